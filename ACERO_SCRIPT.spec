@@ -6,8 +6,8 @@ a = Analysis(
     ['tkinder.py'],
     pathex=[],
     binaries=[],
-    datas=[('CONVERTIDOR.xlsx', '.'), ('script.py', '.')],
-    hiddenimports=['ezdxf', 'ezdxf.addons', 'shapely', 'shapely.geometry', 'xlwings', 'PIL'],
+    datas=[('CONVERTIDOR.xlsx', '.'), ('script.py', '.'), ('convertidor.py', '.'), ('cache_resultados.py', '.'), ('lector_streaming.py', '.'), ('especificacion_acero.py', '.'), ('huellas_prelosas.py', '.'), ('perfil_etapas.py', '.'), ('progreso_prelosas.py', '.'), ('registro_mensajes.py', '.'), ('sesion_excel.py', '.')],
+    hiddenimports=['ezdxf', 'ezdxf.addons', 'shapely', 'shapely.geometry', 'xlwings', 'openpyxl'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
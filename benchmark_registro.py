@@ -0,0 +1,163 @@
+"""
+Comparación del tiempo de procesamiento según el nivel de los mensajes.
+
+Genera un plano sintético con ezdxf (prelosas de los cuatro tipos, polilíneas
+de acero longitudinal, transversal y adicional con sus textos, bloques con
+atributos de acero y textos que no son de acero) y lo procesa con el motor
+nativo en los niveles silencio, resumen y detalle (registro_mensajes.py).
+
+Por defecto los mensajes se escriben en os.devnull, lo que mide el costo de
+formatearlos; con --consola se escriben en la consola, como al ejecutar
+script.py en Windows. No necesita Excel:
+
+    python benchmark_registro.py --prelosas 3000 --repeticiones 3
+    python benchmark_registro.py --prelosas 1000 --consola 2> tiempos.txt
+
+El resultado (mejor tiempo de cada nivel y relación con silencio) se escribe en
+la salida de errores.
+"""
+#argparse: sirve para leer los argumentos de la línea de comandos
+import argparse
+#contextlib: redirige los mensajes del procesamiento
+import contextlib
+#os: sirve para interactuar con el sistema operativo
+import os
+#random: sirve para generar un plano reproducible
+import random
+#sys: salida de errores para el resultado
+import sys
+#tempfile: carpeta para el plano sintético y las salidas
+import tempfile
+#time: sirve para medir cada procesamiento
+import time
+
+#ezdxf: sirve para escribir el plano sintético
+import ezdxf
+
+#script: procesamiento de prelosas
+from script import procesar_prelosas_con_bloques
+#registro_mensajes: niveles de los mensajes
+from registro_mensajes import configurar_registro, NIVELES
+
+# Tipos de prelosa y textos de acero del plano sintético
+TIPOS_PRELOSA = ["PRELOSA MACIZA", "PRELOSA MACIZA 15", "PRELOSA ALIGERADA 20", "PRELOSA ALIGERADA 20 - 2 SENT"]
+TEXTOS_ACERO = ['1%%C3/8"@.20', '1%%C1/2"@.25', '\\A1;1%%C8mm@.175', '1Ø6mm@.15', '#3@20', 'M8@.30',
+                '2%%C3/8"@.40', '1%%C3/8"', '1Ø 8 mm@.175(Inf.)']
+
+
+# Función para agregar un rectángulo cerrado en una capa
+def _rectangulo(msp, x, y, ancho, alto, capa):
+    msp.add_lwpolyline([(x, y), (x + ancho, y), (x + ancho, y + alto), (x, y + alto)], close=True,
+                       dxfattribs={'layer': capa})
+
+
+# Función para generar el plano sintético
+def generar_plano_sintetico(ruta, prelosas, semilla=1):
+    aleatorio = random.Random(semilla)
+    doc = ezdxf.new('R2018')
+    for capa in TIPOS_PRELOSA + ["ACERO LONGITUDINAL", "ACERO TRANSVERSAL", "ACERO LONG ADI", "ACERO TRA ADI",
+                                 "BD-ACERO POSITIVO", "TEXTOS"]:
+        doc.layers.add(capa)
+
+    # Bloque de referencia con los atributos del resultado y bloque de etiqueta de acero
+    bloque = doc.blocks.new('BD-ACERO PRELOSA')
+    bloque.add_line((0, 0), (1, 0))
+    for i, etiqueta in enumerate(['AS_LONG', 'AS_TRA1', 'AS_TRA2']):
+        bloque.add_attdef(etiqueta, insert=(0, -0.3 * i), dxfattribs={'height': 0.1})
+    etiqueta_acero = doc.blocks.new('TAG ACERO')
+    etiqueta_acero.add_text('1%%C1/2"@.30', dxfattribs={'height': 0.1})
+    etiqueta_acero.add_attdef('ACERO', insert=(0, 0.2))
+
+    msp = doc.modelspace()
+    referencia = msp.add_blockref('BD-ACERO PRELOSA', (-100, -100),
+                                  dxfattribs={'layer': 'BD-ACERO POSITIVO', 'xscale': 2, 'yscale': 2})
+    referencia.add_auto_attribs({'AS_LONG': 'x', 'AS_TRA1': 'y', 'AS_TRA2': 'z'})
+
+    for i in range(prelosas):
+        x = (i % 50) * 20
+        y = (i // 50) * 20
+        ancho = aleatorio.choice([8, 12, 15])
+        alto = aleatorio.choice([6, 10, 14])
+        _rectangulo(msp, x, y, ancho, alto, aleatorio.choice(TIPOS_PRELOSA))
+        if aleatorio.random() < 0.8:
+            _rectangulo(msp, x + 1, y + 1, ancho - 2, 1.5, 'ACERO LONGITUDINAL')
+            msp.add_text(aleatorio.choice(TEXTOS_ACERO), dxfattribs={'insert': (x + 2, y + 1.5), 'layer': 'TEXTOS'})
+            if aleatorio.random() < 0.3:
+                msp.add_mtext(aleatorio.choice(TEXTOS_ACERO), dxfattribs={'insert': (x + 5, y + 1.8), 'layer': 'TEXTOS'})
+        if aleatorio.random() < 0.6:
+            _rectangulo(msp, x + 1, y + 3, 1.5, alto - 4, 'ACERO TRANSVERSAL')
+            msp.add_text(aleatorio.choice(TEXTOS_ACERO), dxfattribs={'insert': (x + 1.5, y + 4), 'layer': 'TEXTOS'})
+        if aleatorio.random() < 0.3:
+            _rectangulo(msp, x + 4, y + 4, 3, 1.2, 'ACERO LONG ADI')
+            msp.add_text(aleatorio.choice(TEXTOS_ACERO), dxfattribs={'insert': (x + 4.5, y + 4.5), 'layer': 'TEXTOS'})
+        if aleatorio.random() < 0.2:
+            _rectangulo(msp, x + 4, y + 6, 1.2, 2, 'ACERO TRA ADI')
+            msp.add_text(aleatorio.choice(TEXTOS_ACERO), dxfattribs={'insert': (x + 4.3, y + 6.5), 'layer': 'TEXTOS'})
+        if aleatorio.random() < 0.2:
+            insercion = msp.add_blockref('TAG ACERO', (x + 3, y + 1.2))
+            insercion.add_attrib('ACERO', '1%%C3/8"@.15', (x + 3, y + 1.4))
+        msp.add_text('VIGA V-101 (30x60)', dxfattribs={'insert': (x + 3, y + alto / 2)})
+    doc.saveas(ruta)
+
+
+# Función para procesar el plano con un nivel de mensajes; devuelve los segundos y las líneas escritas
+def medir_nivel(nivel, ruta_plano, excel_path, ruta_salida, consola=False):
+    configurar_registro(nivel)
+
+    class ContadorLineas:
+        def __init__(self, destino):
+            self.destino = destino
+            self.lineas = 0
+
+        def write(self, texto):
+            self.lineas += texto.count("\n")
+            return self.destino.write(texto)
+
+        def flush(self):
+            self.destino.flush()
+
+    with contextlib.ExitStack() as pila:
+        destino = sys.__stdout__ if consola else pila.enter_context(open(os.devnull, 'w', encoding='utf-8'))
+        salida = ContadorLineas(destino)
+        pila.enter_context(contextlib.redirect_stdout(salida))
+        inicio = time.perf_counter()
+        procesar_prelosas_con_bloques(ruta_plano, excel_path, ruta_salida, ruta_cache=False)
+        segundos = time.perf_counter() - inicio
+    return segundos, salida.lineas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara el tiempo de procesamiento según el nivel de los mensajes")
+    parser.add_argument("--prelosas", type=int, default=3000, help="Prelosas del plano sintético")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Procesamientos por nivel (se usa el mejor)")
+    parser.add_argument("--niveles", default=",".join(NIVELES), help="Niveles separados por comas")
+    parser.add_argument("--consola", action="store_true", help="Escribe los mensajes en la consola")
+    parser.add_argument("--excel", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "CONVERTIDOR.xlsx"),
+                        help="Ruta a CONVERTIDOR.xlsx")
+    args = parser.parse_args(argv)
+    niveles = [nivel.strip() for nivel in args.niveles.split(",") if nivel.strip()]
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta_plano = os.path.join(carpeta, "sintetico.dxf")
+        print(f"Generando plano sintético con {args.prelosas} prelosas...", file=sys.stderr)
+        generar_plano_sintetico(ruta_plano, args.prelosas)
+
+        # Los niveles se alternan en cada repetición para repartir el ruido del sistema
+        mejores = {}
+        lineas = {}
+        for repeticion in range(args.repeticiones):
+            for nivel in niveles:
+                segundos, lineas[nivel] = medir_nivel(nivel, ruta_plano, args.excel,
+                                                      os.path.join(carpeta, f"salida_{nivel}.dxf"), args.consola)
+                mejores[nivel] = min(segundos, mejores.get(nivel, segundos))
+                print(f"  {repeticion + 1}/{args.repeticiones} {nivel}: {segundos:.2f} s", file=sys.stderr)
+
+    base = mejores.get(niveles[0])
+    print(f"\n{'Nivel':<10}{'Segundos':>10}{'Líneas':>10}{'Relación':>10}", file=sys.stderr)
+    for nivel in niveles:
+        print(f"{nivel:<10}{mejores[nivel]:>10.2f}{lineas[nivel]:>10}{mejores[nivel] / base:>9.2f}x", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
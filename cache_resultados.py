@@ -0,0 +1,438 @@
+"""
+Caché de resultados de la hoja Convertidor.
+
+En un plano la mayoría de las prelosas comparten las mismas entradas (tipo de
+prelosa, textos de acero y valores predeterminados), así que los textos
+AS_LONG / AS_TRA1 / AS_TRA2 se guardan por esa clave y se reutilizan sin volver
+a escribir ni recalcular la hoja.
+
+La hoja conserva valores entre prelosas, por lo que cada resultado se guarda
+junto con las celdas de entrada que el cálculo leyó antes de escribirlas
+(dependencias) y las celdas que escribió. Un resultado solo se reutiliza si las
+dependencias tienen los mismos valores en la hoja; al reutilizarlo se aplican
+las escrituras para dejar la hoja igual que si se hubiera calculado.
+
+Además de la caché en memoria hay una caché en disco (SQLite) junto a
+CONVERTIDOR.xlsx (en el ejecutable, en la carpeta de datos del usuario) que se
+comparte entre ejecuciones. Sus claves incluyen la huella (SHA-256) de lo que
+define el cálculo del libro (fórmulas, constantes y tabla de áreas), así que
+editarlo invalida los resultados anteriores, pero guardar el libro después de
+un cálculo con Excel no; VERSION_CALCULO se incrementa al cambiar la lógica de
+script.py.
+Para revisarla o podarla:
+
+    python cache_resultados.py info
+    python cache_resultados.py podar --max-entradas 10000 --dias 90
+"""
+#argparse: sirve para leer los argumentos de la línea de comandos
+import argparse
+#collections: OrderedDict mantiene el orden de uso para descartar la clave menos reciente (LRU)
+from collections import OrderedDict
+#hashlib: sirve para calcular la huella del libro y de las claves
+import hashlib
+#json: sirve para guardar claves y resultados en la caché en disco
+import json
+#os: sirve para interactuar con el sistema operativo
+import os
+#sqlite3: base de datos en un archivo para la caché en disco
+import sqlite3
+#sys: código de salida
+import sys
+#time: sirve para registrar cuándo se creó y usó cada entrada
+import time
+
+#convertidor: celdas del libro que definen el cálculo (huella del libro)
+from convertidor import celdas_de_calculo
+#registro_mensajes: mensajes por nivel y categoría
+from registro_mensajes import consola, EXCEL
+
+# Número máximo de claves distintas guardadas en memoria
+TAMANO_MAXIMO = 256
+# Número máximo de variantes (estados de la hoja) por clave
+VARIANTES_POR_CLAVE = 8
+# Número máximo de entradas en la caché en disco
+MAX_ENTRADAS_DISCO = 50000
+# Sufijo del archivo de caché en disco (junto al libro)
+SUFIJO_CACHE = "_cache.sqlite"
+# Carpeta de la caché en los datos del usuario (en el ejecutable el libro está en una carpeta temporal)
+CARPETA_DATOS = "ACERO_SCRIPT"
+# Versión de la lógica de cálculo (incrementar si cambian los resultados para las mismas entradas)
+VERSION_CALCULO = 2
+
+
+# Función para obtener la ruta predeterminada de la caché en disco
+def ruta_cache_predeterminada(excel_path):
+    if getattr(sys, 'frozen', False):
+        # PyInstaller extrae el libro en una carpeta temporal que se borra al salir
+        base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.cache')
+        directorio = os.path.join(base, CARPETA_DATOS)
+        os.makedirs(directorio, exist_ok=True)
+        return os.path.join(directorio, os.path.splitext(os.path.basename(excel_path))[0] + SUFIJO_CACHE)
+    return os.path.splitext(excel_path)[0] + SUFIJO_CACHE
+
+
+# Función para calcular la huella (SHA-256) del contenido de un archivo
+def huella_archivo(ruta):
+    huella = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(1 << 20), b''):
+            huella.update(bloque)
+    return huella.hexdigest()
+
+
+# Función para calcular la huella de lo que define el cálculo del libro (sin las zonas de entrada)
+def huella_libro(excel_path):
+    """
+    Al guardar el libro después de un cálculo con Excel cambian las zonas de
+    entrada; no se incluyen porque la caché comprueba su valor en la hoja.
+    Sin openpyxl se usa la huella del archivo completo.
+    """
+    celdas = celdas_de_calculo(excel_path)
+    if celdas is None:
+        return huella_archivo(excel_path)
+    return _huella_json(celdas)
+
+
+def _huella_json(valor):
+    texto = json.dumps(valor, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+class CachePersistente:
+    """
+    Caché en disco (SQLite) de resultados, compartida entre ejecuciones.
+
+    Las escrituras se agrupan en una transacción que se confirma al cerrar; al
+    cerrar también se descartan las entradas menos usadas si se supera el tope.
+    """
+
+    def __init__(self, ruta, huella, max_entradas=MAX_ENTRADAS_DISCO):
+        self.ruta = ruta
+        self.huella = huella
+        self.max_entradas = max_entradas
+        self.conexion = sqlite3.connect(ruta, timeout=30)
+        self.conexion.execute("""
+            CREATE TABLE IF NOT EXISTS resultados (
+                huella TEXT NOT NULL,
+                clave TEXT NOT NULL,
+                variante TEXT NOT NULL,
+                clave_json TEXT NOT NULL,
+                dependencias TEXT NOT NULL,
+                escrituras TEXT NOT NULL,
+                resultado TEXT NOT NULL,
+                creado REAL NOT NULL,
+                usado REAL NOT NULL,
+                usos INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (huella, clave, variante)
+            )
+        """)
+        self.conexion.execute("CREATE INDEX IF NOT EXISTS idx_resultados_usado ON resultados (usado)")
+        self.conexion.commit()
+        # Entradas usadas en esta ejecución (se actualizan al cerrar)
+        self.usadas = {}
+
+    # Función para obtener las variantes guardadas de una clave (la más reciente primero)
+    def variantes(self, clave):
+        clave_hash = _huella_json([VERSION_CALCULO, clave])
+        filas = self.conexion.execute(
+            "SELECT variante, dependencias, escrituras, resultado FROM resultados "
+            "WHERE huella = ? AND clave = ? ORDER BY usado DESC",
+            (self.huella, clave_hash)
+        ).fetchall()
+        variantes = []
+        for variante, dependencias, escrituras, resultado in filas:
+            variantes.append((
+                (clave_hash, variante),
+                json.loads(dependencias),
+                json.loads(escrituras),
+                tuple(json.loads(resultado)),
+            ))
+        return variantes
+
+    def marcar_usada(self, identificador):
+        self.usadas[identificador] = self.usadas.get(identificador, 0) + 1
+
+    def guardar(self, clave, dependencias, escrituras, resultado):
+        ahora = time.time()
+        self.conexion.execute(
+            "INSERT OR REPLACE INTO resultados "
+            "(huella, clave, variante, clave_json, dependencias, escrituras, resultado, creado, usado, usos) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)",
+            (self.huella, _huella_json([VERSION_CALCULO, clave]), _huella_json(sorted(dependencias.items())),
+             json.dumps(clave, ensure_ascii=False), json.dumps(dependencias, ensure_ascii=False),
+             json.dumps(escrituras, ensure_ascii=False), json.dumps(resultado, ensure_ascii=False),
+             ahora, ahora)
+        )
+
+    def cerrar(self):
+        ahora = time.time()
+        self.conexion.executemany(
+            "UPDATE resultados SET usado = ?, usos = usos + ? WHERE huella = ? AND clave = ? AND variante = ?",
+            [(ahora, usos, self.huella, clave, variante) for (clave, variante), usos in self.usadas.items()]
+        )
+        self.usadas.clear()
+        podar(self.conexion, max_entradas=self.max_entradas)
+        self.conexion.commit()
+        self.conexion.close()
+
+
+# Función para eliminar entradas antiguas, de otros libros o que superan el tope
+def podar(conexion, max_entradas=None, dias=None, huella_actual=None):
+    """
+    Elimina entradas de la caché en disco.
+
+    Args:
+        conexion: Conexión SQLite abierta
+        max_entradas: Deja solo las entradas usadas más recientemente
+        dias: Elimina las entradas no usadas en ese número de días
+        huella_actual: Elimina las entradas de otras versiones del libro
+
+    Returns:
+        Número de entradas eliminadas
+    """
+    eliminadas = 0
+    if huella_actual is not None:
+        eliminadas += conexion.execute("DELETE FROM resultados WHERE huella != ?", (huella_actual,)).rowcount
+    if dias is not None:
+        limite = time.time() - dias * 86400
+        eliminadas += conexion.execute("DELETE FROM resultados WHERE usado < ?", (limite,)).rowcount
+    if max_entradas is not None:
+        eliminadas += conexion.execute(
+            "DELETE FROM resultados WHERE rowid NOT IN "
+            "(SELECT rowid FROM resultados ORDER BY usado DESC LIMIT ?)",
+            (max_entradas,)
+        ).rowcount
+    return eliminadas
+
+
+class CacheResultados:
+    """Caché LRU de resultados de la hoja con estadísticas de aciertos y fallos."""
+
+    def __init__(self, tamano_maximo=TAMANO_MAXIMO, variantes_por_clave=VARIANTES_POR_CLAVE, persistente=None):
+        self.tamano_maximo = tamano_maximo
+        self.variantes_por_clave = variantes_por_clave
+        self.persistente = persistente
+        # clave -> lista de (dependencias, escrituras, resultado), la más reciente primero
+        self.entradas = OrderedDict()
+        self.aciertos = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        self.descartes = 0
+
+    def __len__(self):
+        return sum(len(variantes) for variantes in self.entradas.values())
+
+    # Función para elegir la primera variante cuyas dependencias coinciden con la hoja
+    @staticmethod
+    def _elegir_variante(dependencias_por_variante, ws):
+        for posicion, dependencias in enumerate(dependencias_por_variante):
+            if all(ws.range(celda).value == valor for celda, valor in dependencias.items()):
+                return posicion
+        return None
+
+    # Función para dejar la hoja como la habría dejado el cálculo
+    @staticmethod
+    def _aplicar_escrituras(ws, escrituras):
+        for celda, valor in escrituras.items():
+            ws.range(celda).value = valor
+
+    # Función para buscar un resultado válido para el estado actual de la hoja
+    def buscar(self, clave, ws):
+        variante = self._buscar_variante(clave, ws)
+        return variante[2] if variante is not None else None
+
+    # Función para buscar la variante (dependencias, escrituras, resultado) válida para la hoja y aplicarla
+    def _buscar_variante(self, clave, ws):
+        variantes = self.entradas.get(clave)
+        if variantes:
+            posicion = self._elegir_variante([variante[0] for variante in variantes], ws)
+            if posicion is not None:
+                # Marcar como usada recientemente
+                self.entradas.move_to_end(clave)
+                if posicion:
+                    variantes.insert(0, variantes.pop(posicion))
+                self._aplicar_escrituras(ws, variantes[0][1])
+                return variantes[0]
+
+        if self.persistente is not None:
+            variantes_disco = self.persistente.variantes(clave)
+            posicion = self._elegir_variante([variante[1] for variante in variantes_disco], ws)
+            if posicion is not None:
+                identificador, dependencias, escrituras, resultado = variantes_disco[posicion]
+                self.persistente.marcar_usada(identificador)
+                self._guardar_en_memoria(clave, dependencias, escrituras, resultado)
+                self._aplicar_escrituras(ws, escrituras)
+                self.aciertos_disco += 1
+                return dependencias, escrituras, resultado
+        return None
+
+    def _guardar_en_memoria(self, clave, dependencias, escrituras, resultado):
+        variantes = self.entradas.setdefault(clave, [])
+        variantes.insert(0, (dependencias, escrituras, resultado))
+        del variantes[self.variantes_por_clave:]
+        self.entradas.move_to_end(clave)
+
+        while len(self.entradas) > self.tamano_maximo:
+            _, descartadas = self.entradas.popitem(last=False)
+            self.descartes += len(descartadas)
+
+    def guardar(self, clave, dependencias, escrituras, resultado):
+        self._guardar_en_memoria(clave, dependencias, escrituras, resultado)
+        if self.persistente is not None:
+            self.persistente.guardar(clave, dependencias, escrituras, resultado)
+
+    def calcular(self, clave, ws, funcion, *args):
+        """
+        Devuelve el resultado guardado para la clave o lo calcula con la función.
+
+        Args:
+            clave: Tupla con las entradas normalizadas de la prelosa
+            ws: Hoja Convertidor (debe permitir registrar sus entradas)
+            funcion: Función que escribe en la hoja, recalcula y devuelve el resultado
+            *args: Argumentos de la función
+
+        Returns:
+            El resultado de la función (guardado o recién calculado)
+        """
+        return self.calcular_registrado(clave, ws, funcion, *args)[0]
+
+    def calcular_registrado(self, clave, ws, funcion, *args):
+        """
+        Igual que calcular(), pero devuelve también las celdas que usó el resultado.
+
+        Returns:
+            tuple: (resultado, dependencias, escrituras); las dependencias y las
+            escrituras son las de la variante reutilizada o las del cálculo nuevo
+        """
+        variante = self._buscar_variante(clave, ws)
+        if variante is not None:
+            self.aciertos += 1
+            consola.detalle(EXCEL, "Resultado recuperado de la caché (sin recalcular la hoja)")
+            dependencias, escrituras, resultado = variante
+            return resultado, dependencias, escrituras
+
+        self.fallos += 1
+        ws.iniciar_registro()
+        try:
+            resultado = funcion(*args)
+        finally:
+            registro = ws.terminar_registro()
+
+        self.guardar(clave, registro.dependencias, registro.escrituras, resultado)
+        return resultado, registro.dependencias, registro.escrituras
+
+    def cerrar(self):
+        if self.persistente is not None:
+            self.persistente.cerrar()
+            self.persistente = None
+
+    def resumen(self):
+        consultas = self.aciertos + self.fallos
+        porcentaje = 100.0 * self.aciertos / consultas if consultas else 0.0
+        return (f"Caché de resultados: {self.aciertos} aciertos ({self.aciertos_disco} desde disco), "
+                f"{self.fallos} fallos ({porcentaje:.1f}% aciertos), {len(self)} entradas, "
+                f"{self.descartes} descartadas")
+
+
+# Función para crear la caché de una ejecución (con caché en disco si es posible)
+def crear_cache(excel_path, ruta_cache=None):
+    """
+    Args:
+        excel_path: Ruta a CONVERTIDOR.xlsx
+        ruta_cache: Archivo SQLite (None: junto al libro, False: solo memoria)
+
+    Returns:
+        CacheResultados
+    """
+    if ruta_cache is False:
+        return CacheResultados()
+    try:
+        if ruta_cache is None:
+            ruta_cache = ruta_cache_predeterminada(excel_path)
+        huella = huella_libro(excel_path)
+        persistente = CachePersistente(ruta_cache, huella)
+        consola.resumen("Caché en disco: {}", ruta_cache)
+    except (OSError, sqlite3.Error) as e:
+        consola.error("No se pudo abrir la caché en disco ({}), se usará solo la caché en memoria", e)
+        persistente = None
+    return CacheResultados(persistente=persistente)
+
+
+def _comando_info(args):
+    conexion = sqlite3.connect(args.cache)
+    try:
+        total, huellas, desde, hasta, usos = conexion.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT huella), MIN(creado), MAX(usado), COALESCE(SUM(usos), 0) FROM resultados"
+        ).fetchone()
+        print(f"Archivo: {args.cache} ({os.path.getsize(args.cache) / 1024:.1f} KB)")
+        print(f"Entradas: {total}")
+        print(f"Versiones del libro: {huellas}")
+        print(f"Reutilizaciones registradas: {usos}")
+        if total:
+            print(f"Entrada más antigua: {time.strftime('%Y-%m-%d %H:%M', time.localtime(desde))}")
+            print(f"Último uso: {time.strftime('%Y-%m-%d %H:%M', time.localtime(hasta))}")
+            print("Entradas por versión del libro:")
+            for huella, cantidad in conexion.execute(
+                    "SELECT huella, COUNT(*) FROM resultados GROUP BY huella ORDER BY MAX(usado) DESC"):
+                print(f"  {huella[:12]}  {cantidad}")
+    finally:
+        conexion.close()
+    return 0
+
+
+def _comando_podar(args):
+    huella_actual = None
+    if args.otros_libros:
+        huella_actual = huella_libro(args.excel)
+    conexion = sqlite3.connect(args.cache)
+    try:
+        eliminadas = podar(conexion, max_entradas=args.max_entradas, dias=args.dias, huella_actual=huella_actual)
+        conexion.commit()
+        conexion.execute("VACUUM")
+    finally:
+        conexion.close()
+    print(f"Entradas eliminadas: {eliminadas}")
+    return 0
+
+
+def _comando_vaciar(args):
+    conexion = sqlite3.connect(args.cache)
+    try:
+        eliminadas = conexion.execute("DELETE FROM resultados").rowcount
+        conexion.commit()
+        conexion.execute("VACUUM")
+    finally:
+        conexion.close()
+    print(f"Entradas eliminadas: {eliminadas}")
+    return 0
+
+
+def main(argv=None):
+    excel_predeterminado = os.path.join(os.path.dirname(os.path.abspath(__file__)), "CONVERTIDOR.xlsx")
+    parser = argparse.ArgumentParser(description="Revisa y poda la caché en disco de resultados del Convertidor")
+    parser.add_argument("--cache", default=ruta_cache_predeterminada(excel_predeterminado),
+                        help="Archivo SQLite de la caché")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    subparsers.add_parser("info", help="Muestra el tamaño y contenido de la caché")
+
+    parser_podar = subparsers.add_parser("podar", help="Elimina entradas antiguas o sobrantes")
+    parser_podar.add_argument("--max-entradas", type=int, help="Deja solo las N entradas usadas más recientemente")
+    parser_podar.add_argument("--dias", type=float, help="Elimina las entradas no usadas en los últimos N días")
+    parser_podar.add_argument("--otros-libros", action="store_true",
+                              help="Elimina las entradas de versiones del libro distintas de --excel")
+    parser_podar.add_argument("--excel", default=excel_predeterminado, help="Ruta a CONVERTIDOR.xlsx")
+
+    subparsers.add_parser("vaciar", help="Elimina todas las entradas")
+
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.cache):
+        print(f"No existe la caché: {args.cache}")
+        return 1
+
+    comandos = {"info": _comando_info, "podar": _comando_podar, "vaciar": _comando_vaciar}
+    return comandos[args.comando](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,759 @@
+"""
+Motor de cálculo nativo para la hoja "Convertidor" de CONVERTIDOR.xlsx.
+
+Reproduce en Python las fórmulas que usa procesar_prelosas_con_bloques:
+    - VLOOKUP de áreas de acero en C4:D11 (C4:D10 para el bloque transversal)
+    - Espaciamiento equivalente en J8..J10 y J17..J19
+    - Redondeo CEILING.MATH/FLOOR.MATH a 0.025 con tope 0.4 (K8..K10) y 0.5 (K17..K19)
+
+Las clases LibroConvertidor / HojaConvertidor imitan la parte de la API de
+xlwings que usa el script (ws.range('G4').value, ws.book.app.calculate(), ...)
+para que el motor nativo y Excel sean intercambiables.
+"""
+#math: sirve para los redondeos CEILING.MATH / FLOOR.MATH
+import math
+#os: sirve para interactuar con el sistema operativo
+import os
+#re: sirve para interpretar direcciones de celdas (G4, K17, ...)
+import re
+#time: sirve para medir las escrituras, lecturas y cálculos (perfil por etapa)
+import time
+
+#perfil_etapas: claves de las etapas de la hoja en el perfil
+from perfil_etapas import ETAPA_EXCEL_ESCRITURAS, ETAPA_EXCEL_CALCULO, ETAPA_EXCEL_LECTURAS
+#registro_mensajes: mensajes por nivel y categoría
+from registro_mensajes import consola
+
+
+# Nombre de la hoja que se reproduce
+NOMBRE_HOJA = "Convertidor"
+
+# Motores de cálculo disponibles
+MOTOR_NATIVO = "nativo"
+MOTOR_EXCEL = "excel"
+
+# Tabla de áreas de acero (C4:D11) tal como está en CONVERTIDOR.xlsx
+AREAS_ACERO = [
+    ("6mm", 0.283),
+    ("8mm", 0.5),
+    ("3/8\"", 0.71),
+    ("12mm", 1.13),
+    ("1/2\"", 1.29),
+    ("5/8\"", 1.99),
+    ("3/4\"", 2.84),
+    (1, 5.1),
+]
+
+# Valores de entrada de la hoja tal como están guardados en CONVERTIDOR.xlsx
+VALORES_INICIALES = {
+    'G4': 1, 'H4': "3/8\"", 'I4': "@", 'J4': 0.2,
+    'H5': "3/8\"", 'I5': "@", 'J5': 0.4,
+    'H6': "3/8\"", 'I6': "@", 'J6': 0.25,
+    'G7': 0, 'H7': "5/8\"", 'I7': "@", 'J7': 0.57,
+    'G8': 1, 'H8': "3/8\"", 'I8': "@",
+    'G9': 1, 'H9': "1/2\"", 'I9': "@",
+    'G10': 1, 'H10': "8mm", 'I10': "@",
+    'G13': -1, 'H13': "6mm", 'I13': "@", 'J13': 0.28,
+    'G14': 1, 'H14': "3/8\"", 'I14': "@", 'J14': 0.2,
+    'H15': "3/8\"", 'I15': "@", 'J15': 0.2,
+    'H16': "3/8\"", 'I16': "@", 'J16': 0.2,
+    'G17': 0, 'H17': "6mm", 'I17': "@",
+    'G18': 1, 'H18': "8mm", 'I18': "@",
+    'G19': 1, 'H19': "3/8\"", 'I19': "@",
+}
+
+# Zonas de entrada que el motor Excel escribe de una sola vez y rango de resultados que lee
+ZONAS_ENTRADA = ('G4:J7', 'G13:J16')
+RANGO_RESULTADOS = 'K8:K20'
+
+# Bloques de la hoja: filas de entrada, filas de resultado, última fila de la tabla de áreas y tope
+BLOQUE_LONGITUDINAL = {'entradas': (4, 5, 6, 7), 'resultados': (8, 9, 10), 'fila_tabla': 11, 'tope': 0.4}
+BLOQUE_TRANSVERSAL = {'entradas': (13, 14, 15, 16), 'resultados': (17, 18, 19), 'fila_tabla': 10, 'tope': 0.5}
+
+# Celdas de entrada de las fórmulas (cantidad, diámetro y espaciamiento); las vacías también son dependencias
+CELDAS_ENTRADA = tuple(f'{columna}{fila}' for bloque in (BLOQUE_LONGITUDINAL, BLOQUE_TRANSVERSAL)
+                       for fila in bloque['entradas'] for columna in "GHJ")
+
+# Paso de redondeo de la columna K
+PASO_REDONDEO = 0.025
+
+_PATRON_CELDA = re.compile(r'^\$?([A-Z]+)\$?(\d+)$')
+
+
+class ErrorCelda(Exception):
+    """Error de fórmula de Excel (#N/A, #DIV/0!, #VALUE!)."""
+
+    def __init__(self, codigo):
+        super().__init__(codigo)
+        self.codigo = codigo
+
+
+# Función para normalizar un valor escrito en una celda como lo haría Excel
+def normalizar_valor_celda(valor):
+    """
+    Los números se guardan como float y los textos numéricos se convierten
+    a número (Excel interpreta "0.20" igual que 0.2 al asignar Range.Value).
+    """
+    if valor is None:
+        return None
+    if isinstance(valor, bool):
+        return valor
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    if isinstance(valor, str):
+        texto = valor.strip()
+        if texto == "":
+            return None
+        try:
+            return float(texto)
+        except ValueError:
+            return valor
+    return valor
+
+
+# Función para leer un número de una celda con la semántica de Excel (vacío = 0)
+def _numero(valor):
+    if valor is None:
+        return 0.0
+    if isinstance(valor, ErrorCelda):
+        raise valor
+    if isinstance(valor, bool):
+        return 1.0 if valor else 0.0
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    raise ErrorCelda("#VALUE!")
+
+
+# Función para dividir como Excel
+def _dividir(numerador, denominador):
+    if denominador == 0:
+        raise ErrorCelda("#DIV/0!")
+    return numerador / denominador
+
+
+# Función para aproximar el cociente a 15 cifras significativas (precisión de Excel)
+def _cociente_excel(numero, significancia):
+    cociente = numero / significancia
+    return float(f"{cociente:.15g}")
+
+
+def ceiling_math(numero, significancia=1.0):
+    """CEILING.MATH(numero, significancia) con el modo por defecto de Excel."""
+    if significancia == 0 or numero == 0:
+        return 0.0
+    significancia = abs(significancia)
+    return math.ceil(_cociente_excel(numero, significancia)) * significancia
+
+
+def floor_math(numero, significancia=1.0):
+    """FLOOR.MATH(numero, significancia) con el modo por defecto de Excel."""
+    if significancia == 0 or numero == 0:
+        return 0.0
+    significancia = abs(significancia)
+    return math.floor(_cociente_excel(numero, significancia)) * significancia
+
+
+# Función para redondear el espaciamiento (fórmula de la columna K)
+def redondear_espaciamiento(espaciamiento, tope, paso=PASO_REDONDEO):
+    """
+    Reproduce:
+        IF(IF(ABS(J-CEILING.MATH(J,0.025))>0, FLOOR.MATH(J,0.025), CEILING.MATH(J,0.025))>tope,
+           tope, ...)
+    """
+    techo = ceiling_math(espaciamiento, paso)
+    if abs(espaciamiento - techo) > 0:
+        redondeado = floor_math(espaciamiento, paso)
+    else:
+        redondeado = techo
+    return tope if redondeado > tope else redondeado
+
+
+# Función para convertir una dirección tipo "K17" en (columna, fila)
+def separar_direccion(direccion):
+    coincidencia = _PATRON_CELDA.match(direccion.strip().upper())
+    if not coincidencia:
+        raise ValueError(f"Dirección de celda no soportada: {direccion}")
+    return coincidencia.group(1), int(coincidencia.group(2))
+
+
+class RegistroEntradas:
+    """
+    Celdas que usa un cálculo de la hoja, para la caché de resultados.
+
+    dependencias: celdas de entrada leídas (directamente o a través de una
+    fórmula) antes de que el cálculo las escribiera, con su valor inicial.
+    escrituras: valor final de cada celda escrita por el cálculo.
+    """
+
+    def __init__(self):
+        self.escritas = set()
+        self.dependencias = {}
+        self.escrituras = {}
+        self.entradas_completas = False
+        self.calculado = False
+
+    def anotar_escritura(self, direccion):
+        self.escritas.add(direccion)
+
+    def anotar_entrada(self, direccion, valor):
+        if direccion not in self.escritas:
+            self.dependencias.setdefault(direccion, valor)
+
+    # Una fórmula depende de todas las entradas aún no escritas; las siguientes
+    # lecturas no añaden nada porque el conjunto de celdas sin escribir solo se reduce
+    def anotar_entradas(self, celdas):
+        if self.entradas_completas:
+            return
+        for direccion, valor in celdas:
+            self.anotar_entrada(direccion, valor)
+        self.entradas_completas = True
+
+
+class HojaConvertidor:
+    """
+    Hoja "Convertidor" evaluada en Python.
+
+    Guarda el estado de las celdas igual que Excel: lo que no se sobrescribe
+    entre prelosas se mantiene. Las fórmulas se evalúan al leerlas, por lo que
+    siempre están actualizadas (equivalente al cálculo automático).
+    """
+
+    def __init__(self, valores=None, areas=None, libro=None):
+        self.name = NOMBRE_HOJA
+        self.book = libro
+        # El motor nativo no hace llamadas COM (se mantiene por compatibilidad con el resumen)
+        self.llamadas_com = 0
+        # Registro de entradas para la caché de resultados (None si no se registra)
+        self.registro = None
+        # PerfilEtapas que mide escrituras y lecturas (None si no se mide, ver medir_convertidor)
+        self.perfil = None
+        self.valores_iniciales = dict(valores if valores is not None else VALORES_INICIALES)
+        self.areas = list(areas if areas is not None else AREAS_ACERO)
+        self.restablecer()
+
+    # Función para volver al estado del libro recién abierto (valores y fórmulas originales)
+    def restablecer(self):
+        self.celdas = {}
+        for direccion, valor in self.valores_iniciales.items():
+            self.celdas[direccion] = normalizar_valor_celda(valor)
+
+        # Fórmulas de las columnas J y K (se eliminan si se sobrescribe la celda)
+        self.formulas = {}
+        for bloque in (BLOQUE_LONGITUDINAL, BLOQUE_TRANSVERSAL):
+            for fila in bloque['resultados']:
+                self.formulas[f'J{fila}'] = (self._formula_j, bloque, fila)
+                self.formulas[f'K{fila}'] = (self._formula_k, bloque, fila)
+
+    def range(self, direccion):
+        return RangoNativo(self, direccion)
+
+    # Función para buscar el área de un diámetro (VLOOKUP exacto sobre la tabla C:D)
+    def buscar_area(self, clave, fila_tabla):
+        clave = _valor_evaluado(clave)
+        if clave is None:
+            raise ErrorCelda("#N/A")
+        filas_disponibles = fila_tabla - 4 + 1
+        for acero, area in self.areas[:filas_disponibles]:
+            if isinstance(clave, str) and isinstance(acero, str):
+                if clave.casefold() == acero.casefold():
+                    return float(area)
+            elif not isinstance(clave, str) and not isinstance(acero, str):
+                if float(clave) == float(acero):
+                    return float(area)
+        raise ErrorCelda("#N/A")
+
+    # Función para calcular G*VLOOKUP(H)/J de una fila de entrada
+    def _aporte(self, fila, fila_tabla):
+        cantidad = _numero(self.celdas.get(f'G{fila}'))
+        area = self.buscar_area(self.celdas.get(f'H{fila}'), fila_tabla)
+        espaciamiento = _numero(self.celdas.get(f'J{fila}'))
+        return _dividir(cantidad * area, espaciamiento)
+
+    # Fórmula de J8..J10 / J17..J19
+    def _formula_j(self, bloque, fila):
+        fila_tabla = bloque['fila_tabla']
+        cantidad = _numero(self.celdas.get(f'G{fila}'))
+        numerador = cantidad * self.buscar_area(self.celdas.get(f'H{fila}'), fila_tabla)
+
+        primera, *restantes = bloque['entradas']
+        denominador = self._aporte(primera, fila_tabla)
+        for fila_entrada in restantes:
+            try:
+                denominador = denominador + self._aporte(fila_entrada, fila_tabla)
+            except ErrorCelda:
+                # IFERROR(...; 0)
+                denominador = denominador + 0
+        return _dividir(numerador, denominador)
+
+    # Fórmula de K8..K10 / K17..K19
+    def _formula_k(self, bloque, fila):
+        espaciamiento = self.evaluar(f'J{fila}')
+        return redondear_espaciamiento(_numero(espaciamiento), bloque['tope'])
+
+    # Función para evaluar una celda (devuelve ErrorCelda si la fórmula falla)
+    def evaluar(self, direccion):
+        formula = self.formulas.get(direccion)
+        if formula is None:
+            return self.celdas.get(direccion)
+        funcion, bloque, fila = formula
+        try:
+            return funcion(bloque, fila)
+        except ErrorCelda as e:
+            return e
+
+    def leer(self, direccion):
+        """Lee una celda como lo hace xlwings (los errores se devuelven como None)."""
+        columna, fila = separar_direccion(direccion)
+        direccion = f'{columna}{fila}'
+        if self.registro is not None:
+            if direccion in self.formulas:
+                if not self.registro.entradas_completas:
+                    # Las celdas de entrada vacías se anotan con None: escribirlas después cambia el resultado
+                    celdas = dict.fromkeys(CELDAS_ENTRADA)
+                    celdas.update(self.celdas)
+                    self.registro.anotar_entradas(
+                        (celda, valor) for celda, valor in celdas.items() if celda not in self.formulas
+                    )
+            else:
+                self.registro.anotar_entrada(direccion, self.celdas.get(direccion))
+        valor = self.evaluar(direccion)
+        if isinstance(valor, ErrorCelda):
+            return None
+        return valor
+
+    def escribir(self, direccion, valor):
+        columna, fila = separar_direccion(direccion)
+        direccion = f'{columna}{fila}'
+        if self.registro is not None:
+            self.registro.anotar_escritura(direccion)
+        self.formulas.pop(direccion, None)
+        self.celdas[direccion] = normalizar_valor_celda(valor)
+
+    # Funciones para registrar qué entradas usa un cálculo (caché de resultados)
+    def iniciar_registro(self):
+        self.registro = RegistroEntradas()
+
+    def terminar_registro(self):
+        registro, self.registro = self.registro, None
+        registro.escrituras = {celda: self.celdas.get(celda) for celda in registro.escritas}
+        return registro
+
+
+def _valor_evaluado(valor):
+    if isinstance(valor, ErrorCelda):
+        raise valor
+    return valor
+
+
+class RangoNativo:
+    """Equivalente mínimo de xlwings.Range para una sola celda."""
+
+    def __init__(self, hoja, direccion):
+        self.hoja = hoja
+        self.address = direccion
+
+    @property
+    def value(self):
+        perfil = self.hoja.perfil
+        if perfil is None:
+            return self.hoja.leer(self.address)
+        inicio = time.perf_counter()
+        try:
+            return self.hoja.leer(self.address)
+        finally:
+            perfil.agregar(ETAPA_EXCEL_LECTURAS, time.perf_counter() - inicio)
+
+    @value.setter
+    def value(self, valor):
+        perfil = self.hoja.perfil
+        if perfil is None:
+            self.hoja.escribir(self.address, valor)
+            return
+        inicio = time.perf_counter()
+        try:
+            self.hoja.escribir(self.address, valor)
+        finally:
+            perfil.agregar(ETAPA_EXCEL_ESCRITURAS, time.perf_counter() - inicio)
+
+
+class _Hojas:
+    def __init__(self, hoja):
+        self.active = hoja
+
+    def __getitem__(self, clave):
+        if clave in (0, NOMBRE_HOJA):
+            return self.active
+        raise KeyError(clave)
+
+
+class AppNativa:
+    """Sustituto de xlwings.App: el cálculo es inmediato y no hay proceso que cerrar."""
+
+    perfil = None
+
+    def calculate(self):
+        # Las fórmulas se evalúan al leerlas: en el perfil solo se cuenta la llamada
+        if self.perfil is not None:
+            self.perfil.agregar(ETAPA_EXCEL_CALCULO, 0.0)
+
+    def quit(self):
+        pass
+
+
+class LibroConvertidor:
+    """Sustituto de xlwings.Book con la hoja Convertidor evaluada en Python."""
+
+    def __init__(self, excel_path=None):
+        self.fullname = excel_path
+        self.app = AppNativa()
+        valores, areas = cargar_datos_convertidor(excel_path)
+        self.sheets = _Hojas(HojaConvertidor(valores, areas, libro=self))
+
+    def save(self):
+        # El motor nativo no modifica CONVERTIDOR.xlsx
+        pass
+
+    def close(self):
+        pass
+
+
+class HojaExcelPorLotes:
+    """
+    Hoja de Excel (xlwings) que agrupa las escrituras y lecturas.
+
+    Mantiene en memoria una copia de G4:J7 y G13:J16. Las escrituras solo
+    actualizan la copia; al llamar a calculate() se envía cada zona modificada
+    como una matriz, se recalcula y K8:K20 se lee con una sola llamada.
+    Con el cálculo en modo manual esto equivale a las escrituras celda por celda.
+    """
+
+    def __init__(self, hoja_excel, libro=None):
+        self.hoja_excel = hoja_excel
+        self.name = getattr(hoja_excel, 'name', NOMBRE_HOJA)
+        self.book = libro
+        self.llamadas_com = 0
+        self.registro = None
+        self.perfil = None
+
+        # Copia local de las zonas de entrada
+        self.zonas = {}
+        self.celdas = {}
+        self.zonas_modificadas = set()
+        for zona in ZONAS_ENTRADA:
+            inicio, fin = zona.split(':')
+            col_inicio, fila_inicio = separar_direccion(inicio)
+            col_fin, fila_fin = separar_direccion(fin)
+            columnas = [chr(c) for c in range(ord(col_inicio), ord(col_fin) + 1)]
+            filas = list(range(fila_inicio, fila_fin + 1))
+            self.zonas[zona] = (columnas, filas)
+
+            matriz = self._com(lambda: self.hoja_excel.range(zona).value)
+            for i, fila in enumerate(filas):
+                for j, columna in enumerate(columnas):
+                    self.celdas[f'{columna}{fila}'] = matriz[i][j]
+        # Entradas del libro al abrirlo (restablecer() vuelve a ellas)
+        self.celdas_libro = dict(self.celdas)
+
+        # Resultados leídos después del último cálculo
+        self.resultados = None
+        self.calculo_pendiente = True
+        # Últimos valores escritos directamente fuera de las zonas (para no repetirlos)
+        self.escrituras_directas = {}
+        # Valores leídos fuera de las zonas (válidos hasta el siguiente cálculo)
+        self.lecturas_directas = {}
+
+    # Función para volver a las entradas del libro al abrirlo (el siguiente calculate() envía las zonas que cambian)
+    def restablecer(self):
+        self.llamadas_com = 0
+        for direccion, valor in self.celdas_libro.items():
+            if self.celdas[direccion] != valor or type(self.celdas[direccion]) is not type(valor):
+                self.celdas[direccion] = valor
+                self.zonas_modificadas.add(self._zona_de(direccion))
+                self.calculo_pendiente = True
+        self.escrituras_directas.clear()
+        self.lecturas_directas.clear()
+
+    # Función para ejecutar y contar una llamada COM
+    def _com(self, llamada):
+        self.llamadas_com += 1
+        return llamada()
+
+    def range(self, direccion):
+        return RangoPorLotes(self, direccion)
+
+    def _zona_de(self, direccion):
+        columna, fila = separar_direccion(direccion)
+        for zona, (columnas, filas) in self.zonas.items():
+            if columna in columnas and fila in filas:
+                return zona
+        return None
+
+    def leer(self, direccion):
+        columna, fila = separar_direccion(direccion)
+        direccion = f'{columna}{fila}'
+        if direccion in self.celdas:
+            if self.registro is not None:
+                self.registro.anotar_entrada(direccion, self.celdas[direccion])
+            return self.celdas[direccion]
+
+        inicio, fin = RANGO_RESULTADOS.split(':')
+        col_resultados, fila_inicio = separar_direccion(inicio)
+        _, fila_fin = separar_direccion(fin)
+        if columna == col_resultados and fila_inicio <= fila <= fila_fin:
+            if self.resultados is None:
+                self.resultados = self._com(lambda: self.hoja_excel.range(RANGO_RESULTADOS).value)
+            valor = self.resultados[fila - fila_inicio]
+            # Sin recálculo en este cálculo, el valor viene del estado anterior (cálculo manual)
+            if self.registro is not None and not self.registro.calculado:
+                self.registro.anotar_entrada(direccion, valor)
+            return valor
+
+        # Celdas ya escritas o leídas desde el último cálculo: se conoce su valor sin consultar Excel
+        if direccion in self.escrituras_directas:
+            valor = self.escrituras_directas[direccion]
+        elif direccion in self.lecturas_directas:
+            valor = self.lecturas_directas[direccion]
+        else:
+            valor = self._com(lambda: self.hoja_excel.range(direccion).value)
+            self.lecturas_directas[direccion] = valor
+        if self.registro is not None:
+            self.registro.anotar_entrada(direccion, valor)
+        return valor
+
+    def escribir(self, direccion, valor):
+        columna, fila = separar_direccion(direccion)
+        direccion = f'{columna}{fila}'
+        if self.registro is not None:
+            self.registro.anotar_escritura(direccion)
+        zona = self._zona_de(direccion)
+        if zona is not None:
+            if self.celdas.get(direccion) != valor or type(self.celdas.get(direccion)) is not type(valor):
+                self.celdas[direccion] = valor
+                self.zonas_modificadas.add(zona)
+                self.calculo_pendiente = True
+            return
+
+        # Celda fuera de las zonas: se escribe directamente si cambió
+        if direccion in self.escrituras_directas and self.escrituras_directas[direccion] == valor:
+            return
+        self._com(lambda: setattr(self.hoja_excel.range(direccion), 'value', valor))
+        self.escrituras_directas[direccion] = valor
+        self.calculo_pendiente = True
+
+    # Función para enviar a Excel las zonas modificadas (una matriz por zona)
+    def volcar(self):
+        for zona in ZONAS_ENTRADA:
+            if zona not in self.zonas_modificadas:
+                continue
+            columnas, filas = self.zonas[zona]
+            matriz = [[self.celdas[f'{columna}{fila}'] for columna in columnas] for fila in filas]
+            self._com(lambda: setattr(self.hoja_excel.range(zona), 'value', matriz))
+        self.zonas_modificadas.clear()
+
+    def calcular(self, app_excel):
+        if self.registro is not None:
+            self.registro.anotar_entradas(list(self.celdas.items()) + list(self.escrituras_directas.items()))
+            self.registro.calculado = True
+        if not self.calculo_pendiente and self.resultados is not None:
+            return
+        self.volcar()
+        self._com(app_excel.calculate)
+        self.resultados = None
+        self.lecturas_directas.clear()
+        self.calculo_pendiente = False
+
+    # Funciones para registrar qué entradas usa un cálculo (caché de resultados)
+    def iniciar_registro(self):
+        self.registro = RegistroEntradas()
+
+    def terminar_registro(self):
+        registro, self.registro = self.registro, None
+        for celda in registro.escritas:
+            if celda in self.celdas:
+                registro.escrituras[celda] = self.celdas[celda]
+            else:
+                registro.escrituras[celda] = self.escrituras_directas.get(celda)
+        return registro
+
+
+class RangoPorLotes(RangoNativo):
+    """Equivalente mínimo de xlwings.Range sobre HojaExcelPorLotes."""
+
+
+class AppExcelPorLotes:
+    """Envuelve xlwings.App para que calculate() vuelque antes las entradas pendientes."""
+
+    def __init__(self, app_excel, libro):
+        self.app_excel = app_excel
+        self.libro = libro
+        self.perfil = None
+
+    def calculate(self):
+        if self.perfil is None:
+            self.libro.sheets.active.calcular(self.app_excel)
+            return
+        with self.perfil.medir(ETAPA_EXCEL_CALCULO):
+            self.libro.sheets.active.calcular(self.app_excel)
+
+    def quit(self):
+        self.app_excel.quit()
+
+
+class LibroExcelPorLotes:
+    """Envuelve xlwings.Book con la hoja Convertidor en modo por lotes."""
+
+    def __init__(self, app_excel, libro_excel):
+        self.app_excel = app_excel
+        self.libro_excel = libro_excel
+        self.fullname = getattr(libro_excel, 'fullname', None)
+        self.app = AppExcelPorLotes(app_excel, self)
+        hoja = HojaExcelPorLotes(libro_excel.sheets.active, libro=self)
+        self.sheets = _Hojas(hoja)
+
+    def save(self):
+        hoja = self.sheets.active
+        hoja.volcar()
+        # Dejar el libro guardado en cálculo automático
+        hoja._com(lambda: setattr(self.app_excel, 'calculation', 'automatic'))
+        hoja._com(self.libro_excel.save)
+
+    def close(self):
+        self.sheets.active._com(self.libro_excel.close)
+
+
+# Función para leer las entradas y la tabla de áreas desde CONVERTIDOR.xlsx
+def cargar_datos_convertidor(excel_path):
+    """
+    Lee los valores constantes de la hoja Convertidor con openpyxl para que el
+    motor nativo parta del mismo estado que Excel. Si openpyxl no está instalado
+    o el archivo no existe se usan los valores conocidos del libro.
+
+    Returns:
+        tuple: (valores de celdas, tabla de áreas)
+    """
+    if not excel_path or not os.path.exists(excel_path):
+        return dict(VALORES_INICIALES), list(AREAS_ACERO)
+
+    try:
+        import openpyxl
+    except ImportError:
+        return dict(VALORES_INICIALES), list(AREAS_ACERO)
+
+    try:
+        libro = openpyxl.load_workbook(excel_path, data_only=False)
+        hoja = libro[NOMBRE_HOJA] if NOMBRE_HOJA in libro.sheetnames else libro.active
+
+        valores = {}
+        for columna in "GHIJ":
+            for fila in range(4, 20):
+                valor = hoja[f'{columna}{fila}'].value
+                if isinstance(valor, str) and valor.startswith("="):
+                    continue
+                if valor is not None:
+                    valores[f'{columna}{fila}'] = valor
+
+        areas = []
+        for fila in range(4, 12):
+            acero = hoja[f'C{fila}'].value
+            area = hoja[f'D{fila}'].value
+            if acero is None or area is None:
+                continue
+            areas.append((acero, area))
+
+        libro.close()
+        return valores, (areas or list(AREAS_ACERO))
+    except Exception as e:
+        consola.error("No se pudo leer {} con openpyxl ({}). Usando valores por defecto.", excel_path, e)
+        return dict(VALORES_INICIALES), list(AREAS_ACERO)
+
+
+# Función para leer lo que define el cálculo de la hoja: fórmulas, constantes y tabla de áreas (C4:K20)
+def celdas_de_calculo(excel_path):
+    """
+    Lee con openpyxl las celdas de C4:K20 que no son zonas de entrada. Las
+    zonas de entrada cambian al guardar el libro después de un cálculo, pero no
+    forman parte de la huella porque la caché comprueba sus valores en la hoja.
+
+    Returns:
+        list: Pares (celda, valor o fórmula) ordenados, o None si openpyxl no está
+        instalado o el libro no se puede leer
+    """
+    if not excel_path or not os.path.exists(excel_path):
+        return None
+    try:
+        import openpyxl
+    except ImportError:
+        return None
+
+    zonas = []
+    for zona in ZONAS_ENTRADA:
+        inicio, fin = (separar_direccion(celda) for celda in zona.split(':'))
+        zonas.append((inicio, fin))
+
+    def en_zona(columna, fila):
+        return any(inicio[0] <= columna <= fin[0] and inicio[1] <= fila <= fin[1] for inicio, fin in zonas)
+
+    try:
+        libro = openpyxl.load_workbook(excel_path, data_only=False)
+        hoja = libro[NOMBRE_HOJA] if NOMBRE_HOJA in libro.sheetnames else libro.active
+        celdas = []
+        for columna in "CDEFGHIJK":
+            for fila in range(4, 21):
+                if en_zona(columna, fila):
+                    continue
+                valor = hoja[f'{columna}{fila}'].value
+                if valor is not None:
+                    celdas.append((f'{columna}{fila}', valor if isinstance(valor, (int, float, str)) else str(valor)))
+        libro.close()
+        return celdas
+    except Exception as e:
+        consola.error("No se pudo leer {} con openpyxl ({}).", excel_path, e)
+        return None
+
+
+# Función para medir las escrituras, cálculos y lecturas de la hoja en un PerfilEtapas (None: dejar de medir)
+def medir_convertidor(wb, perfil):
+    wb.app.perfil = perfil
+    wb.sheets.active.perfil = perfil
+
+
+# Función para abrir Excel en segundo plano con CONVERTIDOR.xlsx, sin refresco de pantalla y en cálculo manual
+def lanzar_excel(excel_path):
+    """
+    Returns:
+        tuple: (app, libro) de xlwings
+    """
+    import xlwings as xw
+
+    app_excel = xw.App(visible=False)  # Abrir Excel en segundo plano
+    libro_excel = app_excel.books.open(excel_path)  # Abrir el archivo
+
+    # Sin refresco de pantalla y con cálculo manual durante toda la sesión
+    app_excel.screen_updating = False
+    app_excel.calculation = 'manual'
+    return app_excel, libro_excel
+
+
+# Función para abrir el convertidor con el motor seleccionado
+def abrir_convertidor(excel_path, motor=MOTOR_NATIVO):
+    """
+    Abre la hoja de cálculo de aceros.
+
+    Args:
+        excel_path: Ruta a CONVERTIDOR.xlsx
+        motor: "nativo" (Python, sin Excel) o "excel" (xlwings)
+
+    Returns:
+        tuple: (app, wb, ws) con la misma interfaz en ambos motores
+    """
+    if motor == MOTOR_EXCEL:
+        app_excel, libro_excel = lanzar_excel(excel_path)
+        wb = LibroExcelPorLotes(app_excel, libro_excel)
+        wb.sheets.active.llamadas_com += 3  # books.open, screen_updating y calculation
+        return wb.app, wb, wb.sheets.active
+
+    if motor != MOTOR_NATIVO:
+        raise ValueError(f"Motor de cálculo desconocido: {motor}")
+
+    wb = LibroConvertidor(excel_path)
+    return wb.app, wb, wb.sheets.active
@@ -0,0 +1,379 @@
+"""
+Gramática de las especificaciones de acero de los planos de prelosas.
+
+Reconoce textos como 1Ø3/8"@.20, 1∅8 mm@.175(Inf.), #3@20 o M6. Los patrones se
+compilan una sola vez al importar el módulo y analizar_especificacion() revisa
+cada texto una sola vez: devuelve una EspecificacionAcero con la cantidad, la
+notación (M6, #3...), los fragmentos de diámetro y el espaciamiento que
+encontró. Las reglas de cada tipo de prelosa (diametro_maciza,
+diametro_aligerada) deciden el diámetro a partir de ese resultado sin volver a
+buscar en el texto, con las mismas prioridades que las funciones anteriores.
+
+Un plano repite unos pocos textos miles de veces, así que CacheEspecificaciones
+guarda (con tamaño máximo) el texto normalizado de cada texto crudo y la
+especificación de cada texto normalizado durante una ejecución.
+
+Para medir el rendimiento con textos de prueba:
+
+    python especificacion_acero.py --textos 100000
+"""
+#argparse: sirve para leer los argumentos de la línea de comandos
+import argparse
+#collections: OrderedDict mantiene el orden de uso para descartar la clave menos reciente (LRU)
+from collections import OrderedDict
+#random: sirve para generar los textos de prueba del benchmark
+import random
+#re: sirve para trabajar con expresiones regulares
+import re
+#sys: código de salida
+import sys
+#time: sirve para medir el tiempo del benchmark
+import time
+
+# Notaciones alternativas de diámetros y su equivalente
+CONVERSION_DIAMETROS = {
+    "M6": "6mm",
+    "M8": "8mm",
+    "#3": "3/8\"",
+    "#4": "1/2\"",
+    "#5": "5/8\""
+}
+
+# Número máximo de textos distintos guardados en cada caché de CacheEspecificaciones
+TAMANO_CACHE = 4096
+
+# Normalización de textos
+PATRON_CODIGO_FORMATO = re.compile(r'\\[A-Za-z0-9]+;')
+PATRON_MM_SIN_ESPACIO = re.compile(r'(\d+)Ø(\d+)mm')
+# Formato DXF como {\W0.8;texto}
+PATRON_FORMATO_DXF = re.compile(r'\{.*?;(.*?)\}')
+
+# Fragmentos de la especificación
+PATRON_CANTIDAD = re.compile(r'(\d+)∅')
+PATRON_NOTACION_CON_SEPARACION = re.compile(r'(M\d+|#\d+)[@,.]?\d+')
+PATRON_NOTACION = re.compile(r'(M\d+|#\d+)')
+PATRON_PREFIJO_MM = re.compile(r'\d+Ø\s*(\d+)\s*mm')
+PATRON_PREFIJO_PULGADAS = re.compile(r'\d+∅([\d/]+\")')
+PATRON_PULGADAS = re.compile(r'\d+Ø([\d/]+\")')
+PATRON_MM = re.compile(r'∅?\s*(\d+)\s*(?:mm\.?|\.?mm)', re.IGNORECASE)
+PATRON_NUMERO = re.compile(r'∅?([\d/]+)')
+PATRON_ESPACIAMIENTO = re.compile(r'@[.,]?(\d+)')
+
+# Cualquiera de estos fragmentos hace válido un texto de acero: símbolo de
+# diámetro, #3, M6, @.20, 3/8" o 8 mm
+PATRON_VALIDO = re.compile(r'[Ø∅]|#\d|M\d|@[.,]?\d|[\d/]"|\d\s*mm')
+
+# Fragmentos de textos partidos en varias entidades
+PATRON_SIMBOLO_ESPECIAL = re.compile(r'\\f.*Symbol.*[Ø∅]')
+PATRON_SOLO_NUMERO = re.compile(r'\d+$')
+PATRON_MEDIDA_PULGADAS = re.compile(r'[\d/]+"')
+PATRON_MEDIDA_MM = re.compile(r'\d+\s*mm')
+
+
+# Función para reemplazar caracteres especiales
+def reemplazar_caracteres_especiales(texto):
+    texto = texto.replace("%%C", "∅")
+    texto = texto.replace("\\A1;", "")  # Eliminar \A1; que aparece en algunos textos
+    texto = PATRON_CODIGO_FORMATO.sub('', texto)
+    return texto
+
+# Función para normalizar un texto de acero (caracteres especiales, comillas y mm)
+def validar_formato_texto(texto):
+    if texto is None:
+        return ""
+    # Reemplazar caracteres especiales básicos
+    texto = reemplazar_caracteres_especiales(texto)
+
+    # Cambiar comillas simples '' por comillas rectas "
+    texto = texto.replace("''", '"')
+
+    # Validación de diámetro con unidades (Ej: 1Ø8mm@.20)
+    # Agregar espacio entre número y unidad si no existe
+    texto = PATRON_MM_SIN_ESPACIO.sub(r'\1Ø \2 mm', texto)
+
+    # Validación de comillas
+    # Asegurar que las comillas sean rectas " en lugar de curvas
+    texto = texto.replace('"', '"').replace('"', '"')
+
+    return texto
+
+# Función para quitar el formato DXF (como {\W0.8;texto}) de un texto
+def limpiar_formato_dxf(texto):
+    formato_match = PATRON_FORMATO_DXF.search(texto)
+    if formato_match:
+        return formato_match.group(1)
+    return texto
+
+# Función para convertir diámetros alternativos al formato correcto
+def convertir_diametro(diametro_texto):
+    return CONVERSION_DIAMETROS.get(diametro_texto, diametro_texto)
+
+# Función para verificar si el texto tiene un formato válido para especificación de acero
+def es_formato_acero_valido(texto):
+    if not texto:
+        return False
+    return PATRON_VALIDO.search(texto) is not None
+
+# Función para identificar si un texto es un número, símbolo de diámetro o medida
+def clasificar_fragmento(texto):
+    texto = texto.strip()
+    # Es un formato especial de símbolo de diámetro
+    if PATRON_SIMBOLO_ESPECIAL.search(texto):
+        return "SIMBOLO_ESPECIAL"
+    # Es un número solo
+    elif PATRON_SOLO_NUMERO.match(texto):
+        return "NUMERO"
+    # Es un símbolo de diámetro solo
+    elif texto in ["Ø", "∅"]:
+        return "SIMBOLO"
+    # Es una medida (con pulgadas o mm)
+    elif PATRON_MEDIDA_PULGADAS.match(texto) or PATRON_MEDIDA_MM.match(texto) or "(Inf.)" in texto:
+        return "MEDIDA"
+    # Es una notación completa con (Inf.)
+    elif "Inf" in texto and ("3/8" in texto or "1/2" in texto):
+        return "MEDIDA_COMPLETA"
+    # No es ninguno de los anteriores
+    return "OTRO"
+
+
+class EspecificacionAcero:
+    """
+    Resultado del análisis de un texto de acero.
+
+    Los fragmentos que no aparecen en el texto quedan en None. cantidad,
+    espaciamiento y los diámetros se guardan como texto, tal como se leen.
+    """
+
+    __slots__ = ("texto", "texto_limpio", "cantidad", "notacion", "prefijo_mm",
+                 "prefijo_pulgadas", "pulgadas", "diametro_mm", "numero",
+                 "espaciamiento", "menciona_mm", "valido")
+
+    def __init__(self, texto):
+        self.texto = texto
+        # Validez del texto completo, como lo revisa la búsqueda de textos
+        self.valido = es_formato_acero_valido(texto)
+
+        texto_limpio = limpiar_formato_dxf(texto)
+        self.texto_limpio = texto_limpio
+
+        # Número antes de ∅ al inicio (1∅3/8")
+        match = PATRON_CANTIDAD.match(texto_limpio) if "∅" in texto_limpio else None
+        self.cantidad = match.group(1) if match else None
+
+        # Notación directa (M6, #3...), prefiriendo la que va seguida del espaciamiento
+        self.notacion = None
+        if '#' in texto_limpio or 'M' in texto_limpio:
+            match = (PATRON_NOTACION_CON_SEPARACION.search(texto_limpio)
+                     or PATRON_NOTACION.search(texto_limpio))
+            if match:
+                self.notacion = match.group(1)
+
+        # Diámetros escritos con Ø o ∅ al inicio del texto (1Ø 8 mm, 1∅3/8", 1Ø1/2")
+        self.prefijo_mm = None
+        self.pulgadas = None
+        if "Ø" in texto_limpio:
+            match = PATRON_PREFIJO_MM.match(texto_limpio)
+            self.prefijo_mm = match.group(1) if match else None
+            match = PATRON_PULGADAS.search(texto_limpio)
+            self.pulgadas = match.group(1) if match else None
+        self.prefijo_pulgadas = None
+        if "∅" in texto_limpio:
+            match = PATRON_PREFIJO_PULGADAS.match(texto_limpio)
+            self.prefijo_pulgadas = match.group(1) if match else None
+
+        # Diámetro en milímetros (8mm, 8 mm., ∅ 6mm)
+        self.menciona_mm = "mm" in texto_limpio.lower()
+        self.diametro_mm = None
+        if self.menciona_mm:
+            match = PATRON_MM.search(texto_limpio)
+            self.diametro_mm = match.group(1) if match else None
+
+        # Primer número o fracción del texto
+        match = PATRON_NUMERO.search(texto_limpio)
+        self.numero = match.group(1) if match else None
+
+        # Espaciamiento (@20, @.20, @,20)
+        self.espaciamiento = None
+        if "@" in texto_limpio:
+            match = PATRON_ESPACIAMIENTO.search(texto_limpio)
+            self.espaciamiento = match.group(1) if match else None
+
+    @property
+    def diametro(self):
+        return diametro_aligerada(self)
+
+    def __repr__(self):
+        return (f"EspecificacionAcero({self.texto!r}, cantidad={self.cantidad!r}, "
+                f"diametro={self.diametro!r}, notacion={self.notacion!r}, "
+                f"espaciamiento={self.espaciamiento!r}, valido={self.valido})")
+
+
+# Función para analizar un texto de acero
+def analizar_especificacion(texto):
+    return EspecificacionAcero(texto)
+
+# Función para obtener el diámetro con las reglas de las prelosas macizas
+def diametro_maciza(especificacion):
+    # Notación directa (M6, #3, etc.)
+    if especificacion.notacion is not None:
+        return convertir_diametro(especificacion.notacion)
+
+    diametro = None
+    numero = especificacion.numero
+    # Caso específico para milímetros
+    if especificacion.menciona_mm:
+        if especificacion.diametro_mm is not None:
+            diametro = f"{especificacion.diametro_mm}mm"
+    # Caso para fraccionales
+    elif numero is not None:
+        diametro = f"{numero}\"" if "/" in numero else numero
+
+    # Si no se pudo extraer con ningún formato específico, usar el número
+    if diametro is None and numero is not None:
+        diametro = f"{numero}mm" if especificacion.menciona_mm else numero
+    return diametro
+
+# Función para obtener el diámetro con las reglas de las prelosas aligeradas (1 y 2 sentidos)
+def diametro_aligerada(especificacion):
+    # Casos específicos como '1Ø 8 mm@.175(Inf.)', '1∅3/8"@.225(Inf.)' o '1Ø3/8"'
+    if especificacion.prefijo_mm is not None:
+        return f"{especificacion.prefijo_mm}mm"
+    if especificacion.prefijo_pulgadas is not None:
+        return especificacion.prefijo_pulgadas
+    if especificacion.pulgadas is not None:
+        return especificacion.pulgadas
+
+    # Notación directa (M6, #3, etc.)
+    if especificacion.notacion is not None:
+        return convertir_diametro(especificacion.notacion)
+
+    # Milímetros con posible espacio entre número y 'mm'
+    if especificacion.diametro_mm is not None:
+        return f"{especificacion.diametro_mm}mm"
+
+    # Caso para fraccionales
+    numero = especificacion.numero
+    if numero is not None:
+        if especificacion.menciona_mm and "/" not in numero:
+            return f"{numero}mm"
+        elif "/" in numero:
+            return f"{numero}\""
+        return numero
+
+    return None  # No se pudo extraer diámetro
+
+
+class CacheEspecificaciones:
+    """
+    Cachés LRU de textos normalizados y de especificaciones analizadas.
+
+    Las especificaciones se comparten entre todas las prelosas que usan el mismo
+    texto, por lo que no deben modificarse.
+    """
+
+    def __init__(self, tamano_maximo=TAMANO_CACHE):
+        self.tamano_maximo = tamano_maximo
+        # texto crudo -> texto normalizado
+        self.normalizados = OrderedDict()
+        # texto normalizado -> EspecificacionAcero
+        self.especificaciones = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        self.descartes = 0
+
+    def __len__(self):
+        return len(self.normalizados) + len(self.especificaciones)
+
+    # Función para buscar el valor de un texto o calcularlo y guardarlo
+    def _obtener(self, entradas, texto, funcion):
+        try:
+            valor = entradas[texto]
+        except KeyError:
+            self.fallos += 1
+            valor = funcion(texto)
+            entradas[texto] = valor
+            if len(entradas) > self.tamano_maximo:
+                entradas.popitem(last=False)
+                self.descartes += 1
+            return valor
+        self.aciertos += 1
+        entradas.move_to_end(texto)
+        return valor
+
+    # Función para normalizar un texto crudo del plano (validar_formato_texto)
+    def normalizar(self, texto):
+        if texto is None:
+            return ""
+        return self._obtener(self.normalizados, texto, validar_formato_texto)
+
+    # Función para analizar un texto de acero (analizar_especificacion)
+    def analizar(self, texto):
+        return self._obtener(self.especificaciones, texto, EspecificacionAcero)
+
+    def resumen(self):
+        consultas = self.aciertos + self.fallos
+        porcentaje = 100.0 * self.aciertos / consultas if consultas else 0.0
+        return (f"Caché de textos de acero: {self.aciertos} aciertos, {self.fallos} fallos "
+                f"({porcentaje:.1f}% aciertos), {len(self)} entradas, {self.descartes} descartadas")
+
+
+# Función para generar textos de acero de prueba
+def generar_textos(cantidad, semilla=0):
+    generador = random.Random(semilla)
+    diametros = ['3/8"', '1/2"', '5/8"', '8 mm', '6mm', '8mm']
+    notaciones = list(CONVERSION_DIAMETROS)
+    textos = []
+    for _ in range(cantidad):
+        espaciamiento = generador.choice(["@.20", "@.175", "@20", "@,25", "@.605", ""])
+        sufijo = generador.choice(["", "", "(Inf.)", " (Sup.)"])
+        forma = generador.random()
+        if forma < 0.55:
+            simbolo = generador.choice(["Ø", "∅"])
+            texto = f"{generador.randint(1, 3)}{simbolo}{generador.choice(diametros)}{espaciamiento}{sufijo}"
+        elif forma < 0.7:
+            texto = f"{generador.choice(notaciones)}{espaciamiento}"
+        elif forma < 0.8:
+            texto = f"{{\\W0.8;1∅{generador.choice(diametros)}{espaciamiento}}}"
+        elif forma < 0.9:
+            texto = generador.choice(["Ø", "1", '3/8"', "8 mm", "(Inf.)"])
+        else:
+            texto = generador.choice(["PRELOSA P-1", "EJE A", "VER DETALLE", "NPT +3.20", "L=4.50"])
+        textos.append(texto)
+    return textos
+
+# Función para medir cuántos textos por segundo se analizan
+def medir_rendimiento(cantidad_textos, semilla=0, repeticiones=3):
+    textos = generar_textos(cantidad_textos, semilla)
+    print(f"Textos de prueba: {len(textos)} ({len(set(textos))} distintos)")
+
+    mediciones = [
+        ("es_formato_acero_valido", lambda texto: es_formato_acero_valido(texto)),
+        ("clasificar_fragmento", lambda texto: clasificar_fragmento(texto)),
+        ("analizar_especificacion", lambda texto: analizar_especificacion(texto)),
+        ("analizar + diametro_maciza", lambda texto: diametro_maciza(analizar_especificacion(texto))),
+        ("analizar + diametro_aligerada", lambda texto: diametro_aligerada(analizar_especificacion(texto))),
+        ("CacheEspecificaciones.analizar", CacheEspecificaciones().analizar),
+    ]
+    for nombre, funcion in mediciones:
+        mejor = None
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            for texto in textos:
+                funcion(texto)
+            duracion = time.perf_counter() - inicio
+            mejor = duracion if mejor is None else min(mejor, duracion)
+        print(f"{nombre:<32} {mejor:8.3f} s  {len(textos) / mejor:12,.0f} textos/s")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide el rendimiento del análisis de textos de acero")
+    parser.add_argument("--textos", type=int, default=100000, help="Cantidad de textos de prueba")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla del generador aleatorio")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Se informa la mejor de N repeticiones")
+    args = parser.parse_args(argv)
+    return medir_rendimiento(args.textos, args.semilla, args.repeticiones)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Reprocesamiento incremental de un plano.
+
+Cada prelosa tiene una huella (SHA-256) de sus vértices, de las polilíneas de
+acero que contiene y de los textos de acero de cada tipo. Al terminar un plano
+se guarda junto al DXF de salida un archivo <salida>_huellas.json con la huella
+de cada prelosa, el bloque BD-ACERO PRELOSA que se le insertó (centro, escala,
+rotación y atributos) y las celdas de la hoja Convertidor que usó su cálculo
+(dependencias con su valor inicial y valor final de las celdas escritas).
+
+En la siguiente ejecución con la misma salida, las prelosas con una huella ya
+guardada y cuyas dependencias tienen los mismos valores en la hoja reutilizan
+su bloque sin recalcular; sus escrituras se aplican a la hoja para que las
+prelosas siguientes la encuentren igual que en un proceso completo. Solo las
+prelosas nuevas o modificadas se calculan. El archivo también guarda una huella
+del contexto (fórmulas, constantes y tabla de áreas del libro, valores
+predeterminados, bloque de referencia y versión del cálculo): si cambia, se
+recalculan todas las prelosas. Las zonas de entrada que Excel deja guardadas
+en el libro no forman parte del contexto porque se comprueban como
+dependencias de cada prelosa.
+"""
+#hashlib: sirve para calcular las huellas de las prelosas y del contexto
+import hashlib
+#json: formato del archivo de huellas
+import json
+#os: sirve para interactuar con el sistema operativo
+import os
+
+#numpy: los vértices se agregan a la huella como arreglos float64
+import numpy as np
+
+#cache_resultados: huella del cálculo del libro y versión de la lógica de cálculo
+from cache_resultados import huella_libro, VERSION_CALCULO
+#registro_mensajes: mensajes por nivel y categoría
+from registro_mensajes import consola
+
+# Versión del formato del archivo de huellas
+VERSION_HUELLAS = 2
+# Sufijo del archivo de huellas (junto al DXF de salida)
+SUFIJO_HUELLAS = "_huellas.json"
+
+
+# Función para obtener la ruta del archivo de huellas de un DXF de salida
+def ruta_huellas(output_dxf_path):
+    return os.path.splitext(output_dxf_path)[0] + SUFIJO_HUELLAS
+
+
+# Función para calcular la huella de una prelosa
+def huella_prelosa(tipo_prelosa, vertices, polilineas, textos_por_tipo):
+    """
+    Args:
+        tipo_prelosa: Capa de la prelosa
+        vertices: Vértices (x, y) de la prelosa
+        polilineas: Polilíneas de acero dentro de la prelosa (con capa y vertices)
+        textos_por_tipo: Listas de textos de acero (longitudinal, transversal, ...)
+
+    Returns:
+        str: Huella hexadecimal
+    """
+    huella = hashlib.sha256()
+    huella.update(tipo_prelosa.encode('utf-8'))
+    huella.update(np.ascontiguousarray(vertices, dtype=np.float64).tobytes())
+    for polilinea in polilineas:
+        huella.update(b'\x00' + polilinea.capa.encode('utf-8') + b'\x00')
+        huella.update(np.ascontiguousarray(polilinea.vertices, dtype=np.float64).tobytes())
+    for textos in textos_por_tipo:
+        huella.update(b'\x01' + '\x1f'.join(textos).encode('utf-8'))
+    return huella.hexdigest()
+
+
+# Función para calcular la huella de todo lo que, además de la prelosa, cambia sus resultados
+def huella_contexto(excel_path, valores_predeterminados, definicion_bloque, textos_bloques=False):
+    try:
+        libro = huella_libro(excel_path)
+    except OSError:
+        libro = None
+    contexto = [VERSION_HUELLAS, VERSION_CALCULO, libro, valores_predeterminados, definicion_bloque, textos_bloques]
+    texto = json.dumps(contexto, ensure_ascii=False, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+class HuellasPrelosas:
+    """
+    Bloques de la ejecución anterior por huella de prelosa y bloques de la
+    ejecución actual, que reemplazan a los anteriores al guardar.
+    """
+
+    def __init__(self, ruta, contexto):
+        self.ruta = ruta
+        self.contexto = contexto
+        self.anteriores = self._cargar()
+        self.actuales = {}
+        self.reutilizadas = 0
+
+    # Función para leer el archivo de huellas (vacío si no existe, está dañado o cambió el contexto)
+    def _cargar(self):
+        try:
+            with open(self.ruta, encoding='utf-8') as archivo:
+                datos = json.load(archivo)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            consola.error("No se pudo leer el archivo de huellas {} ({}), se recalculan todas las prelosas",
+                          self.ruta, e)
+            return {}
+        if not isinstance(datos, dict) or datos.get("version") != VERSION_HUELLAS:
+            return {}
+        if datos.get("contexto") != self.contexto:
+            consola.resumen("Cambió el libro, los valores predeterminados o el bloque de referencia: "
+                            "se recalculan todas las prelosas")
+            return {}
+        prelosas = datos.get("prelosas")
+        return prelosas if isinstance(prelosas, dict) else {}
+
+    def __len__(self):
+        return len(self.anteriores)
+
+    # Función para obtener lo guardado de una prelosa sin cambios (None si cambió, es nueva o la hoja es distinta)
+    def buscar(self, huella, ws):
+        """
+        Args:
+            huella: Huella de la prelosa
+            ws: Hoja Convertidor en el estado previo a la prelosa
+
+        Returns:
+            dict: bloque, dependencias y escrituras guardados; las escrituras ya
+            se aplicaron a la hoja
+        """
+        guardada = self.anteriores.get(huella)
+        if guardada is None:
+            return None
+        if not all(ws.range(celda).value == valor for celda, valor in guardada["dependencias"].items()):
+            return None
+        for celda, valor in guardada["escrituras"].items():
+            ws.range(celda).value = valor
+        self.reutilizadas += 1
+        return guardada
+
+    # Función para registrar el bloque de una prelosa y las celdas que usó en esta ejecución
+    def registrar(self, huella, bloque, dependencias, escrituras):
+        self.actuales[huella] = {"bloque": bloque, "dependencias": dependencias, "escrituras": escrituras}
+
+    def guardar(self):
+        """Escribe las huellas de esta ejecución (reemplazo atómico del archivo anterior)."""
+        datos = {"version": VERSION_HUELLAS, "contexto": self.contexto, "prelosas": self.actuales}
+        temporal = self.ruta + ".tmp"
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(datos, archivo, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temporal, self.ruta)
+
+    def resumen(self, total_prelosas):
+        return (f"Reprocesamiento incremental: {self.reutilizadas} de {total_prelosas} prelosas sin cambios "
+                f"(bloque reutilizado), {total_prelosas - self.reutilizadas} recalculadas")
@@ -0,0 +1,454 @@
+"""
+Lectura por streaming de planos DXF muy grandes.
+
+ezdxf.readfile carga el documento completo en memoria antes de empezar, y en
+los planos más grandes eso ocupa varios GB. En modo streaming el plano se
+recorre una sola vez de principio a fin (sin el índice de todo el archivo que
+usa iterdxf) y solo se conservan las entidades que usa el procesamiento:
+
+- LWPOLYLINE de las capas de prelosa y de acero,
+- TEXT, MTEXT e INSERT (con sus ATTRIB) del espacio modelo,
+- las capas y los ATTDEF, TEXT y MTEXT de las definiciones de bloque.
+
+Estas entidades se cargan sin documento, y del resto del archivo solo se guardan
+unas pocas posiciones en bytes (fin de la cabecera, capas, inicio y fin de la
+sección ENTITIES), así que la memoria depende de las entidades relevantes y no
+del tamaño del archivo. Al guardar se hace una segunda pasada secuencial sobre
+el archivo original: las entidades se copian tal cual, se omiten las de las
+capas eliminadas y al final se añaden los bloques insertados.
+
+Limitaciones: solo DXF ASCII (igual que iterdxf) y las referencias a entidades
+eliminadas desde la sección OBJECTS (grupos, reactores) no se limpian.
+"""
+#re: sirve para leer y actualizar $HANDSEED en la cabecera
+import re
+#io: StringIO para exportar las entidades nuevas o modificadas
+from io import StringIO
+
+from ezdxf.entities import Insert, factory
+#subentity: enlaza los ATTRIB y el SEQEND con su INSERT (igual que iterdxf)
+from ezdxf.entities.subentity import entity_linker
+from ezdxf.lldxf import const
+from ezdxf.lldxf.extendedtags import ExtendedTags
+from ezdxf.lldxf.tagwriter import TagWriter
+from ezdxf.tools.codepage import toencoding
+
+#registro_mensajes: mensajes por nivel y categoría
+from registro_mensajes import consola
+
+
+# Tipos de texto y bloque que se conservan del espacio modelo
+TIPOS_TEXTO = ('TEXT', 'MTEXT', 'INSERT')
+# Entidades que se cargan de las definiciones de bloque
+TIPOS_BLOQUES = ('BLOCK', 'ATTDEF', 'TEXT', 'MTEXT')
+# Entidades que siguen a un INSERT o POLYLINE y se eliminan junto con él
+TIPOS_ENLAZADOS = ('ATTRIB', 'VERTEX', 'SEQEND')
+# Tamaño de los bloques de bytes copiados en la segunda pasada
+TAMANO_COPIA = 1 << 20
+
+PATRON_HANDSEED = re.compile(rb'(\$HANDSEED\s*\r?\n\s*5\s*\r?\n)([0-9A-Fa-f]+)')
+
+
+class EscanerDXF:
+    """
+    Recorrido secuencial de un DXF ASCII por entradas: cada entrada va de una
+    etiqueta de código 0 a la siguiente (SECTION, una capa, una entidad, ENDSEC...).
+
+    Solo guarda el contenido de las entradas pedidas; del resto se conocen su
+    sección, tipo, posición en bytes, capa y si está en el espacio papel mientras
+    se recorren (capa y espacio_papel de la última entrada generada). También lee
+    la versión y la página de códigos de la cabecera y el mayor handle del archivo.
+
+    Args:
+        archivo: archivo abierto en modo binario
+        posicion: posición en bytes donde empieza el recorrido (inicio de una entrada)
+        seccion: sección en la que está esa posición
+    """
+
+    def __init__(self, archivo, posicion=0, seccion=None):
+        self.archivo = archivo
+        self.posicion = posicion
+        self.seccion = seccion
+        self.version = "AC1009"
+        self.codepage = "cp1252"
+        self.handle_maximo = 0
+        self.capa = None
+        self.espacio_papel = False
+
+    @property
+    def encoding(self):
+        # Desde R2007 los DXF están en UTF-8
+        return "utf-8" if self.version >= "AC1021" else self.codepage
+
+    def entradas(self, conservar):
+        """
+        Genera (seccion, tipo, inicio, fin, datos) por cada entrada del archivo.
+
+        Args:
+            conservar: función (seccion, tipo) que indica si se guardan los bytes
+                de la entrada; si no, datos es None
+        """
+        archivo = self.archivo
+        archivo.seek(self.posicion)
+        posicion = self.posicion
+        tipo = inicio = lineas = None
+        variable = None
+        # El nombre de la sección es la etiqueta (2, nombre) que sigue a (0, SECTION)
+        nombre_seccion = False
+        # Capa de la entrada (primera etiqueta 8) y espacio papel (etiqueta 67 anterior a la capa)
+        capa = None
+        espacio_papel = False
+        # Los códigos se comparan como bytes (más rápido que convertirlos a int en cada etiqueta)
+        for linea_codigo in archivo:
+            linea_valor = archivo.readline()
+            codigo = linea_codigo.strip()
+
+            if codigo == b'0':
+                if tipo is not None:
+                    self.capa, self.espacio_papel = capa, espacio_papel
+                    yield self.seccion, tipo, inicio, posicion, b''.join(lineas) if lineas is not None else None
+                    if tipo == 'ENDSEC':
+                        self.seccion = None
+                tipo = linea_valor.strip().decode('ascii', errors='replace')
+                nombre_seccion = tipo == 'SECTION'
+                inicio = posicion
+                capa = None
+                espacio_papel = False
+                lineas = [] if self.seccion is not None and conservar(self.seccion, tipo) else None
+                if tipo == 'EOF':
+                    yield self.seccion, tipo, inicio, posicion + len(linea_codigo) + len(linea_valor), None
+                    return
+            else:
+                if codigo == b'2' and nombre_seccion:
+                    self.seccion = linea_valor.strip().decode('ascii', errors='replace')
+                elif codigo == b'8':
+                    if capa is None:
+                        capa = linea_valor.rstrip(b'\r\n').decode(self.encoding, errors='surrogateescape')
+                elif codigo == b'67':
+                    if capa is None:
+                        espacio_papel = linea_valor.strip() == b'1'
+                elif (codigo == b'5' and tipo != 'DIMSTYLE') or (codigo == b'105' and tipo == 'DIMSTYLE'):
+                    try:
+                        self.handle_maximo = max(self.handle_maximo, int(linea_valor, 16))
+                    except ValueError:
+                        pass
+                elif self.seccion == 'HEADER':
+                    if codigo == b'9':
+                        variable = linea_valor.strip()
+                    elif variable is not None:
+                        if variable == b'$ACADVER':
+                            self.version = linea_valor.strip().decode('ascii', errors='replace')
+                        elif variable == b'$DWGCODEPAGE':
+                            self.codepage = toencoding(linea_valor.strip().decode('ascii', errors='replace'))
+                        variable = None
+                elif not codigo.isdigit():
+                    raise const.DXFStructureError(f"Código de grupo no válido en la posición {posicion}")
+                nombre_seccion = False
+
+            if lineas is not None:
+                lineas += (linea_codigo, linea_valor)
+            posicion += len(linea_codigo) + len(linea_valor)
+
+        # Archivo sin EOF: la última entrada termina al final del archivo
+        if tipo is not None:
+            self.capa, self.espacio_papel = capa, espacio_papel
+            yield self.seccion, tipo, inicio, posicion, b''.join(lineas) if lineas is not None else None
+
+
+# Capas del plano por nombre (sin distinguir mayúsculas), con la misma interfaz que doc.layers
+class TablaCapas:
+    def __init__(self):
+        self.capas = {}
+
+    def agregar(self, capa):
+        self.capas[capa.dxf.name.lower()] = capa
+
+    def __contains__(self, nombre):
+        return nombre.lower() in self.capas
+
+    def __iter__(self):
+        return iter(self.capas.values())
+
+    def get(self, nombre):
+        capa = self.capas.get(nombre.lower())
+        if capa is None:
+            raise const.DXFTableEntryError(nombre)
+        return capa
+
+
+# Entidad BLOCK (punto base), ATTDEF (add_auto_attribs) y textos de una definición
+class DefinicionBloque:
+    def __init__(self, block):
+        self.block = block
+        self.atributos = []
+        # ATTDEF, TEXT y MTEXT en el orden del archivo
+        self.entidades = []
+
+    def __iter__(self):
+        return iter(self.entidades)
+
+    def attdefs(self):
+        return iter(self.atributos)
+
+
+# Definiciones de bloque por nombre (sin distinguir mayúsculas), como doc.blocks.get
+class TablaBloques:
+    def __init__(self):
+        self.bloques = {}
+
+    def agregar(self, definicion):
+        self.bloques[definicion.block.dxf.name.lower()] = definicion
+
+    def __contains__(self, nombre):
+        return nombre.lower() in self.bloques
+
+    def get(self, nombre, default=None):
+        return self.bloques.get(nombre.lower(), default)
+
+
+# INSERT creado en modo streaming: su bloque se resuelve con las definiciones leídas
+class InsertStreaming(Insert):
+    definicion = None
+
+    def block(self):
+        return self.definicion
+
+
+# Espacio modelo en modo streaming: entidades relevantes y bloques insertados
+class ModeloStreaming:
+    def __init__(self, documento):
+        self.doc = documento
+        self.entidades = []
+        self.nuevas = []
+
+    def __iter__(self):
+        return iter(self.entidades)
+
+    def __len__(self):
+        return len(self.entidades)
+
+    def add_blockref(self, name, insert, dxfattribs=None):
+        """Crea un INSERT que se escribirá al final del espacio modelo."""
+        dxfattribs = dict(dxfattribs or {})
+        dxfattribs['name'] = name
+        dxfattribs['insert'] = insert
+        bloque = InsertStreaming.new(
+            handle=self.doc.nuevo_handle(),
+            owner=self.doc.propietario_modelo,
+            dxfattribs=dxfattribs,
+        )
+        bloque.definicion = self.doc.blocks.get(name)
+        self.entidades.append(bloque)
+        self.nuevas.append(bloque)
+        return bloque
+
+
+class DocumentoStreaming:
+    """
+    Plano DXF leído por streaming, con la interfaz de ezdxf que usa script.py
+    (modelspace(), layers y blocks).
+
+    Args:
+        ruta: archivo DXF de entrada
+        capas_polilineas: capas cuyas LWPOLYLINE se conservan
+    """
+
+    def __init__(self, ruta, capas_polilineas):
+        self.ruta = ruta
+        self.capas_polilineas = set(capas_polilineas)
+        self.layers = TablaCapas()
+        self.blocks = TablaBloques()
+        self.propietario_modelo = None
+        self.siguiente_handle = None
+        # Capas por posición de inicio: (fin, capa, exportación original)
+        self.capas_originales = {}
+        self.modelo = ModeloStreaming(self)
+        # Posiciones en bytes que se usan al guardar
+        self.fin_cabecera = None
+        self.inicio_entidades = None
+        self.fin_entidades = None
+
+        with open(ruta, 'rb') as archivo:
+            escaner = EscanerDXF(archivo)
+            self.encoding = escaner.encoding
+            self.dxfversion = escaner.version
+            definicion = None
+            enlazar = entity_linker()
+            for seccion, tipo, inicio, fin, datos in escaner.entradas(self._conservar):
+                if tipo == 'ENDSEC':
+                    if seccion == 'HEADER':
+                        self.fin_cabecera = inicio
+                    elif seccion == 'ENTITIES':
+                        self.fin_entidades = inicio
+                elif tipo == 'SECTION':
+                    # La versión y la codificación se conocen al terminar la cabecera
+                    self.encoding = escaner.encoding
+                    self.dxfversion = escaner.version
+                    if seccion == 'ENTITIES':
+                        self.inicio_entidades = fin
+                elif datos is None:
+                    continue
+                elif seccion == 'TABLES':
+                    capa = self._cargar(datos)
+                    self.layers.agregar(capa)
+                    self.capas_originales[inicio] = (fin, capa)
+                elif seccion == 'BLOCKS':
+                    definicion = self._agregar_a_bloques(self._cargar(datos), definicion)
+                else:
+                    self._agregar_al_modelo(self._cargar(datos), enlazar)
+            self._leer_cabecera(archivo, escaner.handle_maximo)
+        # Exportación original para detectar capas modificadas al guardar (con los handles ya conocidos)
+        for inicio, (fin, capa) in self.capas_originales.items():
+            self.capas_originales[inicio] = (fin, capa, self._exportar(capa))
+        if self.inicio_entidades is None or self.fin_entidades is None:
+            raise const.DXFStructureError(f"{ruta} no tiene sección ENTITIES")
+
+    def modelspace(self):
+        return self.modelo
+
+    def nuevo_handle(self):
+        """Siguiente handle libre (None si el plano no usa handles)."""
+        if self.siguiente_handle is None:
+            return None
+        handle = f"{self.siguiente_handle:X}"
+        self.siguiente_handle += 1
+        return handle
+
+    # Entradas que se cargan en la lectura: capas, textos de los bloques y entidades del espacio modelo
+    @staticmethod
+    def _conservar(seccion, tipo):
+        if seccion == 'TABLES':
+            return tipo == 'LAYER'
+        if seccion == 'BLOCKS':
+            return tipo in TIPOS_BLOQUES
+        if seccion == 'ENTITIES':
+            # ATTRIB y SEQEND se enlazan con su INSERT
+            return tipo == 'LWPOLYLINE' or tipo in TIPOS_TEXTO or tipo in ('ATTRIB', 'SEQEND')
+        return False
+
+    def _cargar(self, datos):
+        texto = datos.decode(self.encoding, errors='surrogateescape').replace('\r\n', '\n')
+        return factory.load(ExtendedTags.from_text(texto))
+
+    def _exportar(self, entidad):
+        texto = StringIO()
+        escritor = TagWriter(texto, self.dxfversion, write_handles=self.siguiente_handle is not None)
+        entidad.export_dxf(escritor)
+        return texto.getvalue().encode(self.encoding, errors='dxfreplace')
+
+    def _leer_cabecera(self, archivo, handle_maximo):
+        # $HANDSEED no siempre está al día, así que se usa también el mayor handle del archivo
+        if handle_maximo:
+            self.siguiente_handle = handle_maximo + 1
+        if self.fin_cabecera is None:
+            return
+        archivo.seek(0)
+        coincidencia = PATRON_HANDSEED.search(archivo.read(self.fin_cabecera))
+        if coincidencia:
+            self.siguiente_handle = max(self.siguiente_handle or 0, int(coincidencia.group(2), 16))
+
+    # Función para agregar una entidad de la sección BLOCKS; devuelve la definición en curso
+    def _agregar_a_bloques(self, entidad, definicion):
+        if entidad.dxftype() == 'BLOCK':
+            definicion = DefinicionBloque(entidad)
+            self.blocks.agregar(definicion)
+        elif definicion is not None:
+            definicion.entidades.append(entidad)
+            if entidad.dxftype() == 'ATTDEF':
+                definicion.atributos.append(entidad)
+        return definicion
+
+    # Función para agregar una entidad de la sección ENTITIES (sin las del espacio papel)
+    def _agregar_al_modelo(self, entidad, enlazar):
+        if enlazar(entidad) or entidad.dxf.paperspace != 0 or entidad.dxftype() == 'SEQEND':
+            return
+        if self.propietario_modelo is None:
+            self.propietario_modelo = entidad.dxf.get('owner')
+        if entidad.dxftype() == 'LWPOLYLINE' and entidad.dxf.layer not in self.capas_polilineas:
+            return
+        self.modelo.entidades.append(entidad)
+
+    def _copiar(self, origen, destino, inicio, fin):
+        origen.seek(inicio)
+        restante = fin - inicio
+        while restante > 0:
+            datos = origen.read(min(TAMANO_COPIA, restante))
+            if not datos:
+                break
+            destino.write(datos)
+            restante -= len(datos)
+
+    def guardar(self, ruta_salida, capas_a_eliminar):
+        """
+        Escribe el plano con los bloques insertados y sin las entidades del espacio
+        modelo que están en capas_a_eliminar.
+
+        Returns:
+            int: Número de entidades eliminadas
+        """
+        capas_eliminadas = set(capas_a_eliminar)
+
+        # Handles de los ATTRIB y SEQEND creados por add_auto_attribs
+        for bloque in self.modelo.nuevas:
+            for subentidad in list(bloque.attribs) + [bloque.seqend]:
+                if subentidad is not None and subentidad.dxf.get('handle') is None:
+                    subentidad.dxf.handle = self.nuevo_handle()
+
+        entidades_eliminadas = 0
+        with open(self.ruta, 'rb') as origen, open(self.ruta, 'rb') as lectura, open(ruta_salida, 'wb') as destino:
+            # Cabecera con $HANDSEED actualizado
+            inicio = 0
+            if self.fin_cabecera is not None:
+                origen.seek(0)
+                cabecera = origen.read(self.fin_cabecera)
+                if self.siguiente_handle is not None:
+                    cabecera = PATRON_HANDSEED.sub(
+                        lambda m: m.group(1) + f"{self.siguiente_handle:X}".encode('ascii'), cabecera, count=1
+                    )
+                destino.write(cabecera)
+                inicio = self.fin_cabecera
+
+            # Tablas y bloques, reescribiendo solo las capas modificadas
+            for inicio_capa, (fin_capa, capa, original) in sorted(self.capas_originales.items()):
+                exportada = self._exportar(capa)
+                if exportada == original:
+                    continue
+                self._copiar(origen, destino, inicio, inicio_capa)
+                destino.write(exportada)
+                inicio = fin_capa
+            self._copiar(origen, destino, inicio, self.inicio_entidades)
+
+            # Entidades (segunda pasada secuencial), sin las de las capas eliminadas (ni sus ATTRIB/VERTEX/SEQEND):
+            # las entidades que se conservan seguidas se copian como un solo tramo
+            omitir_enlazadas = False
+            inicio_tramo = self.inicio_entidades
+            escaner = EscanerDXF(lectura, self.inicio_entidades, 'ENTITIES')
+            for _, tipo, inicio, fin, _ in escaner.entradas(lambda seccion, tipo: False):
+                if tipo == 'ENDSEC':
+                    break
+                if tipo in TIPOS_ENLAZADOS:
+                    omitir = omitir_enlazadas
+                    if tipo == 'SEQEND':
+                        omitir_enlazadas = False
+                else:
+                    omitir_enlazadas = False
+                    omitir = escaner.capa in capas_eliminadas and not escaner.espacio_papel
+                    if omitir:
+                        entidades_eliminadas += 1
+                        omitir_enlazadas = tipo in ('INSERT', 'POLYLINE')
+                if omitir:
+                    self._copiar(origen, destino, inicio_tramo, inicio)
+                    inicio_tramo = fin
+            self._copiar(origen, destino, inicio_tramo, self.fin_entidades)
+
+            # Bloques insertados durante el procesamiento
+            # (export_dxf de INSERT ya escribe sus ATTRIB y el SEQEND)
+            for bloque in self.modelo.nuevas:
+                destino.write(self._exportar(bloque))
+
+            # ENDSEC de ENTITIES, OBJECTS y EOF tal cual
+            origen.seek(0, 2)
+            self._copiar(origen, destino, self.fin_entidades, origen.tell())
+
+        consola.resumen("Se eliminaron {} entidades de las capas: {}", entidades_eliminadas, ', '.join(capas_a_eliminar))
+        return entidades_eliminadas
@@ -0,0 +1,223 @@
+"""
+Perfil de tiempos por etapa del procesamiento de un plano.
+
+procesar_prelosas_con_bloques registra en un PerfilEtapas el tiempo real
+(perf_counter) y el número de llamadas de cada etapa: carga del DXF,
+recopilación de entidades, búsqueda de polilíneas anidadas, extracción de
+textos, análisis de los textos de acero, cálculo de espaciamientos con la hoja
+Convertidor (separado en escrituras, cálculo y lecturas), inserción de bloques,
+eliminación de capas y guardado.
+
+Además guarda cuánto tardó cada prelosa en cada etapa, para los histogramas y
+percentiles. Con el análisis repartido entre procesos, los tiempos de
+polilíneas anidadas y extracción de textos son la suma de lo que tardó cada
+proceso.
+
+El perfil se imprime como tabla al final del resumen (y en el registro de la
+interfaz) y se exporta a JSON con exportar_json().
+"""
+#bisect: sirve para ubicar cada tiempo en su intervalo del histograma
+import bisect
+#contextlib: medir() se usa como bloque with
+import contextlib
+#json: sirve para exportar el perfil
+import json
+#os: sirve para ubicar el archivo del perfil junto a la salida
+import os
+#time: perf_counter para medir el tiempo real de cada etapa
+import time
+
+# Claves de las etapas que registra el procesamiento
+ETAPA_CARGA = "carga_dxf"
+ETAPA_APERTURA_CONVERTIDOR = "apertura_convertidor"
+ETAPA_RECOPILACION = "recopilacion_entidades"
+ETAPA_POLILINEAS = "polilineas_anidadas"
+ETAPA_TEXTOS = "extraccion_textos"
+ETAPA_ACERO = "analisis_acero"
+ETAPA_ESPACIAMIENTO = "calculo_espaciamiento"
+ETAPA_EXCEL_ESCRITURAS = "excel_escrituras"
+ETAPA_EXCEL_CALCULO = "excel_calculo"
+ETAPA_EXCEL_LECTURAS = "excel_lecturas"
+ETAPA_INSERCION = "insercion_bloques"
+ETAPA_ELIMINACION = "eliminacion_capas"
+ETAPA_GUARDADO = "guardado"
+
+# Orden y nombre de las etapas en la tabla (las de la hoja forman parte del cálculo de espaciamientos)
+ETAPAS = (
+    (ETAPA_CARGA, "Carga del DXF"),
+    (ETAPA_APERTURA_CONVERTIDOR, "Apertura de la hoja Convertidor"),
+    (ETAPA_RECOPILACION, "Recopilación de entidades"),
+    (ETAPA_POLILINEAS, "Búsqueda de polilíneas anidadas"),
+    (ETAPA_TEXTOS, "Extracción de textos"),
+    (ETAPA_ACERO, "Análisis de textos de acero"),
+    (ETAPA_ESPACIAMIENTO, "Cálculo de espaciamientos"),
+    (ETAPA_EXCEL_ESCRITURAS, "  escrituras en la hoja"),
+    (ETAPA_EXCEL_CALCULO, "  cálculo de la hoja"),
+    (ETAPA_EXCEL_LECTURAS, "  lecturas de la hoja"),
+    (ETAPA_INSERCION, "Inserción de bloques"),
+    (ETAPA_ELIMINACION, "Eliminación de capas de acero"),
+    (ETAPA_GUARDADO, "Guardado del DXF"),
+)
+
+# Clave del tiempo total de cada prelosa en los histogramas
+PRELOSA = "prelosa"
+
+# Sufijo del archivo JSON del perfil (junto al DXF de salida)
+SUFIJO_PERFIL = "_perfil.json"
+
+# Límites (segundos) de los intervalos de los histogramas por prelosa
+LIMITES_HISTOGRAMA = (0.0001, 0.001, 0.01, 0.1, 1.0, 10.0)
+
+
+# Función para nombrar los intervalos del histograma (<0.1 ms, 0.1-1 ms, ..., >=10 s)
+def _nombre_intervalo(inferior, superior):
+    def texto(segundos):
+        return f"{segundos * 1000:g} ms" if segundos < 1 else f"{segundos:g} s"
+    if inferior is None:
+        return f"<{texto(superior)}"
+    if superior is None:
+        return f">={texto(inferior)}"
+    return f"{texto(inferior)}-{texto(superior)}"
+
+
+NOMBRES_INTERVALOS = tuple(
+    _nombre_intervalo(inferior, superior)
+    for inferior, superior in zip((None,) + LIMITES_HISTOGRAMA, LIMITES_HISTOGRAMA + (None,))
+)
+
+
+# Función para obtener la ruta del perfil de un DXF de salida
+def ruta_perfil(output_dxf_path):
+    return os.path.splitext(output_dxf_path)[0] + SUFIJO_PERFIL
+
+
+def _percentil(ordenados, fraccion):
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, int(fraccion * len(ordenados)))]
+
+
+class PerfilEtapas:
+    """Tiempos y llamadas por etapa, contadores y tiempos de cada prelosa."""
+
+    def __init__(self):
+        # etapa -> [segundos, llamadas]
+        self.etapas = {}
+        self.contadores = {}
+        # etapa -> tiempos de cada prelosa (la prelosa en curso se acumula en self.prelosa_actual)
+        self.por_prelosa = {}
+        self.prelosa_actual = None
+        self.inicio_prelosa = None
+        self.inicio = time.perf_counter()
+        self.segundos_totales = None
+
+    # Función para sumar el tiempo de una o varias llamadas a una etapa (y a la prelosa en curso)
+    def agregar(self, etapa, segundos, llamadas=1):
+        acumulado = self.etapas.get(etapa)
+        if acumulado is None:
+            self.etapas[etapa] = [segundos, llamadas]
+        else:
+            acumulado[0] += segundos
+            acumulado[1] += llamadas
+        if self.prelosa_actual is not None:
+            self.prelosa_actual[etapa] = self.prelosa_actual.get(etapa, 0.0) + segundos
+
+    @contextlib.contextmanager
+    def medir(self, etapa):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.agregar(etapa, time.perf_counter() - inicio)
+
+    def contar(self, nombre, cantidad=1):
+        self.contadores[nombre] = self.contadores.get(nombre, 0) + cantidad
+
+    # Funciones para delimitar el trabajo de una prelosa (histogramas por prelosa)
+    def iniciar_prelosa(self, segundos_previos=0.0):
+        """segundos_previos: tiempo de la prelosa ya medido fuera (análisis en otro proceso)."""
+        self.prelosa_actual = {}
+        self.inicio_prelosa = time.perf_counter() - segundos_previos
+
+    def terminar_prelosa(self):
+        if self.prelosa_actual is None:
+            return
+        self.prelosa_actual[PRELOSA] = time.perf_counter() - self.inicio_prelosa
+        for etapa, segundos in self.prelosa_actual.items():
+            self.por_prelosa.setdefault(etapa, []).append(segundos)
+        self.prelosa_actual = None
+        self.contar("prelosas")
+
+    def terminar(self):
+        self.segundos_totales = time.perf_counter() - self.inicio
+
+    # Función para resumir los tiempos de cada prelosa en una etapa
+    def _estadisticas_prelosas(self, etapa):
+        tiempos = self.por_prelosa.get(etapa)
+        if not tiempos:
+            return None
+        ordenados = sorted(tiempos)
+        histograma = [0] * len(NOMBRES_INTERVALOS)
+        for segundos in ordenados:
+            histograma[bisect.bisect_right(LIMITES_HISTOGRAMA, segundos)] += 1
+        return {
+            "prelosas": len(ordenados),
+            "media": sum(ordenados) / len(ordenados),
+            "p50": _percentil(ordenados, 0.50),
+            "p95": _percentil(ordenados, 0.95),
+            "maximo": ordenados[-1],
+            "histograma": dict(zip(NOMBRES_INTERVALOS, histograma)),
+        }
+
+    def como_diccionario(self):
+        nombres = dict(ETAPAS)
+        orden = [etapa for etapa, _ in ETAPAS] + sorted(set(self.etapas) - set(nombres))
+        etapas = {}
+        for etapa in orden:
+            if etapa not in self.etapas:
+                continue
+            segundos, llamadas = self.etapas[etapa]
+            etapas[etapa] = {
+                "nombre": nombres.get(etapa, etapa).strip(),
+                "segundos": segundos,
+                "llamadas": llamadas,
+                "por_prelosa": self._estadisticas_prelosas(etapa),
+            }
+        return {
+            "segundos_totales": self.segundos_totales,
+            "etapas": etapas,
+            "prelosa": self._estadisticas_prelosas(PRELOSA),
+            "contadores": dict(self.contadores),
+            "limites_histograma": list(LIMITES_HISTOGRAMA),
+        }
+
+    def exportar_json(self, ruta):
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump(self.como_diccionario(), archivo, ensure_ascii=False, indent=2)
+
+    def tabla(self):
+        """Tabla de texto con el tiempo, el porcentaje y las llamadas de cada etapa."""
+        datos = self.como_diccionario()
+        total = datos["segundos_totales"] or sum(
+            etapa["segundos"] for clave, etapa in datos["etapas"].items() if not clave.startswith("excel_")
+        )
+        lineas = ["PERFIL POR ETAPA",
+                  f"{'Etapa':<34}{'Segundos':>10}{'%':>7}{'Llamadas':>10}{'p95/prelosa':>13}"]
+        nombres = dict(ETAPAS)
+        for clave, etapa in datos["etapas"].items():
+            porcentaje = 100 * etapa["segundos"] / total if total else 0.0
+            p95 = f"{etapa['por_prelosa']['p95'] * 1000:.2f} ms" if etapa["por_prelosa"] else "-"
+            lineas.append(f"{nombres.get(clave, clave):<34}{etapa['segundos']:>10.3f}{porcentaje:>6.1f}%"
+                          f"{etapa['llamadas']:>10}{p95:>13}")
+        if datos["segundos_totales"] is not None:
+            lineas.append(f"{'Total':<34}{datos['segundos_totales']:>10.3f}")
+        if datos["prelosa"]:
+            prelosa = datos["prelosa"]
+            lineas.append(f"Por prelosa: media {prelosa['media'] * 1000:.2f} ms, p50 {prelosa['p50'] * 1000:.2f} ms, "
+                          f"p95 {prelosa['p95'] * 1000:.2f} ms, máximo {prelosa['maximo'] * 1000:.2f} ms")
+            lineas.append("Histograma por prelosa: " + ", ".join(
+                f"{intervalo}: {cantidad}" for intervalo, cantidad in prelosa["histograma"].items() if cantidad
+            ))
+        if datos["contadores"]:
+            lineas.append("Contadores: " + ", ".join(f"{nombre}={valor}" for nombre, valor in datos["contadores"].items()))
+        return "\n".join(lineas)
@@ -0,0 +1,363 @@
+"""
+Procesamiento por lotes de planos DXF sin interfaz gráfica.
+
+Los planos se procesan con una SesionCalculo de script.py: la hoja Convertidor
+(y Excel con --motor excel) se abre una sola vez y las cachés de resultados y de
+textos de acero se comparten entre planos. Excel se abre con una SesionExcel
+(sesion_excel.py): cada plano empieza con las entradas del libro y, si Excel
+deja de responder durante un plano, se reinicia y el plano se repite una vez.
+
+Con --procesos N los planos se reparten entre N procesos (ProcessPoolExecutor),
+cada uno con su propia sesión del motor nativo. Excel no admite este modo, y
+cada proceso usa solo la caché en memoria para no bloquear la caché en disco,
+que SQLite comparte con un solo escritor a la vez. Un plano dañado solo marca
+error en su resultado; si un plano hace terminar su proceso de forma anormal
+(el grupo de procesos queda roto), solo ese plano se marca con error y los
+demás pendientes se reparten en un grupo de procesos nuevo.
+
+Con --procesos-prelosas N (y los planos en un solo proceso) el análisis de las
+prelosas de cada plano se reparte entre N procesos; el cálculo con la hoja
+Convertidor y la inserción de los bloques siguen en serie, en el orden del plano.
+Conviene para pocos planos con miles de prelosas.
+
+Con --incremental cada plano guarda junto a su salida las huellas de sus
+prelosas (<salida>_huellas.json); al volver a procesarlo con la misma salida
+solo se recalculan las prelosas nuevas o modificadas. Con --perfil se guardan
+los tiempos por etapa de cada plano en <salida>_perfil.json (perfil_etapas.py).
+
+    python procesar_lote.py "planos/*.dxf" --salida resultados --valores valores.json
+    python procesar_lote.py --lista planos.txt --salida resultados --motor excel
+    python procesar_lote.py "proyecto/**/*.dxf" --salida resultados --procesos 16
+    python procesar_lote.py torre.dxf --salida resultados --procesos-prelosas 0
+
+El archivo de valores predeterminados es un JSON con la misma estructura que
+default_values de la interfaz:
+
+    {"PRELOSA MACIZA": {"espaciamiento_long": "0.20", "espaciamiento_trans": "0.20", "acero": "3/8\\""}}
+
+Los mensajes del procesamiento se escriben en el archivo de --log (uno por
+proceso con --procesos: procesar_lote.<pid>.log). Por la salida
+estándar se imprime una línea JSON por plano (archivo, salida, prelosas,
+bloques, reutilizadas, segundos, error) y al terminar se guarda el resumen completo en
+--resumen. Con --registro resumen (o silencio) el log solo tiene el avance y
+el resumen de cada plano (o solo los errores); con --categorias se eligen los
+mensajes de cada prelosa del nivel detalle (geometria, textos, excel, bloques).
+"""
+#argparse: sirve para leer los argumentos de la línea de comandos
+import argparse
+#concurrent.futures: reparte los planos entre varios procesos
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+#multiprocessing: cola donde cada proceso anota el plano que empieza
+import multiprocessing
+#contextlib: redirige los mensajes del procesamiento al archivo de log
+import contextlib
+#glob: sirve para expandir patrones como planos/*.dxf
+import glob
+#json: sirve para leer los valores predeterminados y escribir el resumen
+import json
+#os: sirve para interactuar con el sistema operativo
+import os
+#sys: código de salida
+import sys
+#time: sirve para medir el tiempo de cada plano
+import time
+
+#convertidor: motores de cálculo disponibles
+from convertidor import MOTOR_NATIVO, MOTOR_EXCEL
+#script: procesamiento de prelosas y sesión de cálculo compartida
+from script import SesionCalculo
+#perfil_etapas: archivo del perfil por etapa de cada plano
+from perfil_etapas import ruta_perfil
+#registro_mensajes: nivel y categorías de los mensajes del procesamiento
+from registro_mensajes import configurar_registro, configuracion_registro, leer_categorias, NIVELES, DETALLE
+
+
+# Función para obtener la lista de planos a partir de rutas, patrones y un archivo de lista
+def expandir_planos(patrones, ruta_lista=None):
+    entradas = list(patrones)
+    if ruta_lista:
+        with open(ruta_lista, encoding='utf-8') as archivo:
+            entradas.extend(linea.strip() for linea in archivo
+                            if linea.strip() and not linea.lstrip().startswith('#'))
+
+    planos = []
+    vistos = set()
+    for entrada in entradas:
+        coincidencias = sorted(glob.glob(entrada, recursive=True)) if glob.has_magic(entrada) else [entrada]
+        if not coincidencias:
+            print(f"Sin coincidencias para: {entrada}", file=sys.stderr)
+        for ruta in coincidencias:
+            clave = os.path.normcase(os.path.abspath(ruta))
+            if clave not in vistos:
+                vistos.add(clave)
+                planos.append(ruta)
+    return planos
+
+# Función para elegir el archivo de salida de cada plano (sin repetir nombres)
+def rutas_de_salida(planos, directorio_salida):
+    rutas = []
+    usados = set()
+    for ruta in planos:
+        nombre, extension = os.path.splitext(os.path.basename(ruta))
+        candidato = f"{nombre}{extension or '.dxf'}"
+        contador = 2
+        while candidato.lower() in usados:
+            candidato = f"{nombre}_{contador}{extension or '.dxf'}"
+            contador += 1
+        usados.add(candidato.lower())
+        rutas.append(os.path.join(directorio_salida, candidato))
+    return rutas
+
+# Función para leer el archivo de valores predeterminados (estructura de default_values)
+def leer_valores_predeterminados(ruta):
+    if not ruta:
+        return None
+    with open(ruta, encoding='utf-8') as archivo:
+        valores = json.load(archivo)
+    if not isinstance(valores, dict) or not all(isinstance(v, dict) for v in valores.values()):
+        raise ValueError(f"{ruta}: se esperaba un objeto {{tipo de prelosa: {{valor: ...}}}}")
+    return valores
+
+
+# Función para procesar un plano con la sesión abierta y devolver su resultado
+def procesar_plano(sesion, ruta, ruta_salida, valores_predeterminados=None, modo_streaming=False,
+                   procesos_analisis=1, incremental=False, exportar_perfil=False):
+    inicio = time.time()
+    try:
+        sesion.procesar(ruta, ruta_salida, valores_predeterminados=valores_predeterminados,
+                        modo_streaming=modo_streaming, procesos_analisis=procesos_analisis, incremental=incremental,
+                        ruta_perfil=ruta_perfil(ruta_salida) if exportar_perfil else None)
+        resultado = dict(sesion.resumen_archivo)
+    except Exception as e:
+        resultado = {"archivo": ruta, "prelosas": 0, "bloques": 0, "reutilizadas": 0, "error": str(e)}
+    resultado["salida"] = ruta_salida
+    resultado["segundos"] = round(time.time() - inicio, 3)
+    return resultado
+
+
+# Sesión de cálculo de cada proceso del modo paralelo (se crea en _iniciar_proceso)
+_sesion_proceso = None
+# Cola donde cada proceso anota la posición del plano que empieza (para saber qué plano rompió el grupo)
+_inicios_proceso = None
+
+# Función que prepara cada proceso: log propio, nivel de los mensajes y sesión del motor nativo
+def _iniciar_proceso(excel_path, ruta_log, registro, inicios):
+    global _sesion_proceso, _inicios_proceso
+    _inicios_proceso = inicios
+    configurar_registro(*registro)
+    if ruta_log:
+        base, extension = os.path.splitext(ruta_log)
+        log = open(f"{base}.{os.getpid()}{extension or '.log'}", 'w', encoding='utf-8')
+        sys.stdout = log
+        sys.stderr = log
+    _sesion_proceso = SesionCalculo(excel_path, MOTOR_NATIVO, ruta_cache=False)
+
+# Función que procesa un plano dentro de un proceso del modo paralelo
+def _procesar_en_proceso(posicion, ruta, ruta_salida, valores_predeterminados, modo_streaming, incremental,
+                         exportar_perfil):
+    _inicios_proceso.put(posicion)
+    print(f"\n==== PLANO: {ruta} -> {ruta_salida} ====")
+    try:
+        return procesar_plano(_sesion_proceso, ruta, ruta_salida, valores_predeterminados, modo_streaming,
+                              incremental=incremental, exportar_perfil=exportar_perfil)
+    finally:
+        sys.stdout.flush()
+
+
+def procesar_lote(planos, directorio_salida, excel_path, valores_predeterminados=None,
+                  motor_calculo=MOTOR_NATIVO, ruta_cache=None, modo_streaming=False,
+                  ruta_log=None, salida_json=None, procesos=1, procesos_analisis=1, incremental=False,
+                  exportar_perfil=False):
+    """
+    Procesa varios planos con una sola sesión de cálculo o repartidos entre procesos.
+
+    Args:
+        planos: Rutas de los DXF de entrada
+        directorio_salida: Carpeta donde se guardan los DXF procesados
+        excel_path: Ruta a CONVERTIDOR.xlsx
+        valores_predeterminados: Valores por tipo de prelosa (como default_values de la interfaz)
+        motor_calculo: "nativo" o "excel"
+        ruta_cache: Caché de resultados en disco (None: junto al libro, False: solo memoria)
+        modo_streaming: Lee los planos por streaming (planos muy grandes)
+        ruta_log: Archivo para los mensajes del procesamiento (None: salida estándar)
+        salida_json: Flujo donde se escribe una línea JSON por plano (None: no se escribe)
+        procesos: Número de procesos (1: todo en este proceso); solo con el motor nativo
+        procesos_analisis: Procesos para analizar las prelosas de cada plano (solo con procesos=1)
+        incremental: Solo recalcula las prelosas que cambiaron desde el último proceso de cada salida
+        exportar_perfil: Guarda el perfil por etapa de cada plano en <salida>_perfil.json
+
+    Returns:
+        list: Un diccionario por plano, en el orden de planos, con archivo, salida,
+        prelosas, bloques, reutilizadas, segundos y error
+    """
+    if procesos > 1 and motor_calculo != MOTOR_NATIVO:
+        raise ValueError("El procesamiento en paralelo solo está disponible con el motor nativo")
+    os.makedirs(directorio_salida, exist_ok=True)
+    rutas_salida = rutas_de_salida(planos, directorio_salida)
+    resultados = [None] * len(planos)
+
+    def registrar(posicion, resultado):
+        resultados[posicion] = resultado
+        if salida_json is not None:
+            salida_json.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+            salida_json.flush()
+
+    def fallido(posicion, e):
+        # El proceso terminó de forma anormal (no es un error del plano en Python)
+        return {"archivo": planos[posicion], "prelosas": 0, "bloques": 0, "reutilizadas": 0,
+                "error": f"{type(e).__name__}: {e}", "salida": rutas_salida[posicion], "segundos": 0.0}
+
+    # Función para procesar unas posiciones en un grupo de procesos nuevo; devuelve las que quedaron sin
+    # resultado porque el grupo se rompió, las que habían empezado y el error del grupo roto
+    def ronda(posiciones, procesos_ronda):
+        inicios = multiprocessing.SimpleQueue()
+        rotas = []
+        error_grupo = None
+        with ProcessPoolExecutor(max_workers=procesos_ronda, initializer=_iniciar_proceso,
+                                 initargs=(excel_path, ruta_log, configuracion_registro(), inicios)) as ejecutor:
+            futuros = {
+                ejecutor.submit(_procesar_en_proceso, posicion, planos[posicion], rutas_salida[posicion],
+                                valores_predeterminados, modo_streaming, incremental, exportar_perfil): posicion
+                for posicion in posiciones
+            }
+            for futuro in as_completed(futuros):
+                posicion = futuros[futuro]
+                try:
+                    resultado = futuro.result()
+                except BrokenProcessPool as e:
+                    rotas.append(posicion)
+                    error_grupo = e
+                    continue
+                except Exception as e:
+                    resultado = fallido(posicion, e)
+                registrar(posicion, resultado)
+        iniciadas = set()
+        while not inicios.empty():
+            iniciadas.add(inicios.get())
+        inicios.close()
+        return sorted(rotas), iniciadas, error_grupo
+
+    if procesos > 1:
+        pendientes = list(range(len(planos)))
+        while pendientes:
+            rotas, iniciadas, error_grupo = ronda(pendientes, min(procesos, len(pendientes)))
+            # Sospechosos: planos en curso cuando se rompió el grupo; los que no habían empezado se repiten
+            sospechosas = [posicion for posicion in rotas if posicion in iniciadas]
+            if not sospechosas:
+                # El grupo se rompió sin empezar ningún plano (por ejemplo, al iniciar los procesos)
+                sospechosas = rotas
+            if len(sospechosas) == 1:
+                registrar(sospechosas[0], fallido(sospechosas[0], error_grupo))
+            else:
+                # Varios planos en curso: cada uno se repite en su propio proceso para aislar el que falla
+                for posicion in sospechosas:
+                    rotas_solo, _, error_solo = ronda([posicion], 1)
+                    if rotas_solo:
+                        registrar(posicion, fallido(posicion, error_solo))
+            pendientes = [posicion for posicion in rotas if posicion not in sospechosas]
+        return resultados
+
+    with contextlib.ExitStack() as pila:
+        if ruta_log:
+            log = pila.enter_context(open(ruta_log, 'w', encoding='utf-8'))
+            pila.enter_context(contextlib.redirect_stdout(log))
+            pila.enter_context(contextlib.redirect_stderr(log))
+
+        sesion = pila.enter_context(SesionCalculo(excel_path, motor_calculo, ruta_cache))
+        for posicion, (ruta, ruta_salida) in enumerate(zip(planos, rutas_salida)):
+            print(f"\n==== PLANO {posicion + 1}/{len(planos)}: {ruta} -> {ruta_salida} ====")
+            registrar(posicion, procesar_plano(sesion, ruta, ruta_salida, valores_predeterminados, modo_streaming,
+                                               procesos_analisis, incremental, exportar_perfil))
+        if sesion.sesion_excel is not None:
+            print(sesion.sesion_excel.resumen())
+
+    return resultados
+
+
+# Función para reunir los resultados de los planos en el resumen del lote
+def resumir_lote(resultados, segundos, motor_calculo=MOTOR_NATIVO, procesos=1):
+    return {
+        "planos": len(resultados),
+        "errores": sum(1 for resultado in resultados if resultado["error"]),
+        "prelosas": sum(resultado["prelosas"] for resultado in resultados),
+        "bloques": sum(resultado["bloques"] for resultado in resultados),
+        "reutilizadas": sum(resultado["reutilizadas"] for resultado in resultados),
+        "segundos": round(segundos, 3),
+        "segundos_planos": round(sum(resultado["segundos"] for resultado in resultados), 3),
+        "motor": motor_calculo,
+        "procesos": procesos,
+        "archivos": resultados,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Procesa varios planos DXF sin interfaz gráfica")
+    parser.add_argument("planos", nargs="*", help="Archivos DXF o patrones (planos/*.dxf)")
+    parser.add_argument("--lista", help="Archivo de texto con un plano o patrón por línea")
+    parser.add_argument("--salida", required=True, help="Carpeta para los DXF procesados")
+    parser.add_argument("--valores", help="JSON con los valores predeterminados por tipo de prelosa")
+    parser.add_argument("--excel", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "CONVERTIDOR.xlsx"),
+                        help="Ruta a CONVERTIDOR.xlsx")
+    parser.add_argument("--motor", choices=[MOTOR_NATIVO, MOTOR_EXCEL], default=MOTOR_NATIVO,
+                        help="Motor de cálculo de la hoja Convertidor")
+    parser.add_argument("--sin-cache-disco", action="store_true", help="Usa solo la caché en memoria")
+    parser.add_argument("--streaming", action="store_true", help="Lee los planos por streaming (planos muy grandes)")
+    parser.add_argument("--procesos", type=int, default=1,
+                        help="Procesos en paralelo (0: uno por núcleo); solo con el motor nativo")
+    parser.add_argument("--procesos-prelosas", type=int, default=1,
+                        help="Procesos para analizar las prelosas de cada plano (0: uno por núcleo); "
+                             "se usa cuando los planos se procesan en un solo proceso")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Solo recalcula las prelosas que cambiaron desde el último proceso (<salida>_huellas.json)")
+    parser.add_argument("--perfil", action="store_true",
+                        help="Guarda los tiempos por etapa de cada plano en <salida>_perfil.json")
+    parser.add_argument("--registro", choices=NIVELES, default=DETALLE,
+                        help="Mensajes del procesamiento: silencio (solo errores), resumen o detalle (por prelosa)")
+    parser.add_argument("--categorias",
+                        help="Categorías del nivel detalle separadas por comas: geometria, textos, excel, bloques "
+                             "(por defecto todas)")
+    parser.add_argument("--log", help="Archivo para los mensajes del procesamiento (por defecto <salida>/procesar_lote.log)")
+    parser.add_argument("--resumen", help="Resumen JSON de todos los planos (por defecto <salida>/resumen_lote.json)")
+    args = parser.parse_args(argv)
+
+    planos = expandir_planos(args.planos, args.lista)
+    if not planos:
+        print("No hay planos para procesar", file=sys.stderr)
+        return 2
+    valores = leer_valores_predeterminados(args.valores)
+    try:
+        configurar_registro(args.registro, leer_categorias(args.categorias))
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    procesos = args.procesos if args.procesos > 0 else (os.cpu_count() or 1)
+    procesos = min(procesos, len(planos))
+    if procesos > 1 and args.motor != MOTOR_NATIVO:
+        print("--procesos solo está disponible con el motor nativo", file=sys.stderr)
+        return 2
+
+    ruta_log = args.log or os.path.join(args.salida, "procesar_lote.log")
+    ruta_resumen = args.resumen or os.path.join(args.salida, "resumen_lote.json")
+    os.makedirs(args.salida, exist_ok=True)
+
+    inicio = time.time()
+    resultados = procesar_lote(planos, args.salida, args.excel, valores,
+                               motor_calculo=args.motor,
+                               ruta_cache=False if args.sin_cache_disco else None,
+                               modo_streaming=args.streaming,
+                               ruta_log=ruta_log, salida_json=sys.stdout, procesos=procesos,
+                               procesos_analisis=args.procesos_prelosas, incremental=args.incremental,
+                               exportar_perfil=args.perfil)
+
+    resumen = resumir_lote(resultados, time.time() - inicio, args.motor, procesos)
+    with open(ruta_resumen, 'w', encoding='utf-8') as archivo:
+        json.dump(resumen, archivo, ensure_ascii=False, indent=2)
+    print(f"{resumen['planos']} planos, {resumen['prelosas']} prelosas, {resumen['bloques']} bloques, "
+          f"{resumen['errores']} errores en {resumen['segundos']:.1f} s. Resumen: {ruta_resumen}",
+          file=sys.stderr)
+    return 1 if resumen["errores"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
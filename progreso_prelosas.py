@@ -0,0 +1,89 @@
+"""
+Eventos de progreso del procesamiento de un plano.
+
+procesar_prelosas_con_bloques acepta un receptor de progreso (cualquier función
+que reciba un EventoProgreso) y le envía, en orden:
+
+    carga       plano leído
+    prelosas    prelosas encontradas (total)
+    prelosa     prelosa terminada (actual de total), una por prelosa
+    guardado    inicio del guardado del DXF de salida
+    fin         plano terminado (bloques insertados)
+
+o "error" si el procesamiento se interrumpe. Cada evento lleva los segundos
+desde el inicio del plano, con los que se calcula la velocidad (prelosas por
+segundo) y el tiempo restante.
+
+La interfaz pasa como receptor el put de una cola y la lee desde el hilo de
+Tk con master.after.
+"""
+#time: perf_counter para los segundos desde el inicio del plano
+import time
+
+# Tipos de evento
+EVENTO_CARGA = "carga"
+EVENTO_PRELOSAS = "prelosas"
+EVENTO_PRELOSA = "prelosa"
+EVENTO_GUARDADO = "guardado"
+EVENTO_FIN = "fin"
+EVENTO_ERROR = "error"
+
+
+class EventoProgreso:
+    """Evento de progreso: tipo, prelosas terminadas y total, segundos desde el inicio."""
+
+    __slots__ = ("tipo", "actual", "total", "segundos", "bloques", "mensaje")
+
+    def __init__(self, tipo, actual=0, total=0, segundos=0.0, bloques=0, mensaje=None):
+        self.tipo = tipo
+        self.actual = actual
+        self.total = total
+        self.segundos = segundos
+        self.bloques = bloques
+        self.mensaje = mensaje
+
+    def __repr__(self):
+        return f"EventoProgreso({self.tipo!r}, {self.actual}/{self.total}, {self.segundos:.2f} s)"
+
+
+class EmisorProgreso:
+    """
+    Envía los eventos de un plano al receptor, con los segundos desde el inicio
+    y el total de prelosas. Sin receptor no hace nada.
+    """
+
+    def __init__(self, receptor=None):
+        self.receptor = receptor
+        self.inicio = time.perf_counter()
+        self.total = 0
+        self.actual = 0
+
+    def _emitir(self, tipo, **datos):
+        if self.receptor is None:
+            return
+        evento = EventoProgreso(tipo, self.actual, self.total, time.perf_counter() - self.inicio, **datos)
+        try:
+            self.receptor(evento)
+        except Exception as e:
+            # Un receptor con errores no debe interrumpir el procesamiento
+            print(f"Error en el receptor de progreso: {e}")
+
+    def carga(self):
+        self._emitir(EVENTO_CARGA)
+
+    def prelosas(self, total):
+        self.total = total
+        self._emitir(EVENTO_PRELOSAS)
+
+    def prelosa(self):
+        self.actual += 1
+        self._emitir(EVENTO_PRELOSA)
+
+    def guardado(self):
+        self._emitir(EVENTO_GUARDADO)
+
+    def fin(self, bloques):
+        self._emitir(EVENTO_FIN, bloques=bloques)
+
+    def error(self, mensaje):
+        self._emitir(EVENTO_ERROR, mensaje=mensaje)
@@ -0,0 +1,101 @@
+"""
+Mensajes del procesamiento por nivel y categoría.
+
+script.py escribe sus mensajes con el objeto consola en lugar de print:
+
+    consola.resumen("Motor de cálculo: {}", motor)        nivel resumen
+    consola.detalle(EXCEL, "  → AS_LONG: {}", as_long)    nivel detalle, por categoría
+    consola.error("Error al insertar bloque: {}", e)      siempre
+
+El mensaje se formatea (str.format con los argumentos) solo si se va a
+escribir, así que en los niveles silencio y resumen los mensajes de cada texto,
+bloque y prelosa no cuestan más que la llamada. Los niveles son:
+
+    silencio    solo errores
+    resumen     errores, avance por tipo de prelosa y resumen final
+    detalle     además, los mensajes de cada prelosa de las categorías activas
+
+Categorías del nivel detalle: geometria (polilíneas anidadas y orientación),
+textos (extracción y análisis de los textos de acero), excel (celdas y valores
+de la hoja Convertidor) y bloques (bloque de referencia e inserción).
+
+La configuración es del proceso (configurar_registro); los procesos de análisis
+reciben la del proceso principal con configuracion_registro().
+"""
+
+# Niveles
+SILENCIO = "silencio"
+RESUMEN = "resumen"
+DETALLE = "detalle"
+NIVELES = (SILENCIO, RESUMEN, DETALLE)
+
+# Categorías del nivel detalle
+GEOMETRIA = "geometria"
+TEXTOS = "textos"
+EXCEL = "excel"
+BLOQUES = "bloques"
+CATEGORIAS = (GEOMETRIA, TEXTOS, EXCEL, BLOQUES)
+
+
+class Consola:
+    """Escribe con print (sys.stdout del momento) los mensajes del nivel y las categorías activas."""
+
+    def __init__(self):
+        self.nivel = DETALLE
+        self.categorias = frozenset(CATEGORIAS)
+        # Categorías que se escriben (vacío fuera del nivel detalle)
+        self.activas = self.categorias
+        self.con_resumen = True
+
+    def configurar(self, nivel=DETALLE, categorias=None):
+        """
+        Args:
+            nivel: silencio, resumen o detalle
+            categorias: Categorías del nivel detalle (None: todas)
+        """
+        if nivel not in NIVELES:
+            raise ValueError(f"Nivel de registro no válido: {nivel} (opciones: {', '.join(NIVELES)})")
+        categorias = frozenset(CATEGORIAS if categorias is None else categorias)
+        desconocidas = categorias - set(CATEGORIAS)
+        if desconocidas:
+            raise ValueError(f"Categorías de registro no válidas: {', '.join(sorted(desconocidas))} "
+                             f"(opciones: {', '.join(CATEGORIAS)})")
+        self.nivel = nivel
+        self.categorias = categorias
+        self.activas = categorias if nivel == DETALLE else frozenset()
+        self.con_resumen = nivel != SILENCIO
+
+    # Función para saber si se escriben los mensajes de una categoría (para omitir trabajo previo)
+    def activo(self, categoria):
+        return categoria in self.activas
+
+    def detalle(self, categoria, mensaje, *args):
+        if categoria in self.activas:
+            print(mensaje.format(*args) if args else mensaje)
+
+    def resumen(self, mensaje, *args):
+        if self.con_resumen:
+            print(mensaje.format(*args) if args else mensaje)
+
+    def error(self, mensaje, *args):
+        print(mensaje.format(*args) if args else mensaje)
+
+
+# Consola compartida por los módulos del procesamiento
+consola = Consola()
+
+
+def configurar_registro(nivel=DETALLE, categorias=None):
+    consola.configurar(nivel, categorias)
+
+
+# Función para pasar la configuración a otro proceso (configurar_registro(*configuracion))
+def configuracion_registro():
+    return consola.nivel, tuple(sorted(consola.categorias))
+
+
+# Función para leer una lista de categorías separadas por comas (línea de comandos)
+def leer_categorias(texto):
+    if texto is None:
+        return None
+    return [categoria.strip().lower() for categoria in texto.split(",") if categoria.strip()]
@@ -1,18 +1,51 @@
 
 #ezdxf: sirve para leer y escribir archivos DXF
 import ezdxf
+#Attrib, factory: copias de los atributos del bloque de acero sin volver a validarlos
+from ezdxf.entities import Attrib
+from ezdxf.entities import factory as entity_factory
 #shapely: sirve para trabajar con geometría y realizar operaciones espaciales
-from shapely.geometry import Point, Polygon, LineString  
+from shapely.geometry import Point, Polygon, LineString, box
+#STRtree: índice espacial para consultar solo las entidades cercanas a una polilínea
+import shapely
+from shapely import STRtree
+#numpy: operaciones vectorizadas sobre los puntos de inserción
+import numpy as np
 #re: sirve para trabajar con expresiones regulares
 import re
 #os: sirve para interactuar con el sistema operativo
 import os
 #sys: proporciona acceso a variables y funciones que interactúan con el intérprete de Python
 import sys
+#convertidor: motor de cálculo de la hoja Convertidor (nativo o Excel)
+from convertidor import abrir_convertidor, medir_convertidor, MOTOR_NATIVO, MOTOR_EXCEL
+#cache_resultados: reutiliza los resultados de prelosas con las mismas entradas
+from cache_resultados import crear_cache
+#lector_streaming: lectura por streaming de planos muy grandes (modo opcional)
+from lector_streaming import DocumentoStreaming
+#perfil_etapas: tiempos y llamadas de cada etapa del procesamiento
+from perfil_etapas import (PerfilEtapas, ETAPA_CARGA, ETAPA_APERTURA_CONVERTIDOR, ETAPA_RECOPILACION,
+                           ETAPA_POLILINEAS, ETAPA_TEXTOS, ETAPA_ACERO, ETAPA_ESPACIAMIENTO, ETAPA_INSERCION,
+                           ETAPA_ELIMINACION, ETAPA_GUARDADO)
+#registro_mensajes: mensajes por nivel (silencio, resumen, detalle) y categoría, formateados solo si se escriben
+from registro_mensajes import (consola, configurar_registro, configuracion_registro,
+                               GEOMETRIA, TEXTOS, EXCEL, BLOQUES)
+#progreso_prelosas: eventos de progreso para la interfaz (carga, prelosas, guardado, fin)
+from progreso_prelosas import EmisorProgreso
+#huellas_prelosas: reprocesamiento incremental (solo se recalculan las prelosas que cambiaron)
+from huellas_prelosas import HuellasPrelosas, huella_prelosa, huella_contexto, ruta_huellas
+#especificacion_acero: gramática precompilada de los textos de acero (1Ø3/8"@.20, #3, M6...)
+from especificacion_acero import (validar_formato_texto, es_formato_acero_valido, clasificar_fragmento,
+                                  limpiar_formato_dxf, convertir_diametro,
+                                  diametro_maciza, diametro_aligerada, CacheEspecificaciones)
+
+#heapq: sirve para unir listas ya ordenadas manteniendo el orden del dibujo
+import heapq
 #traceback: permite extraer, formatear y imprimir información sobre excepciones
-import xlwings as xw
-
 import traceback
+#contextlib, io: capturan los mensajes de cada prelosa analizada en otro proceso
+import contextlib
+import io
 import time
 import random
 
@@ -27,185 +60,330 @@ if os.name == 'nt':
     except Exception:
         pass
 
-# Función para reemplazar caracteres especiales
-def reemplazar_caracteres_especiales(texto):
-    texto = texto.replace("%%C", "∅")
-    texto = texto.replace("\\A1;", "")  # Eliminar \A1; que aparece en algunos textos
-    texto = re.sub(r'\\[A-Za-z0-9]+;', '', texto)
-    return texto
+# Catálogo de las entidades del modelo construido en un solo recorrido
+class CatalogoEntidades:
+    """
+    Índices de las entidades del modelo por (tipo, capa) y por capa en mayúsculas.
+
+    Las consultas devuelven las entidades en el orden del dibujo. Las entidades
+    agregadas al modelo después de construirlo se registran con agregar().
+    """
+
+    def __init__(self, msp):
+        self.entidades = []
+        # (tipo, capa) -> posiciones en self.entidades
+        self.por_tipo_capa = {}
+        # CAPA EN MAYÚSCULAS -> posiciones en self.entidades
+        self.por_capa_mayusculas = {}
+        for entidad in msp:
+            self.agregar(entidad)
+
+    # Función para registrar una entidad (por ejemplo, un bloque insertado después de construir el catálogo)
+    def agregar(self, entidad):
+        posicion = len(self.entidades)
+        self.entidades.append(entidad)
+        capa = getattr(entidad.dxf, 'layer', None)
+        self.por_tipo_capa.setdefault((entidad.dxftype(), capa), []).append(posicion)
+        if capa is not None:
+            self.por_capa_mayusculas.setdefault(capa.upper(), []).append(posicion)
+
+    def __len__(self):
+        return len(self.entidades)
+
+    def _unir(self, listas_posiciones):
+        return [self.entidades[posicion] for posicion in heapq.merge(*listas_posiciones)]
+
+    # Función para obtener las entidades de uno o varios tipos (ej. 'TEXT', 'MTEXT')
+    def de_tipo(self, *tipos):
+        return self._unir([posiciones for (tipo, _), posiciones in self.por_tipo_capa.items() if tipo in tipos])
+
+    # Función para obtener las entidades de un tipo en las capas indicadas (nombre exacto)
+    def de_tipo_y_capas(self, tipo, capas):
+        return self._unir([self.por_tipo_capa.get((tipo, capa), []) for capa in set(capas)])
+
+    # Función para obtener las entidades de cualquier tipo en las capas indicadas (nombre exacto)
+    def de_capas(self, capas):
+        capas = set(capas)
+        return self._unir([posiciones for (_, capa), posiciones in self.por_tipo_capa.items() if capa in capas])
+
+    # Función para obtener las entidades cuya capa en mayúsculas contiene el texto indicado
+    def de_capa_que_contiene(self, texto):
+        texto = texto.upper()
+        return self._unir([posiciones for capa, posiciones in self.por_capa_mayusculas.items() if texto in capa])
+
+
+# Registro compacto de un TEXT, MTEXT o INSERT: cada entidad se lee una sola vez
+class RegistroTexto:
+    __slots__ = ('handle', 'tipo', 'capa', 'x', 'y', 'texto', 'nombre', 'atributos')
+
+    def __init__(self, entidad, normalizar=validar_formato_texto):
+        self.handle = entidad.dxf.handle
+        self.tipo = entidad.dxftype()
+        self.capa = sys.intern(entidad.dxf.layer)
+        insercion = entidad.dxf.insert
+        self.x = insercion[0]
+        self.y = insercion[1]
+        # Texto ya normalizado con validar_formato_texto (o la caché de la ejecución)
+        self.texto = ""
+        # Solo INSERT: nombre del bloque y atributos (etiqueta, texto normalizado)
+        self.nombre = None
+        self.atributos = ()
+        if self.tipo == 'MTEXT':
+            self.texto = normalizar(entidad.text)
+        elif self.tipo == 'TEXT':
+            self.texto = normalizar(entidad.dxf.text)
+        else:
+            self.nombre = entidad.dxf.name
+            self.atributos = tuple((attrib.dxf.tag, normalizar(attrib.dxf.text))
+                                   for attrib in entidad.attribs)
+
+    def __repr__(self):
+        return f"RegistroTexto({self.tipo}, {self.handle}, {self.texto or self.nombre!r})"
+
+
+# Función para extraer los registros de los textos y bloques (los registros ya extraídos se conservan)
+def registros_de_textos(textos, normalizar=validar_formato_texto):
+    return [elemento if isinstance(elemento, RegistroTexto) else RegistroTexto(elemento, normalizar)
+            for elemento in textos
+            if isinstance(elemento, RegistroTexto) or elemento.dxftype() in ['TEXT', 'MTEXT', 'INSERT']]
+
+
+# Registro compacto de una LWPOLYLINE: sus vértices están en el arreglo de PolilineasCompactas
+class RegistroPolilinea:
+    __slots__ = ('handle', 'capa', 'indice', 'almacen')
+
+    def __init__(self, handle, capa, indice, almacen):
+        self.handle = handle
+        self.capa = capa
+        self.indice = indice
+        self.almacen = almacen
+
+    # Vértices (x, y) como vista del arreglo float64 compartido
+    @property
+    def vertices(self):
+        desplazamientos = self.almacen.desplazamientos
+        return self.almacen.vertices[desplazamientos[self.indice]:desplazamientos[self.indice + 1]]
+
+    def __repr__(self):
+        return f"RegistroPolilinea({self.capa!r}, {self.handle})"
+
+
+# Vértices de varias polilíneas en un solo arreglo float64 (n, 2) con los desplazamientos de cada una
+class PolilineasCompactas:
+    def __init__(self, polilineas):
+        self.registros = []
+        bloques = []
+        desplazamientos = [0]
+        for polilinea in polilineas:
+            puntos = np.array(polilinea.get_points('xy'), dtype=np.float64).reshape(-1, 2)
+            bloques.append(puntos)
+            desplazamientos.append(desplazamientos[-1] + len(puntos))
+            self.registros.append(
+                RegistroPolilinea(polilinea.dxf.handle, sys.intern(polilinea.dxf.layer), len(self.registros), self)
+            )
+        self.vertices = np.concatenate(bloques) if bloques else np.empty((0, 2), dtype=np.float64)
+        self.desplazamientos = np.array(desplazamientos, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.registros)
+
+    def poligonos(self, registros):
+        """
+        Polígonos de los registros construidos de una vez con shapely a partir del
+        arreglo plano. Todos los registros deben tener al menos 3 vértices.
+        """
+        if not registros:
+            return np.array([], dtype=object)
+        indices = np.array([registro.indice for registro in registros], dtype=np.int64)
+        inicios = self.desplazamientos[indices]
+        cuentas = self.desplazamientos[indices + 1] - inicios
+        # Posición de cada vértice en self.vertices, polilínea por polilínea
+        salida = np.cumsum(cuentas) - cuentas
+        posiciones = np.arange(cuentas.sum()) + np.repeat(inicios - salida, cuentas)
+        anillos = shapely.linearrings(self.vertices[posiciones],
+                                      indices=np.repeat(np.arange(len(indices)), cuentas))
+        return shapely.polygons(anillos)
+
+
+# Tolerancia máxima para bloques cercanos a la polilínea (1.0 general, 1.5 para bloques de acero)
+TOLERANCIA_MAXIMA_BLOQUES = 1.5
+
+
+# Función para obtener la tolerancia de un bloque según su nombre (1.5 si parece de acero)
+def tolerancia_bloque(elemento):
+    if elemento.nombre:
+        nombre_bloque = elemento.nombre.upper()
+        if any(term in nombre_bloque for term in ['ACERO', 'REFUERZO', 'ARMADURA', 'BARRA']):
+            return 1.5
+    return 1.0
+
+
+# Índice espacial de los puntos de inserción de textos y bloques (se construye una vez por documento)
+class IndiceTextos:
+    def __init__(self, textos, normalizar=validar_formato_texto):
+        # Solo TEXT, MTEXT e INSERT tienen punto de inserción y se analizan por posición
+        self.textos = registros_de_textos(textos, normalizar)
+        self.puntos = shapely.points(
+            np.array([(elemento.x, elemento.y) for elemento in self.textos], dtype=float).reshape(-1, 2)
+        )
+        self.arbol = STRtree(self.puntos)
+        # Polilínea de acero -> entidades asignadas (ver asignar)
+        self.asignaciones = {}
+
+    def __len__(self):
+        return len(self.textos)
+
+    # Función para obtener los elementos cuyo punto de inserción cae en el rectángulo
+    # envolvente del polígono ampliado por la tolerancia (en el orden original)
+    def candidatos(self, poligono, tolerancia=0.0):
+        min_x, min_y, max_x, max_y = poligono.bounds
+        zona = box(min_x - tolerancia, min_y - tolerancia, max_x + tolerancia, max_y + tolerancia)
+        return [self.textos[i] for i in sorted(self.arbol.query(zona))]
+
+    def asignar(self, polilineas, poligonos=None):
+        """
+        Asigna en un solo paso los textos y bloques a todas las polilíneas de acero.
+
+        Un TEXT/MTEXT pertenece a la polilínea si esta contiene su punto de
+        inserción; un INSERT si está a menos de su tolerancia (1.0 o 1.5). Las
+        polilíneas que no forman un polígono válido quedan sin asignación y se
+        procesan como antes. poligonos: polígonos ya construidos (IndicePolilineas).
+        """
+        if poligonos is not None:
+            validas = list(polilineas)
+            poligonos = list(poligonos)
+        else:
+            validas = []
+            poligonos = []
+            for polilinea in polilineas:
+                try:
+                    poligonos.append(Polygon(polilinea.vertices))
+                    validas.append(polilinea)
+                except (ValueError, shapely.errors.GEOSException):
+                    continue
+
+        self.asignaciones = {polilinea: [] for polilinea in validas}
+        if not validas or not self.textos:
+            return
+
+        poligonos = np.array(poligonos, dtype=object)
+        es_bloque = np.array([elemento.tipo == 'INSERT' for elemento in self.textos])
+        tolerancias = np.array([tolerancia_bloque(elemento) if bloque else 0.0
+                                for elemento, bloque in zip(self.textos, es_bloque)])
+
+        # Textos: punto de inserción contenido en la polilínea
+        indices_poligono, indices_texto = self.arbol.query(poligonos, predicate='contains')
+        filtro = ~es_bloque[indices_texto]
+        pares = [(indices_poligono[filtro], indices_texto[filtro])]
+
+        # Bloques: distancia menor que la tolerancia (los puntos interiores tienen distancia 0)
+        indices_poligono, indices_texto = self.arbol.query(
+            poligonos, predicate='dwithin', distance=TOLERANCIA_MAXIMA_BLOQUES
+        )
+        filtro = es_bloque[indices_texto]
+        indices_poligono, indices_texto = indices_poligono[filtro], indices_texto[filtro]
+        distancias = shapely.distance(poligonos[indices_poligono], self.puntos[indices_texto])
+        filtro = distancias < tolerancias[indices_texto]
+        pares.append((indices_poligono[filtro], indices_texto[filtro]))
+
+        indices_poligono = np.concatenate([par[0] for par in pares])
+        indices_texto = np.concatenate([par[1] for par in pares])
+        # Mantener el orden original de las entidades dentro de cada polilínea
+        orden = np.lexsort((indices_texto, indices_poligono))
+        for i_poligono, i_texto in zip(indices_poligono[orden], indices_texto[orden]):
+            self.asignaciones[validas[i_poligono]].append(self.textos[i_texto])
+
+
+# Textos de acero dentro de las definiciones de bloque (se leen una vez por nombre de bloque)
+class IndiceBloques:
+    def __init__(self, doc, normalizar=validar_formato_texto, textos_por_bloque=None):
+        """
+        doc: documento con las definiciones de bloque (None: solo se usan los
+        textos_por_bloque ya leídos, como en los procesos de análisis).
+        """
+        self.bloques = doc.blocks if doc is not None else {}
+        self.normalizar = normalizar
+        # Nombre del bloque en mayúsculas -> tupla de textos de acero normalizados
+        self.textos_por_bloque = dict(textos_por_bloque or {})
+
+    def textos(self, nombre):
+        clave = nombre.upper()
+        textos = self.textos_por_bloque.get(clave)
+        if textos is None:
+            textos = self._leer_definicion(nombre)
+            self.textos_por_bloque[clave] = textos
+        return textos
+
+    # TEXT y MTEXT de la definición con formato válido de acero
+    def _leer_definicion(self, nombre):
+        definicion = self.bloques.get(nombre)
+        if definicion is None:
+            return ()
+        textos = []
+        for entidad in definicion:
+            tipo = entidad.dxftype()
+            try:
+                if tipo == 'MTEXT':
+                    texto_bloque = entidad.text
+                elif tipo == 'TEXT':
+                    texto_bloque = entidad.dxf.text
+                else:
+                    continue
+            except Exception as e:
+                consola.error("Error al extraer texto del bloque {}: {}", nombre, str(e))
+                continue
+            texto_formateado = self.normalizar(texto_bloque)
+            if texto_formateado.strip() and es_formato_acero_valido(texto_formateado):
+                textos.append(texto_formateado)
+            else:
+                consola.detalle(TEXTOS, "Texto de bloque descartado (formato no válido): {}", texto_formateado)
+        return tuple(textos)
+
 
-def obtener_textos_dentro_de_polilinea(polilinea, textos, capa_polilinea=None):
+def obtener_textos_dentro_de_polilinea(polilinea, textos, capa_polilinea=None, ya_asignados=False, bloques=None):
+    """
+    textos: lista de entidades, registros (RegistroTexto) o IndiceTextos; con el
+    índice solo se revisan las entidades cercanas a la polilínea (mismo resultado
+    que con la lista).
+    capa_polilinea: capa de la polilínea (se acepta por compatibilidad, no cambia
+    el resultado).
+    ya_asignados: los textos vienen de IndiceTextos.asignar y no se vuelve a
+    comprobar su posición.
+    bloques: IndiceBloques con los textos de las definiciones de bloque (None: no
+    se revisa el interior de los bloques).
+    """
     vertices = [(p[0], p[1]) for p in polilinea]
     poligono = Polygon(vertices)
-    textos_en_polilinea = []
-    
-    # NUEVO: Lista para almacenar textos potencialmente fragmentados
-    textos_fragmentados = []
-    
-    # Determinar orientación de la polilínea
-    xs = [v[0] for v in vertices]
-    ys = [v[1] for v in vertices]
-    ancho = max(xs) - min(xs)
-    alto = max(ys) - min(ys)
-    es_vertical = alto > ancho
-    
-    # Determinar tipo de acero basado en la capa
-    tipo_acero = "INDETERMINADO"
-    if capa_polilinea:
-        capa = capa_polilinea.upper()
-        if "LONG ADI" in capa:
-            tipo_acero = "LONG_ADI"
-        elif "TRA ADI" in capa:
-            tipo_acero = "TRA_ADI"
-        elif "LONGITUDINAL" in capa:
-            tipo_acero = "LONGITUDINAL"
-        elif "TRANSVERSAL" in capa:
-            tipo_acero = "TRANSVERSAL"
-
-    # Notaciones alternativas de diámetros que son válidas
-    conversion_diametros = {
-        "M6": "6mm",
-        "M8": "8mm",
-        "#3": "3/8\"",
-        "#4": "1/2\"",
-        "#5": "5/8\""
-    }
-
-    def validar_formato_texto(texto):
-        # Función existente sin cambios
-        if texto is None:
-            return ""
-        # Reemplazar caracteres especiales básicos
-        texto = reemplazar_caracteres_especiales(texto)
-        
-        # Cambiar comillas simples '' por comillas rectas "
-        texto = texto.replace("''", '"')
-        
-        # Validación de diámetro con unidades (Ej: 1Ø8mm@.20)
-        # Agregar espacio entre número y unidad si no existe
-        texto = re.sub(r'(\d+)Ø(\d+)mm', r'\1Ø \2 mm', texto)
-        
-        # Validación de comillas
-        # Asegurar que las comillas sean rectas " en lugar de curvas
-        texto = texto.replace('"', '"').replace('"', '"')
-        
-        return texto
-    
-    # NUEVA FUNCIÓN: Verificar si el texto tiene un formato válido para especificación de acero
-    def es_formato_acero_valido(texto):
-        # Si está vacío, no es válido
-        if not texto or texto.strip() == "":
-            return False
-        
-        # Verificar notaciones alternativas directas (como M6, M8, #3, etc.)
-        # Si el texto es exactamente una de estas notaciones, es válido
-        for notacion in conversion_diametros.keys():
-            if notacion in texto:
-                return True
-        
-        # Patrones comunes para especificaciones de acero
-        patrones = [
-            # 1Ø3/8", 1Ø1/2", etc.
-            r'\d+Ø[\d/]+"',
-            # 1Ø8mm, 1Ø6mm, etc.
-            r'\d+Ø\d+\s*mm',
-            # 1∅3/8", 1∅1/2", etc.
-            r'\d+∅[\d/]+"',
-            # 1∅8mm, 1∅6mm, etc.
-            r'\d+∅\d+\s*mm',
-            # Formatos con espaciamiento: @.20, @20, etc.
-            r'@[.,]?\d+',
-            # Formatos como #3, #4, etc.
-            r'#\d+',
-            # Formatos como M6, M8, etc.
-            r'M\d+',
-            # Notación de diámetro simple: 3/8", 1/2", etc.
-            r'[\d/]+"',
-            # Notación de diámetro simple en mm: 6mm, 8mm, etc.
-            r'\d+\s*mm',
-            # Asegurar que contenga al menos un símbolo de diámetro (Ø o ∅)
-            r'[Ø∅]'
-        ]
-        
-        # Si el texto cumple con alguno de los patrones, es válido
-        for patron in patrones:
-            if re.search(patron, texto):
-                return True
-        
-        # NUEVA COMPROBACIÓN: Si el texto contiene caracteres especiales como paréntesis
-        # y no cumple con ningún patrón anterior, probablemente no sea una especificación de acero
-        if any(c in texto for c in "(){}[]<>*"):
-            return False
-        
-        # Verificar si contiene un número seguido inmediatamente de un Ø o ∅
-        if re.search(r'\d+[Ø∅]', texto):
-            return True
-        
-        # Por defecto, si no se detectaron patrones claros, ser conservador y rechazar el texto
-        return False
-    
-    # NUEVO: Función para limpiar y normalizar el símbolo del diámetro en formato especial
-    def limpiar_simbolo_diametro(texto):
-        # Si el texto contiene un símbolo de diámetro con formato especial
-        if re.search(r'\\f.*Symbol.*[Ø∅]', texto):
-            # Intentar extraer solo el símbolo
-            return "Ø"
-        return texto
-    
-    # NUEVO: Función para identificar si un texto es un número, símbolo de diámetro o medida
-    def clasificar_fragmento(texto):
-        texto = texto.strip()
-        # Es un formato especial de símbolo de diámetro
-        if re.search(r'\\f.*Symbol.*[Ø∅]', texto):
-            return "SIMBOLO_ESPECIAL"
-        # Es un número solo
-        elif re.match(r'^\d+$', texto):
-            return "NUMERO"
-        # Es un símbolo de diámetro solo
-        elif texto in ["Ø", "∅"]:
-            return "SIMBOLO"
-        # Es una medida (con pulgadas o mm)
-        elif re.match(r'^[\d/]+"', texto) or re.match(r'^\d+\s*mm', texto) or "(Inf.)" in texto:
-            return "MEDIDA"
-        # Es una notación completa con (Inf.)
-        elif "Inf" in texto and ("3/8" in texto or "1/2" in texto):
-            return "MEDIDA_COMPLETA"
-        # No es ninguno de los anteriores
-        return "OTRO"
+    if isinstance(textos, IndiceTextos):
+        textos = textos.candidatos(poligono, TOLERANCIA_MAXIMA_BLOQUES)
+    else:
+        textos = registros_de_textos(textos)
 
     # Recorremos todos los elementos para recopilar los textos y sus posiciones
     textos_detallados = []
     
     # NUEVO: Procesar primero el caso especial del símbolo con formato especial
     tiene_simbolo_especial = False
-    simbolo_especial_pos = None
     
     # Primera pasada: recopilar todos los textos y sus posiciones
     for elemento in textos:
         # Procesar textos normales (TEXT, MTEXT)
-        if elemento.dxftype() in ['TEXT', 'MTEXT']:
-            punto_texto = Point(elemento.dxf.insert)
-            if poligono.contains(punto_texto):
-                if elemento.dxftype() == 'MTEXT':
-                    texto_contenido = elemento.text
-                else:
-                    texto_contenido = elemento.dxf.text
-                
-                # Aplicar validaciones de formato
-                texto_formateado = validar_formato_texto(texto_contenido)
+        if elemento.tipo in ['TEXT', 'MTEXT']:
+            if ya_asignados or poligono.contains(Point(elemento.x, elemento.y)):
+                # Texto ya normalizado al extraer el registro
+                texto_formateado = elemento.texto
                 
                 # Identificar símbolos especiales
                 tipo = clasificar_fragmento(texto_formateado)
                 if tipo == "SIMBOLO_ESPECIAL":
                     tiene_simbolo_especial = True
-                    simbolo_especial_pos = (elemento.dxf.insert[0], elemento.dxf.insert[1])
                 
                 # Almacenar el texto y su posición
                 if texto_formateado.strip():
                     textos_detallados.append({
                         'texto': texto_formateado,
-                        'x': elemento.dxf.insert[0],
-                        'y': elemento.dxf.insert[1],
+                        'x': elemento.x,
+                        'y': elemento.y,
                         'tipo': tipo,
                         'procesado': False
                     })
@@ -233,7 +411,7 @@ def obtener_textos_dentro_de_polilinea(polilinea, textos, capa_polilinea=None):
             
             # Crear la especificación completa: cantidad + símbolo + medida
             especificacion = f"{cantidad}Ø{medida['texto']}"
-            print(f"Formando especificación combinada: {especificacion}")
+            consola.detalle(TEXTOS, "Formando especificación combinada: {}", especificacion)
             textos_procesados.append(especificacion)
             medida['procesado'] = True
         
@@ -261,7 +439,7 @@ def obtener_textos_dentro_de_polilinea(polilinea, textos, capa_polilinea=None):
         for medida in medidas:
             # Añadir la medida con un "1Ø" prefijado
             textos_procesados.append(f"1Ø{medida['texto']}")
-            print(f"Forzando combinación para medida: 1Ø{medida['texto']}")
+            consola.detalle(TEXTOS, "Forzando combinación para medida: 1Ø{}", medida['texto'])
             medida['procesado'] = True
     
     # Ahora procesar normalmente para capturar los casos que no son textos fragmentados
@@ -270,105 +448,48 @@ def obtener_textos_dentro_de_polilinea(polilinea, textos, capa_polilinea=None):
     # Recorremos todos los elementos
     for elemento in textos:
         # Procesar textos normales (TEXT, MTEXT) - ya los procesamos arriba
-        if elemento.dxftype() in ['TEXT', 'MTEXT']:
+        if elemento.tipo in ['TEXT', 'MTEXT']:
             continue  # Ya procesado arriba
         
         # MEJORA PARA BLOQUES: Detectar bloques incluso si solo intersectan parcialmente
-        elif elemento.dxftype() == 'INSERT':
-            punto_bloque = Point(elemento.dxf.insert)
-            
+        elif elemento.tipo == 'INSERT':
             # Criterios más flexibles para bloques:
             # 1. Si el punto de inserción está dentro
-            # 2. Si está muy cerca de la polilínea (distancia < 3.0 unidades)
+            # 2. Si está muy cerca de la polilínea (tolerancia de 1.0, o 1.5 para bloques de acero)
             # 3. Si el bloque es relevante para el tipo de acero (basado en el nombre del bloque)
-            
-            # Aumentamos la tolerancia para capturar bloques incluso si están parcialmente fuera
-            tolerancia_bloques = 1.0  # Unidades del dibujo
-            
-            # Verificar si el bloque es relevante por su nombre (si disponible)
-            es_bloque_acero = False
-            if hasattr(elemento.dxf, 'name'):
-                nombre_bloque = elemento.dxf.name.upper()
-                es_bloque_acero = any(term in nombre_bloque for term in ['ACERO', 'REFUERZO', 'ARMADURA', 'BARRA'])
-            
-            # Aumentar tolerancia si parece ser un bloque de acero
-            if es_bloque_acero:
-                tolerancia_bloques = 1.5  # Mayor tolerancia para bloques específicos de acero
+            tolerancia_bloques = tolerancia_bloque(elemento)
             
             # Verificar si el bloque intersecta con la polilínea
-            if (poligono.contains(punto_bloque) or 
-                poligono.distance(punto_bloque) < tolerancia_bloques):
+            if ya_asignados or poligono.distance(Point(elemento.x, elemento.y)) < tolerancia_bloques:
                 
-                print(f"Analizando bloque en posición ({elemento.dxf.insert[0]}, {elemento.dxf.insert[1]})")
+                consola.detalle(TEXTOS, "Analizando bloque en posición ({}, {})", elemento.x, elemento.y)
                 
-                # NUEVO: Intentar extraer texto directamente del contenido del bloque
-                try:
-                    # Si el bloque tiene una definición y contiene textos
-                    if hasattr(elemento, 'block') and elemento.block is not None:
-                        for entidad in elemento.block:
-                            if entidad.dxftype() in ['TEXT', 'MTEXT']:
-                                try:
-                                    if entidad.dxftype() == 'MTEXT':
-                                        texto_bloque = entidad.text
-                                    else:
-                                        texto_bloque = entidad.dxf.text
-                                        
-                                    texto_formateado = validar_formato_texto(texto_bloque)
-                                    # NUEVO: Validar formato de acero
-                                    if texto_formateado.strip() and es_formato_acero_valido(texto_formateado):
-                                        print(f"Texto extraído del interior del bloque: {texto_formateado}")
-                                        textos_procesados.append(texto_formateado)
-                                    else:
-                                        print(f"Texto de bloque descartado (formato no válido): {texto_formateado}")
-                                except Exception as e:
-                                    print(f"Error al extraer texto del bloque: {str(e)}")
-                except Exception as e:
-                    print(f"Error al examinar contenido del bloque: {str(e)}")
+                # Textos de acero del interior de la definición del bloque (se leen una vez por bloque)
+                if bloques is not None and elemento.nombre:
+                    for texto_formateado in bloques.textos(elemento.nombre):
+                        consola.detalle(TEXTOS, "Texto extraído del interior del bloque: {}", texto_formateado)
+                        textos_procesados.append(texto_formateado)
                 
-                # Procesamiento de atributos (sin cambios)
+                # Procesamiento de atributos (etiqueta, texto normalizado) guardados en el registro
                 atributos_encontrados = False
-                
-                # Método 1: Obtener atributos usando .attribs
-                try:
-                    if hasattr(elemento, 'attribs'):
-                        for attrib in elemento.attribs:
-                            if hasattr(attrib.dxf, 'tag') and hasattr(attrib.dxf, 'text'):
-                                # Filtrar atributos relevantes
-                                if attrib.dxf.tag in ['ACERO', 'AS_LONG', 'AS_TRA1', 'AS_TRA2']:
-                                    texto_contenido = attrib.dxf.text
-                                    texto_formateado = validar_formato_texto(texto_contenido)
-                                    # NUEVO: Validar formato de acero
-                                    if texto_formateado.strip() and es_formato_acero_valido(texto_formateado):
-                                        print(f"Encontrado atributo en bloque: {attrib.dxf.tag} = {texto_formateado}")
-                                        textos_procesados.append(texto_formateado)
-                                        atributos_encontrados = True
-                                    else:
-                                        print(f"Atributo descartado (formato no válido): {texto_formateado}")
-                except Exception as e:
-                    print(f"Error al procesar atributos (método 1): {str(e)}")
-                
-                # Método 3: Usar get_attribs si está disponible
-                try:
-                    if hasattr(elemento, 'get_attribs'):
-                        for attrib in elemento.get_attribs():
-                            if hasattr(attrib.dxf, 'tag') and hasattr(attrib.dxf, 'text'):
-                                if attrib.dxf.tag in ['ACERO', 'AS_LONG', 'AS_TRA1', 'AS_TRA2']:
-                                    texto_contenido = attrib.dxf.text
-                                    texto_formateado = validar_formato_texto(texto_contenido)
-                                    # NUEVO: Validar formato de acero
-                                    if texto_formateado.strip() and es_formato_acero_valido(texto_formateado):
-                                        print(f"Encontrado atributo (método 3): {attrib.dxf.tag} = {texto_formateado}")
-                                        textos_procesados.append(texto_formateado)
-                                        atributos_encontrados = True
-                                    else:
-                                        print(f"Atributo descartado (método 3, formato no válido): {texto_formateado}")
-                except Exception as e:
-                    print(f"Error al procesar atributos (método 3): {str(e)}")
+                for etiqueta, texto_formateado in elemento.atributos:
+                    # Filtrar atributos relevantes
+                    if etiqueta in ['ACERO', 'AS_LONG', 'AS_TRA1', 'AS_TRA2']:
+                        # NUEVO: Validar formato de acero
+                        if texto_formateado.strip() and es_formato_acero_valido(texto_formateado):
+                            consola.detalle(TEXTOS, "Encontrado atributo en bloque: {} = {}",
+                                            etiqueta, texto_formateado)
+                            textos_procesados.append(texto_formateado)
+                            atributos_encontrados = True
+                        else:
+                            consola.detalle(TEXTOS, "Atributo descartado (formato no válido): {}", texto_formateado)
                 
                 if atributos_encontrados:
-                    print(f"=> Se encontraron atributos en bloque en posición ({elemento.dxf.insert[0]}, {elemento.dxf.insert[1]})")
+                    consola.detalle(TEXTOS, "=> Se encontraron atributos en bloque en posición ({}, {})",
+                                    elemento.x, elemento.y)
                 else:
-                    print(f"No se encontraron atributos relevantes en bloque en posición ({elemento.dxf.insert[0]}, {elemento.dxf.insert[1]})")
+                    consola.detalle(TEXTOS, "No se encontraron atributos relevantes en bloque en posición ({}, {})",
+                                    elemento.x, elemento.y)
 
     # Eliminar posibles duplicados manteniendo el orden
     textos_en_polilinea = []
@@ -376,64 +497,116 @@ def obtener_textos_dentro_de_polilinea(polilinea, textos, capa_polilinea=None):
         if texto not in textos_en_polilinea:
             textos_en_polilinea.append(texto)
     
-    print(f"Total de {len(textos_en_polilinea)} textos/atributos encontrados dentro de la polilínea")
+    consola.detalle(TEXTOS, "Total de {} textos/atributos encontrados dentro de la polilínea", len(textos_en_polilinea))
     return textos_en_polilinea
+# Capas válidas de acero (case-insensitive) para las polilíneas dentro de una prelosa
+CAPAS_ACERO_VALIDAS = [
+    "ACERO LONGITUDINAL", 
+    "ACERO TRANSVERSAL", 
+    "BD-ACERO LONGITUDINAL", 
+    "BD-ACERO TRANSVERSAL",
+    "ACERO LONG ADI",
+    "ACERO TRA ADI"
+]
+
+
+# Polígonos de las polilíneas de acero, construidos una vez por documento e indexados con STRtree
+class IndicePolilineas:
+    def __init__(self, polilineas):
+        """
+        polilineas: registros de PolilineasCompactas o entidades LWPOLYLINE (se
+        convierten a registros).
+        """
+        polilineas = list(polilineas)
+        if not all(isinstance(polilinea, RegistroPolilinea) for polilinea in polilineas):
+            polilineas = PolilineasCompactas(polilineas).registros
+        self.capas = set()
+        self.polilineas = []
+        for polilinea in polilineas:
+            self.capas.add(polilinea.capa)
+            # Filtrar por capas de acero (case-insensitive)
+            capa_polilinea = polilinea.capa.upper()
+            if not any(capa_acero.upper() in capa_polilinea for capa_acero in CAPAS_ACERO_VALIDAS):
+                continue
+            # Con menos de 3 vértices no hay polígono (Polygon informa el error)
+            if len(polilinea.vertices) < 3:
+                try:
+                    Polygon(polilinea.vertices)
+                except Exception as e:
+                    consola.error("Error al procesar polilínea: {}", e)
+                continue
+            self.polilineas.append(polilinea)
+
+        almacenes = {polilinea.almacen for polilinea in self.polilineas}
+        if len(almacenes) == 1:
+            self.poligonos = almacenes.pop().poligonos(self.polilineas)
+        else:
+            self.poligonos = np.array([Polygon(polilinea.vertices) for polilinea in self.polilineas], dtype=object)
+        self.areas = shapely.area(self.poligonos)
+        self.arbol = STRtree(self.poligonos)
+
+    def __len__(self):
+        return len(self.polilineas)
+
+
 # Función para obtener polilíneas dentro de una polilínea principal
 def obtener_polilineas_dentro_de_polilinea(polilinea_principal, polilineas_anidadas):
     """
     Obtiene las polilíneas que están dentro o intersectan con una polilínea principal.
+
+    polilineas_anidadas: lista de entidades o IndicePolilineas (construido una
+    vez por documento). Solo se calcula el área de intersección de las
+    polilíneas que el índice encuentra intersectando la prelosa.
     """
-    # Capas válidas de acero (case-insensitive)
-    capas_acero_validas = [
-        "ACERO LONGITUDINAL", 
-        "ACERO TRANSVERSAL", 
-        "BD-ACERO LONGITUDINAL", 
-        "BD-ACERO TRANSVERSAL",
-        "ACERO LONG ADI",
-        "ACERO TRA ADI"
-    ]
+    if isinstance(polilineas_anidadas, IndicePolilineas):
+        indice = polilineas_anidadas
+    else:
+        indice = IndicePolilineas(polilineas_anidadas)
 
     vertices_principal = [(p[0], p[1]) for p in polilinea_principal]
     poligono_principal = Polygon(vertices_principal)
     polilineas_dentro = []
 
     # Print debug information about the polyline layers
-    capas_encontradas = set()
-    for polilinea in polilineas_anidadas:
-        capas_encontradas.add(polilinea.dxf.layer)
-            
-    
-    print(f"=> Capas de polilíneas encontradas: {capas_encontradas}")
+    consola.detalle(GEOMETRIA, "=> Capas de polilíneas encontradas: {}", indice.capas)
 
-    for polilinea in polilineas_anidadas:
-        try:
-            # Filtrar por capas de acero (case-insensitive)
-            capa_polilinea = polilinea.dxf.layer.upper()
-            if not any(capa_acero.upper() in capa_polilinea for capa_acero in capas_acero_validas):
-                continue
+    # Candidatas: el STRtree prepara la prelosa y verifica la intersección exacta
+    # (contains implica intersects, por lo que basta con intersects)
+    try:
+        candidatas = np.sort(indice.arbol.query(poligono_principal, predicate='intersects'))
+    except Exception:
+        # Geometrías inválidas: revisar una por una las que se superponen por rectángulo envolvente
+        candidatas = [i for i in np.sort(indice.arbol.query(poligono_principal))
+                      if _intersecta_seguro(poligono_principal, indice.poligonos[i])]
 
-            vertices_anidada = [(p[0], p[1]) for p in polilinea.get_points('xy')]
-            poligono_anidado = Polygon(vertices_anidada)
+    for i in candidatas:
+        try:
+            area_interseccion = poligono_principal.intersection(indice.poligonos[i]).area
+            area_anidada = indice.areas[i]
             
-            # Verificar intersección o contención
-            if poligono_principal.intersects(poligono_anidado) or poligono_principal.contains(poligono_anidado):
-                area_interseccion = poligono_principal.intersection(poligono_anidado).area
-                area_anidada = poligono_anidado.area
-                
-                # Calcular ratio de intersección
-                ratio_interseccion = area_interseccion / area_anidada if area_anidada > 0 else 0
-                
-                # Si al menos el 20% de la polilínea está dentro, considerarla
-                if ratio_interseccion >= 0.2:
-                    polilineas_dentro.append(polilinea)
+            # Calcular ratio de intersección
+            ratio_interseccion = area_interseccion / area_anidada if area_anidada > 0 else 0
+            
+            # Si al menos el 20% de la polilínea está dentro, considerarla
+            if ratio_interseccion >= 0.2:
+                polilineas_dentro.append(indice.polilineas[i])
         except Exception as e:
-            print(f"Error al procesar polilínea: {e}")
+            consola.error("Error al procesar polilínea: {}", e)
     
     # Información de depuración adicional
-    print(f"=> Total de polilíneas de acero encontradas dentro de la prelosa: {len(polilineas_dentro)}")
+    consola.detalle(GEOMETRIA, "=> Total de polilíneas de acero encontradas dentro de la prelosa: {}",
+                    len(polilineas_dentro))
     
     return polilineas_dentro
 
+
+def _intersecta_seguro(poligono_principal, poligono_anidado):
+    try:
+        return poligono_principal.intersects(poligono_anidado) or poligono_principal.contains(poligono_anidado)
+    except Exception as e:
+        consola.error("Error al procesar polilínea: {}", e)
+        return False
+
 # Función para calcular el centro de una polilínea
 def calcular_centro_polilinea(vertices):
     x_coords = [v[0] for v in vertices]
@@ -442,73 +615,216 @@ def calcular_centro_polilinea(vertices):
     centro_y = min(y_coords) + (max(y_coords) - min(y_coords)) / 2
     return centro_x, centro_y
 
+# Función para calcular el ángulo del bloque a partir del acero longitudinal (o de la caja de la prelosa)
+def calcular_orientacion_prelosa(vertices, polilineas_longitudinal=None, polilineas_long_adi=None):
+    try:
+        import math
+
+        # 1. Primero intentar con polilíneas longitudinales regulares
+        if polilineas_longitudinal and len(polilineas_longitudinal) > 0:
+            consola.detalle(GEOMETRIA, "Usando orientación de ACERO LONGITUDINAL para el bloque")
+
+            # Obtener la primera polilínea longitudinal
+            polilinea_long = polilineas_longitudinal[0]
+            vertices_long = polilinea_long.vertices
+
+            # Necesitamos al menos 2 puntos para determinar una dirección
+            if len(vertices_long) >= 2:
+                # NUEVO: Detectar si la polilínea está inclinada
+                vertices_long_array = np.array(vertices_long)
+
+                # Calcular el rango en X e Y para determinar la orientación espacial
+                min_x = np.min(vertices_long_array[:, 0])
+                max_x = np.max(vertices_long_array[:, 0])
+                min_y = np.min(vertices_long_array[:, 1])
+                max_y = np.max(vertices_long_array[:, 1])
+
+                rango_x = max_x - min_x
+                rango_y = max_y - min_y
+
+                # Si la diferencia entre los rangos es pequeña, puede estar inclinada
+                es_inclinada = abs(rango_x - rango_y) < 0.5 * max(rango_x, rango_y)
+
+                # Si la polilínea parece estar inclinada, calcular ángulo exacto
+                if es_inclinada:
+                    # Calcular el ángulo usando el primer y último punto para mejor dirección
+                    p1 = vertices_long[0]
+                    p2 = vertices_long[-1]
+
+                    # Calcular vector dirección y su ángulo
+                    dx = p2[0] - p1[0]
+                    dy = p2[1] - p1[1]
+                    angulo = math.degrees(math.atan2(dy, dx))
+
+                    consola.detalle(GEOMETRIA, "Polilínea LONGITUDINAL inclinada. Ángulo exacto: {:.2f}°", angulo)
+                    return angulo
+                else:
+                    # Usar la lógica original para polilíneas no inclinadas
+                    if rango_y > rango_x:  # Orientación predominantemente vertical
+                        angulo_final = 90.0
+                        consola.detalle(GEOMETRIA, "Polilínea LONGITUDINAL orientada verticalmente. Ángulo: {}°",
+                                        angulo_final)
+                    else:  # Orientación predominantemente horizontal
+                        angulo_final = 0.0
+                        consola.detalle(GEOMETRIA, "Polilínea LONGITUDINAL orientada horizontalmente. Ángulo: {}°",
+                                        angulo_final)
+
+                    return angulo_final
+
+        # 2. Si no hay ACERO LONGITUDINAL, intentar con ACERO LONG ADI
+        if polilineas_long_adi and len(polilineas_long_adi) > 0:
+            consola.detalle(GEOMETRIA, "No se encontró ACERO LONGITUDINAL. Usando orientación de ACERO LONG ADI para el bloque")
+
+            # Obtener la primera polilínea de acero adicional
+            polilinea_long_adi = polilineas_long_adi[0]
+            vertices_long_adi = polilinea_long_adi.vertices
+
+            # Necesitamos al menos 2 puntos para determinar una dirección
+            if len(vertices_long_adi) >= 2:
+                # NUEVO: Detectar si la polilínea está inclinada
+                vertices_long_adi_array = np.array(vertices_long_adi)
+
+                # Calcular el rango en X e Y para determinar la orientación espacial
+                min_x = np.min(vertices_long_adi_array[:, 0])
+                max_x = np.max(vertices_long_adi_array[:, 0])
+                min_y = np.min(vertices_long_adi_array[:, 1])
+                max_y = np.max(vertices_long_adi_array[:, 1])
+
+                rango_x = max_x - min_x
+                rango_y = max_y - min_y
+
+                # Si la diferencia entre los rangos es pequeña, puede estar inclinada
+                es_inclinada = abs(rango_x - rango_y) < 0.5 * max(rango_x, rango_y)
+
+                # Si la polilínea parece estar inclinada, calcular ángulo exacto
+                if es_inclinada:
+                    # Calcular el ángulo usando el primer y último punto para mejor dirección
+                    p1 = vertices_long_adi[0]
+                    p2 = vertices_long_adi[-1]
+
+                    # Calcular vector dirección y su ángulo
+                    dx = p2[0] - p1[0]
+                    dy = p2[1] - p1[1]
+                    angulo = math.degrees(math.atan2(dy, dx))
+
+                    consola.detalle(GEOMETRIA, "Polilínea LONG ADI inclinada. Ángulo exacto: {:.2f}°", angulo)
+                    return angulo
+                else:
+                    # Usar la lógica original para polilíneas no inclinadas
+                    if rango_y > rango_x:  # Orientación predominantemente vertical
+                        angulo_final = 90.0
+                        consola.detalle(GEOMETRIA, "Polilínea LONG ADI orientada verticalmente. Ángulo: {}°",
+                                        angulo_final)
+                    else:  # Orientación predominantemente horizontal
+                        angulo_final = 0.0
+                        consola.detalle(GEOMETRIA, "Polilínea LONG ADI orientada horizontalmente. Ángulo: {}°",
+                                        angulo_final)
+
+                    return angulo_final
+
+        # 3. Si no se pudo determinar orientación con polilíneas, usar el método de caja contenedora
+        consola.detalle(GEOMETRIA, "No se pudo determinar orientación por ACERO LONGITUDINAL ni ACERO LONG ADI, usando método de caja")
+
+        # Convertir vértices a array NumPy
+        vertices_array = np.array(vertices)
+
+        # Calcular caja contenedora
+        min_x = np.min(vertices_array[:, 0])
+        max_x = np.max(vertices_array[:, 0])
+        min_y = np.min(vertices_array[:, 1])
+        max_y = np.max(vertices_array[:, 1])
+
+        ancho = max_x - min_x
+        alto = max_y - min_y
+
+        # CAMBIO: Orientar para que la línea azul apunte al lado más ESTRECHO (como en la versión original)
+        if ancho < alto:  # Si el ancho es menor que el alto
+            # Prelosa más alta que ancha -> línea azul horizontal (0°)
+            angulo_final = 0.0
+            consola.detalle(GEOMETRIA, "Prelosa vertical (más alta que ancha). Orientando bloque horizontalmente: {}°",
+                            angulo_final)
+        else:
+            # Prelosa más ancha que alta -> línea azul vertical (90°)
+            angulo_final = 90.0
+            consola.detalle(GEOMETRIA, "Prelosa horizontal (más ancha que alta). Orientando bloque verticalmente: {}°",
+                            angulo_final)
+
+        return angulo_final
+
+    except Exception as e:
+        consola.error("Error al calcular la orientación: {}", e)
+        traceback.print_exc()
+        return 0.0  # Valor por defecto en caso de error
+
 # Función para encontrar el bloque acero en el documento
-def encontrar_bloque_acero(doc, bloque_nombre="BD-ACERO PRELOSA", capa_nombre="BD-ACERO POSITIVO"):
+def encontrar_bloque_acero(doc, bloque_nombre="BD-ACERO PRELOSA", capa_nombre="BD-ACERO POSITIVO", catalogo=None):
     """
     Busca el bloque de acero en el documento.
+
+    catalogo: CatalogoEntidades del modelo (si no se indica, se construye uno).
     """
-    msp = doc.modelspace()
+    if catalogo is None:
+        catalogo = CatalogoEntidades(doc.modelspace())
+    bloques = catalogo.de_tipo('INSERT')
     
     # Método 1: Buscar por nombre exacto
-    for entity in msp:
-        if entity.dxftype() == 'INSERT' and entity.dxf.name.strip().upper() == bloque_nombre.upper():
-            print(f"Bloque encontrado por nombre: {entity.dxf.name}")
+    for entity in bloques:
+        if entity.dxf.name.strip().upper() == bloque_nombre.upper():
+            consola.resumen("Bloque encontrado por nombre: {}", entity.dxf.name)
             return entity
 
     # Método 2: Buscar por capa
-    for entity in msp:
-        if entity.dxftype() == 'INSERT' and capa_nombre.upper() in entity.dxf.layer.upper():
-            print(f"Bloque encontrado por capa: {entity.dxf.layer}")
+    for entity in catalogo.de_capa_que_contiene(capa_nombre):
+        if entity.dxftype() == 'INSERT':
+            consola.resumen("Bloque encontrado por capa: {}", entity.dxf.layer)
             return entity
 
     # Método 3: Buscar coincidencias parciales
-    for entity in msp:
-        if entity.dxftype() == 'INSERT':
-            nombre = entity.dxf.name.upper()
-            capa = entity.dxf.layer.upper()
-            if "ACERO" in nombre and "PRELOSA" in nombre:
-                print(f"Bloque encontrado por coincidencia parcial en nombre: {entity.dxf.name}")
-                return entity
-            if "ACERO" in capa and "POSITIVO" in capa:
-                print(f"Bloque encontrado por coincidencia parcial en capa: {entity.dxf.layer}")
-                return entity
+    for entity in bloques:
+        nombre = entity.dxf.name.upper()
+        capa = entity.dxf.layer.upper()
+        if "ACERO" in nombre and "PRELOSA" in nombre:
+            consola.resumen("Bloque encontrado por coincidencia parcial en nombre: {}", entity.dxf.name)
+            return entity
+        if "ACERO" in capa and "POSITIVO" in capa:
+            consola.resumen("Bloque encontrado por coincidencia parcial en capa: {}", entity.dxf.layer)
+            return entity
 
     # Método 4: Buscar por atributos
-    for entity in msp:
-        if entity.dxftype() == 'INSERT':
+    for entity in bloques:
+        try:
+            atributos = {}
+                
+            # Intentar diferentes métodos para obtener atributos
             try:
-                atributos = {}
+                for attrib in entity.attribs:
+                    atributos[attrib.dxf.tag] = attrib.dxf.text
+            except:
+                pass
                 
-                # Intentar diferentes métodos para obtener atributos
+            if not atributos:
                 try:
-                    for attrib in entity.attribs:
-                        atributos[attrib.dxf.tag] = attrib.dxf.text
+                    for child in entity:
+                        if child.dxftype() == 'ATTRIB':
+                            atributos[child.dxf.tag] = child.dxf.text
                 except:
                     pass
                 
-                if not atributos:
-                    try:
-                        for child in entity:
-                            if child.dxftype() == 'ATTRIB':
-                                atributos[child.dxf.tag] = child.dxf.text
-                    except:
-                        pass
+            if not atributos:
+                try:
+                    for attrib in entity.get_attribs():
+                        atributos[attrib.dxf.tag] = attrib.dxf.text
+                except:
+                    pass
                 
-                if not atributos:
-                    try:
-                        for attrib in entity.get_attribs():
-                            atributos[attrib.dxf.tag] = attrib.dxf.text
-                    except:
-                        pass
-                
-                # Verificar atributos específicos
-                if 'AS_LONG' in atributos or 'AS_TRA1' in atributos or 'AS_TRA2' in atributos:
-                    print(f"Bloque encontrado por atributos: {list(atributos.keys())}")
-                    return entity
-            except:
-                pass
+            # Verificar atributos específicos
+            if 'AS_LONG' in atributos or 'AS_TRA1' in atributos or 'AS_TRA2' in atributos:
+                consola.resumen("Bloque encontrado por atributos: {}", list(atributos.keys()))
+                return entity
+        except:
+            pass
     
-    print("=> No se encontró el bloque de acero. Se creará uno genérico.")
+    consola.resumen("=> No se encontró el bloque de acero. Se creará uno genérico.")
     return None
 
 # Función para obtener definición del bloque
@@ -526,7 +842,7 @@ def obtener_definicion_bloque(bloque_original):
         }
         return definicion
     except Exception as e:
-        print(f"Error al obtener definición del bloque: {e}")
+        consola.error("Error al obtener definición del bloque: {}", e)
         return {
             'nombre': 'BD-ACERO PRELOSA',
             'capa': 'BD-ACERO POSITIVO',
@@ -535,43 +851,38 @@ def obtener_definicion_bloque(bloque_original):
             'rotation': 0.0
         }
 
-# Función para insertar un bloque de acero en el modelo
-def insertar_bloque_acero(msp, definicion_bloque, centro, as_long, as_tra1, as_tra2=None):
+# Inserción de un bloque de acero ya calculada (rotación legible, escala y atributos)
+class InsercionBloque:
+    __slots__ = ('centro', 'xscale', 'yscale', 'rotation', 'valores_atributos')
+
+    def __init__(self, centro, xscale, yscale, rotation, valores_atributos):
+        self.centro = centro
+        self.xscale = xscale
+        self.yscale = yscale
+        self.rotation = rotation
+        self.valores_atributos = valores_atributos
+
+    # Función para guardar la inserción en el archivo de huellas (JSON)
+    def como_diccionario(self):
+        return {'centro': list(self.centro), 'xscale': self.xscale, 'yscale': self.yscale,
+                'rotation': self.rotation, 'atributos': self.valores_atributos}
+
+    @classmethod
+    def desde_diccionario(cls, datos):
+        return cls(tuple(datos['centro']), datos['xscale'], datos['yscale'], datos['rotation'], datos['atributos'])
+
+
+# Función para calcular la inserción de un bloque de acero sin escribirlo en el modelo
+def planificar_insercion_bloque(definicion_bloque, centro, as_long, as_tra1, as_tra2=None):
     """
-    Inserta un bloque de acero en el centro de la prelosa con los valores calculados,
-    respetando la escala del bloque original que el usuario colocó en el plano.
-    Maneja rotaciones en cualquier ángulo, incluyendo casos inclinados.
+    Calcula la rotación, la escala y los atributos del bloque de acero en el centro
+    de la prelosa, respetando la escala del bloque original que el usuario colocó
+    en el plano. Maneja rotaciones en cualquier ángulo, incluyendo casos inclinados.
     """
     try:
-        # Usar directamente los valores recibidos
-        str_as_long = as_long
-        str_as_tra1 = as_tra1
-        str_as_tra2 = as_tra2 if as_tra2 is not None else ""
-        
-        # Verificar y desbloquear la capa si es necesario
-        capa_destino = definicion_bloque.get('capa', 'BD-ACERO POSITIVO')
-        
-        # Verificar si la capa existe y desbloquearla
-        doc = msp.doc
-        if capa_destino in doc.layers:
-            layer = doc.layers.get(capa_destino)
-            if hasattr(layer.dxf, 'lock') and layer.dxf.lock:
-                layer.dxf.lock = False
-
-        # Verificar capa alternativa
-        capa_alternativa = '- BD - ACERO POSITIVO'
-        if capa_alternativa in doc.layers:
-            layer = doc.layers.get(capa_alternativa)
-            if hasattr(layer.dxf, 'lock') and layer.dxf.lock:
-                layer.dxf.lock = False
-            
-            # Si la capa original no existe pero la alternativa sí, usar la alternativa
-            if capa_destino not in doc.layers:
-                capa_destino = capa_alternativa
-        
         # Obtener la rotación original
         rotation = definicion_bloque.get('rotation', 0.0)
-        print(f"    Rotación original del bloque: {rotation:.2f}°")
+        consola.detalle(BLOQUES, "    Rotación original del bloque: {:.2f}°", rotation)
         
         # Normalizar a 0-360
         rotation = rotation % 360
@@ -582,14 +893,14 @@ def insertar_bloque_acero(msp, definicion_bloque, centro, as_long, as_tra1, as_t
             # Si el bloque está horizontal y a 180°, girar 180° para que el texto sea legible
             if abs(rotation - 180.0) < 0.1:
                 rotation = 0.0
-                print(f"    Corrigiendo rotación horizontal a: {rotation:.2f}°")
+                consola.detalle(BLOQUES, "    Corrigiendo rotación horizontal a: {:.2f}°", rotation)
         
         # Para casos verticales (90° o 270°)
         elif abs(rotation - 90.0) < 0.1 or abs(rotation - 270.0) < 0.1:
             # Si el bloque está vertical y a 270°, ajustar a 90° para que el texto sea legible
             if abs(rotation - 270.0) < 0.1:
                 rotation = 90.0
-                print(f"    Corrigiendo rotación vertical a: {rotation:.2f}°")
+                consola.detalle(BLOQUES, "    Corrigiendo rotación vertical a: {:.2f}°", rotation)
         
         # Para casos inclinados (cualquier otro ángulo)
         else:
@@ -600,11 +911,11 @@ def insertar_bloque_acero(msp, definicion_bloque, centro, as_long, as_tra1, as_t
             elif 90 < rotation < 180:
                 # Segundo cuadrante - rotar a primer cuadrante
                 rotation = (rotation - 180) % 360
-                print(f"    Rotación ajustada para ángulo inclinado 2do cuadrante: {rotation:.2f}°")
+                consola.detalle(BLOQUES, "    Rotación ajustada para ángulo inclinado 2do cuadrante: {:.2f}°", rotation)
             elif 180 < rotation < 270:
                 # Tercer cuadrante - rotar a cuarto cuadrante
                 rotation = (rotation - 180) % 360
-                print(f"    Rotación ajustada para ángulo inclinado 3er cuadrante: {rotation:.2f}°")
+                consola.detalle(BLOQUES, "    Rotación ajustada para ángulo inclinado 3er cuadrante: {:.2f}°", rotation)
             elif 270 < rotation < 360:
                 # Cuarto cuadrante - mantener
                 pass
@@ -636,87 +947,166 @@ def insertar_bloque_acero(msp, definicion_bloque, centro, as_long, as_tra1, as_t
                 factor_reduccion = min(1.0, area_polilinea / limite_area)
                 xscale = xscale * factor_reduccion
                 yscale = yscale * factor_reduccion
-                print(f"    Reduciendo escala para polilínea pequeña. Factor: {factor_reduccion:.3f}")
-        
-        print(f"    Usando escala ajustada: X={xscale:.3f}, Y={yscale:.3f} (original * {factor_aumento})")
-        
-        # Insertar el bloque con la rotación ajustada y escala modificada
-        bloque = msp.add_blockref(
-            name=definicion_bloque['nombre'],
-            insert=centro,
-            dxfattribs={
-                'layer': capa_destino,
-                'xscale': xscale,
-                'yscale': yscale,
-                'rotation': rotation
-            }
-        )
+                consola.detalle(BLOQUES, "    Reduciendo escala para polilínea pequeña. Factor: {:.3f}",
+                                factor_reduccion)
         
+        consola.detalle(BLOQUES, "    Usando escala ajustada: X={:.3f}, Y={:.3f} (original * {})",
+                        xscale, yscale, factor_aumento)
+
         # Preparar valores de atributos
         valores_atributos = {
-            'AS_LONG': str_as_long,
-            'AS_TRA1': str_as_tra1
+            'AS_LONG': as_long,
+            'AS_TRA1': as_tra1
         }
         
         if as_tra2 is not None and as_tra2 != "":
-            valores_atributos['AS_TRA2'] = str_as_tra2
-        
-        # Método 1: add_auto_attribs es el más confiable para asignar atributos
-        try:
-            bloque.add_auto_attribs(valores_atributos)
-            
-            # Después de asignar, configurar cada atributo para hacerlo visible y editable
-            for attrib in bloque.attribs:
-                # Configurar flags del atributo
-                attrib.dxf.invisible = 0  # 0 = visible
-                # Más configuraciones si están disponibles
-                if hasattr(attrib.dxf, 'constant'):
-                    attrib.dxf.constant = 0
-                if hasattr(attrib.dxf, 'verify'):
-                    attrib.dxf.verify = 1
-                if hasattr(attrib.dxf, 'preset'):
-                    attrib.dxf.preset = 0
-            
-            return bloque
-        except Exception as e:
-            print(f"No se pudo usar add_auto_attribs: {e}")
-        
-        # Método 2: Asignar atributos uno por uno
-        try:
-            for attrib in bloque.attribs:
-                if attrib.dxf.tag in valores_atributos:
-                    attrib.dxf.text = valores_atributos[attrib.dxf.tag]
-                    attrib.dxf.invisible = 0
-                    
-                    # Más configuraciones si están disponibles
-                    if hasattr(attrib.dxf, 'constant'):
-                        attrib.dxf.constant = 0
-                    if hasattr(attrib.dxf, 'verify'):
-                        attrib.dxf.verify = 1
-                    if hasattr(attrib.dxf, 'preset'):
-                        attrib.dxf.preset = 0
+            valores_atributos['AS_TRA2'] = as_tra2
+
+        return InsercionBloque(centro, xscale, yscale, rotation, valores_atributos)
+    
+    except Exception as e:
+        consola.error("Error global al insertar bloque: {}", e)
+        traceback.print_exc()
+        return None
+
+
+# Inserción en bloque de los BD-ACERO PRELOSA de un documento
+class InsertadorBloques:
+    """
+    La capa destino y la plantilla de atributos (ATTDEF de la definición del
+    bloque) se resuelven una vez por documento. Las inserciones planificadas se
+    acumulan con agregar() y se escriben en el modelo en un solo paso con
+    insertar_pendientes(), que mide los bloques insertados por segundo.
+    """
+
+    def __init__(self, msp, definicion_bloque):
+        self.msp = msp
+        self.nombre = definicion_bloque['nombre']
+        self.capa = self._resolver_capa(msp.doc, definicion_bloque.get('capa', 'BD-ACERO POSITIVO'))
+        self.plantilla = self._leer_plantilla(msp.doc, self.nombre)
+        # (inserción, descripción para los mensajes de error)
+        self.pendientes = []
+        self.insertados = 0
+        self.segundos = 0.0
+
+    # Función para desbloquear la capa destino (o la alternativa si la original no existe)
+    @staticmethod
+    def _resolver_capa(doc, capa_destino):
+        # Verificar si la capa existe y desbloquearla
+        if capa_destino in doc.layers:
+            layer = doc.layers.get(capa_destino)
+            if hasattr(layer.dxf, 'lock') and layer.dxf.lock:
+                layer.dxf.lock = False
+
+        # Verificar capa alternativa
+        capa_alternativa = '- BD - ACERO POSITIVO'
+        if capa_alternativa in doc.layers:
+            layer = doc.layers.get(capa_alternativa)
+            if hasattr(layer.dxf, 'lock') and layer.dxf.lock:
+                layer.dxf.lock = False
             
-            print("Atributos asignados y configurados manualmente")
+            # Si la capa original no existe pero la alternativa sí, usar la alternativa
+            if capa_destino not in doc.layers:
+                capa_destino = capa_alternativa
+        return capa_destino
+
+    # Función para leer los ATTDEF del bloque como en add_auto_attribs, visibles y sin prompt
+    @staticmethod
+    def _leer_plantilla(doc, nombre):
+        definicion = doc.blocks.get(nombre)
+        if definicion is None:
+            return []
+        plantilla = []
+        for attdef in definicion.attdefs():
+            atributos = attdef.dxfattribs(drop={"prompt", "handle"})
+            if "tag" not in atributos or "insert" not in atributos:
+                consola.detalle(BLOQUES, "ATTDEF sin etiqueta o sin posición en el bloque {}, se omite", nombre)
+                continue
+            atributos.setdefault("text", "")
+            atributos['invisible'] = 0  # 0 = visible
+            # ATTRIB modelo validado una sola vez; cada bloque usa una copia
+            modelo = Attrib.new(dxfattribs=atributos)
+            mtext = attdef if attdef.has_embedded_mtext_entity else None
+            plantilla.append((modelo, mtext))
+        return plantilla
+
+    def agregar(self, insercion, descripcion=""):
+        self.pendientes.append((insercion, descripcion))
+
+    # Función para escribir un bloque planificado con sus atributos
+    def insertar(self, insercion):
+        # Insertar el bloque con la rotación ajustada y escala modificada
+        bloque = self.msp.add_blockref(
+            name=self.nombre,
+            insert=insercion.centro,
+            dxfattribs={
+                'layer': self.capa,
+                'xscale': insercion.xscale,
+                'yscale': insercion.yscale,
+                'rotation': insercion.rotation
+            }
+        )
+        if not self.plantilla:
             return bloque
-        except Exception as e:
-            print(f"No se pudo asignar atributos manualmente: {e}")
-        
-        # Si llegamos aquí, intenta un último recurso
         try:
-            # Intenta acceder a los atributos usando .get_attribs()
-            for attrib in bloque.get_attribs():
-                if attrib.dxf.tag in valores_atributos:
-                    attrib.dxf.text = valores_atributos[attrib.dxf.tag]
-                    attrib.dxf.invisible = 0
-            
-            print("Atributos asignados usando get_attribs")
-            return bloque
+            matriz = bloque.matrix44()
+            for modelo, attdef in self.plantilla:
+                # Mismos pasos que Insert.add_attrib, sin volver a validar los atributos del ATTDEF
+                attrib = modelo.copy()
+                texto = insercion.valores_atributos.get(modelo.dxf.tag, modelo.dxf.text)
+                attrib.dxf.text = texto
+                if bloque.doc:
+                    entity_factory.bind(attrib, bloque.doc)
+                attrib.dxf.owner = bloque.dxf.owner
+                attrib.dxf.paperspace = bloque.dxf.paperspace
+                bloque.attribs.append(attrib)
+                if bloque.seqend is None:
+                    bloque.new_seqend()
+                if attdef is not None:
+                    mtext = attdef.virtual_mtext_entity()
+                    mtext.text = texto
+                    attrib.embed_mtext(mtext)
+                attrib.transform(matriz)
         except Exception as e:
-            print(f"Error en último intento: {e}")
-            return bloque  # Devolver el bloque aunque haya errores
-    
+            consola.error("No se pudo asignar los atributos: {}", e)
+        return bloque  # Devolver el bloque aunque haya errores en los atributos
+
+    def insertar_pendientes(self):
+        """
+        Escribe en el modelo todas las inserciones pendientes, en el orden en que se
+        agregaron.
+
+        Returns:
+            list: Bloques insertados
+        """
+        inicio = time.perf_counter()
+        bloques = []
+        for insercion, descripcion in self.pendientes:
+            try:
+                bloques.append(self.insertar(insercion))
+            except Exception as e:
+                consola.error("Error al insertar bloque: {}", e)
+                consola.error("Error al insertar el bloque en {}", descripcion)
+        self.pendientes = []
+        self.insertados += len(bloques)
+        self.segundos += time.perf_counter() - inicio
+        return bloques
+
+    def resumen(self):
+        por_segundo = self.insertados / self.segundos if self.segundos > 0 else 0.0
+        return (f"Inserción de bloques: {self.insertados} bloques en {self.segundos:.3f} s "
+                f"({por_segundo:.0f} bloques/s)")
+
+
+# Función para insertar un bloque de acero en el modelo (para muchos bloques usar InsertadorBloques)
+def insertar_bloque_acero(msp, definicion_bloque, centro, as_long, as_tra1, as_tra2=None):
+    insercion = planificar_insercion_bloque(definicion_bloque, centro, as_long, as_tra1, as_tra2)
+    if insercion is None:
+        return None
+    try:
+        return InsertadorBloques(msp, definicion_bloque).insertar(insercion)
     except Exception as e:
-        print(f"Error global al insertar bloque: {e}")
+        consola.error("Error global al insertar bloque: {}", e)
         traceback.print_exc()
         return None
 
@@ -732,21 +1122,22 @@ def desbloquear_capa_acero_positivo(doc):
         # Desbloquear la capa
         if capa:
             capa.dxf.flags = 0  # Código para desbloquear
-            print(f"[ÉXITO] Capa '{nombre_capa}' desbloqueada correctamente")
+            consola.resumen("[ÉXITO] Capa '{}' desbloqueada correctamente", nombre_capa)
         else:
-            print(f"[ADVERTENCIA] Capa '{nombre_capa}' no encontrada")
+            consola.resumen("[ADVERTENCIA] Capa '{}' no encontrada", nombre_capa)
     
     except Exception as e:
-        print(f"[ERROR] No se pudo desbloquear la capa: {e}")
+        consola.error("[ERROR] No se pudo desbloquear la capa: {}", e)
 
 # Función para eliminar entidades por capa
-def eliminar_entidades_por_capa(doc, capas_a_eliminar):
+def eliminar_entidades_por_capa(doc, capas_a_eliminar, catalogo=None):
     """
     Elimina todas las entidades en el modelo que pertenecen a las capas especificadas.
     
     Args:
         doc: Documento DXF
         capas_a_eliminar: Lista de nombres de capas cuyas entidades se eliminarán
+        catalogo: CatalogoEntidades del modelo (si no se indica, se construye uno)
     
     Returns:
         int: Número de entidades eliminadas
@@ -755,18 +1146,16 @@ def eliminar_entidades_por_capa(doc, capas_a_eliminar):
     entidades_eliminadas = 0
     
     # Recopilamos todas las entidades a eliminar en una lista
-    entidades_a_eliminar = []
-    for entity in msp:
-        if hasattr(entity, 'dxf') and hasattr(entity.dxf, 'layer'):
-            if entity.dxf.layer in capas_a_eliminar:
-                entidades_a_eliminar.append(entity)
+    if catalogo is None:
+        catalogo = CatalogoEntidades(msp)
+    entidades_a_eliminar = catalogo.de_capas(capas_a_eliminar)
     
     # Eliminamos las entidades
     for entity in entidades_a_eliminar:
         msp.delete_entity(entity)
         entidades_eliminadas += 1
     
-    print(f"Se eliminaron {entidades_eliminadas} entidades de las capas: {', '.join(capas_a_eliminar)}")
+    consola.resumen("Se eliminaron {} entidades de las capas: {}", entidades_eliminadas, ', '.join(capas_a_eliminar))
     return entidades_eliminadas
 
 # Modificar el código principal para llamar a esta función justo antes de guardar el archivo DXF
@@ -796,11 +1185,289 @@ def formatear_valor_espaciamiento(valor):
     
     return valor_str
 
+# Resultado del análisis de una prelosa (fase 1): textos de cada tipo de acero y bloque a insertar
+class AnalisisPrelosa:
+    __slots__ = ('tipo_prelosa', 'idx', 'centro', 'textos_longitudinal', 'textos_transversal',
+                 'textos_long_adi', 'textos_tra_adi', 'textos_adicionales', 'angulo_rotacion',
+                 'ancho', 'alto', 'huella', 'tiempos', 'mensajes_orientacion', 'mensajes')
+
+    def __init__(self, tipo_prelosa, idx):
+        self.tipo_prelosa = tipo_prelosa
+        self.idx = idx
+        self.centro = None
+        self.textos_longitudinal = []
+        self.textos_transversal = []
+        self.textos_long_adi = []
+        self.textos_tra_adi = []
+        self.textos_adicionales = []
+        self.angulo_rotacion = 0.0
+        self.ancho = 0.0
+        self.alto = 0.0
+        # Huella de la prelosa para el reprocesamiento incremental (huellas_prelosas)
+        self.huella = None
+        # Etapa del perfil -> (segundos, llamadas) medidos durante el análisis
+        self.tiempos = {}
+        # Mensajes del cálculo de la orientación (se imprimen después del cálculo de la hoja)
+        self.mensajes_orientacion = ""
+        # Mensajes del análisis cuando se hizo en otro proceso (None: ya se imprimieron)
+        self.mensajes = None
+
+    def __repr__(self):
+        return f"AnalisisPrelosa({self.tipo_prelosa!r}, {self.idx + 1})"
+
+
+# Función para analizar una prelosa sin tocar el documento ni la hoja Convertidor
+def analizar_prelosa(vertices, tipo_prelosa, idx, indice_polilineas, indice_textos, indice_bloques=None):
+    """
+    Busca las polilíneas de acero de la prelosa, reúne sus textos por tipo de
+    acero y calcula el centro, la orientación y el tamaño del bloque. Solo lee
+    los índices, por lo que puede ejecutarse en otro proceso.
+    """
+    analisis = AnalisisPrelosa(tipo_prelosa, idx)
+    analisis.centro = calcular_centro_polilinea(vertices)
+    inicio = time.perf_counter()
+    polilineas_dentro = obtener_polilineas_dentro_de_polilinea(vertices, indice_polilineas)
+    analisis.tiempos[ETAPA_POLILINEAS] = (time.perf_counter() - inicio, 1)
+    segundos_textos = 0.0
+
+    # Procesar polilíneas de acero
+    for polilinea_anidada in polilineas_dentro:
+        vertices_anidada = polilinea_anidada.vertices
+
+        inicio = time.perf_counter()
+        textos_asignados = indice_textos.asignaciones.get(polilinea_anidada)
+        if textos_asignados is not None:
+            textos_dentro = obtener_textos_dentro_de_polilinea(
+                vertices_anidada,
+                textos_asignados,
+                capa_polilinea=polilinea_anidada.capa,
+                ya_asignados=True,
+                bloques=indice_bloques
+            )
+        else:
+            textos_dentro = obtener_textos_dentro_de_polilinea(
+                vertices_anidada,
+                indice_textos,
+                capa_polilinea=polilinea_anidada.capa,
+                bloques=indice_bloques
+            )
+        segundos_textos += time.perf_counter() - inicio
+
+        consola.detalle(TEXTOS, "Polilínea anidada en {} {} tiene {} textos dentro.",
+                        tipo_prelosa.lower(), idx+1, len(textos_dentro))
+
+        # Clasificar textos según el tipo de acero
+        tipo_acero = polilinea_anidada.capa.upper()
+        if "LONGITUDINAL" in tipo_acero:
+            for texto in textos_dentro:
+                consola.detalle(TEXTOS, "=" * 50)
+                consola.detalle(TEXTOS, "Texto encontrado en ACERO LONGITUDINAL: {}", texto)
+                analisis.textos_longitudinal.append(texto)
+        elif "TRANSVERSAL" in tipo_acero:
+            for texto in textos_dentro:
+                consola.detalle(TEXTOS, "=" * 50)
+                consola.detalle(TEXTOS, "Texto encontrado en ACERO TRANSVERSAL: {}", texto)
+                analisis.textos_transversal.append(texto)
+        elif "ACERO LONG ADI" in tipo_acero:
+            for texto in textos_dentro:
+                consola.detalle(TEXTOS, "=" * 50)
+                consola.detalle(TEXTOS, "Texto encontrado en ACERO LONG ADI: {}", texto)
+                analisis.textos_long_adi.append(texto)
+        elif "ACERO TRA ADI" in tipo_acero:
+            for texto in textos_dentro:
+                consola.detalle(TEXTOS, "Texto encontrado en ACERO TRA ADI: {}", texto)
+                analisis.textos_tra_adi.append(texto)
+        elif "ADICIONAL" in tipo_acero:
+            for texto in textos_dentro:
+                consola.detalle(TEXTOS, "Texto encontrado en ACERO ADICIONAL: {}", texto)
+                analisis.textos_adicionales.append(texto)
+
+    if polilineas_dentro:
+        analisis.tiempos[ETAPA_TEXTOS] = (segundos_textos, len(polilineas_dentro))
+
+    analisis.huella = huella_prelosa(tipo_prelosa, vertices, polilineas_dentro, (
+        analisis.textos_longitudinal, analisis.textos_transversal, analisis.textos_long_adi,
+        analisis.textos_tra_adi, analisis.textos_adicionales))
+
+    # Filtrar polilíneas longitudinales y adicionales
+    polilineas_longitudinal = [p for p in polilineas_dentro if "LONGITUDINAL" in p.capa.upper() and "ADI" not in p.capa.upper()]
+    polilineas_long_adi = [p for p in polilineas_dentro if "LONG ADI" in p.capa.upper()]
+
+    # Calcular la orientación considerando ambos tipos de acero (sus mensajes se escriben al aplicar el análisis)
+    if consola.activo(GEOMETRIA):
+        mensajes = io.StringIO()
+        with contextlib.redirect_stdout(mensajes):
+            analisis.angulo_rotacion = calcular_orientacion_prelosa(vertices, polilineas_longitudinal, polilineas_long_adi)
+        analisis.mensajes_orientacion = mensajes.getvalue()
+    else:
+        analisis.angulo_rotacion = calcular_orientacion_prelosa(vertices, polilineas_longitudinal, polilineas_long_adi)
+
+    # Calcular las dimensiones de la polilínea
+    xs = [v[0] for v in vertices]
+    ys = [v[1] for v in vertices]
+    analisis.ancho = max(xs) - min(xs)
+    analisis.alto = max(ys) - min(ys)
+    return analisis
+
+
+# Índices de cada proceso de análisis (se construyen en _iniciar_analisis)
+_indices_proceso = None
+
+# Función que prepara cada proceso de análisis a partir de los registros compactos del plano
+def _iniciar_analisis(polilineas_acero, textos, textos_por_bloque, registro):
+    global _indices_proceso
+    configurar_registro(*registro)
+    indice_polilineas = IndicePolilineas(polilineas_acero)
+    indice_textos = IndiceTextos(textos)
+    indice_textos.asignar(indice_polilineas.polilineas, indice_polilineas.poligonos)
+    indice_bloques = IndiceBloques(None, textos_por_bloque=textos_por_bloque) if textos_por_bloque is not None else None
+    _indices_proceso = (indice_polilineas, indice_textos, indice_bloques)
+
+# Función que analiza un lote de prelosas en un proceso de análisis (los mensajes vuelven con cada resultado)
+def _analizar_en_proceso(prelosas):
+    resultados = []
+    for vertices, tipo_prelosa, idx in prelosas:
+        mensajes = io.StringIO()
+        with contextlib.redirect_stdout(mensajes):
+            analisis = analizar_prelosa(vertices, tipo_prelosa, idx, *_indices_proceso)
+        analisis.mensajes = mensajes.getvalue()
+        resultados.append(analisis)
+    return resultados
+
+# Función para analizar las prelosas en varios procesos; devuelve los análisis en el orden de entrada
+def analizar_prelosas_en_procesos(prelosas, indice_polilineas, indice_textos, indice_bloques, procesos):
+    """
+    prelosas: lista de (vertices, tipo_prelosa, idx).
+
+    Cada proceso recibe una vez las polilíneas de acero (vértices en arreglos
+    float64), los registros de textos y los textos de los bloques asignados (si
+    indice_bloques no es None), y reconstruye sus índices. Los análisis se
+    devuelven por lotes a medida que terminan, para aplicar los primeros
+    mientras se analizan los siguientes.
+    """
+    # Textos de los bloques cercanos al acero leídos aquí: los procesos no tienen el documento
+    textos_por_bloque = None
+    if indice_bloques is not None:
+        for textos_asignados in indice_textos.asignaciones.values():
+            for elemento in textos_asignados:
+                if elemento.nombre:
+                    indice_bloques.textos(elemento.nombre)
+        textos_por_bloque = indice_bloques.textos_por_bloque
+
+    #concurrent.futures: se importa solo cuando el análisis se reparte entre procesos
+    from concurrent.futures import ProcessPoolExecutor
+
+    tamano_lote = max(1, min(64, len(prelosas) // (procesos * 4)))
+    lotes = [prelosas[i:i + tamano_lote] for i in range(0, len(prelosas), tamano_lote)]
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_analisis,
+                             initargs=(indice_polilineas.polilineas, indice_textos.textos,
+                                       textos_por_bloque, configuracion_registro())) as ejecutor:
+        for resultados in ejecutor.map(_analizar_en_proceso, lotes):
+            yield from resultados
+
+
+# Hoja Convertidor y cachés compartidas al procesar varios planos en un mismo proceso
+class SesionCalculo:
+    """
+    Abre la hoja Convertidor (y Excel, si es el motor) y las cachés una sola vez
+    para varios planos. Cada plano empieza con la hoja en el mismo estado que
+    tendría al procesarlo por separado: el motor nativo y Excel vuelven a los
+    valores del libro. Con Excel la hoja la entrega una SesionExcel
+    (sesion_excel.py), que reinicia Excel si deja de responder; puede ser
+    compartida (la interfaz la conserva entre procesamientos) o propia de la
+    sesión (se cierra con ella).
+    """
+
+    def __init__(self, excel_path, motor_calculo=MOTOR_NATIVO, ruta_cache=None, sesion_excel=None):
+        self.excel_path = excel_path
+        self.motor_calculo = motor_calculo
+        self.sesion_excel = None
+        self.sesion_excel_propia = False
+        if motor_calculo == MOTOR_EXCEL:
+            if sesion_excel is None:
+                from sesion_excel import SesionExcel
+                sesion_excel = SesionExcel(excel_path)
+                self.sesion_excel_propia = True
+            self.sesion_excel = sesion_excel
+            # Excel se abre (o se reutiliza) al empezar cada plano
+            self.app = self.wb = self.ws = None
+        else:
+            self.app, self.wb, self.ws = abrir_convertidor(excel_path, motor_calculo)
+        self.cache_resultados = crear_cache(excel_path, ruta_cache)
+        self.cache_especificaciones = CacheEspecificaciones()
+        # Resumen del último plano procesado (prelosas, bloques, error)
+        self.resumen_archivo = None
+
+    # Función para preparar la hoja antes de procesar un plano
+    def iniciar_archivo(self, file_path):
+        self.resumen_archivo = {"archivo": file_path, "prelosas": 0, "bloques": 0, "reutilizadas": 0, "error": None}
+        if self.sesion_excel is not None:
+            self.app, self.wb, self.ws = self.sesion_excel.abrir()
+        else:
+            self.ws.restablecer()
+
+    # Función para procesar un plano con la sesión; si Excel deja de responder durante el plano se repite una vez
+    def procesar(self, file_path, output_dxf_path, **opciones):
+        total = procesar_prelosas_con_bloques(file_path, self.excel_path, output_dxf_path, sesion=self, **opciones)
+        # Los errores de cada prelosa no detienen el plano: se comprueba Excel aunque no haya error
+        if self.sesion_excel is not None and self.sesion_excel.caida():
+            consola.error("Excel dejó de responder durante {}; se repite el plano", file_path)
+            total = procesar_prelosas_con_bloques(file_path, self.excel_path, output_dxf_path, sesion=self, **opciones)
+        return total
+
+    def cerrar(self):
+        self.cache_resultados.cerrar()
+        if self.sesion_excel is not None:
+            if self.sesion_excel_propia:
+                self.sesion_excel.cerrar()
+            return
+        try:
+            self.wb.save()
+            self.wb.close()
+            self.app.quit()
+        except Exception:
+            consola.error("Error al cerrar Excel, continuando...")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self.cerrar()
+        return False
+
+
 # Función principal modificada para usar bloques en lugar de textos
-def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valores_predeterminados=None):
+def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valores_predeterminados=None,
+                                  motor_calculo=MOTOR_NATIVO, ruta_cache=None, modo_streaming=False,
+                                  sesion=None, procesos_analisis=1, incremental=False,
+                                  perfil=None, ruta_perfil=None, progreso=None, textos_bloques=False):
     """
     Procesa las prelosas identificando tipos y contenidos,
     calcula valores usando Excel y coloca bloques con los resultados.
+
+    motor_calculo: "nativo" evalúa la hoja Convertidor en Python (sin Excel);
+    "excel" usa xlwings con CONVERTIDOR.xlsx abierto en segundo plano.
+    ruta_cache: archivo SQLite de la caché de resultados en disco (None: junto a
+    CONVERTIDOR.xlsx, False: solo caché en memoria).
+    modo_streaming: lee el plano con iterdxf conservando solo las entidades que
+    se procesan y escribe la salida en una segunda pasada (planos muy grandes).
+    sesion: SesionCalculo abierta por quien llama; se usan su hoja y sus cachés
+    (motor_calculo y ruta_cache se ignoran), no se cierra al terminar y el
+    resultado del plano queda en sesion.resumen_archivo.
+    procesos_analisis: procesos para analizar las prelosas (geometría y textos)
+    antes de calcularlas e insertar los bloques en serie (1: en este proceso,
+    0 o None: uno por núcleo).
+    incremental: reutiliza los bloques de la ejecución anterior con la misma
+    salida para las prelosas sin cambios (archivo <salida>_huellas.json, ver
+    huellas_prelosas.py); solo se recalculan las prelosas nuevas o modificadas.
+    perfil: PerfilEtapas donde se registran los tiempos de cada etapa (None: se
+    crea uno); se imprime como tabla al final del resumen.
+    ruta_perfil: archivo JSON donde se exporta el perfil (None: no se exporta).
+    progreso: función que recibe los EventoProgreso del plano (carga, prelosas
+    encontradas, cada prelosa terminada, guardado y fin; ver progreso_prelosas.py).
+    textos_bloques: usa también los textos de acero del interior de las
+    definiciones de los bloques cercanos al acero (por defecto solo sus
+    atributos, como hasta ahora).
     """
 
     banner = """
@@ -820,7 +1487,7 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
         ╚════════════════════════════════════════════════════════════════════════════════════════════════╝
 
     """
-    print(banner)
+    consola.resumen(banner)
 
 
     # Valores predeterminados por defecto
@@ -847,29 +1514,56 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
             else:
                 # Añadir nuevos tipos personalizados
                 default_valores[tipo] = valores
-                print(f"Añadido tipo personalizado: {tipo} con valores: {valores}")
+                consola.resumen("Añadido tipo personalizado: {} con valores: {}", tipo, valores)
 
-    print("Valores predeterminados combinados:")
-    print(default_valores)
+    consola.resumen("Valores predeterminados combinados:")
+    consola.resumen(default_valores)
     """
     Procesa las prelosas identificando tipos y contenidos,
     calcula valores usando Excel y coloca bloques con los resultados.
     """
+    progreso = EmisorProgreso(progreso)
+    # Caché de resultados (la propia se cierra en el finally, también si el plano falla)
+    cache_resultados = None
     try:
         tiempo_inicio = time.time()
+        if perfil is None:
+            perfil = PerfilEtapas()
+        if sesion is not None:
+            sesion.iniciar_archivo(file_path)
         
+        # Capas de las polilíneas de acero que se analizan dentro de cada prelosa
+        capas_polilineas_acero = ["ACERO LONGITUDINAL", "ACERO TRANSVERSAL", "ACERO LONG ADI", "ACERO TRA ADI",
+                                  "BD-ACERO LONGITUDINAL", "BD-ACERO TRANSVERSAL",
+                                  "ACERO", "REFUERZO", "ARMADURA"]
+
         # Cargar el documento DXF
-        doc = ezdxf.readfile(file_path)
+        with perfil.medir(ETAPA_CARGA):
+            if modo_streaming:
+                consola.resumen("Lectura del plano por streaming")
+                doc = DocumentoStreaming(file_path, list(default_valores.keys()) + capas_polilineas_acero)
+            else:
+                doc = ezdxf.readfile(file_path)
+        progreso.carga()
         msp = doc.modelspace()
+        # Catálogo de entidades por tipo y capa (un solo recorrido del modelo)
+        with perfil.medir(ETAPA_RECOPILACION):
+            catalogo = CatalogoEntidades(msp)
         
-        # Abrir Excel
-        app = xw.App(visible=False)  # Abrir Excel en segundo plano
-        wb = app.books.open(excel_path)  # Abrir el archivo
-        ws = wb.sheets.active  # Obtener la hoja activa
+        # Abrir la hoja Convertidor (motor nativo o Excel), o usar la de la sesión
+        if sesion is not None:
+            consola.resumen("Motor de cálculo: {} (sesión compartida)", sesion.motor_calculo)
+            app, wb, ws = sesion.app, sesion.wb, sesion.ws
+        else:
+            consola.resumen("Motor de cálculo: {}", motor_calculo)
+            with perfil.medir(ETAPA_APERTURA_CONVERTIDOR):
+                app, wb, ws = abrir_convertidor(excel_path, motor_calculo)
+        # Escrituras, cálculos y lecturas de la hoja en el perfil
+        medir_convertidor(wb, perfil)
 
         
         # NUEVO: Limpiar celdas antes de empezar
-        print("Limpiando...")
+        consola.detalle(EXCEL, "Limpiando...")
         try:
             
             # Limpiar segundas filas horizontales
@@ -882,14 +1576,14 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
             wb.app.calculate()
             
         except Exception as e:
-            print(f"Error al limpiar celdas: {e}")
+            consola.error("Error al limpiar celdas: {}", e)
         
         # Leer los valores iniciales de las celdas K8 y K17
         k8_original = ws.range('K8').value
         k17_original = ws.range('K17').value
         
         # Encontrar bloque de referencia para acero
-        bloque_original = encontrar_bloque_acero(doc)
+        bloque_original = encontrar_bloque_acero(doc, catalogo=catalogo)
         if bloque_original:
             definicion_bloque = obtener_definicion_bloque(bloque_original)
         else:
@@ -900,25 +1594,37 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                 'yscale': 1.0,
                 'rotation': 0.0
             }
+        # Capa destino y plantilla de atributos resueltas una vez; los bloques se insertan al final
+        insertador = InsertadorBloques(msp, definicion_bloque)
+
+        # Bloques de la ejecución anterior por huella de prelosa (reprocesamiento incremental)
+        huellas = None
+        if incremental:
+            huellas = HuellasPrelosas(ruta_huellas(output_dxf_path),
+                                      huella_contexto(excel_path, default_valores, definicion_bloque, textos_bloques))
+            consola.resumen("Reprocesamiento incremental: {} prelosas guardadas en {}", len(huellas), huellas.ruta)
 
         polilineas_por_tipo = {}
         
-        # Primero obtener todas las polilíneas del modelo space
-        todas_polilineas = [entity for entity in msp if entity.dxftype() == 'LWPOLYLINE']
-        
         # Obtener todas las capas de tipos de prelosa definidas
         tipos_prelosa = list(default_valores.keys())
         
-        print(f"Buscando polilíneas para los siguientes tipos: {tipos_prelosa}")
+        # Registros compactos (vértices en un solo arreglo) de las prelosas y de las polilíneas de acero
+        inicio_recopilacion = time.perf_counter()
+        polilineas_compactas = PolilineasCompactas(
+            catalogo.de_tipo_y_capas('LWPOLYLINE', tipos_prelosa + capas_polilineas_acero)
+        )
+        
+        consola.resumen("Buscando polilíneas para los siguientes tipos: {}", tipos_prelosa)
         
         # Asignar cada polilínea a su respectivo tipo según la capa
-        for entity in todas_polilineas:
-            capa = entity.dxf.layer
+        for registro in polilineas_compactas.registros:
+            capa = registro.capa
             # Si la capa existe como clave en default_valores, es un tipo válido
             if capa in tipos_prelosa:
                 if capa not in polilineas_por_tipo:
                     polilineas_por_tipo[capa] = []
-                polilineas_por_tipo[capa].append(entity)
+                polilineas_por_tipo[capa].append(registro)
             
         # Definir la función para clasificar tipos de prelosa
         def clasificar_tipo_prelosa(tipo):
@@ -935,25 +1641,31 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
 
         
         # Obtener polilíneas y textos
-        polilineas_macizas = [entity for entity in msp if entity.dxftype() == 'LWPOLYLINE' and entity.dxf.layer == "PRELOSA MACIZA"]
-        polilineas_macizas_15 = [entity for entity in msp if entity.dxftype() == 'LWPOLYLINE' and entity.dxf.layer == "PRELOSA MACIZA 15"]
-        polilineas_aligeradas = [entity for entity in msp if entity.dxftype() == 'LWPOLYLINE' and entity.dxf.layer == "PRELOSA ALIGERADA 20"]
-        polilineas_aligeradas_2sent = [entity for entity in msp if entity.dxftype() == 'LWPOLYLINE' and entity.dxf.layer == "PRELOSA ALIGERADA 20 - 2 SENT"]
-        polilineas_aligeradas_25 = [entity for entity in msp if entity.dxftype() == 'LWPOLYLINE' and entity.dxf.layer == "PRELOSA ALIGERADA 25"]
-        polilineas_aligeradas_25_2sent = [entity for entity in msp if entity.dxftype() == 'LWPOLYLINE' and entity.dxf.layer == "PRELOSA ALIGERADA 25 - 2 SENT"]
-        polilinea_macizas_tipo3 = [entity for entity in msp if entity.dxftype() == 'LWPOLYLINE' and entity.dxf.layer == "PRELOSA MACIZA TIPO 3"]
-        polilinea_macizas_tipo4 = [entity for entity in msp if entity.dxftype() == 'LWPOLYLINE' and entity.dxf.layer == "PRELOSA MACIZA TIPO 4"]
-        polilineas_aligeradas_30 = [entity for entity in msp if entity.dxftype() == 'LWPOLYLINE' and entity.dxf.layer == "PRELOSA ALIGERADA 30"]
-        polilineas_aligeradas_30_2sent = [entity for entity in msp if entity.dxftype() == 'LWPOLYLINE' and entity.dxf.layer == "PRELOSA ALIGERADA 30 - 2 SENT"]
-        polilineas_acero = [entity for entity in msp if entity.dxftype() == 'LWPOLYLINE' and 
-                 entity.dxf.layer in ["ACERO LONGITUDINAL", "ACERO TRANSVERSAL", "ACERO LONG ADI", "ACERO TRA ADI",
-                                      "BD-ACERO LONGITUDINAL", "BD-ACERO TRANSVERSAL",
-                                      "ACERO", "REFUERZO", "ARMADURA"]]
-        textos = [entity for entity in msp if entity.dxftype() in ['TEXT', 'MTEXT', 'INSERT', 'MULTILEADER']]
+        polilineas_acero = [registro for registro in polilineas_compactas.registros
+                            if registro.capa in capas_polilineas_acero]
+        # Registros de textos y bloques (se extraen una vez al construir el índice)
+        textos = catalogo.de_tipo('TEXT', 'MTEXT', 'INSERT')
+        # Índice espacial de textos y bloques, con los textos de cada polilínea de acero asignados en un solo paso
+        indice_polilineas = IndicePolilineas(polilineas_acero)
+        # Textos normalizados y especificaciones de acero compartidos por todas las prelosas
+        cache_especificaciones = sesion.cache_especificaciones if sesion is not None else CacheEspecificaciones()
+        indice_textos = IndiceTextos(textos, cache_especificaciones.normalizar)
+        # Textos de acero de las definiciones de bloque (opcional), leídos la primera vez que se usa cada bloque
+        indice_bloques = IndiceBloques(doc, cache_especificaciones.normalizar) if textos_bloques else None
+        indice_textos.asignar(indice_polilineas.polilineas, indice_polilineas.poligonos)
+        perfil.agregar(ETAPA_RECOPILACION, time.perf_counter() - inicio_recopilacion)
+        perfil.contar("polilineas_acero", len(indice_polilineas))
+        perfil.contar("textos", len(indice_textos))
+        
+        # Textos de acero analizados con la caché de la ejecución (tiempo en el perfil)
+        def analizar_especificacion(texto):
+            with perfil.medir(ETAPA_ACERO):
+                return cache_especificaciones.analizar(texto)
         
         # Contadores para estadísticas
         total_prelosas = 0
         total_bloques = 0
+        cache_resultados = sesion.cache_resultados if sesion is not None else crear_cache(excel_path, ruta_cache)
         
         # Print all layer names in the DXF file
         def clasificar_tipo_prelosa(tipo):
@@ -973,227 +1685,28 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                 return "ALIGERADA"
             else:
                 # Si no se reconoce, usar maciza por defecto
-                print(f"ADVERTENCIA: Tipo de prelosa no reconocido: {tipo}. Usando MACIZA por defecto.")
+                consola.resumen("ADVERTENCIA: Tipo de prelosa no reconocido: {}. Usando MACIZA por defecto.", tipo)
                 return "MACIZA"
 
-        def calcular_orientacion_prelosa(vertices, polilineas_longitudinal=None, polilineas_long_adi=None):
-            try:
-                import math
-                import numpy as np
-                
-                # 1. Primero intentar con polilíneas longitudinales regulares
-                if polilineas_longitudinal and len(polilineas_longitudinal) > 0:
-                    print("Usando orientación de ACERO LONGITUDINAL para el bloque")
-                    
-                    # Obtener la primera polilínea longitudinal
-                    polilinea_long = polilineas_longitudinal[0]
-                    vertices_long = polilinea_long.get_points('xy')
-                    
-                    # Necesitamos al menos 2 puntos para determinar una dirección
-                    if len(vertices_long) >= 2:
-                        # NUEVO: Detectar si la polilínea está inclinada
-                        vertices_long_array = np.array(vertices_long)
-                        
-                        # Calcular el rango en X e Y para determinar la orientación espacial
-                        min_x = np.min(vertices_long_array[:, 0])
-                        max_x = np.max(vertices_long_array[:, 0])
-                        min_y = np.min(vertices_long_array[:, 1])
-                        max_y = np.max(vertices_long_array[:, 1])
-                        
-                        rango_x = max_x - min_x
-                        rango_y = max_y - min_y
-                        
-                        # Si la diferencia entre los rangos es pequeña, puede estar inclinada
-                        es_inclinada = abs(rango_x - rango_y) < 0.5 * max(rango_x, rango_y)
-                        
-                        # Si la polilínea parece estar inclinada, calcular ángulo exacto
-                        if es_inclinada:
-                            # Calcular el ángulo usando el primer y último punto para mejor dirección
-                            p1 = vertices_long[0]
-                            p2 = vertices_long[-1]
-                            
-                            # Calcular vector dirección y su ángulo
-                            dx = p2[0] - p1[0]
-                            dy = p2[1] - p1[1]
-                            angulo = math.degrees(math.atan2(dy, dx))
-                            
-                            print(f"Polilínea LONGITUDINAL inclinada. Ángulo exacto: {angulo:.2f}°")
-                            return angulo
-                        else:
-                            # Usar la lógica original para polilíneas no inclinadas
-                            if rango_y > rango_x:  # Orientación predominantemente vertical
-                                angulo_final = 90.0
-                                print(f"Polilínea LONGITUDINAL orientada verticalmente. Ángulo: {angulo_final}°")
-                            else:  # Orientación predominantemente horizontal
-                                angulo_final = 0.0
-                                print(f"Polilínea LONGITUDINAL orientada horizontalmente. Ángulo: {angulo_final}°")
-                            
-                            return angulo_final
-                
-                # 2. Si no hay ACERO LONGITUDINAL, intentar con ACERO LONG ADI
-                if polilineas_long_adi and len(polilineas_long_adi) > 0:
-                    print("No se encontró ACERO LONGITUDINAL. Usando orientación de ACERO LONG ADI para el bloque")
-                    
-                    # Obtener la primera polilínea de acero adicional
-                    polilinea_long_adi = polilineas_long_adi[0]
-                    vertices_long_adi = polilinea_long_adi.get_points('xy')
-                    
-                    # Necesitamos al menos 2 puntos para determinar una dirección
-                    if len(vertices_long_adi) >= 2:
-                        # NUEVO: Detectar si la polilínea está inclinada
-                        vertices_long_adi_array = np.array(vertices_long_adi)
-                        
-                        # Calcular el rango en X e Y para determinar la orientación espacial
-                        min_x = np.min(vertices_long_adi_array[:, 0])
-                        max_x = np.max(vertices_long_adi_array[:, 0])
-                        min_y = np.min(vertices_long_adi_array[:, 1])
-                        max_y = np.max(vertices_long_adi_array[:, 1])
-                        
-                        rango_x = max_x - min_x
-                        rango_y = max_y - min_y
-                        
-                        # Si la diferencia entre los rangos es pequeña, puede estar inclinada
-                        es_inclinada = abs(rango_x - rango_y) < 0.5 * max(rango_x, rango_y)
-                        
-                        # Si la polilínea parece estar inclinada, calcular ángulo exacto
-                        if es_inclinada:
-                            # Calcular el ángulo usando el primer y último punto para mejor dirección
-                            p1 = vertices_long_adi[0]
-                            p2 = vertices_long_adi[-1]
-                            
-                            # Calcular vector dirección y su ángulo
-                            dx = p2[0] - p1[0]
-                            dy = p2[1] - p1[1]
-                            angulo = math.degrees(math.atan2(dy, dx))
-                            
-                            print(f"Polilínea LONG ADI inclinada. Ángulo exacto: {angulo:.2f}°")
-                            return angulo
-                        else:
-                            # Usar la lógica original para polilíneas no inclinadas
-                            if rango_y > rango_x:  # Orientación predominantemente vertical
-                                angulo_final = 90.0
-                                print(f"Polilínea LONG ADI orientada verticalmente. Ángulo: {angulo_final}°")
-                            else:  # Orientación predominantemente horizontal
-                                angulo_final = 0.0
-                                print(f"Polilínea LONG ADI orientada horizontalmente. Ángulo: {angulo_final}°")
-                            
-                            return angulo_final
-                
-                # 3. Si no se pudo determinar orientación con polilíneas, usar el método de caja contenedora
-                print("No se pudo determinar orientación por ACERO LONGITUDINAL ni ACERO LONG ADI, usando método de caja")
-                
-                # Convertir vértices a array NumPy
-                vertices_array = np.array(vertices)
-                
-                # Calcular caja contenedora
-                min_x = np.min(vertices_array[:, 0])
-                max_x = np.max(vertices_array[:, 0])
-                min_y = np.min(vertices_array[:, 1])
-                max_y = np.max(vertices_array[:, 1])
-                
-                ancho = max_x - min_x
-                alto = max_y - min_y
-                
-                # CAMBIO: Orientar para que la línea azul apunte al lado más ESTRECHO (como en la versión original)
-                if ancho < alto:  # Si el ancho es menor que el alto
-                    # Prelosa más alta que ancha -> línea azul horizontal (0°)
-                    angulo_final = 0.0
-                    print(f"Prelosa vertical (más alta que ancha). Orientando bloque horizontalmente: {angulo_final}°")
-                else:
-                    # Prelosa más ancha que alta -> línea azul vertical (90°)
-                    angulo_final = 90.0
-                    print(f"Prelosa horizontal (más ancha que alta). Orientando bloque verticalmente: {angulo_final}°")
-                
-                return angulo_final
-                        
-            except Exception as e:
-                print(f"Error al calcular la orientación: {e}")
-                traceback.print_exc()
-                return 0.0  # Valor por defecto en caso de error
-
-
-        # FUNCIÓN AUXILIAR: Procesa una prelosa (se aplica a todos los tipos)
-        def procesar_prelosa(polilinea, tipo_prelosa, idx):
-            nonlocal total_prelosas, total_bloques
-            
-            total_prelosas += 1
-            vertices = polilinea.get_points('xy')
-            centro_prelosa = calcular_centro_polilinea(vertices)
-            polilineas_dentro = obtener_polilineas_dentro_de_polilinea(vertices, polilineas_acero)
-            
-            # Variables para almacenar textos por tipo de acero
-            textos_longitudinal = []
-            textos_transversal = []
-            textos_adicionales = []
-            textos_long_adi = []
-            textos_tra_adi = []
-            
-            # Procesar polilíneas de acero
-            for polilinea_anidada in polilineas_dentro:
-                vertices_anidada = polilinea_anidada.get_points('xy')
-                
-                textos_dentro = obtener_textos_dentro_de_polilinea(
-                    vertices_anidada,
-                    textos,
-                    capa_polilinea=polilinea_anidada.dxf.layer
-                )
-                                
-                print(f"Polilínea anidada en {tipo_prelosa.lower()} {idx+1} tiene {len(textos_dentro)} textos dentro.")
-                
-                # Clasificar textos según el tipo de acero
-                tipo_acero = polilinea_anidada.dxf.layer.upper()
-                if "LONGITUDINAL" in tipo_acero:
-                    for texto in textos_dentro:
-                        print("=" * 50)
-                        print(f"Texto encontrado en ACERO LONGITUDINAL: {texto}")
-                        textos_longitudinal.append(texto)
-                elif "TRANSVERSAL" in tipo_acero:
-                    for texto in textos_dentro:
-                        print("=" * 50)
-                        print(f"Texto encontrado en ACERO TRANSVERSAL: {texto}")
-                        textos_transversal.append(texto)
-                elif "ACERO LONG ADI" in tipo_acero:
-                    for texto in textos_dentro:
-                        print("=" * 50)
-                        print(f"Texto encontrado en ACERO LONG ADI: {texto}")
-                        textos_long_adi.append(texto)
-                elif "ACERO TRA ADI" in tipo_acero:
-                    for texto in textos_dentro:
-                        print(f"Texto encontrado en ACERO TRA ADI: {texto}")
-                        textos_tra_adi.append(texto)
-                elif "ADICIONAL" in tipo_acero:
-                    for texto in textos_dentro:
-                        print(f"Texto encontrado en ACERO ADICIONAL: {texto}")
-                        textos_adicionales.append(texto)
-            
-            # Procesar datos en Excel
-            
-            # No limpiar celdas, solo sobrescribir
-            # Almacenar los valores originales de K8 y K17 antes de cualquier modificación 
-            k8_actual = ws.range('K8').value
-            k17_actual = ws.range('K17').value
-                        
-            # Casos especiales para PRELOSA ALIGERADA 20
-            categoria_base = clasificar_tipo_prelosa(tipo_prelosa)
-            print(f"Procesando prelosa tipo '{tipo_prelosa}' (categoría: {categoria_base})")
-
-            # Obtener valores específicos para este tipo
-            espaciamiento_predeterminado = float(default_valores.get(tipo_prelosa, {}).get('espaciamiento', 0.20))
-            acero_predeterminado = default_valores.get(tipo_prelosa, {}).get('acero', "3/8\"")
-            print(f"Usando valores: espaciamiento={espaciamiento_predeterminado}, acero={acero_predeterminado}")
-
-            # Aplicar lógica según la categoría
-            if categoria_base == "MACIZA":
-                print("\n=== PROCESANDO PRELOSA MACIZA ===")
-                
-                # Diccionario de conversión para notaciones alternativas de diámetros
-                conversion_diametros = {
-                    "M6": "6mm",
-                    "M8": "8mm",
-                    "#3": "3/8\"",
-                    "#4": "1/2\"",
-                    "#5": "5/8\""
-                }
+        # FUNCIÓN AUXILIAR: Procesa una prelosa (se aplica a todos los tipos)
+        # Función para calcular los textos AS_LONG, AS_TRA1 y AS_TRA2 de una prelosa con la hoja Convertidor
+        def calcular_textos_acero(tipo_prelosa, textos_longitudinal, textos_transversal, textos_long_adi, textos_tra_adi):
+            # Procesar datos en Excel
+            
+            # No limpiar celdas, solo sobrescribir
+            # Casos especiales para PRELOSA ALIGERADA 20
+            categoria_base = clasificar_tipo_prelosa(tipo_prelosa)
+            consola.detalle(EXCEL, "Procesando prelosa tipo '{}' (categoría: {})", tipo_prelosa, categoria_base)
+
+            # Obtener valores específicos para este tipo
+            espaciamiento_predeterminado = float(default_valores.get(tipo_prelosa, {}).get('espaciamiento', 0.20))
+            acero_predeterminado = default_valores.get(tipo_prelosa, {}).get('acero', "3/8\"")
+            consola.detalle(EXCEL, "Usando valores: espaciamiento={}, acero={}",
+                            espaciamiento_predeterminado, acero_predeterminado)
+
+            # Aplicar lógica según la categoría
+            if categoria_base == "MACIZA":
+                consola.detalle(EXCEL, "\n=== PROCESANDO PRELOSA MACIZA ===")
                 
                 # Obtener valores predeterminados de tkinter
                 espaciamiento_predeterminado = float(default_valores.get(tipo_prelosa, {}).get('espaciamiento', 0.20))
@@ -1203,98 +1716,43 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                 datos_longitudinales_encontrados = False
                 datos_transversales_encontrados = False
                 
-                # Función para convertir diámetros alternativos al formato correcto
-                def convertir_diametro(diametro_texto):
-                    # Verificar si está en nuestro diccionario de conversión
-                    if diametro_texto in conversion_diametros:
-                        return conversion_diametros[diametro_texto]
-                    return diametro_texto
-                
                 # Función para extraer información de las notaciones de acero
                 def procesar_texto_acero(texto):
                     # Variable para almacenar resultados
                     resultado = {"cantidad": "1", "diametro_con_comillas": None, "separacion_decimal": espaciamiento_predeterminado}
                     
                     try:
-                        # Limpiar formato DXF si existe (como {\W0.8;texto})
-                        texto_limpio = texto
-                        formato_match = re.search(r'\{.*?;(.*?)\}', texto)
-                        if formato_match:
-                            texto_limpio = formato_match.group(1)
-                            print(f"  → Limpiando formato DXF: '{texto}' -> '{texto_limpio}'")
+                        especificacion = analizar_especificacion(texto)
+                        if especificacion.texto_limpio != texto:
+                            consola.detalle(TEXTOS, "  → Limpiando formato DXF: '{}' -> '{}'",
+                                            texto, especificacion.texto_limpio)
                         
-                        # Verificar si el texto (limpio) contiene notación directa (M6, #3, etc.)
-                        if '#' in texto_limpio or 'M' in texto_limpio:
-                            # Buscar patrones como "#3@20", "M8@30" sin el símbolo ∅
-                            match = re.search(r'(M\d+|#\d+)[@,.]?\d+', texto_limpio)
-                            if match:
-                                resultado["diametro_con_comillas"] = convertir_diametro(match.group(1))
-                                return resultado
-                                
-                            # Si no hay patrón con @, buscar solo el diámetro
-                            match = re.search(r'(M\d+|#\d+)', texto_limpio)
-                            if match:
-                                resultado["diametro_con_comillas"] = convertir_diametro(match.group(1))
-                                return resultado
+                        resultado["diametro_con_comillas"] = diametro_maciza(especificacion)
+                        # La notación directa (M6, #3, etc.) no lleva cantidad ni espaciamiento
+                        if especificacion.notacion is not None:
+                            return resultado
                         
-                        # Extraer cantidad (número antes de ∅)
-                        cantidad_match = re.search(r'^(\d+)∅', texto_limpio)
-                        resultado["cantidad"] = cantidad_match.group(1) if cantidad_match else "1"
+                        # Cantidad (número antes de ∅)
+                        resultado["cantidad"] = especificacion.cantidad or "1"
                         
-                        # Buscar notaciones alternativas con el símbolo ∅ (M6, M8, #3, etc.)
-                        alt_match = re.search(r'∅(M\d+|#\d+)', texto_limpio)
-                        if alt_match:
-                            diametro_alt = alt_match.group(1)
-                            resultado["diametro_con_comillas"] = convertir_diametro(diametro_alt)
-                        else:
-                            # Caso específico para milímetros
-                            # Caso específico para milímetros (con tolerancia a espacios)
-                            if "mm" in texto_limpio.lower():
-                                mm_match = re.search(r'∅?\s*(\d+)\s*(?:mm\.?|\.?mm)', texto_limpio, re.IGNORECASE)
-                                if mm_match:
-                                    diametro = mm_match.group(1)
-                                    resultado["diametro_con_comillas"] = f"{diametro}mm"
-                            else:
-                                # Caso para fraccionales
-                                diametro_match = re.search(r'∅?([\d/]+)', texto_limpio)
-                                if diametro_match:
-                                    diametro = diametro_match.group(1)
-                                    # Asegurarnos de añadir comillas si es necesario
-                                    if "\"" not in diametro and "/" in diametro:
-                                        resultado["diametro_con_comillas"] = f"{diametro}\""
-                                    else:
-                                        resultado["diametro_con_comillas"] = diametro
-                            
-                            # Si no se pudo extraer con ningún formato específico, usar regex genérico
-                            if resultado["diametro_con_comillas"] is None:
-                                diametro_match = re.search(r'∅?([\d/]+)', texto_limpio)
-                                if diametro_match:
-                                    diametro = diametro_match.group(1)
-                                    # Si no tiene unidades y tenemos "mm" en alguna parte, asumimos mm
-                                    if "mm" in texto_limpio.lower():
-                                        resultado["diametro_con_comillas"] = f"{diametro}mm"
-                                    else:
-                                        resultado["diametro_con_comillas"] = diametro
-                        
-                        # Extraer espaciamiento del texto (común para ambos formatos)
-                        espaciamiento_match = re.search(r'@[.,]?(\d+)', texto_limpio)
-                        if espaciamiento_match:
-                            separacion = int(espaciamiento_match.group(1))
-                            resultado["separacion_decimal"] = separacion / 100
+                        # Espaciamiento (común para ambos formatos)
+                        if especificacion.espaciamiento is not None:
+                            resultado["separacion_decimal"] = int(especificacion.espaciamiento) / 100
                         else:
                             # Usar valor predeterminado específico del tipo cuando no hay espaciamiento
                             resultado["separacion_decimal"] = espaciamiento_predeterminado
-                            print(f"  → No se encontró espaciamiento en '{texto}', usando valor predeterminado: {resultado['separacion_decimal']}")
+                            consola.detalle(TEXTOS, "  → No se encontró espaciamiento en '{}', usando valor predeterminado: {}",
+                                            texto, resultado['separacion_decimal'])
                         
                         return resultado
                             
                     except Exception as e:
-                        print(f"  → Error procesando texto: {str(e)}")
+                        consola.error("  → Error procesando texto: {}", str(e))
                         return resultado
                 
                 # Procesar textos longitudinales principales
                 if len(textos_longitudinal) > 0:
-                    print(f"• Encontrados {len(textos_longitudinal)} textos longitudinales")
+                    consola.detalle(EXCEL, "• Encontrados {} textos longitudinales", len(textos_longitudinal))
                     datos_longitudinales_encontrados = True
                     
                     # Procesar primer texto horizontal (G4, H4, J4)
@@ -1309,9 +1767,11 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                             ws.range('H4').value = resultado["diametro_con_comillas"]
                             ws.range('J4').value = resultado["separacion_decimal"]
                             
-                            print(f"  → Texto 1: '{texto}' → G4={resultado['cantidad']}, H4={resultado['diametro_con_comillas']}, J4={resultado['separacion_decimal']}")
+                            consola.detalle(EXCEL, "  → Texto 1: '{}' → G4={}, H4={}, J4={}",
+                                            texto, resultado['cantidad'], resultado['diametro_con_comillas'],
+                                            resultado['separacion_decimal'])
                         except Exception as e:
-                            print(f"  → Error procesando texto 1: {str(e)}")
+                            consola.error("  → Error procesando texto 1: {}", str(e))
                     
                     # Procesar segundo texto horizontal (G5, H5, J5) si existe
                     if len(textos_longitudinal) >= 2:
@@ -1325,13 +1785,15 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                             ws.range('H5').value = resultado["diametro_con_comillas"]
                             ws.range('J5').value = resultado["separacion_decimal"]
                             
-                            print(f"  → Texto 2: '{texto}' → G5={resultado['cantidad']}, H5={resultado['diametro_con_comillas']}, J5={resultado['separacion_decimal']}")
+                            consola.detalle(EXCEL, "  → Texto 2: '{}' → G5={}, H5={}, J5={}",
+                                            texto, resultado['cantidad'], resultado['diametro_con_comillas'],
+                                            resultado['separacion_decimal'])
                         except Exception as e:
-                            print(f"  → Error procesando texto 2: {str(e)}")
+                            consola.error("  → Error procesando texto 2: {}", str(e))
 
                 # Procesar textos transversales
                 if len(textos_transversal) > 0:
-                    print(f"• Encontrados {len(textos_transversal)} textos transversales")
+                    consola.detalle(EXCEL, "• Encontrados {} textos transversales", len(textos_transversal))
                     datos_transversales_encontrados = True
                     
                     # Procesar primer texto vertical (G14, H14, J14)
@@ -1346,9 +1808,11 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                             ws.range('H14').value = resultado["diametro_con_comillas"]
                             ws.range('J14').value = resultado["separacion_decimal"]
                             
-                            print(f"  → Transversal 1: '{texto}' → G14={resultado['cantidad']}, H14={resultado['diametro_con_comillas']}, J14={resultado['separacion_decimal']}")
+                            consola.detalle(EXCEL, "  → Transversal 1: '{}' → G14={}, H14={}, J14={}",
+                                            texto, resultado['cantidad'], resultado['diametro_con_comillas'],
+                                            resultado['separacion_decimal'])
                         except Exception as e:
-                            print(f"  → Error procesando texto transversal 1: {str(e)}")
+                            consola.error("  → Error procesando texto transversal 1: {}", str(e))
                     
                     # Procesar segundo texto vertical (G15, H15, J15) si existe
                     if len(textos_transversal) >= 2:
@@ -1362,9 +1826,11 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                             ws.range('H15').value = resultado["diametro_con_comillas"]
                             ws.range('J15').value = resultado["separacion_decimal"]
                             
-                            print(f"  → Transversal 2: '{texto}' → G15={resultado['cantidad']}, H15={resultado['diametro_con_comillas']}, J15={resultado['separacion_decimal']}")
+                            consola.detalle(EXCEL, "  → Transversal 2: '{}' → G15={}, H15={}, J15={}",
+                                            texto, resultado['cantidad'], resultado['diametro_con_comillas'],
+                                            resultado['separacion_decimal'])
                         except Exception as e:
-                            print(f"  → Error procesando texto transversal 2: {str(e)}")
+                            consola.error("  → Error procesando texto transversal 2: {}", str(e))
                     
                     # NUEVO: Procesar tercer texto vertical (G16, H16, J16) si existe
                     if len(textos_transversal) >= 3:
@@ -1378,27 +1844,31 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                             ws.range('H16').value = resultado["diametro_con_comillas"]
                             ws.range('J16').value = resultado["separacion_decimal"]
                             
-                            print(f"  → Transversal 3: '{texto}' → G16={resultado['cantidad']}, H16={resultado['diametro_con_comillas']}, J16={resultado['separacion_decimal']}")
+                            consola.detalle(EXCEL, "  → Transversal 3: '{}' → G16={}, H16={}, J16={}",
+                                            texto, resultado['cantidad'], resultado['diametro_con_comillas'],
+                                            resultado['separacion_decimal'])
                         except Exception as e:
-                            print(f"  → Error procesando texto transversal 3: {str(e)}")
+                            consola.error("  → Error procesando texto transversal 3: {}", str(e))
 
                 # Procesar textos longitudinales adicionales
                 if len(textos_long_adi) > 0:
-                    print(f"• Encontrados {len(textos_long_adi)} textos longitudinales adicionales")
+                    consola.detalle(EXCEL, "• Encontrados {} textos longitudinales adicionales", len(textos_long_adi))
                     datos_longitudinales_encontrados = True
                     
                     # Obtener el espaciamiento por defecto de los valores de tkinter
                     espaciamiento_macizas_adi = espaciamiento_predeterminado  # Usar el valor del tipo actual
                     
                     # Colocar valores por defecto en primera fila
-                    print(f"  → Colocando valores default: G4=1, H4={acero_predeterminado}, J4={espaciamiento_macizas_adi}")
+                    consola.detalle(EXCEL, "  → Colocando valores default: G4=1, H4={}, J4={}",
+                                    acero_predeterminado, espaciamiento_macizas_adi)
                     ws.range('G4').value = 1
                     ws.range('H4').value = acero_predeterminado
                     ws.range('J4').value = espaciamiento_macizas_adi
                     
                     # Colocar los mismos valores por defecto en fila vertical si no hay transversales
                     if not datos_transversales_encontrados:
-                        print(f"  → Colocando valores default: G14=1, H14={acero_predeterminado}, J14={espaciamiento_macizas_adi}")
+                        consola.detalle(EXCEL, "  → Colocando valores default: G14=1, H14={}, J14={}",
+                                        acero_predeterminado, espaciamiento_macizas_adi)
                         ws.range('G14').value = 1
                         ws.range('H14').value = acero_predeterminado
                         ws.range('J14').value = espaciamiento_macizas_adi
@@ -1415,11 +1885,13 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                             if resultado["diametro_con_comillas"]:
                                 # Guardar los datos procesados
                                 datos_textos.append([int(resultado["cantidad"]), resultado["diametro_con_comillas"], resultado["separacion_decimal"]])
-                                print(f"  → Long Adi #{i+1}: '{texto}' → cantidad={resultado['cantidad']}, diámetro={resultado['diametro_con_comillas']}, separación={resultado['separacion_decimal']}")
+                                consola.detalle(EXCEL, "  → Long Adi #{}: '{}' → cantidad={}, diámetro={}, separación={}",
+                                                i+1, texto, resultado['cantidad'], resultado['diametro_con_comillas'],
+                                                resultado['separacion_decimal'])
                             else:
-                                print(f"  → No se pudo extraer diámetro de '{texto}'")
+                                consola.detalle(EXCEL, "  → No se pudo extraer diámetro de '{}'", texto)
                         except Exception as e:
-                            print(f"  → Error procesando texto adicional: {str(e)}")
+                            consola.error("  → Error procesando texto adicional: {}", str(e))
 
                     # Colocar los valores extraídos en las filas adicionales (G5, H5, J5, etc.)
                     for i, datos in enumerate(datos_textos):
@@ -1432,7 +1904,7 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                     
                     # Procesar aceros transversales adicionales
                     if len(textos_tra_adi) > 0:
-                        print(f"• Encontrados {len(textos_tra_adi)} textos transversales adicionales")
+                        consola.detalle(EXCEL, "• Encontrados {} textos transversales adicionales", len(textos_tra_adi))
                         datos_transversales_encontrados = True
                         
                         # Procesar los textos de acero transversal adi
@@ -1447,11 +1919,14 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                                 if resultado["diametro_con_comillas"]:
                                     # Guardar los datos procesados
                                     datos_textos_tra.append([int(resultado["cantidad"]), resultado["diametro_con_comillas"], resultado["separacion_decimal"]])
-                                    print(f"  → Trans Adi #{i+1}: '{texto}' → cantidad={resultado['cantidad']}, diámetro={resultado['diametro_con_comillas']}, separación={resultado['separacion_decimal']}")
+                                    consola.detalle(EXCEL, "  → Trans Adi #{}: '{}' → cantidad={}, diámetro={}, separación={}",
+                                                    i+1, texto, resultado['cantidad'],
+                                                    resultado['diametro_con_comillas'],
+                                                    resultado['separacion_decimal'])
                                 else:
-                                    print(f"  → No se pudo extraer diámetro de '{texto}'")
+                                    consola.detalle(EXCEL, "  → No se pudo extraer diámetro de '{}'", texto)
                             except Exception as e:
-                                print(f"  → Error procesando texto transversal adicional: {str(e)}")
+                                consola.error("  → Error procesando texto transversal adicional: {}", str(e))
                                                     
                         # Colocar los valores extraídos en las filas adicionales (G15, H15, J15, etc.)
                         for i, datos in enumerate(datos_textos_tra):
@@ -1464,13 +1939,14 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
 
                 # NUEVO: Caso cuando hay solo longitudinal pero no transversal
                 elif datos_longitudinales_encontrados and not datos_transversales_encontrados:
-                    print("• Solo se encontraron textos longitudinales - Usando valores predeterminados para transversal")
+                    consola.detalle(EXCEL, "• Solo se encontraron textos longitudinales - Usando valores predeterminados para transversal")
                     
                     # Colocar valores predeterminados para transversal
                     ws.range('G14').value = 1
                     ws.range('H14').value = acero_predeterminado
                     ws.range('J14').value = espaciamiento_predeterminado
-                    print(f"  → Colocando valores default transversal: G14=1, H14={acero_predeterminado}, J14={espaciamiento_predeterminado}")
+                    consola.detalle(EXCEL, "  → Colocando valores default transversal: G14=1, H14={}, J14={}",
+                                    acero_predeterminado, espaciamiento_predeterminado)
                     
                     # Limpiar celdas adicionales para evitar interferencias
                     ws.range('G15').value = 0
@@ -1478,26 +1954,28 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
 
                 # NUEVO: Caso cuando hay solo transversal pero no longitudinal
                 elif datos_transversales_encontrados and not datos_longitudinales_encontrados:
-                    print("• Solo se encontraron textos transversales - Usando valores predeterminados para longitudinal")
+                    consola.detalle(EXCEL, "• Solo se encontraron textos transversales - Usando valores predeterminados para longitudinal")
                     
                     # Colocar valores predeterminados para longitudinal
                     ws.range('G4').value = 1
                     ws.range('H4').value = acero_predeterminado
                     ws.range('J4').value = espaciamiento_predeterminado
-                    print(f"  → Colocando valores default longitudinal: G4=1, H4={acero_predeterminado}, J4={espaciamiento_predeterminado}")
+                    consola.detalle(EXCEL, "  → Colocando valores default longitudinal: G4=1, H4={}, J4={}",
+                                    acero_predeterminado, espaciamiento_predeterminado)
                     
                     # Limpiar celdas adicionales para evitar interferencias
                     ws.range('G5').value = 0
 
                 # Caso cuando no hay textos
                 elif len(textos_longitudinal) == 0 and len(textos_transversal) == 0 and len(textos_long_adi) == 0 and len(textos_tra_adi) == 0:
-                    print("• No se encontraron textos de acero - Usando valores predeterminados")
+                    consola.detalle(EXCEL, "• No se encontraron textos de acero - Usando valores predeterminados")
                     
                     # CORREGIDO: Usar el valor del tipo actual, no hardcoded para 'PRELOSA MACIZA'
                     espaciamiento_macizas_adi = float(default_valores.get(tipo_prelosa, {}).get('espaciamiento', 0.20))
                     acero_predeterminado = default_valores.get(tipo_prelosa, {}).get('acero', "3/8\"")
                     
-                    print(f"  → Colocando valores default: G4=1, H4={acero_predeterminado}, J4={espaciamiento_macizas_adi}")
+                    consola.detalle(EXCEL, "  → Colocando valores default: G4=1, H4={}, J4={}",
+                                    acero_predeterminado, espaciamiento_macizas_adi)
                     
                     # Colocar valores por defecto en Excel
                     ws.range('G4').value = 1
@@ -1514,7 +1992,7 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                     ws.range('G16').value = 0  # Limpiar también celda para tercer transversal
 
                 # Forzar recálculo y obtener valores calculados
-                print("• Forzando recálculo de Excel...")
+                consola.detalle(EXCEL, "• Forzando recálculo de Excel...")
                 ws.book.app.calculate()
 
                 # Guardar valores calculados
@@ -1525,29 +2003,30 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                 k19_valor = ws.range('K19').value
                 k20_valor = ws.range('K20').value  # Nuevo: para tercer texto transversal
 
-                print(f"• Resultados calculados (longitudinal): K8={k8_valor}, K9={k9_valor}")
-                print(f"• Resultados calculados (transversal): K17={k17_valor}, K18={k18_valor}, K19={k19_valor}, K20={k20_valor if k20_valor else 'N/A'}")
+                consola.detalle(EXCEL, "• Resultados calculados (longitudinal): K8={}, K9={}", k8_valor, k9_valor)
+                consola.detalle(EXCEL, "• Resultados calculados (transversal): K17={}, K18={}, K19={}, K20={}",
+                                k17_valor, k18_valor, k19_valor, k20_valor if k20_valor else 'N/A')
 
                 # ACERO LONGITUDINAL - Validar y seleccionar el valor adecuado con jerarquía
                 if k8_valor is None or k8_valor <= 0.1 or k8_valor < 0:
                     # Si K8 no es válido, verificar K9
-                    print("  → K8 fuera de rango o inválido, verificando K9")
+                    consola.detalle(EXCEL, "  → K8 fuera de rango o inválido, verificando K9")
                     if k9_valor is not None and k9_valor > 0:
-                        print(f"  → Usando K9 para acero longitudinal (1/2\"): {k9_valor}")
+                        consola.detalle(EXCEL, '  → Usando K9 para acero longitudinal (1/2"): {}', k9_valor)
                         as_long_texto = f"1Ø1/2\"@.{formatear_valor_espaciamiento(k9_valor)}"
                         if k9_valor <= 0.1:
-                            print("  → ADVERTENCIA: K9 menor o igual a 0.1 pero se usará de todos modos")
+                            consola.detalle(EXCEL, "  → ADVERTENCIA: K9 menor o igual a 0.1 pero se usará de todos modos")
                     elif k9_valor is not None and k9_valor < 0:
-                        print(f"  → ALERTA: El valor K9 es negativo: {k9_valor}")
+                        consola.detalle(EXCEL, "  → ALERTA: El valor K9 es negativo: {}", k9_valor)
                         as_long_texto = f"ERROR: VALOR NEGATIVO EN K9 ({k9_valor})"
                     else:
-                        print("  → K9 es None o inválido, usando valor de respaldo")
+                        consola.detalle(EXCEL, "  → K9 es None o inválido, usando valor de respaldo")
                         as_long_texto = "ERROR: ACERO INSUFICIENTE PARA ESTA PRELOSA"
                 elif k8_valor < 0:
-                    print(f"  → ALERTA: El valor K8 es negativo: {k8_valor}")
+                    consola.detalle(EXCEL, "  → ALERTA: El valor K8 es negativo: {}", k8_valor)
                     # Verificar K9 como alternativa
                     if k9_valor is not None and k9_valor > 0:
-                        print(f"  → Usando K9 como alternativa: {k9_valor}")
+                        consola.detalle(EXCEL, "  → Usando K9 como alternativa: {}", k9_valor)
                         as_long_texto = f"1Ø1/2\"@.{formatear_valor_espaciamiento(k9_valor)}"
                     else:
                         as_long_texto = f"ERROR: VALOR NEGATIVO en K8 ({k8_valor})"
@@ -1561,23 +2040,23 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                 # ACERO TRANSVERSAL 2 - Validar con jerarquía: K18 > K19
                 if k18_valor is None or k18_valor <= 0.1 or k18_valor < 0:
                     # Si K18 no es válido, verificar K19
-                    print("  → K18 fuera de rango o inválido, verificando K19")
+                    consola.detalle(EXCEL, "  → K18 fuera de rango o inválido, verificando K19")
                     if k19_valor is not None and k19_valor > 0:
-                        print(f"  → Usando K19 para acero transversal 2 (3/8\"): {k19_valor}")
+                        consola.detalle(EXCEL, '  → Usando K19 para acero transversal 2 (3/8"): {}', k19_valor)
                         as_tra2_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k19_valor)}"
                         if k19_valor <= 0.1:
-                            print("  → ADVERTENCIA: K19 menor o igual a 0.1 pero se usará de todos modos")
+                            consola.detalle(EXCEL, "  → ADVERTENCIA: K19 menor o igual a 0.1 pero se usará de todos modos")
                     elif k19_valor is not None and k19_valor < 0:
-                        print(f"  → ALERTA: El valor K19 es negativo: {k19_valor}")
+                        consola.detalle(EXCEL, "  → ALERTA: El valor K19 es negativo: {}", k19_valor)
                         as_tra2_texto = f"ERROR: VALOR NEGATIVO EN K19 ({k19_valor})"
                     else:
-                        print("  → K19 es None o inválido, usando valor de respaldo")
+                        consola.detalle(EXCEL, "  → K19 es None o inválido, usando valor de respaldo")
                         as_tra2_texto = "ERROR: VERIFICAR CÁLCULOS DE ACERO"
                 elif k18_valor < 0:
-                    print(f"  → ALERTA: El valor K18 es negativo: {k18_valor}")
+                    consola.detalle(EXCEL, "  → ALERTA: El valor K18 es negativo: {}", k18_valor)
                     # Verificar K19 como alternativa
                     if k19_valor is not None and k19_valor > 0:
-                        print(f"  → Usando K19 como alternativa: {k19_valor}")
+                        consola.detalle(EXCEL, "  → Usando K19 como alternativa: {}", k19_valor)
                         as_tra2_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k19_valor)}"
                     else:
                         as_tra2_texto = f"ERROR: VALOR NEGATIVO en K18 ({k18_valor})"
@@ -1588,44 +2067,28 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                 # NUEVO: ACERO TRANSVERSAL 3 - Validar con K20
                 as_tra3_texto = None
                 if len(textos_transversal) >= 3 or (k20_valor is not None and k20_valor > 0):
-                    print("  → Procesando tercer acero transversal")
+                    consola.detalle(EXCEL, "  → Procesando tercer acero transversal")
                     if k20_valor is not None:
                         if k20_valor > 0:
                             # Usar el diámetro que se extrajo del texto o 5/8" si no se puede determinar
                             if len(textos_transversal) >= 3:
                                 # Intentar usar el diámetro del tercer texto transversal
                                 texto = textos_transversal[2]
-                                # Limpiar formato DXF si existe
-                                texto_limpio = texto
-                                formato_match = re.search(r'\{.*?;(.*?)\}', texto)
-                                if formato_match:
-                                    texto_limpio = formato_match.group(1)
+                                especificacion = analizar_especificacion(texto)
                                 
                                 # MEJORADO: Verificar si el texto contiene notación directa
                                 diametro_texto = None
                                 
-                                if '#' in texto_limpio or 'M' in texto_limpio:
-                                    # Buscar patrones como "#3@20", "M8@30" sin el símbolo ∅
-                                    match = re.search(r'(M\d+|#\d+)[@,.]?\d+', texto_limpio)
-                                    if match:
-                                        diametro_texto = convertir_diametro(match.group(1))
+                                if especificacion.notacion is not None:
+                                    diametro_texto = convertir_diametro(especificacion.notacion)
+                                elif especificacion.numero is not None:
+                                    diametro = especificacion.numero
+                                    if especificacion.menciona_mm:
+                                        diametro_texto = f"{diametro}mm"
+                                    elif "/" in diametro:
+                                        diametro_texto = f"{diametro}\""
                                     else:
-                                        # Si no hay patrón con @, buscar solo el diámetro
-                                        match = re.search(r'(M\d+|#\d+)', texto_limpio)
-                                        if match:
-                                            diametro_texto = convertir_diametro(match.group(1))
-                                
-                                if diametro_texto is None:
-                                    # Buscar con el símbolo ∅
-                                    diametro_match = re.search(r'∅?([\d/]+)', texto_limpio)
-                                    if diametro_match:
-                                        diametro = diametro_match.group(1)
-                                        if "mm" in texto_limpio.lower():
-                                            diametro_texto = f"{diametro}mm"
-                                        elif "/" in diametro and "\"" not in diametro:
-                                            diametro_texto = f"{diametro}\""
-                                        else:
-                                            diametro_texto = diametro
+                                        diametro_texto = diametro
                                 
                                 if diametro_texto is None:
                                     diametro_texto = "5/8\""  # Valor por defecto si no se puede extraer
@@ -1633,110 +2096,31 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                                 diametro_texto = "5/8\""  # Valor por defecto si no hay tercer texto
                             
                             as_tra3_texto = f"1Ø{diametro_texto}@.{formatear_valor_espaciamiento(k20_valor)}"
-                            print(f"  → Usando K20 para acero transversal 3 ({diametro_texto}): {k20_valor}")
+                            consola.detalle(EXCEL, "  → Usando K20 para acero transversal 3 ({}): {}",
+                                            diametro_texto, k20_valor)
                         elif k20_valor < 0:
-                            print(f"  → ALERTA: El valor K20 es negativo: {k20_valor}")
+                            consola.detalle(EXCEL, "  → ALERTA: El valor K20 es negativo: {}", k20_valor)
                             as_tra3_texto = f"ERROR: VALOR NEGATIVO EN K20 ({k20_valor})"
                         else:
                             # K20 es 0 o muy pequeño
-                            print("  → K20 es cero o demasiado pequeño, no se agregará tercer acero")
+                            consola.detalle(EXCEL, "  → K20 es cero o demasiado pequeño, no se agregará tercer acero")
                     else:
-                        print("  → K20 es None, no se agregará tercer acero")
+                        consola.detalle(EXCEL, "  → K20 es None, no se agregará tercer acero")
 
-                print("• Valores finales para bloque:")
-                print(f"  → AS_LONG: {as_long_texto}")
-                print(f"  → AS_TRA1: {as_tra1_texto}")
+                consola.detalle(EXCEL, "• Valores finales para bloque:")
+                consola.detalle(EXCEL, "  → AS_LONG: {}", as_long_texto)
+                consola.detalle(EXCEL, "  → AS_TRA1: {}", as_tra1_texto)
                 if as_tra2_texto:
-                    print(f"  → AS_TRA2: {as_tra2_texto}")
+                    consola.detalle(EXCEL, "  → AS_TRA2: {}", as_tra2_texto)
                 if as_tra3_texto:
-                    print(f"  → AS_TRA3: {as_tra3_texto}")
+                    consola.detalle(EXCEL, "  → AS_TRA3: {}", as_tra3_texto)
 
-                print("=== FIN PROCESAMIENTO PRELOSA MACIZA ===\n")
+                consola.detalle(EXCEL, "=== FIN PROCESAMIENTO PRELOSA MACIZA ===\n")
 
                 # Limpiar celdas para evitar interferencias cuando se procese la siguiente prelosa
             
             elif categoria_base == "ALIGERADA":
-                print("\n=== PROCESANDO PRELOSA ALIGERADA ===")
-                
-                # Diccionario de conversión para notaciones alternativas de diámetros
-                conversion_diametros = {
-                    "M6": "6mm",
-                    "M8": "8mm",
-                    "#3": "3/8\"",
-                    "#4": "1/2\"",
-                    "#5": "5/8\""
-                }
-                
-                # Función para convertir diámetros alternativos al formato correcto
-                def convertir_diametro(diametro_texto):
-                    # Verificar si está en nuestro diccionario de conversión
-                    if diametro_texto in conversion_diametros:
-                        return conversion_diametros[diametro_texto]
-                    return diametro_texto
-                
-                # Función optimizada para extraer diámetro con formatos diversos
-                # Función optimizada para extraer diámetro con formatos diversos
-                def extraer_diametro(texto):
-                    # Limpiar formato DXF si existe (como {\W0.8;texto})
-                    texto_limpio = texto
-                    formato_match = re.search(r'\{.*?;(.*?)\}', texto)
-                    if formato_match:
-                        texto_limpio = formato_match.group(1)
-                        print(f"  → Limpiando formato DXF: '{texto}' -> '{texto_limpio}'")
-                    
-                    # Caso específico para '1Ø 8 mm@.175(Inf.)' y similares con espacios
-                    match = re.search(r'^\d+Ø\s*(\d+)\s*mm', texto_limpio)
-                    if match:
-                        return f"{match.group(1)}mm"
-                    
-                    # Caso específico para patrones como "1∅3/8"@.225(Inf.)"
-                    match = re.search(r'^\d+∅([\d/]+\")', texto_limpio)
-                    if match:
-                        return match.group(1)
-                    
-                    # Caso específico para textos como 1Ø3/8" con o sin texto adicional
-                    match = re.search(r'\d+Ø([\d/]+\")', texto_limpio)
-                    if match:
-                        return match.group(1)
-                    
-                    # Verificar si el texto (limpio) contiene notación directa (M6, #3, etc.)
-                    if '#' in texto_limpio or 'M' in texto_limpio:
-                        # Buscar patrones como "#3@20", "M8@30" sin el símbolo ∅
-                        match = re.search(r'(M\d+|#\d+)[@,.]?\d+', texto_limpio)
-                        if match:
-                            return convertir_diametro(match.group(1))
-                            
-                        # Si no hay patrón con @, buscar solo el diámetro
-                        match = re.search(r'(M\d+|#\d+)', texto_limpio)
-                        if match:
-                            return convertir_diametro(match.group(1))
-                    
-                    # Buscar notaciones alternativas con el símbolo ∅ (M6, M8, #3, etc.)
-                    match = re.search(r'∅(M\d+|#\d+)', texto_limpio)
-                    if match:
-                        return convertir_diametro(match.group(1))
-                    
-                    # Caso para milímetros con posible espacio entre número y 'mm'
-                    if "mm" in texto_limpio.lower():
-                        # Buscar patrón con posible espacio entre número y 'mm'
-                        match = re.search(r'∅?\s*(\d+)\s*(?:mm\.?|\.?mm)', texto_limpio, re.IGNORECASE)
-                        if match:
-                            return f"{match.group(1)}mm"
-                    
-                    # Caso para fraccionales
-                    match = re.search(r'∅?([\d/]+)', texto_limpio)
-                    if match:
-                        diametro = match.group(1)
-                        # Si es un número simple y el texto menciona mm, aplicar formato mm
-                        if "mm" in texto_limpio.lower() and "/" not in diametro:
-                            return f"{diametro}mm"
-                        # Si es fraccional, añadir comillas si es necesario
-                        elif "/" in diametro and "\"" not in diametro:
-                            return f"{diametro}\""
-                        else:
-                            return diametro
-                    
-                    return None  # No se pudo extraer diámetro
+                consola.detalle(EXCEL, "\n=== PROCESANDO PRELOSA ALIGERADA ===")
                 
                 # Función para procesar texto de acero y extraer información
                 def procesar_texto_acero(texto, valores_default):
@@ -1747,34 +2131,38 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                     }
                     
                     try:
-                        # Limpiar formato DXF si existe
-                        texto_limpio = texto
-                        formato_match = re.search(r'\{.*?;(.*?)\}', texto)
-                        if formato_match:
-                            texto_limpio = formato_match.group(1)
-                            print(f"  → Limpiando formato para procesamiento: '{texto}' -> '{texto_limpio}'")
+                        especificacion = analizar_especificacion(texto)
+                        texto_limpio = especificacion.texto_limpio
+                        if texto_limpio != texto:
+                            consola.detalle(TEXTOS, "  → Limpiando formato para procesamiento: '{}' -> '{}'",
+                                            texto, texto_limpio)
+                            # El diámetro se busca en el texto ya limpio, que puede tener otro formato
+                            especificacion_limpia = analizar_especificacion(texto_limpio)
+                            if especificacion_limpia.texto_limpio != texto_limpio:
+                                consola.detalle(TEXTOS, "  → Limpiando formato DXF: '{}' -> '{}'",
+                                                texto_limpio, especificacion_limpia.texto_limpio)
+                        else:
+                            especificacion_limpia = especificacion
                         
-                        # Extraer cantidad (número antes de ∅, si no hay se asume 1)
-                        cantidad_match = re.search(r'^(\d+)∅', texto_limpio)
-                        resultado["cantidad"] = cantidad_match.group(1) if cantidad_match else "1"
+                        # Cantidad (número antes de ∅, si no hay se asume 1)
+                        resultado["cantidad"] = especificacion.cantidad or "1"
                         
-                        # Extraer diámetro del texto
-                        diametro_con_comillas = extraer_diametro(texto_limpio)
+                        # Diámetro del texto
+                        diametro_con_comillas = diametro_aligerada(especificacion_limpia)
                         if diametro_con_comillas:
                             resultado["diametro"] = diametro_con_comillas
-                            print(f"  → Diámetro extraído: {diametro_con_comillas}")
+                            consola.detalle(TEXTOS, "  → Diámetro extraído: {}", diametro_con_comillas)
                         else:
-                            print(f"  → No se pudo extraer diámetro, usando valor por defecto: {resultado['diametro']}")
+                            consola.detalle(TEXTOS, "  → No se pudo extraer diámetro, usando valor por defecto: {}",
+                                            resultado['diametro'])
                         
-                        # Extraer espaciamiento del texto (buscar patrones como @20, @.20, etc.)
-                        espaciamiento_match = re.search(r'@[,.]?(\d+)', texto_limpio)
-                        if espaciamiento_match:
-                            separacion = espaciamiento_match.group(1)
-                            resultado["separacion"] = float(f"0.{separacion}")
+                        # Espaciamiento del texto (patrones como @20, @.20, etc.)
+                        if especificacion.espaciamiento is not None:
+                            resultado["separacion"] = float(f"0.{especificacion.espaciamiento}")
                         
                         return resultado
                     except Exception as e:
-                        print(f"  → Error procesando texto '{texto}': {str(e)}")
+                        consola.error("  → Error procesando texto '{}': {}", texto, str(e))
                         return resultado
                 
                 # Obtener valores predeterminados específicos para este tipo de prelosa
@@ -1783,28 +2171,29 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                     "acero": default_valores.get(tipo_prelosa, {}).get('acero', "3/8\"")
                 }
                 
-                print(f"Usando valores predeterminados para {tipo_prelosa}:")
-                print(f"  - Espaciamiento: {valores_default['espaciamiento']}")
-                print(f"  - Acero: {valores_default['acero']}")
+                consola.detalle(EXCEL, "Usando valores predeterminados para {}:", tipo_prelosa)
+                consola.detalle(EXCEL, "  - Espaciamiento: {}", valores_default['espaciamiento'])
+                consola.detalle(EXCEL, "  - Acero: {}", valores_default['acero'])
                 
                 # Variables para rastrear si se han encontrado datos
                 datos_longitudinales_encontrados = False
                 datos_transversales_encontrados = False
                 
                 # Imprimir todos los textos encontrados para depuración
-                print("TEXTOS ENCONTRADOS PARA DEPURACIÓN:")
-                print(f"Textos transversales ({len(textos_transversal)}): {textos_transversal}")
-                print(f"Textos longitudinales ({len(textos_longitudinal)}): {textos_longitudinal}")
-                print(f"Textos longitudinales adicionales ({len(textos_long_adi)}): {textos_long_adi}")
-                print(f"Textos transversales adicionales ({len(textos_tra_adi)}): {textos_tra_adi}")
+                consola.detalle(EXCEL, "TEXTOS ENCONTRADOS PARA DEPURACIÓN:")
+                consola.detalle(EXCEL, "Textos transversales ({}): {}", len(textos_transversal), textos_transversal)
+                consola.detalle(EXCEL, "Textos longitudinales ({}): {}", len(textos_longitudinal), textos_longitudinal)
+                consola.detalle(EXCEL, "Textos longitudinales adicionales ({}): {}",
+                                len(textos_long_adi), textos_long_adi)
+                consola.detalle(EXCEL, "Textos transversales adicionales ({}): {}", len(textos_tra_adi), textos_tra_adi)
                 
                 # Combinar textos verticales y horizontales para procesar
                 textos_a_procesar = textos_transversal + textos_longitudinal
-                print(f"Total textos a procesar (vertical + horizontal): {len(textos_a_procesar)}")
+                consola.detalle(EXCEL, "Total textos a procesar (vertical + horizontal): {}", len(textos_a_procesar))
                 
                 # Procesar los textos (independientemente si son verticales u horizontales)
                 if len(textos_a_procesar) > 0:
-                    print(f"Procesando {len(textos_a_procesar)} textos en {tipo_prelosa}")
+                    consola.detalle(EXCEL, "Procesando {} textos en {}", len(textos_a_procesar), tipo_prelosa)
                     datos_longitudinales_encontrados = True
                     
                     # Limpiar celda g5 preventivamente
@@ -1813,7 +2202,7 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                     # Procesar hasta 2 textos principales (si hay)
                     for i, texto in enumerate(textos_a_procesar[:2]):
                         fila = 4 + i  # Comenzar en fila 4 (G4, H4, J4) y seguir con fila 5
-                        print(f"Procesando texto #{i+1}: '{texto}' para fila {fila}")
+                        consola.detalle(EXCEL, "Procesando texto #{}: '{}' para fila {}", i+1, texto, fila)
                         
                         try:
                             # Procesar el texto y obtener datos
@@ -1824,27 +2213,28 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                             ws.range(f'H{fila}').value = resultado["diametro"]
                             ws.range(f'J{fila}').value = resultado["separacion"]
                             
-                            print(f"  → Colocado en Excel: G{fila}={resultado['cantidad']}, " +
-                                f"H{fila}={resultado['diametro']}, J{fila}={resultado['separacion']}")
+                            consola.detalle(EXCEL, "  → Colocado en Excel: G{}={}, H{}={}, J{}={}",
+                                            fila, resultado['cantidad'], fila, resultado['diametro'], fila,
+                                            resultado['separacion'])
                         except Exception as e:
                             if i == 0:  # Si es el primer texto, colocar valores por defecto en caso de error
-                                print(f"  → Error procesando texto: {e}. Usando valores por defecto")
+                                consola.error("  → Error procesando texto: {}. Usando valores por defecto", e)
                                 ws.range(f'G{fila}').value = 1
                                 ws.range(f'H{fila}').value = valores_default["acero"]
                                 ws.range(f'J{fila}').value = valores_default["espaciamiento"]
                 else:
-                    print(f"ADVERTENCIA: No se encontraron textos principales para {tipo_prelosa}")
+                    consola.detalle(EXCEL, "ADVERTENCIA: No se encontraron textos principales para {}", tipo_prelosa)
                     
                     # Si no hay textos principales pero hay adicionales, colocar valores por defecto
                     if len(textos_long_adi) > 0 or len(textos_tra_adi) > 0:
-                        print("Colocando valores por defecto en celdas principales para el caso adicional")
+                        consola.detalle(EXCEL, "Colocando valores por defecto en celdas principales para el caso adicional")
                         ws.range('G4').value = 1
                         ws.range('H4').value = valores_default["acero"]
                         ws.range('J4').value = valores_default["espaciamiento"]
                         datos_longitudinales_encontrados = True
                     else:
                         # Si no hay ningún texto, usar valores predeterminados para ambos
-                        print("No se encontraron textos de ningún tipo. Colocando valores predeterminados")
+                        consola.detalle(EXCEL, "No se encontraron textos de ningún tipo. Colocando valores predeterminados")
                         
                         # Acero longitudinal (G4, H4, J4)
                         ws.range('G4').value = 1
@@ -1861,15 +2251,15 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                 
                 # Procesar textos longitudinales adicionales
                 if len(textos_long_adi) > 0:
-                    print("=" * 60)
-                    print(f"PROCESANDO {len(textos_long_adi)} TEXTOS LONG ADI EN {tipo_prelosa}")
-                    print("=" * 60)
+                    consola.detalle(EXCEL, "=" * 60)
+                    consola.detalle(EXCEL, "PROCESANDO {} TEXTOS LONG ADI EN {}", len(textos_long_adi), tipo_prelosa)
+                    consola.detalle(EXCEL, "=" * 60)
                     
                     # Procesar los textos de acero long adi
                     datos_textos = []
                     
                     for i, texto in enumerate(textos_long_adi):
-                        print(f"TEXTO #{i+1}: '{texto}'")
+                        consola.detalle(EXCEL, "TEXTO #{}: '{}'", i+1, texto)
                         try:
                             # Procesar texto y guardar resultados
                             resultado = procesar_texto_acero(texto, valores_default)
@@ -1878,13 +2268,13 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                                 resultado["diametro"], 
                                 resultado["separacion"]
                             ])
-                            print(f"  ✓ Datos procesados: cantidad={resultado['cantidad']}, " +
-                                f"diámetro={resultado['diametro']}, separación={resultado['separacion']}")
+                            consola.detalle(EXCEL, "  ✓ Datos procesados: cantidad={}, diámetro={}, separación={}",
+                                            resultado['cantidad'], resultado['diametro'], resultado['separacion'])
                         except Exception as e:
-                            print(f"  ✗ Error procesando texto: {e}")
+                            consola.error("  ✗ Error procesando texto: {}", e)
                     
                     # Colocar los valores extraídos en filas adicionales
-                    print("\nColocando valores en filas adicionales:")
+                    consola.detalle(EXCEL, "\nColocando valores en filas adicionales:")
                     for i, datos in enumerate(datos_textos):
                         fila = 5 + i  # Comienza en fila 5
                         cantidad, diametro, separacion = datos
@@ -1892,11 +2282,12 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                         ws.range(f'G{fila}').value = cantidad
                         ws.range(f'H{fila}').value = diametro
                         ws.range(f'J{fila}').value = separacion
-                        print(f"  ✓ Fila {fila}: G{fila}={cantidad}, H{fila}={diametro}, J{fila}={separacion}")
+                        consola.detalle(EXCEL, "  ✓ Fila {}: G{}={}, H{}={}, J{}={}",
+                                        fila, fila, cantidad, fila, diametro, fila, separacion)
                 
                 # Procesar textos transversales
                 if len(textos_transversal) > 0:
-                    print(f"\n• Encontrados {len(textos_transversal)} textos transversales")
+                    consola.detalle(EXCEL, "\n• Encontrados {} textos transversales", len(textos_transversal))
                     datos_transversales_encontrados = True
                     
                     # Procesar primer texto vertical (G14, H14, J14)
@@ -1916,17 +2307,17 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                             ws.range('H14').value = resultado["diametro"]
                             ws.range('J14').value = resultado["separacion"]
                             
-                            print(f"  → Transversal: G14={resultado['cantidad']}, " +
-                                f"H14={resultado['diametro']}, J14={resultado['separacion']}")
+                            consola.detalle(EXCEL, "  → Transversal: G14={}, H14={}, J14={}",
+                                            resultado['cantidad'], resultado['diametro'], resultado['separacion'])
                         except Exception as e:
                             # En caso de error, usar valores predeterminados para transversal
-                            print(f"  → Error en transversal: {e}. Usando valores por defecto")
+                            consola.error("  → Error en transversal: {}. Usando valores por defecto", e)
                             ws.range('G14').value = 1
                             ws.range('H14').value = "6mm"
                             ws.range('J14').value = 0.50
                 elif datos_longitudinales_encontrados:
                     # Si no hay textos transversales, usar valores predeterminados
-                    print("• No hay textos transversales - Usando valores predeterminados")
+                    consola.detalle(EXCEL, "• No hay textos transversales - Usando valores predeterminados")
                     ws.range('G14').value = 1
                     ws.range('H14').value = "6mm"
                     ws.range('J14').value = 0.50
@@ -1934,9 +2325,9 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                 
                 # Procesar textos transversales adicionales (tra_adi)
                 if len(textos_tra_adi) > 0:
-                    print("\n" + "=" * 60)
-                    print(f"PROCESANDO {len(textos_tra_adi)} TEXTOS TRANSVERSALES ADI")
-                    print("=" * 60)
+                    consola.detalle(EXCEL, "\n" + "=" * 60)
+                    consola.detalle(EXCEL, "PROCESANDO {} TEXTOS TRANSVERSALES ADI", len(textos_tra_adi))
+                    consola.detalle(EXCEL, "=" * 60)
                     
                     # Valores default específicos para transversales adicionales
                     valores_default_trans = {"espaciamiento": 0.50, "acero": "6mm"}
@@ -1944,7 +2335,7 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                     # Procesar los textos
                     datos_textos_tra = []
                     for i, texto in enumerate(textos_tra_adi):
-                        print(f"TEXTO TRANSVERSAL #{i+1}: '{texto}'")
+                        consola.detalle(EXCEL, "TEXTO TRANSVERSAL #{}: '{}'", i+1, texto)
                         try:
                             # Procesar texto y guardar resultados
                             resultado = procesar_texto_acero(texto, valores_default_trans)
@@ -1953,13 +2344,13 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                                 resultado["diametro"], 
                                 resultado["separacion"]
                             ])
-                            print(f"  ✓ Datos procesados: cantidad={resultado['cantidad']}, " +
-                                f"diámetro={resultado['diametro']}, separación={resultado['separacion']}")
+                            consola.detalle(EXCEL, "  ✓ Datos procesados: cantidad={}, diámetro={}, separación={}",
+                                            resultado['cantidad'], resultado['diametro'], resultado['separacion'])
                         except Exception as e:
-                            print(f"  ✗ Error procesando texto: {e}")
+                            consola.error("  ✗ Error procesando texto: {}", e)
                     
                     # Colocar valores en filas adicionales
-                    print("\nColocando valores transversales en filas adicionales:")
+                    consola.detalle(EXCEL, "\nColocando valores transversales en filas adicionales:")
                     for i, datos in enumerate(datos_textos_tra):
                         fila = 15 + i  # Comienza en fila 15
                         cantidad, diametro, separacion = datos
@@ -1967,19 +2358,20 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                         ws.range(f'G{fila}').value = cantidad
                         ws.range(f'H{fila}').value = diametro
                         ws.range(f'J{fila}').value = separacion
-                        print(f"  ✓ Fila {fila}: G{fila}={cantidad}, H{fila}={diametro}, J{fila}={separacion}")
+                        consola.detalle(EXCEL, "  ✓ Fila {}: G{}={}, H{}={}, J{}={}",
+                                        fila, fila, cantidad, fila, diametro, fila, separacion)
                 
                 # Verificar valores antes de recalcular
-                print("VALORES ANTES DE RECALCULAR:")
-                print(f"  Celda K8 = {ws.range('K8').value}")
-                print(f"  Celda K9 = {ws.range('K9').value}")
-                print(f"  Celda K10 = {ws.range('K10').value}")
-                print(f"  Celda K17 = {ws.range('K17').value}")
-                print(f"  Celda K18 = {ws.range('K18').value}")
-                print(f"  Celda K19 = {ws.range('K19').value}")
+                consola.detalle(EXCEL, "VALORES ANTES DE RECALCULAR:")
+                consola.detalle(EXCEL, "  Celda K8 = {}", ws.range('K8').value)
+                consola.detalle(EXCEL, "  Celda K9 = {}", ws.range('K9').value)
+                consola.detalle(EXCEL, "  Celda K10 = {}", ws.range('K10').value)
+                consola.detalle(EXCEL, "  Celda K17 = {}", ws.range('K17').value)
+                consola.detalle(EXCEL, "  Celda K18 = {}", ws.range('K18').value)
+                consola.detalle(EXCEL, "  Celda K19 = {}", ws.range('K19').value)
                 
                 # Forzar recálculo y obtener valores calculados
-                print("• Forzando recálculo de Excel...")
+                consola.detalle(EXCEL, "• Forzando recálculo de Excel...")
                 ws.book.app.calculate()
                 
                 # Guardar valores calculados
@@ -1990,41 +2382,43 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                 k18_valor = ws.range('K18').value
                 k19_valor = ws.range('K19').value
                 
-                print(f"• Resultados (longitudinal): K8={k8_valor}, K9={k9_valor}, K10={k10_valor}")
-                print(f"• Resultados (transversal): K17={k17_valor}, K18={k18_valor}, K19={k19_valor}")
+                consola.detalle(EXCEL, "• Resultados (longitudinal): K8={}, K9={}, K10={}",
+                                k8_valor, k9_valor, k10_valor)
+                consola.detalle(EXCEL, "• Resultados (transversal): K17={}, K18={}, K19={}",
+                                k17_valor, k18_valor, k19_valor)
                 
                 # ACERO LONGITUDINAL - Usando jerarquía K8 > K9 > K10 con validación de valores negativos
                 if k8_valor is None or k8_valor <= 0.1:
-                    print("  → K8 fuera de rango o inválido, verificando K9")
+                    consola.detalle(EXCEL, "  → K8 fuera de rango o inválido, verificando K9")
                     if k9_valor is not None and k9_valor > 0:
-                        print(f"  → Usando K9 para acero longitudinal (1/2\"): {k9_valor}")
+                        consola.detalle(EXCEL, '  → Usando K9 para acero longitudinal (1/2"): {}', k9_valor)
                         as_long_texto = f"1Ø1/2\"@.{formatear_valor_espaciamiento(k9_valor)}"
                     elif k9_valor is not None and k9_valor < 0:
-                        print(f"  → K9 es negativo, verificando K10")
+                        consola.detalle(EXCEL, "  → K9 es negativo, verificando K10")
                         if k10_valor is not None and k10_valor > 0:
-                            print(f"  → Usando K10 para acero longitudinal (8mm): {k10_valor}")
+                            consola.detalle(EXCEL, "  → Usando K10 para acero longitudinal (8mm): {}", k10_valor)
                             as_long_texto = f"1Ø8 mm@.{formatear_valor_espaciamiento(k10_valor)}"
                         else:
-                            print("  → Valores inválidos, usando valor de respaldo")
+                            consola.detalle(EXCEL, "  → Valores inválidos, usando valor de respaldo")
                             as_long_texto = f"1Ø{valores_default['acero']}@.{formatear_valor_espaciamiento(valores_default['espaciamiento'])}"
                     else:
-                        print("  → K9 inválido, verificando K10")
+                        consola.detalle(EXCEL, "  → K9 inválido, verificando K10")
                         if k10_valor is not None and k10_valor > 0:
-                            print(f"  → Usando K10: {k10_valor}")
+                            consola.detalle(EXCEL, "  → Usando K10: {}", k10_valor)
                             as_long_texto = f"1Ø8 mm@.{formatear_valor_espaciamiento(k10_valor)}"
                         else:
-                            print("  → Usando valores de respaldo")
+                            consola.detalle(EXCEL, "  → Usando valores de respaldo")
                             as_long_texto = f"1Ø{valores_default['acero']}@.{formatear_valor_espaciamiento(valores_default['espaciamiento'])}"
                 elif k8_valor < 0:
-                    print(f"  → K8 es negativo, verificando alternativas")
+                    consola.detalle(EXCEL, "  → K8 es negativo, verificando alternativas")
                     if k9_valor is not None and k9_valor > 0:
-                        print(f"  → Usando K9: {k9_valor}")
+                        consola.detalle(EXCEL, "  → Usando K9: {}", k9_valor)
                         as_long_texto = f"1Ø1/2\"@.{formatear_valor_espaciamiento(k9_valor)}"
                     elif k10_valor is not None and k10_valor > 0:
-                        print(f"  → Usando K10: {k10_valor}")
+                        consola.detalle(EXCEL, "  → Usando K10: {}", k10_valor)
                         as_long_texto = f"1Ø8 mm@.{formatear_valor_espaciamiento(k10_valor)}"
                     else:
-                        print("  → Usando valores de respaldo")
+                        consola.detalle(EXCEL, "  → Usando valores de respaldo")
                         as_long_texto = f"1Ø{valores_default['acero']}@.{formatear_valor_espaciamiento(valores_default['espaciamiento'])}"
                 else:
                     # K8 está en rango válido
@@ -2038,10 +2432,10 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                     # Para AS_TRA2 - Validación con manejo de valores negativos
                     if k18_valor is None or k18_valor <= 0.1 or k18_valor < 0:
                         if k19_valor is not None and k19_valor > 0:
-                            print(f"  → Usando K19: {k19_valor}")
+                            consola.detalle(EXCEL, "  → Usando K19: {}", k19_valor)
                             as_tra2_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k19_valor)}"
                         else:
-                            print("  → Usando valor de respaldo para 2 SENT")
+                            consola.detalle(EXCEL, "  → Usando valor de respaldo para 2 SENT")
                             as_tra2_texto = "1Ø8 mm@.50"
                     else:
                         # K18 está en rango válido
@@ -2052,25 +2446,25 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                     
                     # Validar as_tra2
                     if k18_valor is not None and k18_valor > 0 and k18_valor > 0.1:
-                        print(f"  → Usando K18: {k18_valor}")
+                        consola.detalle(EXCEL, "  → Usando K18: {}", k18_valor)
                         as_tra2_texto = f"1Ø8 mm@.{formatear_valor_espaciamiento(k18_valor)}"
                     elif k19_valor is not None and k19_valor > 0:
-                        print(f"  → Usando K19: {k19_valor}")
+                        consola.detalle(EXCEL, "  → Usando K19: {}", k19_valor)
                         as_tra2_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k19_valor)}"
                     else:
-                        print("  → Usando valor predeterminado para aligeradas estándar")
+                        consola.detalle(EXCEL, "  → Usando valor predeterminado para aligeradas estándar")
                         as_tra2_texto = "1Ø8 mm@.50"
                 
                 # Verificación de valores críticos
                 if ("ERROR" in as_long_texto) or ("ERROR" in as_tra2_texto):
-                    print("\n¡ADVERTENCIA! Se detectaron errores en los valores calculados.")
-                    print("Se recomienda revisar los cálculos o valores de entrada.")
+                    consola.detalle(EXCEL, "\n¡ADVERTENCIA! Se detectaron errores en los valores calculados.")
+                    consola.detalle(EXCEL, "Se recomienda revisar los cálculos o valores de entrada.")
                 
                 # Guardar valores finales
-                print("\nVALORES FINALES PARA EL BLOQUE:")
-                print(f"  → AS_LONG: {as_long_texto}")
-                print(f"  → AS_TRA1: {as_tra1_texto}")
-                print(f"  → AS_TRA2: {as_tra2_texto}")
+                consola.detalle(EXCEL, "\nVALORES FINALES PARA EL BLOQUE:")
+                consola.detalle(EXCEL, "  → AS_LONG: {}", as_long_texto)
+                consola.detalle(EXCEL, "  → AS_TRA1: {}", as_tra1_texto)
+                consola.detalle(EXCEL, "  → AS_TRA2: {}", as_tra2_texto)
                 
                 # Almacenar los valores finales en variables globales
                 as_long_final = as_long_texto
@@ -2080,101 +2474,17 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                 # Limpiar celdas para evitar interferencias en futuros cálculos
 
                 
-                print("=== FIN PROCESAMIENTO PRELOSA ALIGERADA ===\n")
+                consola.detalle(EXCEL, "=== FIN PROCESAMIENTO PRELOSA ALIGERADA ===\n")
 
             elif categoria_base == "ALIGERADA_2SENT":
-                print("\n=== PROCESANDO PRELOSA ALIGERADA - 2 SENT ===")
-                
-                # Diccionario de conversión para notaciones alternativas de diámetros
-                conversion_diametros = {
-                    "M6": "6mm",
-                    "M8": "8mm",
-                    "#3": "3/8\"",
-                    "#4": "1/2\"",
-                    "#5": "5/8\""
-                }
+                consola.detalle(EXCEL, "\n=== PROCESANDO PRELOSA ALIGERADA - 2 SENT ===")
                 
-                # Función para convertir diámetros alternativos al formato correcto
-                def convertir_diametro(diametro_texto):
-                    # Verificar si está en nuestro diccionario de conversión
-                    if diametro_texto in conversion_diametros:
-                        return conversion_diametros[diametro_texto]
-                    return diametro_texto
-                
-                # Función optimizada para extraer diámetro con formatos diversos
-                def extraer_diametro(texto):
-                    # Limpiar formato DXF si existe (como {\W0.8;texto})
-                    texto_limpio = texto
-                    formato_match = re.search(r'\{.*?;(.*?)\}', texto)
-                    if formato_match:
-                        texto_limpio = formato_match.group(1)
-                        print(f"  → Limpiando formato DXF: '{texto}' -> '{texto_limpio}'")
-                    
-                    # CORREGIDO: Caso específico para '1Ø 8 mm@.175(Inf.)' y similares con espacios
-                    match = re.search(r'^\d+Ø\s*(\d+)\s*mm', texto_limpio)
-                    if match:
-                        return f"{match.group(1)}mm"
-                    
-                    # Caso específico para patrones como "1∅1/2"" o "1∅5/8""
-                    match = re.search(r'^\d+∅([\d/]+\")', texto_limpio)
-                    if match:
-                        return match.group(1)
-                    
-                    # Caso específico para textos como 1Ø3/8" con o sin texto adicional
-                    match = re.search(r'\d+Ø([\d/]+\")', texto_limpio)
-                    if match:
-                        return match.group(1)
-                        
-                    # Verificar si el texto (limpio) contiene notación directa (M6, #3, etc.)
-                    if '#' in texto_limpio or 'M' in texto_limpio:
-                        # Buscar patrones como "#3@20", "M8@30" sin el símbolo ∅
-                        match = re.search(r'(M\d+|#\d+)[@,.]?\d+', texto_limpio)
-                        if match:
-                            return convertir_diametro(match.group(1))
-                            
-                        # Si no hay patrón con @, buscar solo el diámetro
-                        match = re.search(r'(M\d+|#\d+)', texto_limpio)
-                        if match:
-                            return convertir_diametro(match.group(1))
-                    
-                    # Buscar notaciones alternativas con el símbolo ∅ (M6, M8, #3, etc.)
-                    match = re.search(r'∅(M\d+|#\d+)', texto_limpio)
-                    if match:
-                        return convertir_diametro(match.group(1))
-                    
-                    # CORREGIDO: Caso para milímetros con posible espacio entre número y 'mm'
-                    if "mm" in texto_limpio.lower():
-                        match = re.search(r'∅?\s*(\d+)\s*(?:mm\.?|\.?mm)', texto_limpio, re.IGNORECASE)
-                        if match:
-                            return f"{match.group(1)}mm"
-                    
-                    # Caso para fraccionales
-                    match = re.search(r'∅?\s*([\d/]+)', texto_limpio)
-                    if match:
-                        diametro = match.group(1)
-                        # Si es un número simple y el texto menciona mm, aplicar formato mm
-                        if "mm" in texto_limpio.lower() and "/" not in diametro:
-                            return f"{diametro}mm"
-                        # Si es fraccional, añadir comillas si es necesario
-                        elif "/" in diametro and "\"" not in diametro:
-                            return f"{diametro}\""
-                        else:
-                            return diametro
-                    
-                    # NUEVO: Verificar cualquier número seguido de mm (con espacio opcional)
-                    if "mm" in texto_limpio.lower():
-                        match = re.search(r'(\d+)\s*mm', texto_limpio, re.IGNORECASE)
-                        if match:
-                            return f"{match.group(1)}mm"
-                    
-                    return None  # No se pudo extraer diámetro
-
                 # Usar los valores predeterminados (vienen del tkinter)
                 espaciamiento_predeterminado = float(default_valores.get(tipo_prelosa, {}).get('espaciamiento', 0.605))
                 acero_predeterminado = default_valores.get(tipo_prelosa, {}).get('acero', "3/8\"")
-                print(f"Usando valores predeterminados para {tipo_prelosa}:")
-                print(f"  - Espaciamiento: {espaciamiento_predeterminado}")
-                print(f"  - Acero: {acero_predeterminado}")
+                consola.detalle(EXCEL, "Usando valores predeterminados para {}:", tipo_prelosa)
+                consola.detalle(EXCEL, "  - Espaciamiento: {}", espaciamiento_predeterminado)
+                consola.detalle(EXCEL, "  - Acero: {}", acero_predeterminado)
 
                 # Limpiar celdas para evitar interferencias
                 ws.range('G5').value = 0
@@ -2185,67 +2495,80 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                 # Función auxiliar para procesar texto y escribir en Excel
                 def procesar_texto_acero(texto, celda_cantidad, celda_diametro, celda_espaciamiento):
                     try:
-                        # Limpiar formato DXF si existe
-                        texto_limpio = texto
-                        formato_match = re.search(r'\{.*?;(.*?)\}', texto)
-                        if formato_match:
-                            texto_limpio = formato_match.group(1)
-                            print(f"  → Limpiando formato para procesamiento: '{texto}' -> '{texto_limpio}'")
+                        especificacion = analizar_especificacion(texto)
+                        texto_limpio = especificacion.texto_limpio
+                        if texto_limpio != texto:
+                            consola.detalle(TEXTOS, "  → Limpiando formato para procesamiento: '{}' -> '{}'",
+                                            texto, texto_limpio)
+                            # El diámetro se busca en el texto ya limpio, que puede tener otro formato
+                            especificacion_limpia = analizar_especificacion(texto_limpio)
+                            if especificacion_limpia.texto_limpio != texto_limpio:
+                                consola.detalle(TEXTOS, "  → Limpiando formato DXF: '{}' -> '{}'",
+                                                texto_limpio, especificacion_limpia.texto_limpio)
+                        else:
+                            especificacion_limpia = especificacion
                         
-                        # Extraer cantidad (número antes de ∅)
-                        cantidad_match = re.search(r'^(\d+)∅', texto_limpio)
-                        cantidad = cantidad_match.group(1) if cantidad_match else "1"
+                        # Cantidad (número antes de ∅)
+                        cantidad = especificacion.cantidad or "1"
                         
-                        # Extraer diámetro del texto usando la función auxiliar
-                        diametro_con_comillas = extraer_diametro(texto_limpio)
+                        # Diámetro del texto
+                        diametro_con_comillas = diametro_aligerada(especificacion_limpia)
                         
                         # NUEVO: Verificación adicional para casos específicos como "1Ø 8 mm@.50(Inf.)"
                         if not diametro_con_comillas and ("8 mm" in texto_limpio or "8mm" in texto_limpio):
-                            print(f"  → Detectado '8 mm' en el texto pero no se extrajo correctamente, forzando a '8mm'")
+                            consola.detalle(TEXTOS, "  → Detectado '8 mm' en el texto pero no se extrajo correctamente, forzando a '8mm'")
                             diametro_con_comillas = "8mm"
                         
                         if diametro_con_comillas:
-                            print(f"  → Diámetro extraído: {diametro_con_comillas}")
+                            consola.detalle(TEXTOS, "  → Diámetro extraído: {}", diametro_con_comillas)
                             cantidad = int(cantidad)  # Convertir a entero
                             
                             # Extraer espaciamiento del texto si existe
-                            espaciamiento_match = re.search(r'@[,.]?(\d+)', texto_limpio)
-                            if espaciamiento_match:
-                                separacion = int(espaciamiento_match.group(1))
+                            if especificacion.espaciamiento is not None:
+                                separacion = int(especificacion.espaciamiento)
                                 separacion_decimal = separacion / 100
-                                print(f"  → Espaciamiento extraído del texto: @{separacion} → {separacion_decimal}")
+                                consola.detalle(TEXTOS, "  → Espaciamiento extraído del texto: @{} → {}",
+                                                separacion, separacion_decimal)
                             else:
                                 # Usar el valor predeterminado para el espaciamiento
                                 separacion_decimal = espaciamiento_predeterminado
-                                print(f"  → No se encontró espaciamiento en '{texto}', usando valor predeterminado: {espaciamiento_predeterminado}")
+                                consola.detalle(TEXTOS, "  → No se encontró espaciamiento en '{}', usando valor predeterminado: {}",
+                                                texto, espaciamiento_predeterminado)
                             
                             # Escribir en Excel
                             ws.range(celda_cantidad).value = cantidad
                             ws.range(celda_diametro).value = diametro_con_comillas
                             ws.range(celda_espaciamiento).value = separacion_decimal
                             
-                            print(f"  → Colocado en Excel: {celda_cantidad}={cantidad}, {celda_diametro}={diametro_con_comillas}, {celda_espaciamiento}={separacion_decimal}")
+                            consola.detalle(TEXTOS, "  → Colocado en Excel: {}={}, {}={}, {}={}",
+                                            celda_cantidad, cantidad, celda_diametro, diametro_con_comillas,
+                                            celda_espaciamiento, separacion_decimal)
                             return True
                         else:
-                            print(f"  → No se pudo extraer información del diámetro en el texto '{texto}'")
+                            consola.detalle(TEXTOS, "  → No se pudo extraer información del diámetro en el texto '{}'",
+                                            texto)
                             # Usar valores predeterminados
                             ws.range(celda_cantidad).value = 1
                             ws.range(celda_diametro).value = acero_predeterminado
                             ws.range(celda_espaciamiento).value = espaciamiento_predeterminado
-                            print(f"  → Usando valores predeterminados: {celda_cantidad}=1, {celda_diametro}={acero_predeterminado}, {celda_espaciamiento}={espaciamiento_predeterminado}")
+                            consola.detalle(TEXTOS, "  → Usando valores predeterminados: {}=1, {}={}, {}={}",
+                                            celda_cantidad, celda_diametro, acero_predeterminado, celda_espaciamiento,
+                                            espaciamiento_predeterminado)
                             return False
                     except Exception as e:
-                        print(f"  → Error al procesar texto '{texto}': {e}")
+                        consola.error("  → Error al procesar texto '{}': {}", texto, e)
                         # Usar valores predeterminados en caso de error
                         ws.range(celda_cantidad).value = 1
                         ws.range(celda_diametro).value = acero_predeterminado
                         ws.range(celda_espaciamiento).value = espaciamiento_predeterminado
-                        print(f"  → Error: usando valores predeterminados: {celda_cantidad}=1, {celda_diametro}={acero_predeterminado}, {celda_espaciamiento}={espaciamiento_predeterminado}")
+                        consola.error("  → Error: usando valores predeterminados: {}=1, {}={}, {}={}",
+                                      celda_cantidad, celda_diametro, acero_predeterminado, celda_espaciamiento,
+                                      espaciamiento_predeterminado)
                         return False
                 
                 # Caso 1: Si tenemos textos horizontales
                 if len(textos_longitudinal) > 0:
-                    print(f"Procesando {len(textos_longitudinal)} textos horizontales")
+                    consola.detalle(EXCEL, "Procesando {} textos horizontales", len(textos_longitudinal))
                     
                     # Procesar primer texto horizontal (G4, H4, J4)
                     if len(textos_longitudinal) >= 1:
@@ -2257,7 +2580,7 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                 
                 # Caso 2: Si tenemos textos verticales
                 if len(textos_transversal) > 0:
-                    print(f"Procesando {len(textos_transversal)} textos verticales")
+                    consola.detalle(EXCEL, "Procesando {} textos verticales", len(textos_transversal))
                     
                     # Procesar primer texto vertical (G14, H14, J14)
                     if len(textos_transversal) >= 1:
@@ -2273,7 +2596,7 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                 
                 # NUEVO: Si no hay textos transversales, colocar valores predeterminados para transversales
                 if len(textos_transversal) == 0:
-                    print("No se encontraron textos transversales. Colocando valores por defecto para transversales:")
+                    consola.detalle(EXCEL, "No se encontraron textos transversales. Colocando valores por defecto para transversales:")
                     
                     # Colocar valores predeterminados para transversales (usando los que vienen del tkinter)
                     ws.range('G14').value = 1
@@ -2282,7 +2605,7 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                 
                 # Si no hay textos principales pero hay adicionales, poner valores predeterminados
                 if len(textos_longitudinal) == 0 and len(textos_transversal) == 0 and (len(textos_long_adi) > 0 or len(textos_tra_adi) > 0):
-                    print("No se encontraron textos principales pero hay adicionales. Colocando valores por defecto:")
+                    consola.detalle(EXCEL, "No se encontraron textos principales pero hay adicionales. Colocando valores por defecto:")
                     
                     # Colocar valores por defecto para longitudinales
                     ws.range('G4').value = 1
@@ -2296,7 +2619,7 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                 
                 # NUEVO: Si no hay textos de ningún tipo, colocar valores predeterminados
                 if len(textos_longitudinal) == 0 and len(textos_transversal) == 0 and len(textos_long_adi) == 0 and len(textos_tra_adi) == 0:
-                    print("No se encontraron textos de ningún tipo. Colocando valores predeterminados:")
+                    consola.detalle(EXCEL, "No se encontraron textos de ningún tipo. Colocando valores predeterminados:")
                     
                     # Colocar valores por defecto para longitudinales
                     ws.range('G4').value = 1
@@ -2309,7 +2632,7 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                     ws.range('J14').value = espaciamiento_predeterminado
                 
                 # Forzar recálculo y guardar los valores calculados
-                print("Forzando recálculo de Excel...")
+                consola.detalle(EXCEL, "Forzando recálculo de Excel...")
                 ws.book.app.calculate()
                 
                 # Intentar un segundo cálculo para asegurar que Excel procesó los valores
@@ -2325,46 +2648,46 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                 as_long = k8_valor  # as_long es el valor calculado en K8
                 as_tra2 = k18_valor  # as_tra2 es el valor calculado en K18
                 
-                print(f"• Valores calculados: K8={k8_valor}, K9={k9_valor}")
-                print(f"• Valores calculados: K18={k18_valor}, K19={k19_valor}")
+                consola.detalle(EXCEL, "• Valores calculados: K8={}, K9={}", k8_valor, k9_valor)
+                consola.detalle(EXCEL, "• Valores calculados: K18={}, K19={}", k18_valor, k19_valor)
                 
                 # ACERO LONGITUDINAL - Validar y seleccionar el valor adecuado con jerarquía
                 if as_long is None or as_long <= 0.1:
-                    print("  → as_long menor o igual a 0.1, verificando K8")
+                    consola.detalle(EXCEL, "  → as_long menor o igual a 0.1, verificando K8")
                     # Verificar K8 primero
                     if k8_valor is not None and k8_valor >= 0.1 and k8_valor > 0:
-                        print(f"  → Usando K8 para acero longitudinal (3/8\"): {k8_valor}")
+                        consola.detalle(EXCEL, '  → Usando K8 para acero longitudinal (3/8"): {}', k8_valor)
                         as_long_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k8_valor)}"
                     elif k8_valor is not None and k8_valor < 0:
-                        print(f"  → ALERTA: El valor K8 es negativo: {k8_valor}")
+                        consola.detalle(EXCEL, "  → ALERTA: El valor K8 es negativo: {}", k8_valor)
                         # Continuar con K9
                         if k9_valor is not None and k9_valor > 0:
-                            print(f"  → Usando K9 como alternativa: {k9_valor}")
+                            consola.detalle(EXCEL, "  → Usando K9 como alternativa: {}", k9_valor)
                             as_long_texto = f"1Ø1/2\"@.{formatear_valor_espaciamiento(k9_valor)}"
                         else:
                             as_long_texto = f"ERROR: VALOR NEGATIVO EN K8 ({k8_valor})"
                     else:
                         # Si K8 no es válido, verificar K9
-                        print("  → K8 fuera de rango o inválido, verificando K9")
+                        consola.detalle(EXCEL, "  → K8 fuera de rango o inválido, verificando K9")
                         if k9_valor is not None and k9_valor > 0:
-                            print(f"  → Usando K9 para acero longitudinal (1/2\"): {k9_valor}")
+                            consola.detalle(EXCEL, '  → Usando K9 para acero longitudinal (1/2"): {}', k9_valor)
                             as_long_texto = f"1Ø1/2\"@.{formatear_valor_espaciamiento(k9_valor)}"
                             if k9_valor <= 0.1:
-                                print("  → ADVERTENCIA: K9 menor o igual a 0.1 pero se usará de todos modos")
+                                consola.detalle(EXCEL, "  → ADVERTENCIA: K9 menor o igual a 0.1 pero se usará de todos modos")
                         elif k9_valor is not None and k9_valor < 0:
-                            print(f"  → ALERTA: El valor K9 es negativo: {k9_valor}")
+                            consola.detalle(EXCEL, "  → ALERTA: El valor K9 es negativo: {}", k9_valor)
                             as_long_texto = f"ERROR: VALOR NEGATIVO EN K9 ({k9_valor})"
                         else:
-                            print("  → K9 es None o inválido, usando valor de respaldo")
+                            consola.detalle(EXCEL, "  → K9 es None o inválido, usando valor de respaldo")
                             as_long_texto = "ERROR: ACERO INSUFICIENTE PARA ESTA PRELOSA"
                 elif as_long < 0:
-                    print(f"  → ALERTA: El valor as_long es negativo: {as_long}")
+                    consola.detalle(EXCEL, "  → ALERTA: El valor as_long es negativo: {}", as_long)
                     # Verificar alternativas en orden: K8, K9
                     if k8_valor is not None and k8_valor > 0:
-                        print(f"  → Usando K8 como alternativa: {k8_valor}")
+                        consola.detalle(EXCEL, "  → Usando K8 como alternativa: {}", k8_valor)
                         as_long_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k8_valor)}"
                     elif k9_valor is not None and k9_valor > 0:
-                        print(f"  → Usando K9 como alternativa: {k9_valor}")
+                        consola.detalle(EXCEL, "  → Usando K9 como alternativa: {}", k9_valor)
                         as_long_texto = f"1Ø1/2\"@.{formatear_valor_espaciamiento(k9_valor)}"
                     else:
                         as_long_texto = f"ERROR: VALOR NEGATIVO en as_long ({as_long})"
@@ -2378,43 +2701,43 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                 # ACERO TRANSVERSAL 2 - Validar con jerarquía
                 if as_tra2 is not None:
                     if as_tra2 < 0:
-                        print(f"  → ALERTA: El valor as_tra2 es negativo: {as_tra2}")
+                        consola.detalle(EXCEL, "  → ALERTA: El valor as_tra2 es negativo: {}", as_tra2)
                         # Verificar K18 como alternativa
                         if k18_valor is not None and k18_valor > 0:
-                            print(f"  → Usando K18 como alternativa: {k18_valor}")
+                            consola.detalle(EXCEL, "  → Usando K18 como alternativa: {}", k18_valor)
                             as_tra2_texto = f"1Ø8 mm@.{formatear_valor_espaciamiento(k18_valor)}"
                         elif k19_valor is not None and k19_valor > 0:
-                            print(f"  → Usando K19 como alternativa: {k19_valor}")
+                            consola.detalle(EXCEL, "  → Usando K19 como alternativa: {}", k19_valor)
                             as_tra2_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k19_valor)}"
                         else:
                             as_tra2_texto = f"ERROR: VALOR NEGATIVO en as_tra2 ({as_tra2})"
                     elif as_tra2 <= 0.1:
-                        print("  → as_tra2 menor o igual a 0.1, verificando K18")
+                        consola.detalle(EXCEL, "  → as_tra2 menor o igual a 0.1, verificando K18")
                         # Verificar K18 primero
                         if k18_valor is not None and k18_valor >= 0.1 and k18_valor > 0:
-                            print(f"  → Usando K18 para acero transversal 2 (8mm): {k18_valor}")
+                            consola.detalle(EXCEL, "  → Usando K18 para acero transversal 2 (8mm): {}", k18_valor)
                             as_tra2_texto = f"1Ø8 mm@.{formatear_valor_espaciamiento(k18_valor)}"
                         elif k18_valor is not None and k18_valor < 0:
-                            print(f"  → ALERTA: El valor K18 es negativo: {k18_valor}")
+                            consola.detalle(EXCEL, "  → ALERTA: El valor K18 es negativo: {}", k18_valor)
                             # Verificar K19 como alternativa
                             if k19_valor is not None and k19_valor > 0:
-                                print(f"  → Usando K19 como alternativa: {k19_valor}")
+                                consola.detalle(EXCEL, "  → Usando K19 como alternativa: {}", k19_valor)
                                 as_tra2_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k19_valor)}"
                             else:
                                 as_tra2_texto = f"ERROR: VALOR NEGATIVO EN K18 ({k18_valor})"
                         else:
                             # Si K18 no es válido, verificar K19
-                            print("  → K18 fuera de rango o inválido, verificando K19")
+                            consola.detalle(EXCEL, "  → K18 fuera de rango o inválido, verificando K19")
                             if k19_valor is not None and k19_valor > 0:
-                                print(f"  → Usando K19 para acero transversal 2 (3/8\"): {k19_valor}")
+                                consola.detalle(EXCEL, '  → Usando K19 para acero transversal 2 (3/8"): {}', k19_valor)
                                 as_tra2_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k19_valor)}"
                                 if k19_valor <= 0.1:
-                                    print("  → ADVERTENCIA: K19 menor o igual a 0.1 pero se usará de todos modos")
+                                    consola.detalle(EXCEL, "  → ADVERTENCIA: K19 menor o igual a 0.1 pero se usará de todos modos")
                             elif k19_valor is not None and k19_valor < 0:
-                                print(f"  → ALERTA: El valor K19 es negativo: {k19_valor}")
+                                consola.detalle(EXCEL, "  → ALERTA: El valor K19 es negativo: {}", k19_valor)
                                 as_tra2_texto = f"ERROR: VALOR NEGATIVO EN K19 ({k19_valor})"
                             else:
-                                print("  → K19 es None o inválido, usando valor de respaldo")
+                                consola.detalle(EXCEL, "  → K19 es None o inválido, usando valor de respaldo")
                                 as_tra2_texto = "ERROR: VERIFICAR CÁLCULOS DE ACERO"
                     else:
                         # as_tra2 está en rango válido
@@ -2422,24 +2745,24 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                 else:
                     # Si as_tra2 es None, verificar K18 y K19 en orden
                     if k18_valor is not None and k18_valor >= 0.1 and k18_valor > 0:
-                        print(f"  → as_tra2 es None, usando K18: {k18_valor}")
+                        consola.detalle(EXCEL, "  → as_tra2 es None, usando K18: {}", k18_valor)
                         as_tra2_texto = f"1Ø8 mm@.{formatear_valor_espaciamiento(k18_valor)}"
                     elif k19_valor is not None and k19_valor > 0:
-                        print(f"  → K18 inválido, usando K19: {k19_valor}")
+                        consola.detalle(EXCEL, "  → K18 inválido, usando K19: {}", k19_valor)
                         as_tra2_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k19_valor)}"
                     elif k18_valor is not None and k18_valor < 0:
-                        print(f"  → ALERTA: El valor K18 es negativo: {k18_valor}")
+                        consola.detalle(EXCEL, "  → ALERTA: El valor K18 es negativo: {}", k18_valor)
                         as_tra2_texto = f"ERROR: VALOR NEGATIVO EN K18 ({k18_valor})"
                     elif k19_valor is not None and k19_valor < 0:
-                        print(f"  → ALERTA: El valor K19 es negativo: {k19_valor}")
+                        consola.detalle(EXCEL, "  → ALERTA: El valor K19 es negativo: {}", k19_valor)
                         as_tra2_texto = f"ERROR: VALOR NEGATIVO EN K19 ({k19_valor})"
                     else:
                         as_tra2_texto = "1Ø8 mm@.50"  # Valor por defecto si todo lo demás falla
                 
-                print("• Valores finales para bloque:")
-                print(f"  → AS_LONG: {as_long_texto}")
-                print(f"  → AS_TRA1: {as_tra1_texto}")
-                print(f"  → AS_TRA2: {as_tra2_texto}")
+                consola.detalle(EXCEL, "• Valores finales para bloque:")
+                consola.detalle(EXCEL, "  → AS_LONG: {}", as_long_texto)
+                consola.detalle(EXCEL, "  → AS_TRA1: {}", as_tra1_texto)
+                consola.detalle(EXCEL, "  → AS_TRA2: {}", as_tra2_texto)
                 
                 # Almacenar los valores finales en variables globales
                 as_long_final = as_long_texto
@@ -2448,7 +2771,7 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                 
                 # Limpiar celdas para evitar interferencias en futuros cálculos
                 
-                print("=== FIN PROCESAMIENTO PRELOSA ALIGERADA - 2 SENT ===\n")
+                consola.detalle(EXCEL, "=== FIN PROCESAMIENTO PRELOSA ALIGERADA - 2 SENT ===\n")
                 
             else:
                 # Procesar acero horizontal (G4, H4, J4)
@@ -2472,7 +2795,8 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                             ws.range('H4').value = diametro_con_comillas
                             ws.range('J4').value = separacion_decimal
                             
-                            print(f"Colocando en el excel: {cantidad} -> G4, {diametro_con_comillas} -> H4, {separacion_decimal} -> J4")
+                            consola.detalle(EXCEL, "Colocando en el excel: {} -> G4, {} -> H4, {} -> J4",
+                                            cantidad, diametro_con_comillas, separacion_decimal)
                         else:
                             # Intento alternativo de extracción
                             diametro_match = re.search(r'∅([\d/]+)', texto)
@@ -2490,11 +2814,12 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                                 ws.range('H4').value = diametro_con_comillas
                                 ws.range('J4').value = separacion_decimal
                                 
-                                print(f"Colocando en el excel: {cantidad} -> G4, {diametro_con_comillas} -> H4, {separacion_decimal} -> J4")
+                                consola.detalle(EXCEL, "Colocando en el excel: {} -> G4, {} -> H4, {} -> J4",
+                                                cantidad, diametro_con_comillas, separacion_decimal)
                             else:
-                                print(f"No se pudo extraer información del texto '{texto}'")
+                                consola.detalle(EXCEL, "No se pudo extraer información del texto '{}'", texto)
                     except Exception as e:
-                        print(f"Error al procesar texto horizontal '{texto}': {e}")
+                        consola.error("Error al procesar texto horizontal '{}': {}", texto, e)
                 
                 # Procesar acero vertical (G14, H14, J14)
                 for i, texto in textos_transversal:
@@ -2517,7 +2842,8 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                             ws.range('H14').value = diametro_con_comillas
                             ws.range('J14').value = separacion_decimal
                             
-                            print(f"Colocando en el excel: {cantidad} -> G14, {diametro_con_comillas} -> H14, {separacion_decimal} -> J14")
+                            consola.detalle(EXCEL, "Colocando en el excel: {} -> G14, {} -> H14, {} -> J14",
+                                            cantidad, diametro_con_comillas, separacion_decimal)
                         else:
                             # Intento alternativo de extracción
                             diametro_match = re.search(r'∅([\d/]+)', texto)
@@ -2535,11 +2861,12 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                                 ws.range('H14').value = diametro_con_comillas
                                 ws.range('J14').value = separacion_decimal
                                 
-                                print(f"Colocando en el excel: {cantidad} -> G14, {diametro_con_comillas} -> H14, {separacion_decimal} -> J14")
+                                consola.detalle(EXCEL, "Colocando en el excel: {} -> G14, {} -> H14, {} -> J14",
+                                                cantidad, diametro_con_comillas, separacion_decimal)
                             else:
-                                print(f"No se pudo extraer información del texto '{texto}'")
+                                consola.detalle(EXCEL, "No se pudo extraer información del texto '{}'", texto)
                     except Exception as e:
-                        print(f"Error al procesar texto vertical '{texto}': {e}")
+                        consola.error("Error al procesar texto vertical '{}': {}", texto, e)
             
             # Forzar cálculo y obtener resultados
             try:
@@ -2567,23 +2894,23 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                     if tiene_espaciamiento_20:
                         # FORZAR el valor a 0.1 independientemente de lo que diga Excel
                         as_tra1 = 0.1
-                        print("FORZANDO valor de K17 a 0.100 porque se detectó @20 en acero vertical")
+                        consola.detalle(EXCEL, "FORZANDO valor de K17 a 0.100 porque se detectó @20 en acero vertical")
                 
                 # Si siguen siendo 0, usar valores de respaldo o corregir valores incorrectos
-                print("Verificando si los valores calculados son correctos...")
-                print(f"  K8 calculado: {as_long}")
+                consola.detalle(EXCEL, "Verificando si los valores calculados son correctos...")
+                consola.detalle(EXCEL, "  K8 calculado: {}", as_long)
                 # Verificar si hay textos vertics pero as_tra1 es 0 o nul-+
-                print("\n== VALORES FINALES ==")
-                print("=" * 40)
-                print(f"  Celda K8 = {as_long}")
-                print(f"  Celda K17 = {as_tra1}")
+                consola.detalle(EXCEL, "\n== VALORES FINALES ==")
+                consola.detalle(EXCEL, "=" * 40)
+                consola.detalle(EXCEL, "  Celda K8 = {}", as_long)
+                consola.detalle(EXCEL, "  Celda K17 = {}", as_tra1)
                 if as_tra2:
-                    print(f"  Celda K18 = {as_tra2}")
-                print("-" * 40)
+                    consola.detalle(EXCEL, "  Celda K18 = {}", as_tra2)
+                consola.detalle(EXCEL, "-" * 40)
                 
             
             except Exception as e:
-                print(f"Error al recalcular Excel: {str(e)}")
+                consola.error("Error al recalcular Excel: {}", str(e))
                 # Usar valores basados en los textos encontrados
                 as_long = 0.20
                 as_tra1 = 0.20
@@ -2608,447 +2935,558 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
                             as_tra1 = float(f"0.{espaciamiento}")
                         break
                 
-                print(f"Usando valores extraídos de los textos - K8: {as_long}, K17: {as_tra1}")
+                consola.detalle(EXCEL, "Usando valores extraídos de los textos - K8: {}, K17: {}", as_long, as_tra1)
             
-            # Insertar bloque con los resultados
-            try:
+            # Determinar los textos finales para el bloque
+            # Para prelosas macizas, asignar valores específicos
+            categoria_base = clasificar_tipo_prelosa(tipo_prelosa)
+            
+            if categoria_base == "MACIZA":
+                # Forzar recálculo de Excel para asegurar valores actualizados
+                consola.detalle(EXCEL, "\n=== PROCESANDO PRELOSA MACIZA ===")
                 
-                # Para prelosas macizas, asignar valores específicos
-                categoria_base = clasificar_tipo_prelosa(tipo_prelosa)
+                # Obtener valores de celdas K8, K9 para validación longitudinal
+                k8_valor = ws.range('K8').value
+                k9_valor = ws.range('K9').value
                 
-                if categoria_base == "MACIZA":
-                    # Forzar recálculo de Excel para asegurar valores actualizados
-                    print("\n=== PROCESANDO PRELOSA MACIZA ===")
-                    
-                    # Obtener valores de celdas K8, K9 para validación longitudinal
-                    k8_valor = ws.range('K8').value
-                    k9_valor = ws.range('K9').value
-                    
-                    # Obtener valores de celdas K18, K19 para validación transversal
-                    k18_valor = ws.range('K18').value
-                    k19_valor = ws.range('K19').value
-                    
-                    # Verificar si tenemos aceros adicionales o valores calculados manualmente
-                    tiene_acero_adicional = len(textos_long_adi) > 0 or len(textos_tra_adi) > 0
-                    tiene_valores_default = (len(textos_longitudinal) == 0 and len(textos_transversal) == 0 
-                                        and len(textos_long_adi) == 0 and len(textos_tra_adi) == 0)
-                    
-                    # Determinar el tipo de prelosa para mensajes informativos
-                    if tiene_acero_adicional:
-                        print("PRELOSA MACIZA con ACEROS ADICIONALES - usando valores calculados previamente")
-                    elif tiene_valores_default:
-                        print("PRELOSA MACIZA SIN ACEROS - usando valores calculados con valores por defecto")
+                # Obtener valores de celdas K18, K19 para validación transversal
+                k18_valor = ws.range('K18').value
+                k19_valor = ws.range('K19').value
+                
+                # Verificar si tenemos aceros adicionales o valores calculados manualmente
+                tiene_acero_adicional = len(textos_long_adi) > 0 or len(textos_tra_adi) > 0
+                tiene_valores_default = (len(textos_longitudinal) == 0 and len(textos_transversal) == 0 
+                                    and len(textos_long_adi) == 0 and len(textos_tra_adi) == 0)
+                
+                # Determinar el tipo de prelosa para mensajes informativos
+                if tiene_acero_adicional:
+                    consola.detalle(EXCEL, "PRELOSA MACIZA con ACEROS ADICIONALES - usando valores calculados previamente")
+                elif tiene_valores_default:
+                    consola.detalle(EXCEL, "PRELOSA MACIZA SIN ACEROS - usando valores calculados con valores por defecto")
+                else:
+                    consola.detalle(EXCEL, "PRELOSA MACIZA con ACEROS REGULARES")
+                
+                # ACERO LONGITUDINAL - Validar y seleccionar el valor adecuado con jerarquía
+                # Primero verificar si as_long está en rango válido (entre 0.4 y 0.1)
+                if as_long is None or as_long <= 0.1 or as_long < 0:
+                    # Si as_long no es válido, verificar K8
+                    if k8_valor is not None and k8_valor >= 0.1 and k8_valor > 0:
+                        consola.detalle(EXCEL, '  → Usando K8 para acero longitudinal (3/8"): {}', k8_valor)
+                        as_long_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k8_valor)}"
                     else:
-                        print("PRELOSA MACIZA con ACEROS REGULARES")
-                    
-                    # ACERO LONGITUDINAL - Validar y seleccionar el valor adecuado con jerarquía
-                    # Primero verificar si as_long está en rango válido (entre 0.4 y 0.1)
-                    if as_long is None or as_long <= 0.1 or as_long < 0:
-                        # Si as_long no es válido, verificar K8
-                        if k8_valor is not None and k8_valor >= 0.1 and k8_valor > 0:
-                            print(f"  → Usando K8 para acero longitudinal (3/8\"): {k8_valor}")
-                            as_long_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k8_valor)}"
-                        else:
-                            # Si K8 no es válido, verificar K9
-                            print("  → K8 fuera de rango o inválido, verificando K9")
-                            if k9_valor is not None and k9_valor > 0:
-                                print(f"  → Usando K9 para acero longitudinal (1/2\"): {k9_valor}")
-                                as_long_texto = f"1Ø1/2\"@.{formatear_valor_espaciamiento(k9_valor)}"
-                                if k9_valor <= 0.1:
-                                    print("  → ADVERTENCIA: K9 menor o igual a 0.1 pero se usará de todos modos")
-                            elif k9_valor is not None and k9_valor < 0:
-                                print(f"  → ALERTA: El valor K9 es negativo: {k9_valor}")
-                                as_long_texto = f"ERROR: VALOR NEGATIVO EN K9 ({k9_valor})"
-                            else:
-                                print("  → K9 es None o inválido, usando valor de respaldo")
-                                as_long_texto = "ERROR: ACERO INSUFICIENTE PARA ESTA PRELOSA"
-                    elif as_long < 0:
-                        print(f"  → ALERTA: El valor as_long es negativo: {as_long}")
-                        # Verificar K8 como alternativa
-                        if k8_valor is not None and k8_valor > 0:
-                            print(f"  → Usando K8 como alternativa: {k8_valor}")
-                            as_long_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k8_valor)}"
-                        elif k9_valor is not None and k9_valor > 0:
-                            print(f"  → Usando K9 como alternativa: {k9_valor}")
+                        # Si K8 no es válido, verificar K9
+                        consola.detalle(EXCEL, "  → K8 fuera de rango o inválido, verificando K9")
+                        if k9_valor is not None and k9_valor > 0:
+                            consola.detalle(EXCEL, '  → Usando K9 para acero longitudinal (1/2"): {}', k9_valor)
                             as_long_texto = f"1Ø1/2\"@.{formatear_valor_espaciamiento(k9_valor)}"
+                            if k9_valor <= 0.1:
+                                consola.detalle(EXCEL, "  → ADVERTENCIA: K9 menor o igual a 0.1 pero se usará de todos modos")
+                        elif k9_valor is not None and k9_valor < 0:
+                            consola.detalle(EXCEL, "  → ALERTA: El valor K9 es negativo: {}", k9_valor)
+                            as_long_texto = f"ERROR: VALOR NEGATIVO EN K9 ({k9_valor})"
                         else:
-                            as_long_texto = f"ERROR: VALOR NEGATIVO en as_long ({as_long})"
-                    else:
-                        # as_long está en rango válido
-                        as_long_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(as_long)}"
-                    
-                    # ACERO TRANSVERSAL 1 - siempre a 0.28 en prelosas macizas
-                    as_tra1_texto = "1Ø6 mm@.28"
-                    
-                    # ACERO TRANSVERSAL 2 - Validar con jerarquía: K18 > K19
-                    if as_tra2 is not None:
-                        if as_tra2 < 0:
-                            print(f"  → ALERTA: El valor as_tra2 es negativo: {as_tra2}")
-                            # Verificar K18 como alternativa
-                            if k18_valor is not None and k18_valor > 0:
-                                print(f"  → Usando K18 como alternativa: {k18_valor}")
-                                as_tra2_texto = f"1Ø8 mm@.{formatear_valor_espaciamiento(k18_valor)}"
-                            elif k19_valor is not None and k19_valor > 0:
-                                print(f"  → Usando K19 como alternativa: {k19_valor}")
-                                as_tra2_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k19_valor)}"
-                            else:
-                                as_tra2_texto = f"ERROR: VALOR NEGATIVO en as_tra2 ({as_tra2})"
-                        elif as_tra2 <= 0.1:
-                            print("  → as_tra2 menor o igual a 0.1, verificando K18")
-                            # Verificar K18
-                            if k18_valor is not None and k18_valor >= 0.1 and k18_valor > 0:
-                                print(f"  → Usando K18 para acero transversal 2 (8mm): {k18_valor}")
-                                as_tra2_texto = f"1Ø8 mm@.{formatear_valor_espaciamiento(k18_valor)}"
-                            else:
-                                # Si K18 no es válido, verificar K19
-                                print("  → K18 fuera de rango o inválido, verificando K19")
-                                if k19_valor is not None and k19_valor > 0:
-                                    print(f"  → Usando K19 para acero transversal 2 (3/8\"): {k19_valor}")
-                                    as_tra2_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k19_valor)}"
-                                    if k19_valor <= 0.1:
-                                        print("  → ADVERTENCIA: K19 menor o igual a 0.1 pero se usará de todos modos")
-                                elif k19_valor is not None and k19_valor < 0:
-                                    print(f"  → ALERTA: El valor K19 es negativo: {k19_valor}")
-                                    as_tra2_texto = f"ERROR: VALOR NEGATIVO EN K19 ({k19_valor})"
-                                else:
-                                    print("  → K19 es None o inválido, usando valor de respaldo")
-                                    as_tra2_texto = "ERROR: VERIFICAR CÁLCULOS DE ACERO"
-                        else:
-                            # as_tra2 está en rango válido
-                            as_tra2_texto = f"1Ø8 mm@.{formatear_valor_espaciamiento(as_tra2)}"
+                            consola.detalle(EXCEL, "  → K9 es None o inválido, usando valor de respaldo")
+                            as_long_texto = "ERROR: ACERO INSUFICIENTE PARA ESTA PRELOSA"
+                elif as_long < 0:
+                    consola.detalle(EXCEL, "  → ALERTA: El valor as_long es negativo: {}", as_long)
+                    # Verificar K8 como alternativa
+                    if k8_valor is not None and k8_valor > 0:
+                        consola.detalle(EXCEL, "  → Usando K8 como alternativa: {}", k8_valor)
+                        as_long_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k8_valor)}"
+                    elif k9_valor is not None and k9_valor > 0:
+                        consola.detalle(EXCEL, "  → Usando K9 como alternativa: {}", k9_valor)
+                        as_long_texto = f"1Ø1/2\"@.{formatear_valor_espaciamiento(k9_valor)}"
                     else:
-                        # Si as_tra2 es None, verificar K18 y K19 en orden
-                        if k18_valor is not None and k18_valor >= 0.1 and k18_valor > 0:
-                            print(f"  → as_tra2 es None, usando K18: {k18_valor}")
+                        as_long_texto = f"ERROR: VALOR NEGATIVO en as_long ({as_long})"
+                else:
+                    # as_long está en rango válido
+                    as_long_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(as_long)}"
+                
+                # ACERO TRANSVERSAL 1 - siempre a 0.28 en prelosas macizas
+                as_tra1_texto = "1Ø6 mm@.28"
+                
+                # ACERO TRANSVERSAL 2 - Validar con jerarquía: K18 > K19
+                if as_tra2 is not None:
+                    if as_tra2 < 0:
+                        consola.detalle(EXCEL, "  → ALERTA: El valor as_tra2 es negativo: {}", as_tra2)
+                        # Verificar K18 como alternativa
+                        if k18_valor is not None and k18_valor > 0:
+                            consola.detalle(EXCEL, "  → Usando K18 como alternativa: {}", k18_valor)
                             as_tra2_texto = f"1Ø8 mm@.{formatear_valor_espaciamiento(k18_valor)}"
                         elif k19_valor is not None and k19_valor > 0:
-                            print(f"  → K18 inválido, usando K19: {k19_valor}")
+                            consola.detalle(EXCEL, "  → Usando K19 como alternativa: {}", k19_valor)
                             as_tra2_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k19_valor)}"
-                        elif k18_valor is not None and k18_valor < 0:
-                            print(f"  → ALERTA: El valor K18 es negativo: {k18_valor}")
-                            as_tra2_texto = f"ERROR: VALOR NEGATIVO EN K18 ({k18_valor})"
-                        elif k19_valor is not None and k19_valor < 0:
-                            print(f"  → ALERTA: El valor K19 es negativo: {k19_valor}")
-                            as_tra2_texto = f"ERROR: VALOR NEGATIVO EN K19 ({k19_valor})"
                         else:
-                            as_tra2_texto = None
-                    
-                    print("• Valores finales para bloque:")
-                    print(f"  → AS_LONG: {as_long_texto}")
-                    print(f"  → AS_TRA1: {as_tra1_texto}")
-                    if as_tra2_texto:
-                        print(f"  → AS_TRA2: {as_tra2_texto}")
-                    
-                    print("=== FIN PROCESAMIENTO PRELOSA MACIZA ===\n")
-                    
-                    # Limpiar celdas para evitar interferencias
-                    print("limpiar celdas")
-                    for celda in ['G5', 'G6', 'G7', 'G15', 'G16', 'G17']:
-                        ws.range(celda).value = 0
-                
-                elif categoria_base == "ALIGERADA":
-                    print("\n=== PROCESANDO PRELOSA ALIGERADA ===")
-                    # Obtener valores de celdas K8, K9, K10 para validación
-                    k8_valor = ws.range('K8').value
-                    k9_valor = ws.range('K9').value
-                    k10_valor = ws.range('K10').value
-                    
-                    # ACERO LONGITUDINAL - Validar y seleccionar el valor adecuado con jerarquía
-                    if as_long is None or as_long < 0.1:
-                        print("  → as_long menor a 0.1, verificando K8")
-                        # Verificar K8 primero
-                        if k8_valor is not None and k8_valor >= 0.1 and k8_valor > 0:
-                            print(f"  → Usando K8 para acero longitudinal (3/8\"): {k8_valor}")
-                            as_long_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k8_valor)}"
-                        elif k8_valor is not None and k8_valor < 0:
-                            print(f"  → ALERTA: El valor K8 es negativo: {k8_valor}")
-                            # Continuar con K9
-                            if k9_valor is not None and k9_valor > 0:
-                                print(f"  → Usando K9 como alternativa: {k9_valor}")
-                                as_long_texto = f"1Ø1/2\"@.{formatear_valor_espaciamiento(k9_valor)}"
-                            else:
-                                as_long_texto = f"ERROR: VALOR NEGATIVO EN K8 ({k8_valor})"
+                            as_tra2_texto = f"ERROR: VALOR NEGATIVO en as_tra2 ({as_tra2})"
+                    elif as_tra2 <= 0.1:
+                        consola.detalle(EXCEL, "  → as_tra2 menor o igual a 0.1, verificando K18")
+                        # Verificar K18
+                        if k18_valor is not None and k18_valor >= 0.1 and k18_valor > 0:
+                            consola.detalle(EXCEL, "  → Usando K18 para acero transversal 2 (8mm): {}", k18_valor)
+                            as_tra2_texto = f"1Ø8 mm@.{formatear_valor_espaciamiento(k18_valor)}"
                         else:
-                            # Si K8 no es válido, verificar K9
-                            print("  → K8 fuera de rango o inválido, verificando K9")
-                            if k9_valor is not None and k9_valor >= 0.1 and k9_valor > 0:
-                                print(f"  → Usando K9 para acero longitudinal (1/2\"): {k9_valor}")
-                                as_long_texto = f"1Ø1/2\"@.{formatear_valor_espaciamiento(k9_valor)}"
-                            elif k9_valor is not None and k9_valor < 0:
-                                print(f"  → ALERTA: El valor K9 es negativo: {k9_valor}")
-                                # Verificar K10 como alternativa
-                                if k10_valor is not None and k10_valor > 0:
-                                    print(f"  → Usando K10 como alternativa: {k10_valor}")
-                                    as_long_texto = f"1Ø8 mm@.{formatear_valor_espaciamiento(k10_valor)}"
-                                else:
-                                    as_long_texto = f"ERROR: VALOR NEGATIVO EN K9 ({k9_valor})"
+                            # Si K18 no es válido, verificar K19
+                            consola.detalle(EXCEL, "  → K18 fuera de rango o inválido, verificando K19")
+                            if k19_valor is not None and k19_valor > 0:
+                                consola.detalle(EXCEL, '  → Usando K19 para acero transversal 2 (3/8"): {}', k19_valor)
+                                as_tra2_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k19_valor)}"
+                                if k19_valor <= 0.1:
+                                    consola.detalle(EXCEL, "  → ADVERTENCIA: K19 menor o igual a 0.1 pero se usará de todos modos")
+                            elif k19_valor is not None and k19_valor < 0:
+                                consola.detalle(EXCEL, "  → ALERTA: El valor K19 es negativo: {}", k19_valor)
+                                as_tra2_texto = f"ERROR: VALOR NEGATIVO EN K19 ({k19_valor})"
                             else:
-                                # Si K9 no es válido, verificar K10
-                                print("  → K9 fuera de rango o inválido, verificando K10")
-                                if k10_valor is not None and k10_valor >= 0.1 and k10_valor > 0:
-                                    print(f"  → Usando K10 para acero longitudinal (8mm): {k10_valor}")
-                                    as_long_texto = f"1Ø8 mm@.{formatear_valor_espaciamiento(k10_valor)}"
-                                elif k10_valor is not None and k10_valor < 0:
-                                    print(f"  → ALERTA: El valor K10 es negativo: {k10_valor}")
-                                    as_long_texto = f"ERROR: VALOR NEGATIVO EN K10 ({k10_valor})"
-                                else:
-                                    print("  → Todas las opciones son inválidas o menores a 0.1")
-                                    as_long_texto = "ERROR: ACERO INSUFICIENTE PARA ESTA PRELOSA"
-                    elif as_long < 0:
-                        print(f"  → ALERTA: El valor as_long es negativo: {as_long}")
-                        # Verificar alternativas en orden: K8, K9, K10
-                        if k8_valor is not None and k8_valor > 0:
-                            print(f"  → Usando K8 como alternativa: {k8_valor}")
-                            as_long_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k8_valor)}"
-                        elif k9_valor is not None and k9_valor > 0:
-                            print(f"  → Usando K9 como alternativa: {k9_valor}")
+                                consola.detalle(EXCEL, "  → K19 es None o inválido, usando valor de respaldo")
+                                as_tra2_texto = "ERROR: VERIFICAR CÁLCULOS DE ACERO"
+                    else:
+                        # as_tra2 está en rango válido
+                        as_tra2_texto = f"1Ø8 mm@.{formatear_valor_espaciamiento(as_tra2)}"
+                else:
+                    # Si as_tra2 es None, verificar K18 y K19 en orden
+                    if k18_valor is not None and k18_valor >= 0.1 and k18_valor > 0:
+                        consola.detalle(EXCEL, "  → as_tra2 es None, usando K18: {}", k18_valor)
+                        as_tra2_texto = f"1Ø8 mm@.{formatear_valor_espaciamiento(k18_valor)}"
+                    elif k19_valor is not None and k19_valor > 0:
+                        consola.detalle(EXCEL, "  → K18 inválido, usando K19: {}", k19_valor)
+                        as_tra2_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k19_valor)}"
+                    elif k18_valor is not None and k18_valor < 0:
+                        consola.detalle(EXCEL, "  → ALERTA: El valor K18 es negativo: {}", k18_valor)
+                        as_tra2_texto = f"ERROR: VALOR NEGATIVO EN K18 ({k18_valor})"
+                    elif k19_valor is not None and k19_valor < 0:
+                        consola.detalle(EXCEL, "  → ALERTA: El valor K19 es negativo: {}", k19_valor)
+                        as_tra2_texto = f"ERROR: VALOR NEGATIVO EN K19 ({k19_valor})"
+                    else:
+                        as_tra2_texto = None
+                
+                consola.detalle(EXCEL, "• Valores finales para bloque:")
+                consola.detalle(EXCEL, "  → AS_LONG: {}", as_long_texto)
+                consola.detalle(EXCEL, "  → AS_TRA1: {}", as_tra1_texto)
+                if as_tra2_texto:
+                    consola.detalle(EXCEL, "  → AS_TRA2: {}", as_tra2_texto)
+                
+                consola.detalle(EXCEL, "=== FIN PROCESAMIENTO PRELOSA MACIZA ===\n")
+                
+                # Limpiar celdas para evitar interferencias
+                consola.detalle(EXCEL, "limpiar celdas")
+                for celda in ['G5', 'G6', 'G7', 'G15', 'G16', 'G17']:
+                    ws.range(celda).value = 0
+            
+            elif categoria_base == "ALIGERADA":
+                consola.detalle(EXCEL, "\n=== PROCESANDO PRELOSA ALIGERADA ===")
+                # Obtener valores de celdas K8, K9, K10 para validación
+                k8_valor = ws.range('K8').value
+                k9_valor = ws.range('K9').value
+                k10_valor = ws.range('K10').value
+                
+                # ACERO LONGITUDINAL - Validar y seleccionar el valor adecuado con jerarquía
+                if as_long is None or as_long < 0.1:
+                    consola.detalle(EXCEL, "  → as_long menor a 0.1, verificando K8")
+                    # Verificar K8 primero
+                    if k8_valor is not None and k8_valor >= 0.1 and k8_valor > 0:
+                        consola.detalle(EXCEL, '  → Usando K8 para acero longitudinal (3/8"): {}', k8_valor)
+                        as_long_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k8_valor)}"
+                    elif k8_valor is not None and k8_valor < 0:
+                        consola.detalle(EXCEL, "  → ALERTA: El valor K8 es negativo: {}", k8_valor)
+                        # Continuar con K9
+                        if k9_valor is not None and k9_valor > 0:
+                            consola.detalle(EXCEL, "  → Usando K9 como alternativa: {}", k9_valor)
                             as_long_texto = f"1Ø1/2\"@.{formatear_valor_espaciamiento(k9_valor)}"
-                        elif k10_valor is not None and k10_valor > 0:
-                            print(f"  → Usando K10 como alternativa: {k10_valor}")
-                            as_long_texto = f"1Ø8 mm@.{formatear_valor_espaciamiento(k10_valor)}"
                         else:
-                            as_long_texto = f"ERROR: VALOR NEGATIVO en as_long ({as_long})"
+                            as_long_texto = f"ERROR: VALOR NEGATIVO EN K8 ({k8_valor})"
                     else:
-                        # as_long está en rango válido
-                        as_long_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(as_long)}"
-                    
-                    # Para acero vertical (AS_TRA1) - siempre fijo en aligeradas
-                    as_tra1_texto = "1Ø6 mm@.50"
-                    
-                    # Para AS_TRA2 - siempre fijo en aligeradas
-                    as_tra2_texto = "1Ø8 mm@.50"
-                    
-                    print("• Valores finales para bloque:")
-                    print(f"  → AS_LONG: {as_long_texto}")
-                    print(f"  → AS_TRA1: {as_tra1_texto}")
-                    print(f"  → AS_TRA2: {as_tra2_texto}")
-                    
-                    print("=== FIN PROCESAMIENTO PRELOSA ALIGERADA ===\n")
-                    
-                    # Limpiar celdas para evitar interferencias
-                    print("limpiar celdas")
-                    for celda in ['G5', 'G6', 'G7', 'G15', 'G16', 'G17']:
-                        ws.range(celda).value = 0
-
-                elif categoria_base == "ALIGERADA_2SENT":
-                    print("\n=== PROCESANDO PRELOSA ALIGERADA - 2 SENT ===")
-                    
-                    # Obtener valores de celdas para validación
-                    k8_valor = ws.range('K8').value
-                    k9_valor = ws.range('K9').value
-                    k18_valor = ws.range('K18').value
-                    k19_valor = ws.range('K19').value
-                    
-                    print(f"• Valores calculados: K8={k8_valor}, K9={k9_valor}")
-                    print(f"• Valores calculados: K18={k18_valor}, K19={k19_valor}")
-                    
-                    # ACERO LONGITUDINAL - Validar y seleccionar el valor adecuado con jerarquía
-                    if k8_valor is None or k8_valor <= 0.1:  # Usar directamente k8_valor en lugar de as_long
-                        print("  → as_long menor o igual a 0.1, verificando K8")
                         # Si K8 no es válido, verificar K9
-                        print("  → K8 fuera de rango o inválido, verificando K9")
-                        if k9_valor is not None and k9_valor > 0:
-                            print(f"  → Usando K9 para acero longitudinal (1/2\"): {k9_valor}")
+                        consola.detalle(EXCEL, "  → K8 fuera de rango o inválido, verificando K9")
+                        if k9_valor is not None and k9_valor >= 0.1 and k9_valor > 0:
+                            consola.detalle(EXCEL, '  → Usando K9 para acero longitudinal (1/2"): {}', k9_valor)
                             as_long_texto = f"1Ø1/2\"@.{formatear_valor_espaciamiento(k9_valor)}"
-                            if k9_valor <= 0.1:
-                                print("  → ADVERTENCIA: K9 menor o igual a 0.1 pero se usará de todos modos")
                         elif k9_valor is not None and k9_valor < 0:
-                            print(f"  → ALERTA: El valor K9 es negativo: {k9_valor}")
-                            as_long_texto = f"ERROR: VALOR NEGATIVO EN K9 ({k9_valor})"
-                        else:
-                            print("  → K9 es None o inválido, usando valor de respaldo")
-                            as_long_texto = "ERROR: ACERO INSUFICIENTE PARA ESTA PRELOSA"
-                    elif k8_valor < 0:  # Usar directamente k8_valor
-                        print(f"  → ALERTA: El valor K8 es negativo: {k8_valor}")
-                        # Verificar alternativas en orden: K8, K9
-                        if k9_valor is not None and k9_valor > 0:
-                            print(f"  → Usando K9 como alternativa: {k9_valor}")
-                            as_long_texto = f"1Ø1/2\"@.{formatear_valor_espaciamiento(k9_valor)}"
+                            consola.detalle(EXCEL, "  → ALERTA: El valor K9 es negativo: {}", k9_valor)
+                            # Verificar K10 como alternativa
+                            if k10_valor is not None and k10_valor > 0:
+                                consola.detalle(EXCEL, "  → Usando K10 como alternativa: {}", k10_valor)
+                                as_long_texto = f"1Ø8 mm@.{formatear_valor_espaciamiento(k10_valor)}"
+                            else:
+                                as_long_texto = f"ERROR: VALOR NEGATIVO EN K9 ({k9_valor})"
                         else:
-                            as_long_texto = f"ERROR: VALOR NEGATIVO en K8 ({k8_valor})"
-                    else:
-                        # K8 está en rango válido
+                            # Si K9 no es válido, verificar K10
+                            consola.detalle(EXCEL, "  → K9 fuera de rango o inválido, verificando K10")
+                            if k10_valor is not None and k10_valor >= 0.1 and k10_valor > 0:
+                                consola.detalle(EXCEL, "  → Usando K10 para acero longitudinal (8mm): {}", k10_valor)
+                                as_long_texto = f"1Ø8 mm@.{formatear_valor_espaciamiento(k10_valor)}"
+                            elif k10_valor is not None and k10_valor < 0:
+                                consola.detalle(EXCEL, "  → ALERTA: El valor K10 es negativo: {}", k10_valor)
+                                as_long_texto = f"ERROR: VALOR NEGATIVO EN K10 ({k10_valor})"
+                            else:
+                                consola.detalle(EXCEL, "  → Todas las opciones son inválidas o menores a 0.1")
+                                as_long_texto = "ERROR: ACERO INSUFICIENTE PARA ESTA PRELOSA"
+                elif as_long < 0:
+                    consola.detalle(EXCEL, "  → ALERTA: El valor as_long es negativo: {}", as_long)
+                    # Verificar alternativas en orden: K8, K9, K10
+                    if k8_valor is not None and k8_valor > 0:
+                        consola.detalle(EXCEL, "  → Usando K8 como alternativa: {}", k8_valor)
                         as_long_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k8_valor)}"
-                    
-                    # Para acero vertical (AS_TRA1) - siempre a 0.28 en prelosas aligeradas 2 sent
-                    as_tra1_texto = "1Ø6 mm@.28"
-                    
-                    # ACERO TRANSVERSAL 2 - Validar con jerarquía: K18 > K19
-                    if k18_valor is None or k18_valor <= 0.1:  # Usar directamente k18_valor
-                        print("  → as_tra2 menor o igual a 0.1, verificando K18")
-                        print("  → K18 fuera de rango o inválido, verificando K19")
-                        if k19_valor is not None and k19_valor > 0:
-                            print(f"  → Usando K19 para acero transversal 2 (3/8\"): {k19_valor}")
-                            as_tra2_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k19_valor)}"
-                            if k19_valor <= 0.1:
-                                print("  → ADVERTENCIA: K19 menor o igual a 0.1 pero se usará de todos modos")
-                        elif k19_valor is not None and k19_valor < 0:
-                            print(f"  → ALERTA: El valor K19 es negativo: {k19_valor}")
-                            as_tra2_texto = f"ERROR: VALOR NEGATIVO EN K19 ({k19_valor})"
-                        else:
-                            print("  → K19 es None o inválido, usando valor de respaldo")
-                            as_tra2_texto = "ERROR: VERIFICAR CÁLCULOS DE ACERO"
-                    elif k18_valor < 0:  # Usar directamente k18_valor
-                        print(f"  → ALERTA: El valor K18 es negativo: {k18_valor}")
-                        # Verificar K19 como alternativa
-                        if k19_valor is not None and k19_valor > 0:
-                            print(f"  → Usando K19 como alternativa: {k19_valor}")
-                            as_tra2_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k19_valor)}"
-                        else:
-                            as_tra2_texto = f"ERROR: VALOR NEGATIVO en K18 ({k18_valor})"
+                    elif k9_valor is not None and k9_valor > 0:
+                        consola.detalle(EXCEL, "  → Usando K9 como alternativa: {}", k9_valor)
+                        as_long_texto = f"1Ø1/2\"@.{formatear_valor_espaciamiento(k9_valor)}"
+                    elif k10_valor is not None and k10_valor > 0:
+                        consola.detalle(EXCEL, "  → Usando K10 como alternativa: {}", k10_valor)
+                        as_long_texto = f"1Ø8 mm@.{formatear_valor_espaciamiento(k10_valor)}"
                     else:
-                        # K18 está en rango válido
-                        as_tra2_texto = f"1Ø8 mm@.{formatear_valor_espaciamiento(k18_valor)}"
-                    
-                    print("• Valores finales para bloque:")
-                    print(f"  → AS_LONG: {as_long_texto}")
-                    print(f"  → AS_TRA1: {as_tra1_texto}")
-                    print(f"  → AS_TRA2: {as_tra2_texto}")
-                    
-                    # Almacenar los valores finales en variables globales para que el bloque los use
-                    as_long_final = as_long_texto
-                    as_tra1_final = as_tra1_texto
-                    as_tra2_final = as_tra2_texto
-                    
-                    print("=== FIN PROCESAMIENTO PRELOSA ALIGERADA - 2 SENT ===\n")
-                    
-                    # Limpiar celdas para evitar interferencias
-                    print("limpiar celdas")
-                    for celda in ['G5', 'G6', 'G7', 'G15', 'G16', 'G17']:
-                        ws.range(celda).value = 0
+                        as_long_texto = f"ERROR: VALOR NEGATIVO en as_long ({as_long})"
+                else:
+                    # as_long está en rango válido
+                    as_long_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(as_long)}"
+                
+                # Para acero vertical (AS_TRA1) - siempre fijo en aligeradas
+                as_tra1_texto = "1Ø6 mm@.50"
+                
+                # Para AS_TRA2 - siempre fijo en aligeradas
+                as_tra2_texto = "1Ø8 mm@.50"
+                
+                consola.detalle(EXCEL, "• Valores finales para bloque:")
+                consola.detalle(EXCEL, "  → AS_LONG: {}", as_long_texto)
+                consola.detalle(EXCEL, "  → AS_TRA1: {}", as_tra1_texto)
+                consola.detalle(EXCEL, "  → AS_TRA2: {}", as_tra2_texto)
+                
+                consola.detalle(EXCEL, "=== FIN PROCESAMIENTO PRELOSA ALIGERADA ===\n")
+                
+                # Limpiar celdas para evitar interferencias
+                consola.detalle(EXCEL, "limpiar celdas")
+                for celda in ['G5', 'G6', 'G7', 'G15', 'G16', 'G17']:
+                    ws.range(celda).value = 0
+
+            elif categoria_base == "ALIGERADA_2SENT":
+                consola.detalle(EXCEL, "\n=== PROCESANDO PRELOSA ALIGERADA - 2 SENT ===")
+                
+                # Obtener valores de celdas para validación
+                k8_valor = ws.range('K8').value
+                k9_valor = ws.range('K9').value
+                k18_valor = ws.range('K18').value
+                k19_valor = ws.range('K19').value
+                
+                consola.detalle(EXCEL, "• Valores calculados: K8={}, K9={}", k8_valor, k9_valor)
+                consola.detalle(EXCEL, "• Valores calculados: K18={}, K19={}", k18_valor, k19_valor)
                 
+                # ACERO LONGITUDINAL - Validar y seleccionar el valor adecuado con jerarquía
+                if k8_valor is None or k8_valor <= 0.1:  # Usar directamente k8_valor en lugar de as_long
+                    consola.detalle(EXCEL, "  → as_long menor o igual a 0.1, verificando K8")
+                    # Si K8 no es válido, verificar K9
+                    consola.detalle(EXCEL, "  → K8 fuera de rango o inválido, verificando K9")
+                    if k9_valor is not None and k9_valor > 0:
+                        consola.detalle(EXCEL, '  → Usando K9 para acero longitudinal (1/2"): {}', k9_valor)
+                        as_long_texto = f"1Ø1/2\"@.{formatear_valor_espaciamiento(k9_valor)}"
+                        if k9_valor <= 0.1:
+                            consola.detalle(EXCEL, "  → ADVERTENCIA: K9 menor o igual a 0.1 pero se usará de todos modos")
+                    elif k9_valor is not None and k9_valor < 0:
+                        consola.detalle(EXCEL, "  → ALERTA: El valor K9 es negativo: {}", k9_valor)
+                        as_long_texto = f"ERROR: VALOR NEGATIVO EN K9 ({k9_valor})"
+                    else:
+                        consola.detalle(EXCEL, "  → K9 es None o inválido, usando valor de respaldo")
+                        as_long_texto = "ERROR: ACERO INSUFICIENTE PARA ESTA PRELOSA"
+                elif k8_valor < 0:  # Usar directamente k8_valor
+                    consola.detalle(EXCEL, "  → ALERTA: El valor K8 es negativo: {}", k8_valor)
+                    # Verificar alternativas en orden: K8, K9
+                    if k9_valor is not None and k9_valor > 0:
+                        consola.detalle(EXCEL, "  → Usando K9 como alternativa: {}", k9_valor)
+                        as_long_texto = f"1Ø1/2\"@.{formatear_valor_espaciamiento(k9_valor)}"
+                    else:
+                        as_long_texto = f"ERROR: VALOR NEGATIVO en K8 ({k8_valor})"
                 else:
-                    # Para acero horizontal
-                    if len(textos_longitudinal) > 0:
-                        as_long_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(as_long)}"
+                    # K8 está en rango válido
+                    as_long_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k8_valor)}"
+                
+                # Para acero vertical (AS_TRA1) - siempre a 0.28 en prelosas aligeradas 2 sent
+                as_tra1_texto = "1Ø6 mm@.28"
+                
+                # ACERO TRANSVERSAL 2 - Validar con jerarquía: K18 > K19
+                if k18_valor is None or k18_valor <= 0.1:  # Usar directamente k18_valor
+                    consola.detalle(EXCEL, "  → as_tra2 menor o igual a 0.1, verificando K18")
+                    consola.detalle(EXCEL, "  → K18 fuera de rango o inválido, verificando K19")
+                    if k19_valor is not None and k19_valor > 0:
+                        consola.detalle(EXCEL, '  → Usando K19 para acero transversal 2 (3/8"): {}', k19_valor)
+                        as_tra2_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k19_valor)}"
+                        if k19_valor <= 0.1:
+                            consola.detalle(EXCEL, "  → ADVERTENCIA: K19 menor o igual a 0.1 pero se usará de todos modos")
+                    elif k19_valor is not None and k19_valor < 0:
+                        consola.detalle(EXCEL, "  → ALERTA: El valor K19 es negativo: {}", k19_valor)
+                        as_tra2_texto = f"ERROR: VALOR NEGATIVO EN K19 ({k19_valor})"
                     else:
-                        # Si no hay textos horizontales, usar valor original
-                        as_long_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k8_original)}"
-                    
-                    # Para acero vertical
-                    if len(textos_transversal) > 0:
-                        # Caso especial para espaciamiento 20 en vertical
-                        for texto in textos_transversal:
-                            if "@20" in texto:
-                                as_tra1_texto = "1Ø6 mm@.10"
-                                break
-                        else:
-                            # Si no tiene @20, usar el valor calculado
-                            as_tra1_texto = f"1Ø6 mm@.{formatear_valor_espaciamiento(as_tra1)}"
+                        consola.detalle(EXCEL, "  → K19 es None o inválido, usando valor de respaldo")
+                        as_tra2_texto = "ERROR: VERIFICAR CÁLCULOS DE ACERO"
+                elif k18_valor < 0:  # Usar directamente k18_valor
+                    consola.detalle(EXCEL, "  → ALERTA: El valor K18 es negativo: {}", k18_valor)
+                    # Verificar K19 como alternativa
+                    if k19_valor is not None and k19_valor > 0:
+                        consola.detalle(EXCEL, "  → Usando K19 como alternativa: {}", k19_valor)
+                        as_tra2_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k19_valor)}"
                     else:
-                        # Si no hay textos verticales, usar valor original
-                        as_tra1_texto = f"1Ø6 mm@.{formatear_valor_espaciamiento(k17_original)}"
-                    
-                    # No usar valor fijo para AS_TRA2 en otros tipos de prelosas
-                    as_tra2_texto = None
-                                
-                print(f" ==== Valores formateados para inserción en bloque: ===")
-                print(f"    AS_LONG: {as_long_texto}")
-                print(f"    AS_TRA1: {as_tra1_texto}")
-                if as_tra2_texto:
-                    print(f"    AS_TRA2: {as_tra2_texto}")
+                        as_tra2_texto = f"ERROR: VALOR NEGATIVO en K18 ({k18_valor})"
+                else:
+                    # K18 está en rango válido
+                    as_tra2_texto = f"1Ø8 mm@.{formatear_valor_espaciamiento(k18_valor)}"
                 
+                consola.detalle(EXCEL, "• Valores finales para bloque:")
+                consola.detalle(EXCEL, "  → AS_LONG: {}", as_long_texto)
+                consola.detalle(EXCEL, "  → AS_TRA1: {}", as_tra1_texto)
+                consola.detalle(EXCEL, "  → AS_TRA2: {}", as_tra2_texto)
+                
+                # Almacenar los valores finales en variables globales para que el bloque los use
+                as_long_final = as_long_texto
+                as_tra1_final = as_tra1_texto
+                as_tra2_final = as_tra2_texto
+                
+                consola.detalle(EXCEL, "=== FIN PROCESAMIENTO PRELOSA ALIGERADA - 2 SENT ===\n")
+                
+                # Limpiar celdas para evitar interferencias
+                consola.detalle(EXCEL, "limpiar celdas")
+                for celda in ['G5', 'G6', 'G7', 'G15', 'G16', 'G17']:
+                    ws.range(celda).value = 0
+            
+            else:
+                # Para acero horizontal
+                if len(textos_longitudinal) > 0:
+                    as_long_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(as_long)}"
+                else:
+                    # Si no hay textos horizontales, usar valor original
+                    as_long_texto = f"1Ø3/8\"@.{formatear_valor_espaciamiento(k8_original)}"
+                
+                # Para acero vertical
+                if len(textos_transversal) > 0:
+                    # Caso especial para espaciamiento 20 en vertical
+                    for texto in textos_transversal:
+                        if "@20" in texto:
+                            as_tra1_texto = "1Ø6 mm@.10"
+                            break
+                    else:
+                        # Si no tiene @20, usar el valor calculado
+                        as_tra1_texto = f"1Ø6 mm@.{formatear_valor_espaciamiento(as_tra1)}"
+                else:
+                    # Si no hay textos verticales, usar valor original
+                    as_tra1_texto = f"1Ø6 mm@.{formatear_valor_espaciamiento(k17_original)}"
+                
+                # No usar valor fijo para AS_TRA2 en otros tipos de prelosas
+                as_tra2_texto = None
 
-                # Filtrar polilíneas longitudinales y adicionales
-                polilineas_longitudinal = [p for p in polilineas_dentro if "LONGITUDINAL" in p.dxf.layer.upper() and "ADI" not in p.dxf.layer.upper()]
-                polilineas_long_adi = [p for p in polilineas_dentro if "LONG ADI" in p.dxf.layer.upper()]
+            return as_long_texto, as_tra1_texto, as_tra2_texto
 
-                # Calcular la orientación considerando ambos tipos de acero
-                angulo_rotacion = calcular_orientacion_prelosa(vertices, polilineas_longitudinal, polilineas_long_adi)
-                
-                # Crear una copia de la definición del bloque con la orientación calculada
-                # En la función procesar_prelosa, justo antes de llamar a insertar_bloque_acero:
+        # Fase 2: calcula los textos con la hoja Convertidor y planifica el bloque de una prelosa ya analizada
+        def aplicar_analisis(analisis):
+            nonlocal total_prelosas
+            
+            total_prelosas += 1
+            tipo_prelosa = analisis.tipo_prelosa
+            if analisis.mensajes:
+                print(analisis.mensajes, end="")
+
+            # Prelosa sin cambios desde la ejecución anterior (y hoja en el mismo estado): se reutiliza su
+            # bloque y se aplican sus escrituras a la hoja sin recalcular
+            if huellas is not None:
+                guardado = huellas.buscar(analisis.huella, ws)
+                if guardado is not None:
+                    insertador.agregar(InsercionBloque.desde_diccionario(guardado["bloque"]),
+                                       f"{tipo_prelosa} {analisis.idx + 1}")
+                    huellas.registrar(analisis.huella, **guardado)
+                    consola.detalle(BLOQUES, "{} {} SIN CAMBIOS: se reutiliza el bloque anterior",
+                                    tipo_prelosa, analisis.idx + 1)
+                    consola.detalle(BLOQUES, "=" * 52)
+                    return True
+            textos_longitudinal = analisis.textos_longitudinal
+            textos_transversal = analisis.textos_transversal
+            textos_long_adi = analisis.textos_long_adi
+            textos_tra_adi = analisis.textos_tra_adi
+            
+            # Insertar bloque con los resultados
+            try:
+                # Clave con las entradas normalizadas de la prelosa
+                clave_cache = (
+                    tipo_prelosa,
+                    tuple(textos_longitudinal),
+                    tuple(textos_transversal),
+                    tuple(textos_long_adi),
+                    tuple(textos_tra_adi),
+                    tuple(sorted(default_valores.get(tipo_prelosa, {}).items())),
+                )
+                with perfil.medir(ETAPA_ESPACIAMIENTO):
+                    textos_acero, dependencias, escrituras = cache_resultados.calcular_registrado(
+                        clave_cache, ws, calcular_textos_acero,
+                        tipo_prelosa, textos_longitudinal, textos_transversal, textos_long_adi, textos_tra_adi
+                    )
+                as_long_texto, as_tra1_texto, as_tra2_texto = textos_acero
+                consola.detalle(BLOQUES, " ==== Valores formateados para inserción en bloque: ===")
+                consola.detalle(BLOQUES, "    AS_LONG: {}", as_long_texto)
+                consola.detalle(BLOQUES, "    AS_TRA1: {}", as_tra1_texto)
+                if as_tra2_texto:
+                    consola.detalle(BLOQUES, "    AS_TRA2: {}", as_tra2_texto)
 
-                # Calcular las dimensiones de la polilínea
-                vertices = polilinea.get_points('xy')
-                xs = [v[0] for v in vertices]
-                ys = [v[1] for v in vertices]
-                min_x, max_x = min(xs), max(xs)
-                min_y, max_y = min(ys), max(ys)
-                ancho_polilinea = max_x - min_x
-                alto_polilinea = max_y - min_y
+                # Orientación calculada en el análisis
+                if analisis.mensajes_orientacion:
+                    print(analisis.mensajes_orientacion, end="")
 
-                # Agregar las dimensiones a la definición del bloque
+                # Agregar la orientación y las dimensiones de la polilínea a la definición del bloque
                 definicion_bloque_orientada = definicion_bloque.copy()
-                definicion_bloque_orientada['rotation'] = angulo_rotacion
-                definicion_bloque_orientada['polilinea_ancho'] = ancho_polilinea
-                definicion_bloque_orientada['polilinea_alto'] = alto_polilinea
+                definicion_bloque_orientada['rotation'] = analisis.angulo_rotacion
+                definicion_bloque_orientada['polilinea_ancho'] = analisis.ancho
+                definicion_bloque_orientada['polilinea_alto'] = analisis.alto
 
-                # Insertar bloque con los valores formateados y la orientación correcta, ajustado al tamaño de la polilínea
-                bloque = insertar_bloque_acero(msp, definicion_bloque_orientada, centro_prelosa, as_long_texto, as_tra1_texto, as_tra2_texto)
+                # Planificar el bloque con los valores formateados y la orientación correcta, ajustado al tamaño de la polilínea
+                with perfil.medir(ETAPA_INSERCION):
+                    insercion = planificar_insercion_bloque(definicion_bloque_orientada, analisis.centro, as_long_texto, as_tra1_texto, as_tra2_texto)
                 
-                if bloque:
-                    total_bloques += 1
-                    print(f"{tipo_prelosa} CONCLUIDA CON EXITO ===============================")
+                if insercion:
+                    insertador.agregar(insercion, f"{tipo_prelosa} {analisis.idx + 1}")
+                    consola.detalle(BLOQUES, "{} CONCLUIDA CON EXITO ===============================", tipo_prelosa)
                     #limpiar celda g5
                     ws.range('G5').value = None
                     ws.range('G6').value = None
                     #limpiar celda g15
                     ws.range('G15').value = None
                     ws.range('G16').value = None
-                    print("=" * 52)
+                    if huellas is not None:
+                        # La limpieza también es una escritura de la prelosa (se repite al reutilizarla)
+                        escrituras = dict(escrituras, G5=None, G6=None, G15=None, G16=None)
+                        huellas.registrar(analisis.huella, insercion.como_diccionario(), dependencias, escrituras)
+                    consola.detalle(BLOQUES, "=" * 52)
                     return True
                 else:
-                    print(f"Error al insertar el bloque en {tipo_prelosa}")
-                    print("=" * 52)
+                    consola.error("Error al insertar el bloque en {}", tipo_prelosa)
+                    consola.detalle(BLOQUES, "=" * 52)
                     return False
             except Exception as e:
-                print(f"Error al insertar bloque: {e}")
-                print(f"Error al insertar el bloque en {tipo_prelosa}")
-                print("=" * 52)
+                consola.error("Error al insertar bloque: {}", e)
+                consola.error("Error al insertar el bloque en {}", tipo_prelosa)
+                consola.detalle(BLOQUES, "=" * 52)
                 return False
        
         for tipo, polilineas in polilineas_por_tipo.items():
-            print(f"Encontradas {len(polilineas)} polilíneas de tipo {tipo}")
+            consola.resumen("Encontradas {} polilíneas de tipo {}", len(polilineas), tipo)
+
+        # Fase 1: análisis de cada prelosa (geometría y textos), en este proceso o repartido entre procesos
+        prelosas = [(polilinea.vertices.tolist(), tipo_prelosa, idx)
+                    for tipo_prelosa, polilineas in polilineas_por_tipo.items()
+                    for idx, polilinea in enumerate(polilineas)]
+        progreso.prelosas(len(prelosas))
+        procesos_analisis = min(procesos_analisis or os.cpu_count() or 1, len(prelosas))
+        if procesos_analisis > 1:
+            consola.resumen("Análisis de {} prelosas en {} procesos", len(prelosas), procesos_analisis)
+            analisis_prelosas = analizar_prelosas_en_procesos(prelosas, indice_polilineas, indice_textos,
+                                                              indice_bloques, procesos_analisis)
+        else:
+            analisis_prelosas = (analizar_prelosa(vertices, tipo_prelosa, idx,
+                                                  indice_polilineas, indice_textos, indice_bloques)
+                                 for vertices, tipo_prelosa, idx in prelosas)
 
-        # Procesar cada tipo usando polilineas_por_tipo
+        # Procesar cada tipo usando polilineas_por_tipo; la hoja Convertidor guarda valores
+        # entre prelosas, por lo que la fase 2 se aplica en serie y en el orden del plano
         for tipo_prelosa, polilineas in polilineas_por_tipo.items():
-            print(f"Procesando {len(polilineas)} polilíneas de tipo {tipo_prelosa}")
+            consola.resumen("Procesando {} polilíneas de tipo {}", len(polilineas), tipo_prelosa)
             
             # Procesar cada polilínea según el tipo
-            for idx, polilinea in enumerate(polilineas):
-                procesar_prelosa(polilinea, tipo_prelosa, idx)
+            for _ in polilineas:
+                analisis = next(analisis_prelosas)
+                perfil.iniciar_prelosa(sum(segundos for segundos, _ in analisis.tiempos.values()))
+                for etapa, (segundos, llamadas) in analisis.tiempos.items():
+                    perfil.agregar(etapa, segundos, llamadas)
+                aplicar_analisis(analisis)
+                perfil.terminar_prelosa()
+                progreso.prelosa()
+
+        # Insertar en un solo paso los bloques planificados
+        with perfil.medir(ETAPA_INSERCION):
+            for bloque in insertador.insertar_pendientes():
+                catalogo.agregar(bloque)
+        total_bloques = insertador.insertados
+        perfil.contar("bloques", total_bloques)
                 
         
-        # Cerrar Excel y guardar DXF
-        try:
-            wb.save()
-            wb.close()
-            app.quit()
-        except:
-            print("Error al cerrar Excel, continuando...")
+        # Con una sesión compartida la hoja y las cachés siguen abiertas para el siguiente plano
+        if sesion is None:
+            # Cerrar Excel y guardar DXF
+            try:
+                wb.save()
+                wb.close()
+                app.quit()
+            except:
+                consola.error("Error al cerrar Excel, continuando...")
         
         capas_acero = ["ACERO LONGITUDINAL", "ACERO TRANSVERSAL", "ACERO LONG ADI",
         "BD-ACERO LONGITUDINAL", "BD-ACERO TRANSVERSAL", "ACERO TRA ADI"]    
         
-        eliminar_entidades_por_capa(doc, capas_acero)
+        progreso.guardado()
+        
+        if modo_streaming:
+            # Segunda pasada: copia el plano sin las capas de acero y con los bloques nuevos
+            desbloquear_capa_acero_positivo(doc)
+            with perfil.medir(ETAPA_GUARDADO):
+                doc.guardar(output_dxf_path, capas_acero)
+        else:
+            with perfil.medir(ETAPA_ELIMINACION):
+                eliminar_entidades_por_capa(doc, capas_acero, catalogo)
 
-        desbloquear_capa_acero_positivo(doc)
+                desbloquear_capa_acero_positivo(doc)
 
-        
-        doc.saveas(output_dxf_path)
-        print(f"Archivo DXF guardado en: {output_dxf_path}")
+            with perfil.medir(ETAPA_GUARDADO):
+                doc.saveas(output_dxf_path)
+        consola.resumen("Archivo DXF guardado en: {}", output_dxf_path)
+
+        # Huellas de esta ejecución para el siguiente reprocesamiento
+        if huellas is not None:
+            try:
+                huellas.guardar()
+            except OSError as e:
+                consola.error("No se pudo guardar el archivo de huellas {}: {}", huellas.ruta, e)
         
         # Tiempo total
         tiempo_total = time.time() - tiempo_inicio
         
 
         # Estadísticas finales
-        print("\n" + "=" * 50)
-        print("RESUMEN DEL PROCESAMIENTO")
-        print("=" * 50)
-        print(f"Total de prelosas procesadas: {total_prelosas}")
-        print(f"Total de bloques insertados: {total_bloques}")
-        print(f"Tiempo total: {tiempo_total:.2f} segundos")
-        print(f"Tiempo promedio por prelosa: {tiempo_total/max(total_prelosas, 1):.4f} segundos")
-        print(f"Archivo guardado: {output_dxf_path}")
+        consola.resumen("\n" + "=" * 50)
+        consola.resumen("RESUMEN DEL PROCESAMIENTO")
+        consola.resumen("=" * 50)
+        consola.resumen("Total de prelosas procesadas: {}", total_prelosas)
+        consola.resumen("Total de bloques insertados: {}", total_bloques)
+        consola.resumen("Tiempo total: {:.2f} segundos", tiempo_total)
+        consola.resumen("Tiempo promedio por prelosa: {:.4f} segundos", tiempo_total/max(total_prelosas, 1))
+        llamadas_com = getattr(ws, 'llamadas_com', 0)
+        consola.resumen(cache_resultados.resumen())
+        consola.resumen(cache_especificaciones.resumen())
+        consola.resumen(insertador.resumen())
+        if huellas is not None:
+            consola.resumen(huellas.resumen(total_prelosas))
+        consola.resumen("Llamadas COM a Excel: {} ({:.1f} por prelosa)",
+                        llamadas_com, llamadas_com/max(total_prelosas, 1))
+        consola.resumen("Archivo guardado: {}", output_dxf_path)
+
+        # Perfil por etapa (tabla en el registro y, si se pidió, JSON)
+        perfil.terminar()
+        if llamadas_com:
+            perfil.contar("llamadas_com", llamadas_com)
+        consola.resumen("\n" + perfil.tabla())
+        if ruta_perfil:
+            try:
+                perfil.exportar_json(ruta_perfil)
+                consola.resumen("Perfil exportado: {}", ruta_perfil)
+            except OSError as e:
+                consola.error("No se pudo exportar el perfil {}: {}", ruta_perfil, e)
         
+        if sesion is not None:
+            medir_convertidor(wb, None)
+            sesion.resumen_archivo.update(prelosas=total_prelosas, bloques=total_bloques,
+                                          reutilizadas=huellas.reutilizadas if huellas is not None else 0)
+        progreso.fin(total_bloques)
         return total_bloques
     
     except Exception as e:
-        print(f"Error al procesar el archivo: {e}")
+        consola.error("Error al procesar el archivo: {}", e)
         traceback.print_exc()
+        progreso.error(str(e))
         
+        if sesion is not None:
+            sesion.resumen_archivo["error"] = str(e)
+            if sesion.wb is not None:
+                medir_convertidor(sesion.wb, None)
+            return 0
+
         # Intentar cerrar Excel si está abierto
         try:
             wb.close()
@@ -3058,6 +3496,11 @@ def procesar_prelosas_con_bloques(file_path, excel_path, output_dxf_path, valore
         
         return 0
 
+    finally:
+        # Guardar en disco la caché de resultados propia (con una sesión sigue abierta para el siguiente plano)
+        if sesion is None and cache_resultados is not None:
+            cache_resultados.cerrar()
+
     
 # Punto de entrada principal del script
 if __name__ == "__main__":
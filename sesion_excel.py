@@ -0,0 +1,461 @@
+"""
+Sesión de Excel administrada para el motor "excel" de la hoja Convertidor.
+
+Abrir Excel (xw.App) y CONVERTIDOR.xlsx tarda varios segundos, así que
+SesionExcel los mantiene abiertos entre planos (los de un lote o los
+procesamientos sucesivos de la interfaz):
+
+    abrir()       hoja lista para un plano (app, wb, ws): lanza Excel si no está
+                  abierto, lo reinicia si dejó de responder y, si ya estaba
+                  abierto, restablece G4:J7 y G13:J16 a los valores que tenía el
+                  libro al abrirlo, así cada plano da el mismo resultado que solo
+    responde()    comprueba con una lectura que Excel siga vivo
+    cerrar()      guarda el libro y cierra Excel
+    ejecutar(f)   ejecuta f en el hilo de Excel; al terminar empieza a contar el
+                  tiempo de inactividad y, si vence sin otro trabajo, cierra
+                  Excel (el siguiente abrir() lo vuelve a lanzar)
+    finalizar()   cierra Excel desde cualquier hilo y termina el hilo de Excel
+
+Las llamadas COM deben hacerse desde el hilo que abrió Excel: con tiempo de
+inactividad todo el trabajo con la hoja pasa por ejecutar(), que usa un único
+hilo propio. Sin tiempo de inactividad (procesar_lote.py) se puede usar desde
+el hilo que llama.
+
+El acceso a Excel está en un backend: BackendXlwings (Excel real, Windows) o
+BackendSimulado, que imita xlwings sobre el motor nativo y puede simular que
+Excel se cae, para probar el ciclo de vida sin Excel:
+
+    python sesion_excel.py --verificar
+"""
+#argparse: sirve para leer los argumentos de la línea de comandos
+import argparse
+#os: sirve para interactuar con el sistema operativo
+import os
+#sys: código de salida
+import sys
+#threading: hilo de Excel y temporizador de inactividad
+import threading
+#time: sirve para medir la apertura de Excel
+import time
+#concurrent.futures: hilo único donde se hacen las llamadas COM
+from concurrent.futures import ThreadPoolExecutor
+
+#convertidor: envoltorio por lotes de xlwings y motor nativo del backend simulado
+from convertidor import (
+    LibroConvertidor, LibroExcelPorLotes, ZONAS_ENTRADA, RANGO_RESULTADOS, lanzar_excel, separar_direccion
+)
+#registro_mensajes: mensajes por nivel y categoría
+from registro_mensajes import consola, EXCEL
+
+# Segundos sin trabajo tras los que la interfaz cierra Excel
+TIEMPO_INACTIVIDAD = 600
+
+
+class BackendXlwings:
+    """Excel real con xlwings."""
+
+    def lanzar(self, excel_path):
+        return lanzar_excel(excel_path)
+
+    # Función para comprobar que Excel y el libro responden
+    def responde(self, app_excel, libro_excel):
+        try:
+            libro_excel.sheets.active.range(RANGO_RESULTADOS).value
+            return True
+        except Exception:
+            return False
+
+    # Función para terminar un Excel que ya no responde
+    def descartar(self, app_excel):
+        try:
+            app_excel.kill()
+        except Exception:
+            pass
+
+    # Función que prepara el hilo de Excel (COM por hilo en Windows)
+    def iniciar_hilo(self):
+        try:
+            import pythoncom
+        except ImportError:
+            return
+        pythoncom.CoInitialize()
+
+
+class ExcelCaido(Exception):
+    """Error de una llamada a un Excel simulado que dejó de responder."""
+
+
+class RangoSimulado:
+    """Equivalente mínimo de xlwings.Range (celda o rango en matriz) sobre la hoja nativa."""
+
+    def __init__(self, hoja, direccion):
+        self.hoja = hoja
+        self.direccion = direccion
+
+    def _celdas(self):
+        if ':' not in self.direccion:
+            return None
+        inicio, fin = self.direccion.split(':')
+        col_inicio, fila_inicio = separar_direccion(inicio)
+        col_fin, fila_fin = separar_direccion(fin)
+        return [[f'{chr(c)}{fila}' for c in range(ord(col_inicio), ord(col_fin) + 1)]
+                for fila in range(fila_inicio, fila_fin + 1)]
+
+    @property
+    def value(self):
+        self.hoja.app.comprobar()
+        celdas = self._celdas()
+        nativa = self.hoja.nativa
+        if celdas is None:
+            return nativa.leer(self.direccion)
+        if len(celdas[0]) == 1:
+            return [nativa.leer(fila[0]) for fila in celdas]
+        return [[nativa.leer(celda) for celda in fila] for fila in celdas]
+
+    @value.setter
+    def value(self, valor):
+        self.hoja.app.comprobar()
+        celdas = self._celdas()
+        if celdas is None:
+            self.hoja.nativa.escribir(self.direccion, valor)
+            return
+        for fila, valores in zip(celdas, valor):
+            for celda, dato in zip(fila, valores):
+                self.hoja.nativa.escribir(celda, dato)
+
+
+class HojaSimulada:
+    def __init__(self, app, nativa):
+        self.app = app
+        self.nativa = nativa
+        self.name = nativa.name
+
+    def range(self, direccion):
+        return RangoSimulado(self, direccion)
+
+
+class LibroSimulado:
+    def __init__(self, app, excel_path):
+        self.app = app
+        self.fullname = excel_path
+        self.sheets = type('Hojas', (), {})()
+        self.sheets.active = HojaSimulada(app, LibroConvertidor(excel_path).sheets.active)
+        self.guardados = 0
+
+    def save(self):
+        self.app.comprobar()
+        self.guardados += 1
+
+    def close(self):
+        self.app.comprobar()
+
+
+class AppSimulada:
+    """Equivalente mínimo de xlwings.App; caida=True hace fallar todas sus llamadas."""
+
+    def __init__(self, excel_path):
+        self.caida = False
+        self.cerrada = False
+        self.calculation = 'manual'
+        self.screen_updating = False
+        self.calculos = 0
+        self.libro = LibroSimulado(self, excel_path)
+
+    def comprobar(self):
+        if self.caida or self.cerrada:
+            raise ExcelCaido("Excel simulado no responde")
+
+    def calculate(self):
+        self.comprobar()
+        self.calculos += 1
+
+    def quit(self):
+        self.comprobar()
+        self.cerrada = True
+
+    def kill(self):
+        self.cerrada = True
+
+
+class BackendSimulado:
+    """
+    Excel simulado sobre el motor nativo, con la misma interfaz que BackendXlwings.
+    caer() hace que el Excel abierto deje de responder, como si COM se hubiera
+    desconectado; lanzamientos y apps permiten comprobar los reinicios.
+    """
+
+    def __init__(self):
+        self.apps = []
+
+    @property
+    def lanzamientos(self):
+        return len(self.apps)
+
+    def lanzar(self, excel_path):
+        app = AppSimulada(excel_path)
+        self.apps.append(app)
+        return app, app.libro
+
+    def responde(self, app_excel, libro_excel):
+        return not (app_excel.caida or app_excel.cerrada)
+
+    def descartar(self, app_excel):
+        app_excel.kill()
+
+    def iniciar_hilo(self):
+        pass
+
+    # Función para simular que el Excel abierto deja de responder
+    def caer(self):
+        self.apps[-1].caida = True
+
+
+class SesionExcel:
+    """
+    Excel y CONVERTIDOR.xlsx abiertos entre planos, con reinicio si Excel deja
+    de responder y cierre tras tiempo_inactividad segundos sin trabajo.
+    """
+
+    def __init__(self, excel_path, backend=None, tiempo_inactividad=None):
+        """
+        Args:
+            excel_path: Ruta a CONVERTIDOR.xlsx
+            backend: BackendXlwings (None) o BackendSimulado
+            tiempo_inactividad: Segundos sin trabajo en ejecutar() tras los que se cierra Excel (None: no se cierra)
+        """
+        self.excel_path = excel_path
+        self.backend = backend if backend is not None else BackendXlwings()
+        self.tiempo_inactividad = tiempo_inactividad
+        self.app_excel = None
+        self.app = self.wb = self.ws = None
+
+        # Contadores del ciclo de vida
+        self.lanzamientos = 0
+        self.reinicios = 0
+        self.cierres_inactividad = 0
+        self.planos = 0
+
+        self._hilo = None
+        self._temporizador = None
+        # Cambia con cada trabajo; un cierre por inactividad de una generación anterior se ignora
+        self._generacion = 0
+
+    @property
+    def abierta(self):
+        return self.wb is not None
+
+    def abrir(self):
+        """
+        Returns:
+            tuple: (app, wb, ws) con la hoja Convertidor lista para un plano
+        """
+        self._cancelar_cierre()
+        if self.wb is not None and not self.responde():
+            consola.error("Excel dejó de responder, se reinicia")
+            self._descartar()
+            self.reinicios += 1
+
+        if self.wb is None:
+            self._lanzar()
+        else:
+            # Entradas del libro al abrirlo y K8:K20 calculado con ellas
+            self.ws.restablecer()
+            self.app.calculate()
+            consola.detalle(EXCEL, "Excel reutilizado; entradas restablecidas")
+        self.planos += 1
+        return self.app, self.wb, self.ws
+
+    def _lanzar(self):
+        inicio = time.perf_counter()
+        self.app_excel, libro_excel = self.backend.lanzar(self.excel_path)
+        self.wb = LibroExcelPorLotes(self.app_excel, libro_excel)
+        self.app, self.ws = self.wb.app, self.wb.sheets.active
+        self.ws.llamadas_com += 3  # books.open, screen_updating y calculation
+        self.lanzamientos += 1
+        consola.resumen("Excel abierto en {:.2f} s", time.perf_counter() - inicio)
+
+    def _descartar(self):
+        self.backend.descartar(self.app_excel)
+        self.app_excel = None
+        self.app = self.wb = self.ws = None
+
+    def responde(self):
+        return self.wb is not None and self.backend.responde(self.app_excel, self.wb.libro_excel)
+
+    # Función para saber si un Excel abierto dejó de responder (para repetir el plano)
+    def caida(self):
+        return self.wb is not None and not self.responde()
+
+    def cerrar(self):
+        self._cancelar_cierre()
+        if self.wb is None:
+            return
+        try:
+            self.wb.save()
+            self.wb.close()
+            self.app.quit()
+        except Exception as e:
+            consola.error("Error al cerrar Excel ({}), continuando...", e)
+            self.backend.descartar(self.app_excel)
+        self.app_excel = None
+        self.app = self.wb = self.ws = None
+
+    def ejecutar(self, funcion, *args, **kwargs):
+        """Ejecuta funcion(*args, **kwargs) en el hilo de Excel y devuelve su resultado."""
+        if self._hilo is None:
+            self._hilo = ThreadPoolExecutor(max_workers=1, thread_name_prefix="excel",
+                                            initializer=self.backend.iniciar_hilo)
+        return self._hilo.submit(self._ejecutar, funcion, args, kwargs).result()
+
+    def _ejecutar(self, funcion, args, kwargs):
+        self._cancelar_cierre()
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            self._programar_cierre()
+
+    # Funciones del cierre por inactividad (se ejecutan en el hilo de Excel)
+    def _programar_cierre(self):
+        if self.tiempo_inactividad is None or self.wb is None:
+            return
+        temporizador = threading.Timer(self.tiempo_inactividad, self._vencer, (self._generacion,))
+        temporizador.daemon = True
+        self._temporizador = temporizador
+        temporizador.start()
+
+    def _cancelar_cierre(self):
+        self._generacion += 1
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+            self._temporizador = None
+
+    def _vencer(self, generacion):
+        # Hilo del temporizador: el cierre se hace en el hilo de Excel
+        try:
+            self._hilo.submit(self._cerrar_por_inactividad, generacion)
+        except RuntimeError:
+            # El hilo de Excel ya terminó (finalizar)
+            pass
+
+    def _cerrar_por_inactividad(self, generacion):
+        if generacion != self._generacion or self.wb is None:
+            return
+        consola.resumen("Excel inactivo durante {} s, se cierra", self.tiempo_inactividad)
+        self.cierres_inactividad += 1
+        self.cerrar()
+
+    def finalizar(self):
+        if self._hilo is None:
+            self.cerrar()
+            return
+        self._hilo.submit(self.cerrar).result()
+        self._hilo.shutdown()
+        self._hilo = None
+
+    def resumen(self):
+        return (f"Sesión de Excel: {self.planos} planos, {self.lanzamientos} aperturas, "
+                f"{self.reinicios} reinicios, {self.cierres_inactividad} cierres por inactividad")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self.finalizar()
+        return False
+
+
+# Función para escribir unas entradas, calcular y leer K8:K20 (un "plano" de la verificación)
+def _calcular(sesion, entradas):
+    app, wb, ws = sesion.abrir()
+    for direccion, valor in entradas.items():
+        ws.range(direccion).value = valor
+    app.calculate()
+    return [ws.range(f'K{fila}').value for fila in range(8, 21)]
+
+
+# Función para comprobar el ciclo de vida de la sesión con el backend simulado
+def verificar(excel_path):
+    """
+    Returns:
+        list: descripción de las comprobaciones que fallaron
+    """
+    fallos = []
+
+    def comprobar(condicion, descripcion):
+        print(f"  {'ok ' if condicion else 'FALLO'} {descripcion}")
+        if not condicion:
+            fallos.append(descripcion)
+
+    plano_a = {'G4': 1, 'H4': '1/2"', 'J4': 0.25, 'G5': 2, 'H5': '3/8"', 'J5': 0.2, 'G14': 1, 'H14': '3/8"', 'J14': 0.3}
+    plano_b = {'G4': 1, 'H4': '3/8"', 'J4': 0.2, 'G14': 1, 'H14': '8mm', 'J14': 0.175}
+
+    # Resultados de referencia: cada plano en un Excel recién abierto
+    referencias = {}
+    for nombre, entradas in (("A", plano_a), ("B", plano_b)):
+        with SesionExcel(excel_path, BackendSimulado()) as sesion:
+            referencias[nombre] = _calcular(sesion, entradas)
+
+    print("Reutilización y entradas restablecidas")
+    backend = BackendSimulado()
+    with SesionExcel(excel_path, backend) as sesion:
+        resultados = [_calcular(sesion, plano_a), _calcular(sesion, plano_b), _calcular(sesion, plano_a)]
+        comprobar(backend.lanzamientos == 1, "un solo Excel para tres planos")
+        comprobar(resultados == [referencias["A"], referencias["B"], referencias["A"]],
+                  "cada plano da lo mismo que en un Excel recién abierto")
+        iniciales = sesion.ws.celdas_libro
+        sesion.abrir()
+        comprobar(all(sesion.ws.celdas[celda] == valor for celda, valor in iniciales.items()),
+                  f"{', '.join(ZONAS_ENTRADA)} vuelven a los valores del libro")
+    comprobar(backend.apps[0].cerrada and backend.apps[0].libro.guardados == 1, "cerrar() guarda y cierra Excel")
+
+    print("Reinicio si Excel deja de responder")
+    backend = BackendSimulado()
+    with SesionExcel(excel_path, backend) as sesion:
+        _calcular(sesion, plano_a)
+        backend.caer()
+        comprobar(sesion.caida(), "caida() detecta el Excel que no responde")
+        resultado = _calcular(sesion, plano_b)
+        comprobar(backend.lanzamientos == 2 and sesion.reinicios == 1, "abrir() lanza un Excel nuevo")
+        comprobar(backend.apps[0].cerrada, "el Excel caído se descarta")
+        comprobar(resultado == referencias["B"], "el plano siguiente se calcula bien")
+
+    print("Cierre por inactividad")
+    backend = BackendSimulado()
+    sesion = SesionExcel(excel_path, backend, tiempo_inactividad=0.5)
+    try:
+        sesion.ejecutar(_calcular, sesion, plano_a)
+        time.sleep(0.1)
+        sesion.ejecutar(_calcular, sesion, plano_b)
+        time.sleep(0.3)
+        comprobar(sesion.abierta, "un trabajo nuevo reinicia la cuenta de inactividad")
+        time.sleep(0.6)
+        comprobar(not sesion.abierta and backend.apps[0].cerrada and sesion.cierres_inactividad == 1,
+                  "Excel se cierra tras el tiempo de inactividad")
+        resultado = sesion.ejecutar(_calcular, sesion, plano_a)
+        comprobar(backend.lanzamientos == 2 and resultado == referencias["A"],
+                  "el siguiente trabajo vuelve a abrir Excel")
+    finally:
+        sesion.finalizar()
+    comprobar(not sesion.abierta and backend.apps[-1].cerrada, "finalizar() cierra Excel")
+    print(sesion.resumen())
+    return fallos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sesión de Excel administrada para la hoja Convertidor")
+    parser.add_argument("--verificar", action="store_true",
+                        help="Comprueba el ciclo de vida de la sesión con el backend simulado (no requiere Excel)")
+    parser.add_argument("--excel", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "CONVERTIDOR.xlsx"),
+                        help="Ruta a CONVERTIDOR.xlsx")
+    args = parser.parse_args(argv)
+
+    if not args.verificar:
+        parser.print_help()
+        return 0
+    fallos = verificar(args.excel)
+    print("Verificación correcta" if not fallos else f"{len(fallos)} comprobaciones fallaron")
+    return 1 if fallos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Informe de los tiempos de importación (arranque en frío) de la interfaz y del procesamiento.
+
+Ejecuta en un proceso nuevo "import <módulo>" con python -X importtime y
+resume su salida: tiempo total de cada módulo pedido y sus importaciones
+directas con mayor tiempo acumulado (el módulo y todo lo que importa; con
+--todos, también las importaciones anidadas). Un módulo ya importado por otro
+aparece bajo el primero que lo importó (numpy bajo ezdxf). Sirve para seguir el
+arranque de tkinder.py (la interfaz) y el costo de la primera carga de
+script.py (al pulsar PROCESAR PRELOSAS) entre versiones:
+
+    python tiempos_importacion.py
+    python tiempos_importacion.py script --top 30
+    python tiempos_importacion.py tkinder script --json tiempos.json
+
+Cada módulo se importa en su propio proceso para medirlo en frío.
+"""
+#argparse: sirve para leer los argumentos de la línea de comandos
+import argparse
+#json: sirve para exportar el informe
+import json
+#os: sirve para ejecutar desde la carpeta del proyecto
+import os
+#re: sirve para leer las líneas de -X importtime
+import re
+#subprocess: cada importación se mide en un proceso nuevo
+import subprocess
+#sys: intérprete actual y código de salida
+import sys
+
+# Línea de -X importtime: "import time:  self [us] | cumulative | imported package"
+LINEA_IMPORTTIME = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S.*)$")
+
+# Módulos que se miden por defecto: la interfaz y el procesamiento
+MODULOS_PREDETERMINADOS = ("tkinder", "script")
+
+
+# Función para importar un módulo en un proceso nuevo y leer sus tiempos
+def medir_importacion(modulo, carpeta=None):
+    """
+    Returns:
+        list: (nombre, propio_us, acumulado_us, nivel) por módulo importado, en orden de -X importtime
+    """
+    carpeta = carpeta or os.path.dirname(os.path.abspath(__file__))
+    proceso = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+                             cwd=carpeta, capture_output=True, text=True, encoding='utf-8', errors='replace')
+    if proceso.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {modulo}:\n{proceso.stderr.strip().splitlines()[-1]}")
+    tiempos = []
+    for linea in proceso.stderr.splitlines():
+        coincidencia = LINEA_IMPORTTIME.match(linea)
+        if coincidencia:
+            propio, acumulado, sangria, nombre = coincidencia.groups()
+            tiempos.append((nombre.strip(), int(propio), int(acumulado), len(sangria) // 2))
+    return tiempos
+
+
+# Función para resumir los tiempos de importación de un módulo
+def resumir_importacion(modulo, tiempos, top=15, todos=False):
+    # El módulo pedido es la última línea de nivel 0 con su nombre
+    total = next((acumulado for nombre, _, acumulado, nivel in reversed(tiempos)
+                  if nivel == 0 and nombre == modulo), None)
+    mayores = sorted((t for t in tiempos if t[0] != modulo and (todos or t[3] == 1)),
+                     key=lambda t: t[2], reverse=True)[:top]
+    return {
+        "modulo": modulo,
+        "total_ms": total / 1000 if total is not None else None,
+        "modulos_importados": len(tiempos),
+        "mayores": [{"modulo": nombre, "acumulado_ms": acumulado / 1000, "propio_ms": propio / 1000}
+                    for nombre, propio, acumulado, _ in mayores],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiempos de importación en frío (python -X importtime)")
+    parser.add_argument("modulos", nargs="*", default=list(MODULOS_PREDETERMINADOS),
+                        help="Módulos a importar (por defecto tkinder y script)")
+    parser.add_argument("--top", type=int, default=15, help="Módulos con mayor tiempo acumulado que se muestran")
+    parser.add_argument("--todos", action="store_true", help="Incluye las importaciones anidadas")
+    parser.add_argument("--json", help="Archivo donde se guarda el informe")
+    args = parser.parse_args(argv)
+
+    informe = []
+    for modulo in args.modulos:
+        try:
+            resumen = resumir_importacion(modulo, medir_importacion(modulo), args.top, args.todos)
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            return 1
+        informe.append(resumen)
+        print(f"\n{modulo}: {resumen['total_ms']:.1f} ms ({resumen['modulos_importados']} módulos importados)")
+        print(f"  {'Módulo':<40}{'Acumulado':>12}{'Propio':>10}")
+        for fila in resumen["mayores"]:
+            print(f"  {fila['modulo']:<40}{fila['acumulado_ms']:>9.1f} ms{fila['propio_ms']:>7.1f} ms")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as archivo:
+            json.dump(informe, archivo, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,82 @@
+import time
+# Reference for the cold start time shown in the log
+STARTUP_TIME = time.perf_counter()
+
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext, ttk
 import os
 import sys
 import traceback
-import time
 import subprocess
 import random
 import re
 import platform
 import importlib.util
 import threading
-from PIL import Image, ImageTk  # You'll need to install pillow: pip install pillow
+import queue
+import contextlib
+from collections import deque
+
+# Log pump limits
+LOG_FLUSH_MS = 250            # the main thread flushes the log 4 times per second
+LOG_MAX_PENDING = 50000       # lines kept while waiting for a flush (older ones are dropped)
+LOG_MAX_LINES = 20000         # lines kept in the log widget (ring buffer)
+
+
+class LogPump:
+    """
+    Thread-safe buffer between the processing thread and the log widget.
+    
+    It is a file-like object, so the processor's print output can be redirected
+    to it; add_to_log also goes through it. Only the Tk thread takes the pending
+    lines out (drain) and writes them into the widget.
+    """
+    
+    def __init__(self, max_pending=LOG_MAX_PENDING):
+        self.lock = threading.Lock()
+        self.pending = deque(maxlen=max_pending)
+        self.partial = ""
+        self.dropped = 0
+    
+    def _append(self, line, tag):
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1
+        self.pending.append((time.strftime("%H:%M:%S"), line, tag))
+    
+    def write(self, text):
+        """Buffer print output, one entry per complete line"""
+        with self.lock:
+            lines = (self.partial + text).split("\n")
+            self.partial = lines.pop()
+            for line in lines:
+                self._append(line, None)
+        return len(text)
+    
+    def flush(self):
+        pass
+    
+    def log(self, message, tag=None):
+        """Buffer a message with an optional tag"""
+        with self.lock:
+            if self.partial:
+                self._append(self.partial, None)
+                self.partial = ""
+            self._append(message, tag)
+    
+    def drain(self):
+        """Take all pending lines and the number of lines dropped since the last drain"""
+        with self.lock:
+            lines = list(self.pending)
+            self.pending.clear()
+            dropped, self.dropped = self.dropped, 0
+        return lines, dropped
+    
+    def clear(self):
+        with self.lock:
+            self.pending.clear()
+            self.partial = ""
+            self.dropped = 0
+
 
 class DXFProcessorApp:
     def __init__(self, master):
@@ -29,6 +95,16 @@ class DXFProcessorApp:
         # Fixed Excel file path
         self.excel_path = os.path.join(self.script_dir, "CONVERTIDOR.xlsx")
         
+        # Log lines from any thread are written to the log widget by the Tk thread
+        self.log_pump = LogPump()
+        
+        # Processing module (script.py), imported on the first run and reused for the session
+        self.script_module = None
+        self.script_lock = threading.Lock()
+        
+        # Excel session kept open between runs with the Excel engine (created on first use)
+        self.excel_session = None
+        
         # Configure style and colors
         self.configure_style()
         
@@ -37,6 +113,7 @@ class DXFProcessorApp:
         
         # Show welcome message
         self.show_welcome_message()
+        self.master.after(LOG_FLUSH_MS, self.flush_log)
     
     def configure_style(self):
         """Configure custom styles for the interface"""
@@ -427,6 +504,21 @@ class DXFProcessorApp:
         self.excel_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         self.excel_entry.insert(0, "CONVERTIDOR.xlsx (Predeterminado)")
         
+        # Calculation engine row (with Excel, the workbook stays open between runs)
+        engine_frame = ttk.Frame(file_card, style="Card.TFrame")
+        engine_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(engine_frame, text="Motor de cálculo:", width=15).pack(side=tk.LEFT)
+        
+        self.engine = tk.StringVar(value="nativo")
+        ttk.Combobox(
+            engine_frame,
+            textvariable=self.engine,
+            values=["nativo", "excel"],
+            state="readonly",
+            width=12
+        ).pack(side=tk.LEFT, padx=5)
+        
         # Output Directory Row
         output_frame = ttk.Frame(file_card, style="Card.TFrame")
         output_frame.pack(fill=tk.X, pady=5)
@@ -728,6 +820,17 @@ class DXFProcessorApp:
         )
         clear_button.pack(side=tk.RIGHT)
         
+        # Message level of the processor (summary skips the per-slab messages)
+        ttk.Label(toolbar_frame, text="Nivel de mensajes:", background=self.colors['card_bg']).pack(side=tk.LEFT)
+        self.log_level = tk.StringVar(value="detalle")
+        ttk.Combobox(
+            toolbar_frame,
+            textvariable=self.log_level,
+            values=["silencio", "resumen", "detalle"],
+            state="readonly",
+            width=12
+        ).pack(side=tk.LEFT, padx=(5, 0))
+        
         # Separator
         separator = ttk.Separator(log_card, orient='horizontal')
         separator.pack(fill=tk.X, pady=(0, 10))
@@ -1034,6 +1137,7 @@ class DXFProcessorApp:
         self.add_to_log(f"Archivo de entrada: {self.dxf_path.get()}", "info")
         self.add_to_log(f"Archivo Excel: {self.excel_path}", "info")
         self.add_to_log(f"Archivo de salida: {output_dxf_path}", "info")
+        self.add_to_log(f"Motor de cálculo: {self.engine.get()}", "info")
         self.add_to_log("Valores predeterminados:", "bold")
         
 # Add to log
@@ -1046,19 +1150,28 @@ class DXFProcessorApp:
         self.progress_var.set(0)
         self.processing = True
         
+        # Progress events from the processing thread (read on the Tk thread)
+        self.progress_queue = queue.Queue()
+        self.slabs_start = 0.0
+        
         # Start processing in separate thread
         self.processing_thread = threading.Thread(
             target=self.run_processing,
-            args=(self.dxf_path.get(), self.excel_path, output_dxf_path, default_values)
+            args=(self.dxf_path.get(), self.excel_path, output_dxf_path, default_values, self.log_level.get(),
+                  self.engine.get())
         )
         self.processing_thread.daemon = True
         self.processing_thread.start()
         
         # Start progress update
-        self.master.after(100, self.update_progress)
+        self.master.after(100, self.poll_progress)
+    
+    def run_processing(self, dxf_path, excel_path, output_path, default_values, log_level, engine):
+        """Run processing in separate thread (its output goes to the log pump)"""
+        with contextlib.redirect_stdout(self.log_pump), contextlib.redirect_stderr(self.log_pump):
+            self._run_processing(dxf_path, excel_path, output_path, default_values, log_level, engine)
     
-    def run_processing(self, dxf_path, excel_path, output_path, default_values):
-        """Run processing in separate thread"""
+    def _run_processing(self, dxf_path, excel_path, output_path, default_values, log_level, engine):
         try:
             # Import script dynamically
             script_module = self.import_module_from_path()
@@ -1067,51 +1180,157 @@ class DXFProcessorApp:
                 self.add_to_log("Error: No se pudo importar el script", "error")
                 return
             
-            # Run processing
-            total = script_module.procesar_prelosas_con_bloques(
-                dxf_path, 
-                excel_path,
-                output_path,
-                default_values
-            )
+            # Run processing (per-stage timings are exported next to the output DXF)
+            script_module.configurar_registro(log_level)
+            perfil = script_module.PerfilEtapas()
+            profile_path = os.path.splitext(output_path)[0] + "_perfil.json"
+            if engine == "excel":
+                # All Excel calls run on the session's own thread
+                total = self.get_excel_session(excel_path).ejecutar(
+                    self.process_in_excel_session,
+                    script_module,
+                    dxf_path,
+                    excel_path,
+                    output_path,
+                    default_values,
+                    perfil,
+                    profile_path
+                )
+            else:
+                total = script_module.procesar_prelosas_con_bloques(
+                    dxf_path, 
+                    excel_path,
+                    output_path,
+                    default_values,
+                    perfil=perfil,
+                    ruta_perfil=profile_path,
+                    progreso=self.progress_queue.put
+                )
             
             # Update log with result
             self.add_to_log(f"Procesamiento completado. Bloques insertados: {total}", "success")
+            self.show_profile(perfil, profile_path)
             
-            # Ask if user wants to open folder
-            if messagebox.askyesno(
-                "Procesamiento completado", 
-                f"Se han insertado {total} bloques.\n¿Desea abrir la carpeta de destino?"
-            ):
-                self.open_output_folder(os.path.dirname(output_path))
+            # Ask if user wants to open folder (dialogs run on the Tk thread)
+            self.master.after(0, self.ask_open_output_folder, total, os.path.dirname(output_path))
         
         except Exception as e:
             self.add_to_log(f"Error durante el procesamiento: {str(e)}", "error")
             self.add_to_log(traceback.format_exc(), "error")
-            messagebox.showerror("Error", f"Error durante el procesamiento: {str(e)}")
+            self.master.after(0, messagebox.showerror, "Error", f"Error durante el procesamiento: {str(e)}")
         
         finally:
             # Restore interface
             self.master.after(0, self.restore_interface)
     
-    def update_progress(self):
-        """Update progress bar during processing"""
-        if not self.processing:
+    def get_excel_session(self, excel_path):
+        """Excel session shared by the runs of this window (closed after TIEMPO_INACTIVIDAD seconds idle)"""
+        if self.excel_session is not None and self.excel_session.excel_path != excel_path:
+            # Another workbook was selected: close the old one before opening the new one
+            self.excel_session.finalizar()
+            self.excel_session = None
+        if self.excel_session is None:
+            from sesion_excel import SesionExcel, TIEMPO_INACTIVIDAD
+            self.excel_session = SesionExcel(excel_path, tiempo_inactividad=TIEMPO_INACTIVIDAD)
+        return self.excel_session
+    
+    def process_in_excel_session(self, script_module, dxf_path, excel_path, output_path, default_values,
+                                 perfil, profile_path):
+        """Process one plan with the shared Excel session (runs on the Excel thread)"""
+        with script_module.SesionCalculo(excel_path, "excel", sesion_excel=self.excel_session) as sesion:
+            return sesion.procesar(
+                dxf_path,
+                output_path,
+                valores_predeterminados=default_values,
+                perfil=perfil,
+                ruta_perfil=profile_path,
+                progreso=self.progress_queue.put
+            )
+    
+    def close(self):
+        """Close the Excel session kept between runs and then the window"""
+        if self.processing:
+            messagebox.showinfo("Procesando", "Espere a que termine el proceso en ejecución antes de cerrar")
             return
-        
-        # Increment progress (simulated)
-        current = self.progress_var.get()
-        if current < 100:
-            # Variable increment to simulate progress
-            increment = min(2, 100 - current)
-            self.progress_var.set(current + increment)
-        
-        # Check if thread is still active
-        if self.processing_thread.is_alive():
-            self.master.after(100, self.update_progress)
-        else:
+        if self.excel_session is not None:
+            self.excel_session.finalizar()
+            self.excel_session = None
+        self.master.destroy()
+    
+    def ask_open_output_folder(self, total, folder_path):
+        """Ask if the user wants to open the output folder"""
+        if messagebox.askyesno(
+            "Procesamiento completado", 
+            f"Se han insertado {total} bloques.\n¿Desea abrir la carpeta de destino?"
+        ):
+            self.open_output_folder(folder_path)
+    
+    def show_profile(self, perfil, profile_path):
+        """Show the per-stage timing table of the last run in the log"""
+        lines = perfil.tabla().splitlines()
+        self.add_to_log(lines[0], "bold")
+        for line in lines[1:]:
+            self.add_to_log(line, "muted")
+        if os.path.exists(profile_path):
+            self.add_to_log(f"Perfil exportado: {profile_path}", "info")
+    
+    def poll_progress(self):
+        """Apply the progress events sent by the processing thread"""
+        # Check before draining so the last events are not lost
+        alive = self.processing_thread.is_alive()
+        event = None
+        while True:
+            try:
+                event = self.progress_queue.get_nowait()
+            except queue.Empty:
+                break
+            if event.tipo == "prelosas":
+                self.slabs_start = event.segundos
+        if event is not None:
+            self.show_progress_event(event)
+        
+        if alive:
+            self.master.after(100, self.poll_progress)
+        elif event is None or event.tipo not in ("fin", "error"):
+            # The thread ended without a final event (e.g. the script could not be imported)
+            self.status_label.config(text="Procesamiento finalizado")
+    
+    def show_progress_event(self, event):
+        """Show the latest progress event in the progress bar and status label"""
+        # Loading takes the first 5%, slabs up to 95%, saving the rest
+        if event.tipo == "carga":
+            self.progress_var.set(5)
+            self.status_label.config(text="Plano cargado, buscando prelosas...")
+        elif event.tipo == "prelosas":
+            self.progress_var.set(5)
+            self.status_label.config(text=f"{event.total} prelosas encontradas")
+        elif event.tipo == "prelosa":
+            self.progress_var.set(5 + 90 * event.actual / max(event.total, 1))
+            text = f"Prelosa {event.actual}/{event.total}"
+            elapsed = event.segundos - self.slabs_start
+            if elapsed > 0:
+                rate = event.actual / elapsed
+                remaining = (event.total - event.actual) / rate
+                text += f" | {rate:.1f} prelosas/s | restante {self.format_duration(remaining)}"
+            self.status_label.config(text=text)
+        elif event.tipo == "guardado":
+            self.progress_var.set(95)
+            self.status_label.config(text="Guardando DXF...")
+        elif event.tipo == "fin":
             self.progress_var.set(100)
-            self.status_label.config(text="Procesamiento completado")
+            self.status_label.config(
+                text=f"Procesamiento completado en {self.format_duration(event.segundos)} ({event.bloques} bloques)"
+            )
+        elif event.tipo == "error":
+            self.status_label.config(text="Error durante el procesamiento")
+    
+    def format_duration(self, seconds):
+        """Format seconds as m:ss (or h:mm:ss)"""
+        minutes, seconds = divmod(int(round(seconds)), 60)
+        hours, minutes = divmod(minutes, 60)
+        if hours:
+            return f"{hours}:{minutes:02d}:{seconds:02d}"
+        return f"{minutes}:{seconds:02d}"
     
     def restore_interface(self):
         """Restore interface after processing"""
@@ -1119,33 +1338,46 @@ class DXFProcessorApp:
         self.processing = False
     
     def add_to_log(self, message, tag=None):
-        """Add message to log area with optional formatting"""
-        # If log tab doesn't exist, create it
-        if not hasattr(self, 'log_area'):
-            return
-            
-        self.log_area.config(state=tk.NORMAL)
-        
-        # Add timestamp
-        timestamp = time.strftime("%H:%M:%S")
-        self.log_area.insert(tk.END, f"[{timestamp}] ", "muted")
-        
-        # Add message with optional formatting
-        if tag:
-            self.log_area.insert(tk.END, f"{message}\n", tag)
-        else:
-            self.log_area.insert(tk.END, f"{message}\n")
-        
-        # Scroll to end
-        self.log_area.see(tk.END)
-        self.log_area.config(state=tk.DISABLED)
-        
-        # If log tab is not visible, show a small indication on the log button
-        if self.selected_tab.get() != 'log':
-            self.nav_buttons['log'].configure(text="📋 Registro (•)")
+        """Add message to log area with optional formatting (safe from any thread)"""
+        self.log_pump.log(message, tag)
+    
+    def flush_log(self):
+        """Write the pending log lines into the log area with a single insert"""
+        try:
+            lines, dropped = self.log_pump.drain()
+            if lines and hasattr(self, 'log_area'):
+                # Lines beyond the widget cap would be trimmed right away
+                if len(lines) > LOG_MAX_LINES:
+                    dropped += len(lines) - LOG_MAX_LINES
+                    lines = lines[-LOG_MAX_LINES:]
+                
+                chunks = []
+                if dropped:
+                    chunks += [f"... {dropped} líneas omitidas ...\n", "warning"]
+                for timestamp, message, tag in lines:
+                    chunks += [f"[{timestamp}] ", "muted", f"{message}\n", tag or ()]
+                
+                self.log_area.config(state=tk.NORMAL)
+                self.log_area.insert(tk.END, *chunks)
+                
+                # Ring buffer: keep only the last LOG_MAX_LINES lines
+                excess = int(self.log_area.index('end-1c').split('.')[0]) - 1 - LOG_MAX_LINES
+                if excess > 0:
+                    self.log_area.delete("1.0", f"{excess + 1}.0")
+                
+                # Scroll to end
+                self.log_area.see(tk.END)
+                self.log_area.config(state=tk.DISABLED)
+                
+                # If log tab is not visible, show a small indication on the log button
+                if self.selected_tab.get() != 'log':
+                    self.nav_buttons['log'].configure(text="📋 Registro (•)")
+        finally:
+            self.master.after(LOG_FLUSH_MS, self.flush_log)
     
     def clear_log(self):
         """Clear log area"""
+        self.log_pump.clear()
         self.log_area.config(state=tk.NORMAL)
         self.log_area.delete(1.0, tk.END)
         self.log_area.config(state=tk.DISABLED)
@@ -1354,7 +1586,16 @@ class DXFProcessorApp:
         return random.randint(min_value, max_value)
     
     def import_module_from_path(self):
-        """Import script.py dynamically"""
+        """Import script.py dynamically (once per session, later runs reuse the module)"""
+        with self.script_lock:
+            if self.script_module is None:
+                start = time.perf_counter()
+                self.script_module = self._import_script()
+                if self.script_module is not None:
+                    self.add_to_log(f"Módulo de procesamiento cargado en {time.perf_counter() - start:.2f} s", "muted")
+            return self.script_module
+    
+    def _import_script(self):
         try:
             # First, try to find the script in the executable location
             if getattr(sys, 'frozen', False):
@@ -1372,7 +1613,12 @@ class DXFProcessorApp:
             # Import module
             spec = importlib.util.spec_from_file_location("script", script_path)
             script = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(script)
+            sys.modules["script"] = script
+            try:
+                spec.loader.exec_module(script)
+            except BaseException:
+                del sys.modules["script"]
+                raise
             return script
         except Exception as e:
             self.add_to_log(f"Error importando script: {str(e)}", "error")
@@ -1404,6 +1650,10 @@ def main():
     
     # Create application
     app = DXFProcessorApp(root)
+    root.protocol("WM_DELETE_WINDOW", app.close)
+    root.after_idle(
+        lambda: app.add_to_log(f"Interfaz lista en {time.perf_counter() - STARTUP_TIME:.2f} s", "muted")
+    )
     
     # Center window
     root.update_idletasks()
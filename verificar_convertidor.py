@@ -0,0 +1,511 @@
+"""
+Verificación diferencial del motor nativo (convertidor.py) contra CONVERTIDOR.xlsx.
+
+Lee las fórmulas de la hoja "Convertidor" con openpyxl y las evalúa con un
+intérprete propio (VLOOKUP, IFERROR, IF, ABS, CEILING.MATH, FLOOR.MATH y
+aritmética), independiente de las funciones escritas a mano en convertidor.py.
+Después recorre combinaciones de cantidad/diámetro/espaciamiento en G4:J7 y
+G13:J16 y compara los espaciamientos finales (columna K, ya redondeados a 0.025)
+de ambos motores. También compara los dos motores con los valores guardados
+en caché en el libro. Por último comprueba que la caché de resultados
+(cache_resultados.py) recalcula cuando cambia una sola celda de entrada,
+incluidas las que están vacías en el libro.
+
+No necesita Excel, por lo que se puede ejecutar en Linux / CI:
+
+    python verificar_convertidor.py --casos 5000
+
+Devuelve código de salida 1 si encuentra alguna divergencia.
+"""
+#argparse: sirve para leer los argumentos de la línea de comandos
+import argparse
+#decimal: aritmética decimal para el redondeo de referencia
+from decimal import Decimal, localcontext, ROUND_CEILING, ROUND_FLOOR
+#itertools: sirve para recorrer combinaciones
+import itertools
+#os: sirve para interactuar con el sistema operativo
+import os
+#random: sirve para generar combinaciones aleatorias reproducibles
+import random
+#re: sirve para separar las fórmulas en tokens
+import re
+#sys: código de salida
+import sys
+#time: sirve para medir la duración de la verificación
+import time
+
+from convertidor import (
+    HojaConvertidor, BLOQUE_LONGITUDINAL, BLOQUE_TRANSVERSAL, CELDAS_ENTRADA, NOMBRE_HOJA, separar_direccion
+)
+#cache_resultados: caché de resultados cuyas dependencias se comprueban
+from cache_resultados import CacheResultados
+
+
+# Celdas de resultado que se comparan
+CELDAS_RESULTADO = [f'K{fila}' for fila in BLOQUE_LONGITUDINAL['resultados'] + BLOQUE_TRANSVERSAL['resultados']]
+
+# Valores que se recorren en las filas de entrada
+CANTIDADES = [None, 0, 1, 2, 3, -1]
+DIAMETROS = ["6mm", "8mm", "3/8\"", "12mm", "1/2\"", "5/8\"", "3/4\"", "3/8", "7mm", None]
+ESPACIAMIENTOS = [None, 0, 0.1, 0.125, 0.15, 0.175, 0.2, 0.225, 0.25, 0.28, 0.3, 0.35, 0.4, 0.5, 0.57, 0.605]
+
+# Tolerancia para considerar iguales dos espaciamientos ya redondeados
+TOLERANCIA = 1e-9
+
+_PATRON_TOKEN = re.compile(r'''
+    \s*(?:
+      (?P<numero>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+)
+    | (?P<texto>"(?:[^"]|"")*")
+    | (?P<rango>\$?[A-Z]+\$?\d+:\$?[A-Z]+\$?\d+)
+    | (?P<celda>\$?[A-Z]+\$?\d+)
+    | (?P<funcion>[A-Za-z_][A-Za-z0-9_.]*)\s*\(
+    | (?P<nombre>[A-Za-z_][A-Za-z0-9_.]*)
+    | (?P<operador><>|>=|<=|[-+*/^&=<>(),])
+    )''', re.VERBOSE)
+
+
+class ErrorFormula(Exception):
+    """Error de Excel dentro del intérprete de referencia."""
+
+    def __init__(self, codigo):
+        super().__init__(codigo)
+        self.codigo = codigo
+
+
+# Función para separar una fórmula en tokens
+def tokenizar(formula):
+    tokens = []
+    posicion = 0
+    formula = formula.lstrip("=")
+    while posicion < len(formula):
+        if formula[posicion:].strip() == "":
+            break
+        coincidencia = _PATRON_TOKEN.match(formula, posicion)
+        if not coincidencia:
+            raise ValueError(f"No se pudo interpretar la fórmula en '{formula[posicion:]}'")
+        tipo = coincidencia.lastgroup
+        valor = coincidencia.group(tipo)
+        if tipo == 'texto':
+            valor = valor[1:-1].replace('""', '"')
+        elif tipo == 'funcion':
+            valor = valor.upper().replace("_XLFN.", "")
+        tokens.append((tipo, valor))
+        posicion = coincidencia.end()
+    return tokens
+
+
+class _Analizador:
+    """Analizador descendente recursivo para el subconjunto de fórmulas del libro."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.posicion = 0
+
+    def _actual(self):
+        return self.tokens[self.posicion] if self.posicion < len(self.tokens) else (None, None)
+
+    def _consumir(self, esperado=None):
+        token = self._actual()
+        if esperado is not None and token[1] != esperado:
+            raise ValueError(f"Se esperaba '{esperado}' y se encontró '{token[1]}'")
+        self.posicion += 1
+        return token
+
+    def analizar(self):
+        arbol = self._comparacion()
+        if self.posicion != len(self.tokens):
+            raise ValueError(f"Tokens sin procesar: {self.tokens[self.posicion:]}")
+        return arbol
+
+    def _comparacion(self):
+        izquierda = self._suma()
+        while self._actual()[1] in ('=', '<>', '>', '<', '>=', '<='):
+            operador = self._consumir()[1]
+            izquierda = ('op', operador, izquierda, self._suma())
+        return izquierda
+
+    def _suma(self):
+        izquierda = self._producto()
+        while self._actual()[1] in ('+', '-'):
+            operador = self._consumir()[1]
+            izquierda = ('op', operador, izquierda, self._producto())
+        return izquierda
+
+    def _producto(self):
+        izquierda = self._potencia()
+        while self._actual()[1] in ('*', '/'):
+            operador = self._consumir()[1]
+            izquierda = ('op', operador, izquierda, self._potencia())
+        return izquierda
+
+    def _potencia(self):
+        base = self._unario()
+        while self._actual()[1] == '^':
+            self._consumir()
+            base = ('op', '^', base, self._unario())
+        return base
+
+    def _unario(self):
+        if self._actual()[1] in ('-', '+'):
+            operador = self._consumir()[1]
+            operando = self._unario()
+            return ('neg', operando) if operador == '-' else operando
+        return self._primario()
+
+    def _primario(self):
+        tipo, valor = self._consumir()
+        if tipo == 'numero':
+            return ('num', float(valor))
+        if tipo == 'texto':
+            return ('txt', valor)
+        if tipo == 'celda':
+            return ('ref', valor.replace('$', ''))
+        if tipo == 'rango':
+            inicio, fin = valor.replace('$', '').split(':')
+            return ('rango', inicio, fin)
+        if tipo == 'nombre' and valor.upper() in ('TRUE', 'FALSE'):
+            return ('bool', valor.upper() == 'TRUE')
+        if tipo == 'funcion':
+            argumentos = []
+            if self._actual()[1] != ')':
+                argumentos.append(self._comparacion())
+                while self._actual()[1] == ',':
+                    self._consumir()
+                    argumentos.append(self._comparacion())
+            self._consumir(')')
+            return ('fn', valor, argumentos)
+        if valor == '(':
+            expresion = self._comparacion()
+            self._consumir(')')
+            return expresion
+        raise ValueError(f"Token inesperado: {valor}")
+
+
+# Función para redondear como CEILING.MATH / FLOOR.MATH con aritmética decimal de 15 dígitos
+def _redondeo_referencia(numero, significancia, modo):
+    if numero == 0 or significancia == 0:
+        return 0.0
+    significancia = abs(significancia)
+    with localcontext() as contexto:
+        contexto.prec = 15
+        cociente = Decimal(numero) / Decimal(significancia)
+        entero = cociente.to_integral_value(rounding=modo)
+    return int(entero) * significancia
+
+
+class InterpreteHoja:
+    """Evalúa las fórmulas originales de la hoja sobre un estado de celdas."""
+
+    def __init__(self, formulas, constantes):
+        self.arboles = {direccion: _Analizador(tokenizar(formula)).analizar()
+                        for direccion, formula in formulas.items()}
+        self.constantes = dict(constantes)
+        self.valores = dict(constantes)
+        self.sobrescritas = set()
+        self._cache = {}
+
+    def asignar(self, direccion, valor):
+        self.valores[direccion] = valor
+        if direccion in self.arboles:
+            self.sobrescritas.add(direccion)
+        self._cache = {}
+
+    def restablecer(self):
+        self.valores = dict(self.constantes)
+        self.sobrescritas = set()
+        self._cache = {}
+
+    def evaluar(self, direccion):
+        """Devuelve el valor de la celda o una instancia de ErrorFormula."""
+        if direccion in self._cache:
+            return self._cache[direccion]
+        if direccion in self.arboles and direccion not in self.sobrescritas:
+            try:
+                valor = self._nodo(self.arboles[direccion])
+            except ErrorFormula as e:
+                valor = e
+        else:
+            valor = self.valores.get(direccion)
+        self._cache[direccion] = valor
+        return valor
+
+    # Función para convertir un valor a número con la semántica de Excel
+    def _a_numero(self, valor):
+        if isinstance(valor, ErrorFormula):
+            raise valor
+        if valor is None:
+            return 0.0
+        if isinstance(valor, bool):
+            return 1.0 if valor else 0.0
+        if isinstance(valor, (int, float)):
+            return float(valor)
+        raise ErrorFormula("#VALUE!")
+
+    def _nodo(self, nodo):
+        tipo = nodo[0]
+        if tipo == 'num':
+            return nodo[1]
+        if tipo in ('txt', 'bool'):
+            return nodo[1]
+        if tipo == 'ref':
+            valor = self.evaluar(nodo[1])
+            if isinstance(valor, ErrorFormula):
+                raise valor
+            return valor
+        if tipo == 'neg':
+            return -self._a_numero(self._nodo(nodo[1]))
+        if tipo == 'op':
+            return self._operacion(nodo[1], nodo[2], nodo[3])
+        if tipo == 'fn':
+            return self._funcion(nodo[1], nodo[2])
+        raise ValueError(f"Nodo no soportado: {nodo}")
+
+    def _operacion(self, operador, izquierda, derecha):
+        a = self._nodo(izquierda)
+        b = self._nodo(derecha)
+        if operador in ('+', '-', '*', '/', '^'):
+            a = self._a_numero(a)
+            b = self._a_numero(b)
+            if operador == '+':
+                return a + b
+            if operador == '-':
+                return a - b
+            if operador == '*':
+                return a * b
+            if operador == '/':
+                if b == 0:
+                    raise ErrorFormula("#DIV/0!")
+                return a / b
+            return a ** b
+        # Comparaciones numéricas (las fórmulas del libro solo comparan números)
+        a = self._a_numero(a)
+        b = self._a_numero(b)
+        return {'=': a == b, '<>': a != b, '>': a > b, '<': a < b, '>=': a >= b, '<=': a <= b}[operador]
+
+    def _funcion(self, nombre, argumentos):
+        if nombre == 'IFERROR':
+            try:
+                return self._nodo(argumentos[0])
+            except ErrorFormula:
+                return self._nodo(argumentos[1])
+        if nombre == 'IF':
+            condicion = self._nodo(argumentos[0])
+            if self._a_numero(condicion):
+                return self._nodo(argumentos[1])
+            return self._nodo(argumentos[2]) if len(argumentos) > 2 else False
+        if nombre == 'ABS':
+            return abs(self._a_numero(self._nodo(argumentos[0])))
+        if nombre in ('CEILING.MATH', 'FLOOR.MATH'):
+            numero = self._a_numero(self._nodo(argumentos[0]))
+            significancia = self._a_numero(self._nodo(argumentos[1])) if len(argumentos) > 1 else 1.0
+            modo = ROUND_CEILING if nombre == 'CEILING.MATH' else ROUND_FLOOR
+            return _redondeo_referencia(numero, significancia, modo)
+        if nombre == 'VLOOKUP':
+            return self._vlookup(argumentos)
+        raise ValueError(f"Función no soportada por el intérprete: {nombre}")
+
+    def _vlookup(self, argumentos):
+        clave = self._nodo(argumentos[0])
+        if clave is None:
+            raise ErrorFormula("#N/A")
+        _, inicio, fin = argumentos[1]
+        columna_indice = int(self._a_numero(self._nodo(argumentos[2])))
+        col_inicio, fila_inicio = separar_direccion(inicio)
+        _, fila_fin = separar_direccion(fin)
+        col_resultado = chr(ord(col_inicio) + columna_indice - 1)
+        for fila in range(fila_inicio, fila_fin + 1):
+            candidato = self.evaluar(f'{col_inicio}{fila}')
+            if isinstance(candidato, str) and isinstance(clave, str):
+                coincide = candidato.casefold() == clave.casefold()
+            elif isinstance(candidato, (int, float)) and isinstance(clave, (int, float)):
+                coincide = float(candidato) == float(clave)
+            else:
+                coincide = False
+            if coincide:
+                resultado = self.evaluar(f'{col_resultado}{fila}')
+                if isinstance(resultado, ErrorFormula):
+                    raise resultado
+                return resultado
+        raise ErrorFormula("#N/A")
+
+
+# Función para cargar fórmulas, constantes y valores en caché del libro
+def cargar_libro(excel_path):
+    import openpyxl
+
+    libro_formulas = openpyxl.load_workbook(excel_path, data_only=False)
+    libro_cache = openpyxl.load_workbook(excel_path, data_only=True)
+    hoja = libro_formulas[NOMBRE_HOJA]
+    hoja_cache = libro_cache[NOMBRE_HOJA]
+
+    formulas = {}
+    constantes = {}
+    cache = {}
+    for fila in hoja.iter_rows():
+        for celda in fila:
+            if celda.value is None:
+                continue
+            if isinstance(celda.value, str) and celda.value.startswith("="):
+                formulas[celda.coordinate] = celda.value
+                cache[celda.coordinate] = hoja_cache[celda.coordinate].value
+            else:
+                constantes[celda.coordinate] = celda.value
+    return formulas, constantes, cache
+
+
+# Función para comparar dos resultados de celda (errores incluidos)
+def _iguales(a, b):
+    if a is None or b is None:
+        return a is None and b is None
+    return abs(float(a) - float(b)) <= TOLERANCIA
+
+
+# Función para leer un resultado del intérprete con la semántica de xlwings (error -> None)
+def _leer_referencia(interprete, direccion):
+    valor = interprete.evaluar(direccion)
+    if isinstance(valor, (ErrorFormula, str)):
+        return None
+    return valor
+
+
+# Función para generar casos: barrido de una fila y combinaciones aleatorias de varias filas
+def generar_casos(casos_aleatorios, semilla):
+    filas = list(BLOQUE_LONGITUDINAL['entradas']) + list(BLOQUE_TRANSVERSAL['entradas'])
+
+    # Barrido exhaustivo de cada fila por separado
+    for fila in filas:
+        for cantidad, diametro, espaciamiento in itertools.product(CANTIDADES, DIAMETROS, ESPACIAMIENTOS):
+            yield {f'G{fila}': cantidad, f'H{fila}': diametro, f'J{fila}': espaciamiento}
+
+    # Combinaciones aleatorias de todas las filas de entrada
+    generador = random.Random(semilla)
+    for _ in range(casos_aleatorios):
+        caso = {}
+        for fila in filas:
+            caso[f'G{fila}'] = generador.choice(CANTIDADES)
+            caso[f'H{fila}'] = generador.choice(DIAMETROS)
+            caso[f'J{fila}'] = generador.choice(ESPACIAMIENTOS)
+        yield caso
+
+
+# Valores que se escriben al cambiar una sola entrada (el segundo si la celda ya tiene el primero)
+VALORES_CAMBIO = {'G': (2, 3), 'H': ("1/2\"", "3/8\""), 'J': (0.1, 0.15)}
+
+
+# Función para comprobar que la caché de resultados recalcula al cambiar una sola entrada
+def verificar_cache(constantes):
+    """
+    Para cada celda de entrada (también las vacías en el libro): guarda en la
+    caché los resultados de la hoja, cambia solo esa celda y compara lo que
+    devuelve la caché con un cálculo completo.
+
+    Returns:
+        int: número de celdas cuya caché devolvió un resultado distinto
+    """
+    divergencias = 0
+    for direccion in CELDAS_ENTRADA:
+        hoja_nativa = HojaConvertidor(constantes)
+        cache_resultados = CacheResultados()
+
+        def leer_resultados():
+            return [hoja_nativa.range(celda).value for celda in CELDAS_RESULTADO]
+
+        cache_resultados.calcular(('verificacion',), hoja_nativa, leer_resultados)
+        anterior = hoja_nativa.range(direccion).value
+        primero, segundo = VALORES_CAMBIO[direccion[0]]
+        hoja_nativa.range(direccion).value = segundo if anterior == primero else primero
+
+        obtenido = cache_resultados.calcular(('verificacion',), hoja_nativa, leer_resultados)
+        esperado = leer_resultados()
+        correcto = all(_iguales(a, b) for a, b in zip(esperado, obtenido))
+        if not correcto:
+            divergencias += 1
+        estado = "OK" if correcto else "DIVERGE"
+        print(f"  {direccion} (antes {anterior!r}): caché={obtenido} recálculo={esperado} [{estado}]")
+    return divergencias
+
+
+# Función principal de verificación
+def verificar(excel_path, casos_aleatorios=2000, semilla=0, max_reportes=20):
+    """
+    Ejecuta la verificación completa.
+
+    Returns:
+        int: número de divergencias encontradas
+    """
+    tiempo_inicio = time.time()
+    formulas, constantes, cache = cargar_libro(excel_path)
+    interprete = InterpreteHoja(formulas, constantes)
+    divergencias = 0
+
+    # 1. Estado guardado del libro: intérprete y motor nativo contra la caché de Excel
+    print("=" * 60)
+    print("VERIFICACIÓN CONTRA VALORES EN CACHÉ DEL LIBRO")
+    print("=" * 60)
+    hoja_nativa = HojaConvertidor(constantes)
+    for direccion in sorted(cache, key=lambda d: separar_direccion(d)[::-1]):
+        if direccion[0] not in "JK":
+            continue
+        valor_cache = cache[direccion] if isinstance(cache[direccion], (int, float)) else None
+        valor_interprete = _leer_referencia(interprete, direccion)
+        valor_nativo = hoja_nativa.range(direccion).value
+        correcto = _iguales(valor_cache, valor_interprete) and _iguales(valor_cache, valor_nativo)
+        estado = "OK" if correcto else "DIVERGE"
+        print(f"  {direccion}: caché={valor_cache} intérprete={valor_interprete} nativo={valor_nativo} [{estado}]")
+        if not correcto:
+            divergencias += 1
+
+    # 2. Recorrido de combinaciones de entrada
+    print("=" * 60)
+    print("VERIFICACIÓN DIFERENCIAL (motor nativo vs fórmulas del libro)")
+    print("=" * 60)
+    total_casos = 0
+    reportes = 0
+    for caso in generar_casos(casos_aleatorios, semilla):
+        total_casos += 1
+        interprete.restablecer()
+        hoja_nativa = HojaConvertidor(constantes)
+        for direccion, valor in caso.items():
+            interprete.asignar(direccion, valor)
+            hoja_nativa.range(direccion).value = valor
+
+        for direccion in CELDAS_RESULTADO:
+            esperado = _leer_referencia(interprete, direccion)
+            obtenido = hoja_nativa.range(direccion).value
+            if not _iguales(esperado, obtenido):
+                divergencias += 1
+                if reportes < max_reportes:
+                    reportes += 1
+                    entradas = ", ".join(f"{d}={v!r}" for d, v in caso.items())
+                    print(f"  DIVERGENCIA en {direccion}: libro={esperado} nativo={obtenido} | {entradas}")
+
+    # 3. Caché de resultados: cambiar una sola entrada obliga a recalcular
+    print("=" * 60)
+    print("VERIFICACIÓN DE LA CACHÉ DE RESULTADOS (una entrada cambiada)")
+    print("=" * 60)
+    divergencias += verificar_cache(constantes)
+
+    duracion = time.time() - tiempo_inicio
+    print("=" * 60)
+    print(f"Casos evaluados: {total_casos}")
+    print(f"Celdas comparadas: {total_casos * len(CELDAS_RESULTADO)}")
+    print(f"Divergencias: {divergencias}")
+    print(f"Tiempo: {duracion:.2f} segundos")
+    return divergencias
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verifica el motor nativo contra CONVERTIDOR.xlsx")
+    parser.add_argument("--excel", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "CONVERTIDOR.xlsx"),
+                        help="Ruta a CONVERTIDOR.xlsx")
+    parser.add_argument("--casos", type=int, default=2000, help="Combinaciones aleatorias de varias filas")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla del generador aleatorio")
+    parser.add_argument("--max-reportes", type=int, default=20, help="Divergencias a mostrar en detalle")
+    args = parser.parse_args(argv)
+
+    divergencias = verificar(args.excel, args.casos, args.semilla, args.max_reportes)
+    return 1 if divergencias else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())